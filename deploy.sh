@@ -50,6 +50,7 @@ aws cloudformation deploy \
     BetaUsersTableName=${SSM_PARAMS_PREFIX}BetaUsersTableName \
     UserConfigurationsTableName=${SSM_PARAMS_PREFIX}UserConfigurationsTableName \
     ExternalProviderUsersTableName=${SSM_PARAMS_PREFIX}ExternalProviderUsersTableName \
+    VerifiedUserAttributesTableName=${SSM_PARAMS_PREFIX}VerifiedUserAttributesTableName \
     NotificationTableName=${SSM_PARAMS_PREFIX}NotificationTableName \
     UnreadNotificationManagerTableName=${SSM_PARAMS_PREFIX}UnreadNotificationManagerTableName \
     TopicTableName=${SSM_PARAMS_PREFIX}TopicTableName \
@@ -63,8 +64,11 @@ aws cloudformation deploy \
     UserFraudTableName=${SSM_PARAMS_PREFIX}UserFraudTableName \
     ScreenedArticleTableName=${SSM_PARAMS_PREFIX}ScreenedArticleTableName \
     TokenDistributionTableName=${SSM_PARAMS_PREFIX}TokenDistributionTableName \
+    TokenDistributionTotalTableName=${SSM_PARAMS_PREFIX}TokenDistributionTotalTableName \
     UserFirstExperienceTableName=${SSM_PARAMS_PREFIX}UserFirstExperienceTableName \
     TokenSendTableName=${SSM_PARAMS_PREFIX}TokenSendTableName \
+    TokenSendDailyTotalTableName=${SSM_PARAMS_PREFIX}TokenSendDailyTotalTableName \
+    TokenHistoryExportJobTableName=${SSM_PARAMS_PREFIX}TokenHistoryExportJobTableName \
     DistS3BucketName=${SSM_PARAMS_PREFIX}DistS3BucketName \
     ElasticSearchEndpoint=${SSM_PARAMS_PREFIX}ElasticSearchEndpoint \
     CognitoUserPoolId=${SSM_PARAMS_PREFIX}CognitoUserPoolId \
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+from decimal import Decimal
+import boto3
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+from token_send_util import TokenSendUtil  # noqa: E402
+
+
+#################################################################
+# 日次の合計額（TokenSendDailyTotal）の導入前に作成された当日の出金（done, doing）を、日次の合計額に計上する。
+# 導入後の出金は API が計上するため、デプロイ時刻（epoch）より前に作成された出金のみを対象とする。
+# 計上済のユーザーには backfilled_at を設定し、再実行しても二重に計上しない。
+# デプロイ直後に実行すること。対象日（UTC）を省略した場合は当日を対象とする。
+# TokenSend のテーブル名、TokenSendDailyTotal のテーブル名、デプロイ時刻を引数に実行。
+# $ python backfill_token_send_daily_total.py hoge_token_send_table hoge_daily_total_table 1520150552 [2018-03-04]
+#################################################################
+def main():
+    validate()
+    target_date = sys.argv[4] if len(sys.argv) > 4 else TokenSendUtil.get_target_date(int(time.time()))
+    backfill(sys.argv[1], sys.argv[2], int(sys.argv[3]), target_date)
+
+
+def validate():
+    if len(sys.argv) <= 3:
+        print('TokenSend のテーブル名、TokenSendDailyTotal のテーブル名、デプロイ時刻を指定してください')
+        exit(1)
+
+    print(f'{sys.argv[1]} の出金を {sys.argv[2]} に計上します。よろしいですか（y/n）?')
+    input_str = input()
+    if input_str != 'y' and input_str != 'Y':
+        print('処理を中断します')
+        exit(0)
+
+
+def backfill(token_send_table_name, daily_total_table_name, deployed_at, target_date):
+    dynamodb = boto3.resource('dynamodb')
+    send_values = get_send_values(dynamodb.Table(token_send_table_name), deployed_at, target_date)
+    daily_total_table = dynamodb.Table(daily_total_table_name)
+
+    count = 0
+    for user_id, send_value in send_values.items():
+        try:
+            daily_total_table.update_item(
+                Key={'user_id': user_id, 'target_date': target_date},
+                UpdateExpression='ADD send_value :send_value SET backfilled_at = :now, expiration_time = :expiration_time',
+                ConditionExpression='attribute_not_exists(backfilled_at)',
+                ExpressionAttributeValues={
+                    ':send_value': send_value,
+                    ':now': int(time.time()),
+                    ':expiration_time': TokenSendUtil.get_daily_total_expiration_time(target_date)
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            print(f'{user_id} は計上済のためスキップします')
+            continue
+        count += 1
+
+    print(f'{target_date} の {count} ユーザーの出金額を計上しました')
+
+
+def get_send_values(token_send_table, deployed_at, target_date):
+    query_params = {
+        'IndexName': 'target_date-user_id-index',
+        'KeyConditionExpression': Key('target_date').eq(target_date),
+        'FilterExpression': Attr('created_at').lt(deployed_at) &
+        Attr('send_status').is_in([TokenSendUtil.SEND_STATUS_DONE, TokenSendUtil.SEND_STATUS_DOING]),
+        'ProjectionExpression': 'user_id, send_value'
+    }
+
+    send_values = {}
+    while True:
+        response = token_send_table.query(**query_params)
+        for item in response['Items']:
+            send_values[item['user_id']] = send_values.get(item['user_id'], Decimal(0)) + Decimal(item['send_value'])
+        if 'LastEvaluatedKey' not in response:
+            return send_values
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import glob
+import time
+import bleach
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+from text_sanitizer import TextSanitizer  # noqa: E402
+
+
+#################################################################
+# 記事本文のサニタイズ処理の CPU 時間を計測する。
+# 呼び出し毎に bleach.clean を実行する場合（Cleaner を都度生成）と、TextSanitizer（Cleaner を使い回す）を比較する。
+# 実際の記事本文（Articles の body を 1 件ずつ保存した .html ファイル）のディレクトリを引数に指定できる。
+# 指定しない場合は 1 KB と 64 KB の本文を生成して計測する。
+# $ python benchmark_text_sanitizer.py [本文のディレクトリ]
+#################################################################
+REPEAT = 5
+PARAGRAPH = (
+    '<h2>見出し</h2>'
+    '<p>本文のテキストです。<strong>強調</strong>と<a href="https://example.com/x">リンク</a>&amp;記号。</p>'
+    '<figure class="image"><img src="https://example.com/d/api/articles_images/a/b.png">'
+    '<figcaption>キャプション</figcaption></figure>'
+    '<figure class="media"><oembed url="https://twitter.com/a/status/1"></oembed></figure>'
+    '<pre><code class="language-python">print("hello")</code></pre><blockquote>引用</blockquote><hr>'
+)
+
+
+def main():
+    os.environ.setdefault('DOMAIN', 'example.com')
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else create_corpus()
+    params = TextSanitizer._TextSanitizer__get_cleaner_params('article_body_v2')
+
+    for name, bodies in corpus:
+        # 変更前と同じ結果となることを確認した上で計測する
+        for body in bodies:
+            assert bleach.clean(body, **params) == TextSanitizer.sanitize_article_body_v2(body)
+        before = min([measure(lambda body: bleach.clean(body, **params), bodies) for _ in range(REPEAT)])
+        after = min([measure(TextSanitizer.sanitize_article_body_v2, bodies) for _ in range(REPEAT)])
+        print(f'{name}: bleach.clean {before * 1000 / len(bodies):.2f} ms/body, '
+              f'TextSanitizer {after * 1000 / len(bodies):.2f} ms/body')
+
+
+def load_corpus(directory):
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            bodies.append(f.read())
+    if not bodies:
+        print(f'{directory} に .html ファイルがありません')
+        exit(1)
+    return [(f'{directory} ({len(bodies)} bodies)', bodies)]
+
+
+def create_corpus():
+    return [(f'{size // 1024} KB', [create_body(size)]) for size in [1024, 64 * 1024]]
+
+
+def create_body(size):
+    body = ''
+    while len(body.encode('utf-8')) < size:
+        body += PARAGRAPH
+    return body
+
+
+def measure(sanitize, bodies):
+    start = time.process_time()
+    for body in bodies:
+        sanitize(body)
+    return time.process_time() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import random
+import time
+from hexbytes import HexBytes
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '../src/handlers/me/wallet/token/allhistories/create'))
+from me_wallet_token_allhistories_create import MeWalletTokenAllhistoriesCreate  # noqa: E402
+
+
+#################################################################
+# 全トークン履歴の csv 出力における、ログから csv の行への変換処理の CPU 時間を計測する。
+# ブロックの取得（RPC）は含めず、eth_getLogs 1 回分（1000 件）ずつ変換した場合の 1 行あたりの時間を出力する。
+# $ python benchmark_token_history_export.py [ログの件数（既定値: 100000）]
+#################################################################
+EOA = '0x1111111111111111111111111111111111111111'
+CHUNK_SIZE = 1000
+REPEAT = 5
+
+
+class NullWriter:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+
+def main():
+    log_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.environ.setdefault('PRIVATE_CHAIN_OPERATION_URL', 'http://localhost:8545')
+    os.environ.setdefault('PRIVATE_CHAIN_BRIDGE_ADDRESS', '0x9999000000000000000000000000000000000000')
+    os.environ.setdefault('BURN_ADDRESS', '7ad8f90cfa071c8420e3f09fe0e413d0c47502ea')
+
+    logs = create_logs(log_count)
+    target = MeWalletTokenAllhistoriesCreate({}, {})
+    target._MeWalletTokenAllhistoriesCreate__init_web3()
+    target.web3.eth.getBlock = lambda block_number: {'timestamp': 1546268400 + block_number * 30}
+
+    for method_name in ['filter_transfer_data', 'filter_mint_data']:
+        elapsed = min([measure(getattr(target, method_name), logs) for _ in range(REPEAT)])
+        print(f'{method_name}: {elapsed:.3f} s ({elapsed * 1000000 / log_count:.2f} us/row)')
+
+
+def create_logs(log_count):
+    generator = random.Random(0)
+    counterparties = ['%040x' % generator.getrandbits(160) for _ in range(50)]
+    return [
+        {
+            'blockNumber': 1000 + i,
+            'data': '0x%064x' % generator.getrandbits(80),
+            'transactionHash': HexBytes('%064x' % generator.getrandbits(256)),
+            'topics': [
+                HexBytes(MeWalletTokenAllhistoriesCreate.TRANSFER_EVENT_TOPIC),
+                HexBytes('0x' + '0' * 24 + EOA[2:]),
+                HexBytes('0x' + '0' * 24 + generator.choice(counterparties))
+            ]
+        }
+        for i in range(log_count)
+    ]
+
+
+def measure(filter_data, logs):
+    writer = NullWriter()
+    start = time.process_time()
+    for i in range(0, len(logs), CHUNK_SIZE):
+        filter_data(logs[i:i + CHUNK_SIZE], EOA, writer)
+    return time.process_time() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import sys
+import time
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+
+#################################################################
+# 期限切れの nonce を削除する。
+# TTL の有効化以前に作成された nonce 等、DynamoDB の TTL で削除されていないものを対象とする。
+# Nonce のテーブル名を引数に実行。
+# $ python delete_expired_nonces.py hoge_table_name
+#################################################################
+def main():
+    validate()
+    delete_expired_nonces(sys.argv[1])
+
+
+def validate():
+    if len(sys.argv) <= 1:
+        print('削除対象のテーブル名を指定してください')
+        exit(1)
+
+    print(f'{sys.argv[1]} の期限切れの nonce を削除します。よろしいですか（y/n）?')
+    input_str = input()
+    if input_str != 'y' and input_str != 'Y':
+        print('処理を中断します')
+        exit(0)
+
+
+def delete_expired_nonces(table_name):
+    dynamodb = boto3.resource('dynamodb')
+    target_table = dynamodb.Table(table_name)
+    scan_params = {
+        'FilterExpression': Attr('expiration_time').lt(int(time.time())) | Attr('expiration_time').not_exists(),
+        'ProjectionExpression': 'nonce'
+    }
+
+    count = 0
+    # 件数が多い場合もメモリを圧迫しないよう、scan の 1 ページ毎に削除する
+    with target_table.batch_writer() as batch:
+        while True:
+            response = target_table.scan(**scan_params)
+            for item in response['Items']:
+                batch.delete_item(Key={'nonce': item['nonce']})
+            count += len(response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f'{count} 件の nonce を削除しました')
+
+
+if __name__ == '__main__':
+    main()
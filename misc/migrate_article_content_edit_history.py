@@ -0,0 +1,146 @@
+import os
+import sys
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import Binary
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+import settings  # noqa: E402
+from content_diff_util import ContentDiffUtil  # noqa: E402
+
+
+#################################################################
+# 本文をそのまま保存している記事編集履歴を、スナップショットと圧縮差分の形式に変換する。
+# ArticleContentEditHistory のテーブル名を引数に実行。
+# $ python migrate_article_content_edit_history.py hoge_table_name
+#################################################################
+def main():
+    validate()
+    migrate(sys.argv[1])
+
+
+def validate():
+    if len(sys.argv) <= 1:
+        print('変換対象のテーブル名を指定してください')
+        exit(1)
+
+    print(f'{sys.argv[1]} の記事編集履歴を差分形式に変換します。よろしいですか（y/n）?')
+    input_str = input()
+    if input_str != 'y' and input_str != 'Y':
+        print('処理を中断します')
+        exit(0)
+
+
+def migrate(table_name):
+    dynamodb = boto3.resource('dynamodb')
+    target_table = dynamodb.Table(table_name)
+    # 本文をそのまま保持している version を含む記事を探し、記事単位で変換する
+    scan_params = {
+        'FilterExpression': Attr('sort_key').exists() & Attr('body').exists() & Attr('body_diff').not_exists(),
+        'ProjectionExpression': 'user_id, article_id'
+    }
+
+    checked_articles = set()
+    converted_count = 0
+    before_size = 0
+    after_size = 0
+    # 件数が多い場合もメモリを圧迫しないよう、scan の 1 ページ毎に、ページに含まれる記事の履歴のみを取得して変換する
+    with target_table.batch_writer() as batch:
+        while True:
+            response = target_table.scan(**scan_params)
+            for key in [(item['user_id'], item['article_id']) for item in response['Items']]:
+                if key in checked_articles:
+                    continue
+                checked_articles.add(key)
+
+                items = sorted(query_article_histories(target_table, *key), key=lambda x: x['sort_key'])
+                converted_items = list(convert_items(items))
+                if converted_items:
+                    converted_count += 1
+                for item in converted_items:
+                    if 'body' in item:
+                        before_size += len(item.pop('body').encode('utf-8'))
+                    after_size += len(ContentDiffUtil.to_bytes(item.get('body_diff') or item['compressed_body']))
+                    batch.put_item(Item=item)
+
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f'{converted_count} 記事の編集履歴を変換しました')
+    print(f'本文のサイズ: {before_size} bytes -> {after_size} bytes')
+
+
+def query_article_histories(target_table, user_id, article_id):
+    # スナップショットを除いた、記事の全ての version を取得する
+    query_params = {
+        'KeyConditionExpression': Key('user_id').eq(user_id) &
+        Key('article_edit_history_id').begins_with(article_id + '_')
+    }
+    items = []
+    while True:
+        response = target_table.query(**query_params)
+        items.extend([item for item in response['Items']
+                      if item.get('article_id') == article_id and 'sort_key' in item])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def convert_items(items):
+    # DBUtil.put_article_content_edit_history の差分形式と同一の規則でスナップショットを作成し、変換した item のみを返却する
+    # スナップショットは参照する version より先に書き込まれるよう、変換後の item より先に返却する
+    base_id = None
+    base_body = None
+    compressed_base_body = None
+    base_count = 0
+    for item in items:
+        # 差分形式の version は変換済のため、スナップショットを引き継ぐ
+        if item.get('body_diff') is not None:
+            base_id = item['base_id']
+            base_body = None
+            base_count = item['base_count']
+            continue
+
+        # 小さな本文はそのまま保持し、次の version は新たなスナップショットを基準とする
+        body = item.get('body')
+        if body is None or len(body.encode('utf-8')) < settings.ARTICLE_HISTORY_DIFF_MIN_BODY_BYTES:
+            base_id = None
+            base_body = None
+            continue
+
+        body_diff = None
+        if base_body is not None and base_count < settings.ARTICLE_HISTORY_SNAPSHOT_INTERVAL:
+            body_diff = ContentDiffUtil.create_diff(base_body, body)
+            if len(body_diff) * 2 >= len(compressed_base_body):
+                body_diff = None
+
+        if body_diff is None:
+            compressed_body = ContentDiffUtil.compress(body)
+            if len(compressed_body) >= len(body.encode('utf-8')):
+                base_id = None
+                base_body = None
+                continue
+            base_id = item['article_id'] + '_base_' + str(item['sort_key'])
+            base_body = body
+            compressed_base_body = compressed_body
+            base_count = 0
+            body_diff = ContentDiffUtil.create_diff(base_body, base_body)
+            yield {
+                'user_id': item['user_id'],
+                'article_edit_history_id': base_id,
+                'compressed_body': Binary(compressed_base_body)
+            }
+
+        base_count += 1
+        converted_item = dict(item)
+        converted_item.update({
+            'base_id': base_id,
+            'base_count': base_count,
+            'body_diff': Binary(body_diff)
+        })
+        yield converted_item
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import base64
+import boto3
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+import settings  # noqa: E402
+from crypto_util import CryptoUtil  # noqa: E402
+
+
+#################################################################
+# AES-CBC で暗号化されている外部プロバイダユーザーのパスワードを、AES-GCM で暗号化し直す。
+# 環境変数 LOGIN_SALT を設定し、ExternalProviderUsers のテーブル名を引数に実行。
+# $ LOGIN_SALT=xxxx python migrate_external_provider_user_passwords.py hoge_table_name
+#################################################################
+def main():
+    validate()
+    migrate(sys.argv[1])
+
+
+def validate():
+    if len(sys.argv) <= 1:
+        print('変換対象のテーブル名を指定してください')
+        exit(1)
+    if os.environ.get('LOGIN_SALT') is None:
+        print('環境変数 LOGIN_SALT を設定してください')
+        exit(1)
+
+    print(f'{sys.argv[1]} のパスワードを AES-GCM で暗号化し直します。よろしいですか（y/n）?')
+    input_str = input()
+    if input_str != 'y' and input_str != 'Y':
+        print('処理を中断します')
+        exit(0)
+
+
+def migrate(table_name):
+    dynamodb = boto3.resource('dynamodb')
+    target_table = dynamodb.Table(table_name)
+    scan_params = {'ProjectionExpression': 'external_provider_user_id, password, iv'}
+
+    count = 0
+    skipped = 0
+    # 件数が多い場合もメモリを圧迫しないよう、scan の 1 ページ毎に変換する
+    while True:
+        response = target_table.scan(**scan_params)
+        items = [item for item in response['Items'] if item.get('password') is not None and
+                 CryptoUtil.get_cipher_version(item['password']) != CryptoUtil.CIPHER_VERSION_GCM]
+        plain_text_passwords = CryptoUtil.decrypt_passwords([(item['password'], item['iv']) for item in items])
+        ivs = [os.urandom(settings.AES_IV_BYTES) for _ in items]
+        encrypted_passwords = CryptoUtil.encrypt_passwords(list(zip(plain_text_passwords, ivs)))
+
+        for item, encrypted_password, iv in zip(items, encrypted_passwords, ivs):
+            try:
+                # 変換中にパスワードが更新された場合は上書きしない
+                target_table.update_item(
+                    Key={'external_provider_user_id': item['external_provider_user_id']},
+                    UpdateExpression='set password = :password, iv = :iv',
+                    ConditionExpression='password = :old_password',
+                    ExpressionAttributeValues={
+                        ':password': encrypted_password,
+                        ':iv': base64.b64encode(iv).decode(),
+                        ':old_password': item['password']
+                    }
+                )
+                count += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise e
+                skipped += 1
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    print(f'{count} 件のパスワードを変換しました（更新済のためスキップ: {skipped} 件）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import boto3
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src/common'))
+from verified_user_attribute_util import VerifiedUserAttributeUtil  # noqa: E402
+
+
+#################################################################
+# Cognito のユーザーの検証済みの email, phone_number を VerifiedUserAttributes に登録する。
+# Cognito トリガーによる重複の確認は VerifiedUserAttributes のみを参照するため、デプロイ前に実行すること。
+# ユーザープールID と VerifiedUserAttributes のテーブル名を引数に実行。
+# $ python migrate_verified_user_attributes.py hoge_user_pool_id hoge_table_name
+#################################################################
+def main():
+    validate()
+    os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'] = sys.argv[2]
+    migrate(sys.argv[1])
+
+
+def validate():
+    if len(sys.argv) <= 2:
+        print('ユーザープールID と登録対象のテーブル名を指定してください')
+        exit(1)
+
+    print(f'{sys.argv[1]} の検証済みの email, phone_number を {sys.argv[2]} に登録します。よろしいですか（y/n）?')
+    input_str = input()
+    if input_str != 'y' and input_str != 'Y':
+        print('処理を中断します')
+        exit(0)
+
+
+def migrate(user_pool_id):
+    cognito = boto3.client('cognito-idp')
+    dynamodb = boto3.resource('dynamodb')
+
+    count = 0
+    # list_users は 1 回の呼び出しで最大 60 件のため、全てのページを取得する
+    for page in cognito.get_paginator('list_users').paginate(UserPoolId=user_pool_id):
+        for user in page['Users']:
+            user_attributes = {a['Name']: a['Value'] for a in user['Attributes']}
+            VerifiedUserAttributeUtil.put_verified_attributes(
+                dynamodb, cognito, user_pool_id, user['Username'], user_attributes)
+            count += 1
+
+    print(f'{count} ユーザーの検証済みの属性を登録しました')
+
+
+if __name__ == '__main__':
+    main()
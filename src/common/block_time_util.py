@@ -0,0 +1,70 @@
+import time
+import threading
+import settings
+from collections import OrderedDict
+
+
+class BlockTimeUtil:
+    # block_number -> timestamp のキャッシュ。ブロックの時刻は変化しないため、Lambda のコンテナが再利用される間は
+    # リクエストを跨いで保持し、上限を超えた場合は参照が古いものから破棄する
+    # 全トークン履歴の出力では複数スレッドから参照されるため、キャッシュの参照・更新はロックを取得して行う
+    __timestamps = OrderedDict()
+    __lock = threading.Lock()
+
+    def __init__(self, get_block_timestamp):
+        # get_block_timestamp: ブロック番号（int）を受け取り、ブロックの時刻（unix time の int）を返却する関数
+        self.get_block_timestamp = get_block_timestamp
+
+    @classmethod
+    def clear_cache(cls):
+        with cls.__lock:
+            cls.__timestamps.clear()
+
+    def get_timestamp(self, block_number):
+        timestamps = BlockTimeUtil.__timestamps
+        with BlockTimeUtil.__lock:
+            if block_number in timestamps:
+                timestamps.move_to_end(block_number)
+                return timestamps[block_number]
+
+        # ブロックの取得（RPC）の間はロックを保持しない
+        timestamp = self.get_block_timestamp(block_number)
+        with BlockTimeUtil.__lock:
+            timestamps[block_number] = timestamp
+            if len(timestamps) > settings.BLOCK_TIMESTAMP_CACHE_SIZE:
+                timestamps.popitem(last=False)
+        return timestamp
+
+    def find_first_block(self, target_timestamp, latest_block):
+        # 時刻が target_timestamp 以降となる最初のブロックを返却する。該当するブロックが無い場合は latest_block を返却する
+        # 平均ブロック生成時間から推定したブロックを起点に、範囲を倍々に広げて対象を挟み込んだ後に二分探索する
+        # 推定が正確であれば 2 回程度、外れた場合も O(log n) 回の取得で特定できる
+        estimated_block = latest_block - int((time.time() - target_timestamp) / settings.AVERAGE_BLOCK_TIME)
+        block = min(max(estimated_block, 1), latest_block)
+
+        # low は時刻が target_timestamp より前のブロック（0 は該当無しを表す）、high は target_timestamp 以降のブロック
+        step = 1
+        if self.get_timestamp(block) >= target_timestamp:
+            high = block
+            low = max(high - step, 0)
+            while low > 0 and self.get_timestamp(low) >= target_timestamp:
+                high = low
+                step *= 2
+                low = max(high - step, 0)
+        else:
+            low = block
+            high = min(low + step, latest_block)
+            while self.get_timestamp(high) < target_timestamp:
+                if high == latest_block:
+                    return latest_block
+                low = high
+                step *= 2
+                high = min(low + step, latest_block)
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.get_timestamp(middle) >= target_timestamp:
+                high = middle
+            else:
+                low = middle
+        return high
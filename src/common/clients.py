@@ -0,0 +1,133 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+
+class Clients:
+    # Lambda のコンテナが再利用される間、boto3 のセッションと作成したクライアントを使い回す。
+    # 各クライアントは初回の利用時に作成し、処理で利用しないクライアントの作成は行わない。
+    # リージョンは AWS_REGION、エンドポイントは {サービス名}_ENDPOINT_URL（例: DYNAMODB_ENDPOINT_URL）の環境変数で変更できる。
+    # クライアント以外にコンテナ内で使い回す値（HTTP のセッション、取得した公開鍵等）も get_or_create で保持する。
+    # boto3 のセッションはスレッドセーフではないため、ThreadPoolExecutor 等から同時に呼び出された場合も、
+    # セッションの作成は lock を、各値の作成は key ごとの lock（key_locks）を取得した上で 1 度のみ行う
+    session = None
+    instances = {}
+    key_locks = {}
+    lock = threading.RLock()
+
+    @classmethod
+    def dynamodb(cls):
+        return LazyClient(lambda: cls.get_resource('dynamodb'))
+
+    @classmethod
+    def s3(cls):
+        return LazyClient(lambda: cls.get_resource('s3'))
+
+    @classmethod
+    def cognito(cls):
+        return LazyClient(lambda: cls.get_client('cognito-idp'))
+
+    @classmethod
+    def elasticsearch(cls):
+        return LazyClient(cls.get_elasticsearch)
+
+    @classmethod
+    def get_or_create(cls, key, factory, is_valid=None):
+        # key の値を作成済の場合は返却し、未作成または is_valid が False を返す場合は factory で作成する。
+        # factory は HTTP 通信等を行う場合があるため、他の key の取得を待たせないよう key ごとの lock を取得した状態で呼び出し、
+        # 同じ key の値は重複して作成しない
+        with cls.lock:
+            key_lock = cls.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = cls.instances.get(key)
+            if value is None or (is_valid is not None and not is_valid(value)):
+                value = factory()
+                with cls.lock:
+                    cls.instances[key] = value
+            return value
+
+    @classmethod
+    def get_session(cls):
+        with cls.lock:
+            if cls.session is None:
+                cls.session = boto3.session.Session()
+            return cls.session
+
+    @classmethod
+    def get_resource(cls, service_name, region_name=None):
+        return cls.get_or_create(
+            ('resource', service_name, region_name),
+            lambda: cls.get_session().resource(service_name, **cls.__get_options(service_name, region_name))
+        )
+
+    @classmethod
+    def get_client(cls, service_name, region_name=None, signature_version=None):
+        def create():
+            options = cls.__get_options(service_name, region_name)
+            if signature_version is not None:
+                options['config'] = Config(signature_version=signature_version)
+            return cls.get_session().client(service_name, **options)
+
+        return cls.get_or_create(('client', service_name, region_name, signature_version), create)
+
+    @classmethod
+    def get_elasticsearch(cls):
+        return cls.get_or_create(('elasticsearch', os.environ['ELASTIC_SEARCH_ENDPOINT']), cls.__create_elasticsearch)
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.session = None
+            cls.instances.clear()
+
+    @staticmethod
+    def __create_elasticsearch():
+        # Elasticsearch を利用しない関数で読み込まないよう、作成時に import する
+        from elasticsearch import Elasticsearch, RequestsHttpConnection
+        from requests_aws4auth import AWS4Auth
+
+        awsauth = AWS4Auth(
+            os.environ['AWS_ACCESS_KEY_ID'],
+            os.environ['AWS_SECRET_ACCESS_KEY'],
+            os.environ['AWS_REGION'],
+            'es',
+            session_token=os.environ['AWS_SESSION_TOKEN']
+        )
+        return Elasticsearch(
+            hosts=[{'host': os.environ['ELASTIC_SEARCH_ENDPOINT'], 'port': 443}],
+            http_auth=awsauth,
+            use_ssl=True,
+            verify_certs=True,
+            connection_class=RequestsHttpConnection
+        )
+
+    @staticmethod
+    def __get_options(service_name, region_name):
+        options = {}
+        region_name = region_name or os.environ.get('AWS_REGION')
+        if region_name is not None:
+            options['region_name'] = region_name
+        endpoint_url = os.environ.get(service_name.upper().replace('-', '_') + '_ENDPOINT_URL')
+        if endpoint_url is not None:
+            options['endpoint_url'] = endpoint_url
+        return options
+
+
+class LazyClient:
+    # 属性が参照されるまでクライアントの作成を遅延する。複数のスレッドから参照された場合も factory は 1 度のみ呼び出す
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get_instance(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self.get_instance(), name)
@@ -0,0 +1,79 @@
+import struct
+import zlib
+from boto3.dynamodb.types import Binary
+
+
+class ContentDiffUtil:
+    # 差分データの先頭に付与する、共通する先頭・末尾の文字数
+    DIFF_HEADER_FORMAT = '>II'
+    DIFF_HEADER_SIZE = struct.calcsize(DIFF_HEADER_FORMAT)
+    # zlib が参照可能な辞書の最大サイズ
+    ZDICT_MAX_BYTES = 32768
+
+    @staticmethod
+    def compress(text):
+        return zlib.compress(text.encode('utf-8'))
+
+    @staticmethod
+    def decompress(data):
+        return zlib.decompress(ContentDiffUtil.to_bytes(data)).decode('utf-8')
+
+    @classmethod
+    def create_diff(cls, base_text, text):
+        # 共通する先頭・末尾を除いた変更箇所のみを、基準テキストの該当箇所を辞書として圧縮する
+        prefix_length = cls.__get_common_prefix_length(base_text, text)
+        suffix_length = cls.__get_common_suffix_length(base_text[prefix_length:], text[prefix_length:])
+
+        changed_text = text[prefix_length:len(text) - suffix_length]
+        compressor = zlib.compressobj(zdict=cls.__get_zdict(base_text, prefix_length, suffix_length))
+        compressed = compressor.compress(changed_text.encode('utf-8')) + compressor.flush()
+
+        return struct.pack(cls.DIFF_HEADER_FORMAT, prefix_length, suffix_length) + compressed
+
+    @classmethod
+    def apply_diff(cls, base_text, diff):
+        diff = cls.to_bytes(diff)
+        prefix_length, suffix_length = struct.unpack(cls.DIFF_HEADER_FORMAT, diff[:cls.DIFF_HEADER_SIZE])
+
+        decompressor = zlib.decompressobj(zdict=cls.__get_zdict(base_text, prefix_length, suffix_length))
+        changed_text = (decompressor.decompress(diff[cls.DIFF_HEADER_SIZE:]) + decompressor.flush()).decode('utf-8')
+
+        return base_text[:prefix_length] + changed_text + base_text[len(base_text) - suffix_length:]
+
+    @staticmethod
+    def to_bytes(data):
+        # DynamoDB から取得したバイナリは Binary 型で返却される
+        if isinstance(data, Binary):
+            return data.value
+        return bytes(data)
+
+    @classmethod
+    def __get_zdict(cls, base_text, prefix_length, suffix_length):
+        zdict = base_text[prefix_length:len(base_text) - suffix_length].encode('utf-8')
+        # 空の辞書は指定できないため、変更箇所が無い場合は基準テキスト全体を用いる
+        if not zdict:
+            zdict = base_text.encode('utf-8') or b' '
+        return zdict[-cls.ZDICT_MAX_BYTES:]
+
+    @staticmethod
+    def __get_common_prefix_length(a, b):
+        # os.path.commonprefix と同様の二分探索により、文字単位のループを避ける
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[:middle] == b[:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    @staticmethod
+    def __get_common_suffix_length(a, b):
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[len(a) - middle:] == b[len(b) - middle:]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
@@ -5,20 +5,59 @@ from botocore.exceptions import ClientError
 
 
 class CryptoUtil:
+    # 暗号化方式のバージョン。バージョン 2 以降は暗号文の先頭に付与し、付与されていない暗号文は AES-CBC（バージョン 1）とする
+    CIPHER_VERSION_CBC = 1
+    CIPHER_VERSION_GCM = 2
+    CIPHER_VERSION_PREFIXES = {CIPHER_VERSION_GCM: 'v2$'}
 
     @staticmethod
-    def encrypt_password(plain_text_password, iv):
-        salt = os.environ['LOGIN_SALT']
-        cipher = AES.new(salt.encode("utf8"), AES.MODE_CBC, iv)
-        return base64.b64encode(cipher.encrypt(plain_text_password.encode("utf8"))).decode()
+    def get_key():
+        return os.environ['LOGIN_SALT'].encode('utf8')
 
-    @staticmethod
-    def decrypt_password(byte_hash_data, iv):
-        encrypted_data = base64.b64decode(byte_hash_data)
+    @classmethod
+    def get_cipher_version(cls, byte_hash_data):
+        hash_data = byte_hash_data.decode() if isinstance(byte_hash_data, bytes) else byte_hash_data
+        for version, prefix in cls.CIPHER_VERSION_PREFIXES.items():
+            if hash_data.startswith(prefix):
+                return version
+        return cls.CIPHER_VERSION_CBC
+
+    @classmethod
+    def encrypt_password(cls, plain_text_password, iv, version=CIPHER_VERSION_GCM):
+        key = cls.get_key()
+        if version == cls.CIPHER_VERSION_CBC:
+            cipher = AES.new(key, AES.MODE_CBC, iv)
+            return base64.b64encode(cipher.encrypt(plain_text_password.encode("utf8"))).decode()
+
+        # 改ざんを検知できるよう、認証タグを暗号文の末尾に付与する
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
+        encrypted_data, tag = cipher.encrypt_and_digest(plain_text_password.encode("utf8"))
+        return cls.CIPHER_VERSION_PREFIXES[version] + base64.b64encode(encrypted_data + tag).decode()
+
+    @classmethod
+    def decrypt_password(cls, byte_hash_data, iv):
+        version = cls.get_cipher_version(byte_hash_data)
         aes_iv = base64.b64decode(iv)
-        salt = os.environ['LOGIN_SALT']
-        cipher = AES.new(salt.encode("utf8"), AES.MODE_CBC, aes_iv)
-        return cipher.decrypt(encrypted_data).decode()
+        key = cls.get_key()
+        if version == cls.CIPHER_VERSION_CBC:
+            cipher = AES.new(key, AES.MODE_CBC, aes_iv)
+            return cipher.decrypt(base64.b64decode(byte_hash_data)).decode()
+
+        prefix = cls.CIPHER_VERSION_PREFIXES[version]
+        data = base64.b64decode(byte_hash_data[len(prefix):])
+        cipher = AES.new(key, AES.MODE_GCM, nonce=aes_iv)
+        # 認証タグが一致しない場合は ValueError となる
+        return cipher.decrypt_and_verify(data[:-16], data[-16:]).decode()
+
+    @classmethod
+    def encrypt_passwords(cls, passwords, version=CIPHER_VERSION_GCM):
+        # 移行処理等で、(平文のパスワード, iv) の組をまとめて暗号化する
+        return [cls.encrypt_password(plain_text_password, iv, version) for plain_text_password, iv in passwords]
+
+    @classmethod
+    def decrypt_passwords(cls, passwords):
+        # 移行処理等で、(暗号化されたパスワード, base64 エンコードされた iv) の組をまとめて復号する
+        return [cls.decrypt_password(byte_hash_data, iv) for byte_hash_data, iv in passwords]
 
     @staticmethod
     def get_external_provider_password(dynamodb, user_id):
@@ -2,7 +2,9 @@ import os
 
 import settings
 import time
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import Binary
+from content_diff_util import ContentDiffUtil
 from decimal import Decimal
 from jsonschema import ValidationError
 from record_not_found_error import RecordNotFoundError
@@ -86,6 +88,36 @@ class DBUtil:
             raise ValidationError('You have already purchased')
         return True
 
+    @classmethod
+    def validate_no_pending_burn(cls, dynamodb, user_id):
+        # 投げ銭・記事購入のバーンのトランザクションは、投げ銭・購入の完了後に TransactionStatusReconciler が送信する。
+        # 送信前に新たなトランザクションを受け付けると、署名済のバーンと同じ nonce が使われバーンを実行できなくなるため受け付けない
+        tip_table = dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        paid_articles_table = dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        user_condition = Attr('user_id').eq(user_id)
+        pending_burn_queries = [
+            (tip_table, {
+                'IndexName': 'burn_uncompleted-index',
+                'KeyConditionExpression': Key('burn_uncompleted').eq(1),
+                'FilterExpression': user_condition
+            }),
+            (paid_articles_table, {
+                'IndexName': 'status-index',
+                'KeyConditionExpression': Key('status').eq('doing'),
+                'FilterExpression': user_condition & Attr('burn_signed_transaction').exists()
+            }),
+            (paid_articles_table, {
+                'IndexName': 'uncompleted-index',
+                'KeyConditionExpression': Key('uncompleted').eq(1),
+                'FilterExpression': user_condition & Attr('burn_uncompleted').exists()
+            })
+        ]
+        # いずれのインデックスも処理中のもののみを含むため、全件を取得しても件数は限られる
+        for table, query_params in pending_burn_queries:
+            if cls.query_all_items(table, query_params):
+                raise ValidationError('Previous burn transaction is pending')
+        return True
+
     @classmethod
     def __validate_version(cls, article_info, version):
         # version が 1 の場合は設定されていないことを確認
@@ -198,7 +230,17 @@ class DBUtil:
         return True
 
     @staticmethod
-    def put_article_content_edit_history(dynamodb, user_id, article_id, sanitized_body):
+    def is_same_article_body(dynamodb_table, article_id, body):
+        # 保存済みの body はサニタイズ済みのため、一致する場合は再サニタイズ・再保存が不要と判断できる
+        item = dynamodb_table.get_item(
+            Key={'article_id': article_id},
+            ProjectionExpression='body'
+        ).get('Item')
+
+        return item is not None and item.get('body') == body
+
+    @classmethod
+    def put_article_content_edit_history(cls, dynamodb, user_id, article_id, sanitized_body):
         article_content_edit_history_table = dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
         # 最新の version を取得
         query_params = {
@@ -217,22 +259,41 @@ class DBUtil:
         # version は 00 → 99 をループ
         version = str(0 if len(items) == 0 else (int(items[0]['version']) + 1) % 100).zfill(2)
 
+        item = {
+            'user_id': user_id,
+            'article_edit_history_id': article_id + '_' + version,
+            'article_id': article_id,
+            'version': version,
+            'sort_key': int(create_time * 1000000),
+            'update_at': int(create_time)
+        }
+        history_diff = None
+        if settings.ARTICLE_HISTORY_STORAGE_MODE == 'diff' and sanitized_body is not None and \
+                len(sanitized_body.encode('utf-8')) >= settings.ARTICLE_HISTORY_DIFF_MIN_BODY_BYTES:
+            history_diff = cls.__create_history_diff(
+                article_content_edit_history_table, user_id, article_id, items, sanitized_body, item['sort_key'])
+        if history_diff is not None:
+            item.update(history_diff)
+        else:
+            item['body'] = sanitized_body
+
         # 該当バージョンで書き込み（put で上書きすることで過去 version の削除を不要にしている）
         # version の値が重複することもシステム的にはありえるが、後勝ちで問題ないためトランザクション処理は省略
-        article_content_edit_history_table.put_item(
-            Item={
-                'user_id': user_id,
-                'article_edit_history_id': article_id + '_' + version,
-                'body': sanitized_body,
-                'article_id': article_id,
-                'version': version,
-                'sort_key': int(create_time * 1000000),
-                'update_at': int(create_time)
-            }
-        )
+        overwritten = article_content_edit_history_table.put_item(Item=item, ReturnValues='ALL_OLD').get('Attributes')
+
+        # 上書きにより参照されなくなったスナップショットを削除
+        unreferenced_base_id = cls.__get_unreferenced_history_base_id(
+            article_content_edit_history_table, user_id, article_id, version, item.get('base_id'), overwritten)
+        if unreferenced_base_id is not None:
+            article_content_edit_history_table.delete_item(
+                Key={
+                    'user_id': user_id,
+                    'article_edit_history_id': unreferenced_base_id
+                }
+            )
 
-    @staticmethod
-    def get_article_content_edit_history(dynamodb, user_id, article_id, version):
+    @classmethod
+    def get_article_content_edit_history(cls, dynamodb, user_id, article_id, version):
         article_content_edit_history_table = dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
         article_content_edit_history = article_content_edit_history_table.get_item(
             Key={
@@ -242,4 +303,94 @@ class DBUtil:
         ).get('Item')
         if article_content_edit_history is None:
             raise RecordNotFoundError('Record Not Found')
+
+        # 差分形式で保存されている場合はスナップショットから本文を復元する
+        if article_content_edit_history.get('body_diff') is not None:
+            base = article_content_edit_history_table.get_item(
+                Key={
+                    'user_id': user_id,
+                    'article_edit_history_id': article_content_edit_history['base_id']
+                }
+            ).get('Item')
+            if base is None:
+                raise RecordNotFoundError('Record Not Found')
+            article_content_edit_history['body'] = ContentDiffUtil.apply_diff(
+                ContentDiffUtil.decompress(base['compressed_body']),
+                article_content_edit_history['body_diff']
+            )
+            for key in ['body_diff', 'base_id', 'base_count']:
+                article_content_edit_history.pop(key, None)
+
         return article_content_edit_history
+
+    @classmethod
+    def __create_history_diff(cls, article_content_edit_history_table, user_id, article_id, latest_items,
+                              sanitized_body, sort_key):
+        # 最新 version が参照しているスナップショットが使用可能であれば、そのスナップショットとの差分を保存する
+        if len(latest_items) != 0:
+            latest = article_content_edit_history_table.get_item(
+                Key={
+                    'user_id': latest_items[0]['user_id'],
+                    'article_edit_history_id': latest_items[0]['article_edit_history_id']
+                },
+                ProjectionExpression='base_id, base_count'
+            ).get('Item')
+            if latest is not None and latest.get('base_id') is not None and \
+                    latest['base_count'] < settings.ARTICLE_HISTORY_SNAPSHOT_INTERVAL:
+                base = article_content_edit_history_table.get_item(
+                    Key={
+                        'user_id': latest_items[0]['user_id'],
+                        'article_edit_history_id': latest['base_id']
+                    }
+                ).get('Item')
+                if base is not None:
+                    compressed_base_body = ContentDiffUtil.to_bytes(base['compressed_body'])
+                    body_diff = ContentDiffUtil.create_diff(ContentDiffUtil.decompress(compressed_base_body),
+                                                            sanitized_body)
+                    # 差分がスナップショットに比べて十分に小さい場合のみ差分として扱う
+                    if len(body_diff) * 2 < len(compressed_base_body):
+                        return {
+                            'base_id': latest['base_id'],
+                            'base_count': latest['base_count'] + 1,
+                            'body_diff': Binary(body_diff)
+                        }
+
+        # 新たにスナップショットを作成する
+        # 圧縮しても本文より小さくならない場合は、スナップショットを作成せず本文をそのまま保存する
+        compressed_body = ContentDiffUtil.compress(sanitized_body)
+        if len(compressed_body) >= len(sanitized_body.encode('utf-8')):
+            return None
+        # スナップショットには article_id, sort_key を持たせないことで article_id-sort_key-index の対象外としている
+        base_id = article_id + '_base_' + str(sort_key)
+        article_content_edit_history_table.put_item(
+            Item={
+                'user_id': user_id,
+                'article_edit_history_id': base_id,
+                'compressed_body': Binary(compressed_body)
+            }
+        )
+        return {
+            'base_id': base_id,
+            'base_count': 1,
+            'body_diff': Binary(ContentDiffUtil.create_diff(sanitized_body, sanitized_body))
+        }
+
+    @staticmethod
+    def __get_unreferenced_history_base_id(article_content_edit_history_table, user_id, article_id, version,
+                                           base_id, overwritten):
+        # version の上書き対象が参照しているスナップショットを、次に古い version が参照していない場合は不要となる
+        if overwritten is None or overwritten.get('base_id') is None or overwritten['base_id'] == base_id:
+            return None
+
+        next_version = str((int(version) + 1) % 100).zfill(2)
+        next_oldest = article_content_edit_history_table.get_item(
+            Key={
+                'user_id': user_id,
+                'article_edit_history_id': article_id + '_' + next_version
+            },
+            ProjectionExpression='base_id'
+        ).get('Item')
+        if next_oldest is not None and next_oldest.get('base_id') == overwritten['base_id']:
+            return None
+
+        return overwritten['base_id']
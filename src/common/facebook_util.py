@@ -1,10 +1,10 @@
 import json
 import settings
-import requests
 import hmac
 import hashlib
 
 from nonce_util import NonceUtil
+from provider_http_client import ProviderHttpClient
 from botocore.exceptions import ClientError
 from exceptions import FacebookOauthError
 from exceptions import FacebookVerifyException
@@ -54,7 +54,8 @@ class FacebookUtil:
         return authorization_endpoint
 
     def get_access_token(self, code):
-        response = requests.get(
+        response = ProviderHttpClient.get(
+            'facebook',
             settings.FACEBOOK_API_ACCESSTOKEN_URL +
             '?client_id=' + self.app_id +
             '&client_secret=' + self.app_secret +
@@ -72,7 +73,8 @@ class FacebookUtil:
         return token['access_token']
 
     def get_user_info(self, access_token):
-        response = requests.get(
+        response = ProviderHttpClient.get(
+            'facebook',
             settings.FACEBOOK_API_USERINFO_URL +
             '?access_token=' + access_token +
             '&fields=id,email&appsecret_proof=' +
@@ -108,7 +110,8 @@ class FacebookUtil:
         }
 
     def __verify_access_token(self, access_token, user_id):
-        response = requests.get(
+        response = ProviderHttpClient.get(
+            'facebook',
             settings.FACEBOOK_API_DEBUG_URL +
             '?access_token=' + self.app_token +
             '&input_token=' + access_token +
@@ -0,0 +1,110 @@
+import base64
+import binascii
+import math
+from io import BytesIO
+from PIL import Image
+from jsonschema import ValidationError
+
+
+class ImageUtil:
+    # 先頭バイトによる画像形式の判定に用いるシグネチャ
+    IMAGE_SIGNATURES = [
+        (b'\xff\xd8\xff', 'jpeg'),
+        (b'\x89PNG\r\n\x1a\n', 'png'),
+        (b'GIF87a', 'gif'),
+        (b'GIF89a', 'gif')
+    ]
+    # 再エンコード時の保存オプション。JPEG は画質を従来（Pillow の既定値）と揃えたままハフマン符号を最適化する
+    # WebP は API のレスポンス内でエンコードするため、既定（method=4）より高速な method=2 を用いる
+    SAVE_OPTIONS = {
+        'jpeg': {'quality': 75, 'optimize': True},
+        'webp': {'quality': 80, 'method': 2}
+    }
+
+    @staticmethod
+    def decode_base64_image(image_base64):
+        try:
+            image_data = base64.b64decode(image_base64)
+        except (binascii.Error, ValueError):
+            raise ValidationError('Bad Request: No supported image format')
+
+        if ImageUtil.get_image_format(image_data) is None:
+            raise ValidationError('Bad Request: No supported image format')
+        return image_data
+
+    @staticmethod
+    def get_image_format(image_data):
+        for signature, image_format in ImageUtil.IMAGE_SIGNATURES:
+            if image_data.startswith(signature):
+                return image_format
+        return None
+
+    @staticmethod
+    def open_image(image_data):
+        # Image.open はヘッダのみを読み込み、画素のデコードは縮小等で必要になった時点で行われる
+        try:
+            return Image.open(BytesIO(image_data))
+        except Exception:
+            raise ValidationError('Bad Request: No supported image format')
+
+    @staticmethod
+    def draft(image, size):
+        # JPEG は DCT のスケーリングにより、指定サイズを下回らない範囲で縮小した状態でデコードし全画素を展開しない
+        if image.format == 'JPEG':
+            image.draft(None, (math.ceil(size[0]), math.ceil(size[1])))
+        return image
+
+    @staticmethod
+    def thumbnail(image, size):
+        ImageUtil.draft(image, size)
+        image.thumbnail(size, Image.ANTIALIAS)
+        return image
+
+    @staticmethod
+    def create_variants(image, widths):
+        # 元画像より小さい幅のみを大きい順に生成する。直前に縮小した画像を元に縮小することで、縮小処理の画素数を抑える
+        original_width, original_height = image.size
+        target_widths = sorted([width for width in widths if width < original_width], reverse=True)
+        if not target_widths:
+            return
+
+        ImageUtil.draft(image, (target_widths[0], original_height * target_widths[0] / original_width))
+        image = ImageUtil.to_resizable_mode(image)
+        for width in target_widths:
+            height = max(1, round(original_height * width / original_width))
+            image = image.resize((width, height), Image.ANTIALIAS)
+            yield width, image
+
+    @staticmethod
+    def resize_to_fit(image, size):
+        # 元画像は変更せずに縮小した画像を返却する
+        resizable_image = ImageUtil.to_resizable_mode(image)
+        image = resizable_image.copy() if resizable_image is image else resizable_image
+        image.thumbnail(size, Image.ANTIALIAS)
+        return image
+
+    @staticmethod
+    def to_resizable_mode(image):
+        # パレット形式等のままでは最近傍法で縮小されるため RGBA に変換する
+        if image.mode in ['P', 'LA']:
+            return image.convert('RGBA')
+        return image
+
+    @staticmethod
+    def crop_center(image, crop_width, crop_height):
+        w, h = image.size
+        return image.crop((
+            (w - crop_width) // 2,
+            (h - crop_height) // 2,
+            (w + crop_width) // 2,
+            (h + crop_height) // 2
+        ))
+
+    @staticmethod
+    def encode(image, ext):
+        # JPEG は透過・パレットを保持できないため RGB に変換する
+        if ext == 'jpeg' and image.mode not in ['RGB', 'L', 'CMYK']:
+            image = image.convert('RGB')
+        buf = BytesIO()
+        image.save(buf, format=ext, **ImageUtil.SAVE_OPTIONS.get(ext, {}))
+        return buf.getvalue()
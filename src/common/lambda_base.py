@@ -3,6 +3,7 @@ import json
 import logging
 import traceback
 import copy
+import re
 import settings
 from jsonschema import ValidationError
 
@@ -162,13 +163,25 @@ class LambdaBase(metaclass=ABCMeta):
             }
 
     def __filter_event_for_log(self, event):
-        copied_event = copy.deepcopy(event)
+        # 画像データ等の巨大な body を丸ごと複製・再シリアライズしないよう、浅いコピーのみ行う
+        copied_event = copy.copy(event)
 
-        if 'body' not in copied_event:
+        body = copied_event.get('body')
+        if not isinstance(body, str):
+            return copied_event
+
+        # 一定サイズを超える body は先頭のみをログ出力対象とし、JSON としての再パースは行わない
+        if len(body) > settings.LOG_BODY_MAX_LENGTH:
+            preview = self.__mask_not_logging_parameters(body[:settings.LOG_BODY_MAX_LENGTH])
+            copied_event['body'] = preview + '...(truncated {0} chars)'.format(len(body) - settings.LOG_BODY_MAX_LENGTH)
+            return copied_event
+
+        # マスク対象のパラメータが含まれ得ない場合はパース不要
+        if not any(not_logging_param in body for not_logging_param in settings.not_logging_parameters):
             return copied_event
 
         try:
-            body = json.loads(copied_event['body'])
+            body = json.loads(body)
         except Exception:
             return copied_event
 
@@ -178,3 +191,14 @@ class LambdaBase(metaclass=ABCMeta):
         copied_event['body'] = json.dumps(body)
 
         return copied_event
+
+    @staticmethod
+    def __mask_not_logging_parameters(body_preview):
+        # 途中で切り詰められた文字列値も対象とするため、閉じクォートが無い場合は末尾までをマスクする
+        for not_logging_param in settings.not_logging_parameters:
+            body_preview = re.sub(
+                r'("{0}"\s*:\s*)"(?:[^"\\]|\\.)*(?:"|\\?$)'.format(re.escape(not_logging_param)),
+                r'\1"xxxxx"',
+                body_preview
+            )
+        return body_preview
@@ -1,5 +1,5 @@
 import string
-import random
+import secrets
 import os
 import time
 from botocore.exceptions import ClientError
@@ -8,8 +8,11 @@ from botocore.exceptions import ClientError
 class NonceUtil:
     @staticmethod
     def generate(dynamodb, expiration_minites, provider, type, length):
+        # OAuth の state・nonce として用いるため、推測されないよう secrets で生成する
+        # （Facebook の state は末尾の '_' 等を除去して扱うため、英数字のみとする）
         chars = string.ascii_letters + string.digits
-        nonce = ''.join([random.choice(chars) for i in range(length)])
+        nonce = ''.join([secrets.choice(chars) for i in range(length)])
+        # 期限切れの nonce は expiration_time を TTL として DynamoDB により削除される
         expiration_time = int(time.time()) + expiration_minites*60
         try:
             nonce_table = dynamodb.Table(os.environ['NONCE_TABLE_NAME'])
@@ -29,17 +32,19 @@ class NonceUtil:
 
     @staticmethod
     def verify(dynamodb, nonce, provider, type):
+        # 再利用を防ぐため、有効な nonce は検証と同時に削除する。
+        # TTL による削除は即時ではないため、期限切れの nonce は条件で除外する
         try:
             nonce_table = dynamodb.Table(os.environ['NONCE_TABLE_NAME'])
-            result = nonce_table.get_item(Key={
-                'nonce': nonce
-            }).get('Item')
-
-            if result is None:
-                return False
-
-            if result['provider'] != provider or result['type'] != type:
-                return False
+            nonce_table.delete_item(
+                Key={'nonce': nonce},
+                ConditionExpression='attribute_exists(nonce) and provider = :provider and #type = :type '
+                                    'and expiration_time > :now',
+                ExpressionAttributeNames={'#type': 'type'},
+                ExpressionAttributeValues={':provider': provider, ':type': type, ':now': int(time.time())}
+            )
             return True
         except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
             raise e
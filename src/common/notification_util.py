@@ -28,6 +28,30 @@ class NotificationUtil:
             'created_at': int(time.time())
         })
 
+    @staticmethod
+    def notify_article_purchase(dynamodb, paid_article, target_user_id, purchase_type):
+        if purchase_type not in settings.ARTICLE_PURCHASE_NOTIFICATION_TYPES:
+            raise ValueError('Invalid purchase type ' + purchase_type)
+
+        notification_table = dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
+
+        # 購入情報毎に一意とし、再実行時に通知が重複しないようにする
+        notification_id = '-'.join([purchase_type, target_user_id, paid_article['article_id'],
+                                    str(paid_article['sort_key'])])
+
+        notification_table.put_item(Item={
+            'notification_id': notification_id,
+            'user_id': target_user_id,
+            'acted_user_id': paid_article['user_id'],
+            'article_id': paid_article['article_id'],
+            'article_user_id': paid_article['article_user_id'],
+            'article_title': paid_article['article_title'],
+            'sort_key': TimeUtil.generate_sort_key(),
+            'type': purchase_type,
+            'price': int(paid_article['price']),
+            'created_at': int(time.time())
+        })
+
     @staticmethod
     def update_unread_notification_manager(dynamodb, user_id):
         unread_notification_manager_table = dynamodb.Table(os.environ['UNREAD_NOTIFICATION_MANAGER_TABLE_NAME'])
@@ -0,0 +1,53 @@
+import json
+import time
+import settings
+from Crypto.PublicKey import RSA
+from clients import Clients
+from provider_http_client import ProviderHttpClient
+
+
+class OidcKeyCache:
+    # OpenID Provider のディスカバリドキュメントと公開鍵を、Clients に URL 毎に保持する
+    # 値は {'value': ..., 'fetched_at': ...} の形式で保持する
+
+    @classmethod
+    def get_discovery_document(cls, url, error_class):
+        cached = Clients.get_or_create(
+            ('oidc_discovery_document', url),
+            lambda: {'value': cls.__fetch(url, error_class), 'fetched_at': time.time()},
+            is_valid=lambda cached: not cls.__is_expired(cached)
+        )
+        return cached['value']
+
+    @classmethod
+    def get_public_key(cls, url, kid, error_class):
+        # 公開鍵（kid と PEM の組）は読み込み済の RSA 鍵として保持し、ID トークンの検証毎に PEM を解析しない
+        # 未知の kid の場合は鍵のローテーションを考慮して再取得するが、再取得の間隔は一定以上空ける
+        def create():
+            return {
+                'value': {key_id: RSA.importKey(pem) for key_id, pem in cls.__fetch(url, error_class).items()},
+                'fetched_at': time.time()
+            }
+
+        def is_valid(cached):
+            return not cls.__is_expired(cached) and \
+                (kid in cached['value'] or
+                 cached['fetched_at'] >= time.time() - settings.OIDC_KEY_CACHE_MIN_REFRESH_INTERVAL_SECONDS)
+
+        cached = Clients.get_or_create(('oidc_public_keys', url), create, is_valid=is_valid)
+        return cached['value'].get(kid)
+
+    @staticmethod
+    def __is_expired(cached):
+        return cached['fetched_at'] < time.time() - settings.OIDC_KEY_CACHE_SECONDS
+
+    @staticmethod
+    def __fetch(url, error_class):
+        response = ProviderHttpClient.get('oidc', url)
+        if response.status_code is not 200:
+            raise error_class(
+                endpoint=url,
+                status_code=response.status_code,
+                message=response.text
+            )
+        return json.loads(response.text)
@@ -0,0 +1,118 @@
+import os
+import rlp
+import settings
+from eth_keys import keys
+from eth_utils import keccak
+from jsonschema import ValidationError
+from rlp.exceptions import DecodingError
+
+
+class ParsedRawTransaction:
+    # raw_transaction を decode すると下記パラメータを取得可能
+    # 0：nonce(transaction_count)
+    # 1：gasPrice（0）
+    # 2：gasLimit（0）
+    # 3：to_address
+    # 4：value（0）
+    # 5：data
+    # 6：v（検証で利用。但し、内部で chain_id が利用されているため確認対象）
+    # 7：r（検証で利用）
+    # 8：s（検証で利用）
+    RELAY_METHOD = 'eeec0e24'
+
+    def __init__(self, raw_transaction):
+        # decode は生成時の 1 回のみ行い、署名の検証・パラメータの検証で共有する
+        self.raw_transaction = raw_transaction
+        try:
+            self.byte_data_list = rlp.decode(bytes.fromhex(raw_transaction[2:]))
+        except (DecodingError, ValueError):
+            raise ValidationError('raw_transaction is invalid')
+        # 発生しない想定だが念の為個数・型を確認
+        if len(self.byte_data_list) != 9 or not all(isinstance(b, bytes) for b in self.byte_data_list):
+            raise ValidationError('raw_transaction is invalid')
+        self.__sender = None
+
+    @property
+    def nonce(self):
+        return int.from_bytes(self.byte_data_list[0], 'big')
+
+    @property
+    def to_address(self):
+        return '0x' + self.byte_data_list[3].hex()
+
+    @property
+    def value(self):
+        return int.from_bytes(self.byte_data_list[4], 'big')
+
+    @property
+    def data(self):
+        return self.byte_data_list[5].hex()
+
+    @property
+    def method(self):
+        return self.data[0:8]
+
+    @property
+    def v(self):
+        return int.from_bytes(self.byte_data_list[6], 'big')
+
+    @property
+    def sender(self):
+        # 署名者のアドレスの復元は負荷が高いため、結果を保持する
+        if self.__sender is None:
+            self.__sender = self.__recover_sender()
+        return self.__sender
+
+    def validate_signature(self, address):
+        try:
+            sender = self.sender
+        except Exception:
+            raise ValidationError('Signature is invalid')
+        if address != sender:
+            raise ValidationError('Signature is invalid')
+
+    def validate_fields(self, transaction_count):
+        # 検証パラメータと data を除いたパラメータが正しいことを確認後 data を返却する
+        # nonce
+        if self.byte_data_list[0].hex() != '' and self.nonce != int(transaction_count, 16):
+            raise ValidationError('nonce is invalid')
+        if self.byte_data_list[0].hex() == '' and int(transaction_count, 16) != 0:
+            raise ValidationError('nonce is invalid')
+        # gasPrice
+        if self.byte_data_list[1].hex() != '':
+            raise ValidationError('gasPrice is invalid')
+        # gasLimit
+        if self.byte_data_list[2].hex() != '0186a0':
+            raise ValidationError('gasLimit is invalid')
+        # to_address
+        # relay method の場合は to_address は PRIVATE_CHAIN_BRIDGE_ADDRESS
+        if self.method == self.RELAY_METHOD:
+            to_address = os.environ['PRIVATE_CHAIN_BRIDGE_ADDRESS']
+        else:
+            to_address = os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS']
+        if self.to_address.lower() != '0x' + to_address[2:].lower():
+            raise ValidationError('private_chain_alis_token_address is invalid')
+        # value
+        if self.byte_data_list[4].hex() != '':
+            raise ValidationError('value is invalid')
+        # v は検証パラメータだが、chain_id を含んでいるため確認する
+        if self.byte_data_list[6].hex() not in settings.PRIVATE_CHAIN_V_VALUES:
+            raise ValidationError('v is invalid')
+        # data を返す
+        return self.data
+
+    def __recover_sender(self):
+        # Account.recover_transaction と同等の処理を、decode 済のパラメータを用いて行う（EIP-155 の署名にも対応）
+        v = self.v
+        r = int.from_bytes(self.byte_data_list[7], 'big')
+        s = int.from_bytes(self.byte_data_list[8], 'big')
+        unsigned_fields = self.byte_data_list[0:6]
+        if v in (27, 28):
+            v_standard = v - 27
+        else:
+            chain_id = (v - 35) // 2
+            v_standard = v - 35 - chain_id * 2
+            unsigned_fields = unsigned_fields + [chain_id, 0, 0]
+        message_hash = keccak(rlp.encode(unsigned_fields))
+        signature = keys.Signature(vrs=(v_standard, r, s))
+        return signature.recover_public_key_from_msg_hash(message_hash).to_checksum_address()
@@ -7,11 +7,10 @@ import re
 from jsonschema import validate
 from aws_requests_auth.aws_auth import AWSRequestsAuth
 from exceptions import SendTransactionError, ReceiptError
-from web3 import Web3, Account, HTTPProvider
+from web3 import Web3, HTTPProvider
 from eth_account.messages import encode_defunct
 from jsonschema import ValidationError
-from rlp import decode
-from rlp.exceptions import DecodingError
+from parsed_raw_transaction import ParsedRawTransaction
 
 
 class PrivateChainUtil:
@@ -60,24 +59,50 @@ class PrivateChainUtil:
         # return transaction hash
         return json.dumps(result).replace('"', '')
 
+    @classmethod
+    def send_raw_transaction_idempotently(cls, raw_transaction):
+        # 再送信時に送信済のトランザクションとして拒否された場合は、送信済として raw_transaction から算出したハッシュを返却する
+        try:
+            return cls.send_raw_transaction(raw_transaction)
+        except SendTransactionError as e:
+            transaction_hash = Web3.sha3(hexstr=raw_transaction).hex()
+            if re.search(settings.SENT_TRANSACTION_ERROR_PATTERN, str(e), re.IGNORECASE) is not None:
+                return transaction_hash
+            if re.search(settings.NONCE_TOO_LOW_ERROR_PATTERN, str(e), re.IGNORECASE) is not None and \
+                    cls.__exists_transaction_receipt(transaction_hash):
+                return transaction_hash
+            raise e
+
+    @classmethod
+    def __exists_transaction_receipt(cls, transaction_hash):
+        # 実行に失敗した（mined ログが存在しない）トランザクションも、取り込まれていれば receipt が存在する
+        try:
+            return cls.is_transaction_receipt_completed(transaction_hash)
+        except ReceiptError:
+            return True
+
     @classmethod
     def is_transaction_completed(cls, transaction):
         count = 0
         is_completed = False
         while count < settings.TRANSACTION_CONFIRM_COUNT:
             count += 1
-            # get receipt of target transaction
-            payload = {'transaction_hash': transaction}
-            request_url = 'https://' + os.environ['PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/transaction/receipt'
-            result = cls.send_transaction(request_url=request_url, payload_dict=payload)
             # 完了しているかを確認
-            if PrivateChainUtil.__is_completed_receipt_result(result):
+            if cls.is_transaction_receipt_completed(transaction):
                 is_completed = True
                 break
             # 完了が確認できなかった場合は 1 秒待機後に再実施
             time.sleep(1)
         return is_completed
 
+    @classmethod
+    def is_transaction_receipt_completed(cls, transaction):
+        # receipt を 1 回のみ取得し、完了しているかを返却する（待機・再取得は行わない）
+        payload = {'transaction_hash': transaction}
+        request_url = 'https://' + os.environ['PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/transaction/receipt'
+        result = cls.send_transaction(request_url=request_url, payload_dict=payload)
+        return PrivateChainUtil.__is_completed_receipt_result(result)
+
     @classmethod
     def __is_completed_receipt_result(cls, result):
         # 全ての log が完了となっていることを確認
@@ -130,58 +155,20 @@ class PrivateChainUtil:
         ) != address:
             raise ValidationError('Signature is invalid')
 
+    @classmethod
+    def parse_raw_transaction(cls, transaction):
+        # decode 済の ParsedRawTransaction はそのまま用いる
+        if isinstance(transaction, ParsedRawTransaction):
+            return transaction
+        return ParsedRawTransaction(transaction)
+
     @classmethod
     def validate_raw_transaction_signature(cls, transaction, address):
-        if address != Account.recover_transaction(transaction):
-            raise ValidationError('Signature is invalid')
+        cls.parse_raw_transaction(transaction).validate_signature(address)
 
     @classmethod
     def get_data_from_raw_transaction(cls, raw_transaction, transaction_count):
-        try:
-            # raw_transaction を decode すると下記パラメータを取得可能
-            # 検証パラメータと data を除いたパラメータが正しいことを確認後 data を返却する
-            # 0：nonce(transaction_count)
-            # 1：gasPrice（0）
-            # 2：gasLimit（0）
-            # 3：to_address
-            # 4：value（0）
-            # 5：data
-            # 6：v（検証で利用。但し、内部で chain_id が利用されているため確認対象）
-            # 7：r（検証で利用）
-            # 8：s（検証で利用）
-            byte_data_list = decode(bytes.fromhex(raw_transaction[2:]))
-            # 発生しない想定だが念の為個数を確認
-            if len(byte_data_list) != 9:
-                raise ValidationError('raw_transaction is invalid')
-            # nonce
-            if byte_data_list[0].hex() != '' and int(byte_data_list[0].hex(), 16) != int(transaction_count, 16):
-                raise ValidationError('nonce is invalid')
-            if byte_data_list[0].hex() == '' and int(transaction_count, 16) != 0:
-                raise ValidationError('nonce is invalid')
-            # gasPrice
-            if byte_data_list[1].hex() != '':
-                raise ValidationError('gasPrice is invalid')
-            # gasLimit
-            if byte_data_list[2].hex() != '0186a0':
-                raise ValidationError('gasLimit is invalid')
-            # to_address
-            # relay method の場合は to_address は PRIVATE_CHAIN_BRIDGE_ADDRESS
-            if byte_data_list[5].hex()[0:8] == 'eeec0e24':
-                to_address = os.environ['PRIVATE_CHAIN_BRIDGE_ADDRESS']
-            else:
-                to_address = os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS']
-            if byte_data_list[3].hex().lower() != to_address[2:].lower():
-                raise ValidationError('private_chain_alis_token_address is invalid')
-            # value
-            if byte_data_list[4].hex() != '':
-                raise ValidationError('value is invalid')
-            # v は検証パラメータだが、chain_id を含んでいるため確認する
-            if byte_data_list[6].hex() not in settings.PRIVATE_CHAIN_V_VALUES:
-                raise ValidationError('v is invalid')
-            # data を返す
-            return byte_data_list[5].hex()
-        except DecodingError:
-            raise ValidationError('raw_transaction is invalid')
+        return cls.parse_raw_transaction(raw_transaction).validate_fields(transaction_count)
 
     @classmethod
     def validate_erc20_transfer_data(cls, data, to_address):
@@ -0,0 +1,63 @@
+import json
+import logging
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import settings
+from clients import Clients
+
+
+class ProviderHttpClient:
+    # 外部プロバイダ（Twitter, Facebook, Yahoo, LINE 等）への接続は、Clients に保持してホスト毎に使い回す
+
+    @classmethod
+    def get(cls, provider, url, **kwargs):
+        return cls.request(provider, 'GET', url, **kwargs)
+
+    @classmethod
+    def post(cls, provider, url, **kwargs):
+        return cls.request(provider, 'POST', url, **kwargs)
+
+    @classmethod
+    def request(cls, provider, method, url, **kwargs):
+        kwargs.setdefault('timeout', settings.PROVIDER_HTTP_TIMEOUT)
+        host = urlparse(url).netloc
+        started_at = time.time()
+        status_code = None
+        try:
+            response = cls.get_session(host).request(method, url, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            # プロバイダ毎のレイテンシを CloudWatch Logs Insights で集計できるよう、JSON 形式で出力する
+            logging.info(json.dumps({
+                'metric': 'provider_http_latency',
+                'provider': provider,
+                'host': host,
+                'method': method,
+                'status_code': status_code,
+                'elapsed_ms': round((time.time() - started_at) * 1000, 3)
+            }))
+
+    @classmethod
+    def get_session(cls, host):
+        return Clients.get_or_create(('provider_http_session', host), cls.__create_session)
+
+    @staticmethod
+    def __create_session():
+        # 接続エラーは全てのメソッドで、応答の読み込みエラー及び 5xx は冪等なメソッド（GET 等）のみ再試行する。
+        # 再試行後も 5xx の場合はレスポンスをそのまま返却し、呼び出し元で各プロバイダのエラーとして扱う
+        retry = Retry(
+            total=settings.PROVIDER_HTTP_RETRY_COUNT,
+            backoff_factor=settings.PROVIDER_HTTP_RETRY_BACKOFF_FACTOR,
+            status_forcelist=settings.PROVIDER_HTTP_RETRY_STATUS_CODES,
+            raise_on_status=False
+        )
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(max_retries=retry))
+        session.mount('http://', HTTPAdapter(max_retries=retry))
+        return session
@@ -34,9 +34,10 @@ class RSAAlgorithm(Algorithm):
 
     def prepare_key(self, key):
 
-        # 差分はこの2行のコメントアウトのみ
-        # if isinstance(key, RSA._RSAobj):
-        #     return key
+        # PyCryptodome では RSA._RSAobj が存在しないため RSA.RsaKey で判定する
+        # （OidcKeyCache が読み込み済の鍵を渡す）
+        if isinstance(key, RSA.RsaKey):
+            return key
 
         if isinstance(key, string_types):
             if isinstance(key, text_type):
@@ -0,0 +1,62 @@
+import io
+
+
+class S3MultipartWriter:
+    # マルチパートアップロードでは、最終パート以外のサイズを 5MB 以上とする必要がある
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, s3_object, part_size=MIN_PART_SIZE, metadata=None):
+        self.s3_object = s3_object
+        self.part_size = part_size
+        self.__extra_args = {'Metadata': metadata} if metadata is not None else {}
+        self.size = 0
+        self.__buffer = io.BytesIO()
+        self.__multipart_upload = None
+        self.__parts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, text):
+        self.write_bytes(text.encode('utf-8'))
+        return len(text)
+
+    def write_bytes(self, data):
+        self.__buffer.write(data)
+        self.size += len(data)
+        # パートのサイズに達した時点でアップロードし、保持するデータをパート 1 つ分に抑える
+        if self.__buffer.tell() >= self.part_size:
+            self.__upload_part()
+        return len(data)
+
+    def close(self):
+        # 1 パートに満たない場合は、マルチパートアップロードを用いずに 1 回の put で保存する
+        if self.__multipart_upload is None:
+            self.s3_object.put(Body=self.__buffer.getvalue(), **self.__extra_args)
+        else:
+            if self.__buffer.tell() > 0:
+                self.__upload_part()
+            self.__multipart_upload.complete(MultipartUpload={'Parts': self.__parts})
+        self.__buffer = io.BytesIO()
+
+    def abort(self):
+        # 完了していないマルチパートアップロードはパートが課金対象として残り続けるため破棄する
+        if self.__multipart_upload is not None:
+            self.__multipart_upload.abort()
+            self.__multipart_upload = None
+        self.__buffer = io.BytesIO()
+
+    def __upload_part(self):
+        if self.__multipart_upload is None:
+            self.__multipart_upload = self.s3_object.initiate_multipart_upload(**self.__extra_args)
+
+        part_number = len(self.__parts) + 1
+        response = self.__multipart_upload.Part(part_number).upload(Body=self.__buffer.getvalue())
+        self.__parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        self.__buffer = io.BytesIO()
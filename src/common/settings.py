@@ -274,6 +274,8 @@ parameters = {
 
 # ログに出力されてはいけないパラメータ(ログ出力時に値がマスクされる)
 not_logging_parameters = {'access_token', 'pin_code'}
+# エラー時のログに出力する body の最大文字数(画像データ等の巨大な body は先頭のみ出力する)
+LOG_BODY_MAX_LENGTH = 2048
 
 article_recent_default_limit = 20
 users_articles_public_default_limit = 10
@@ -333,9 +335,13 @@ LIKED_RETRY_COUNT = 3
 
 ARTICLE_IMAGE_MAX_WIDTH = 3840
 ARTICLE_IMAGE_MAX_HEIGHT = 2160
+# 記事画像の閲覧環境に応じて配信する縮小画像の幅
+ARTICLE_IMAGE_VARIANT_WIDTHS = [320, 640, 1280, 1920]
 
 USER_ICON_WIDTH = 240
 USER_ICON_HEIGHT = 240
+# 一覧画面等の小さな表示領域向けに、アイコンと併せて生成する縮小アイコンのサイズ
+USER_ICON_VARIANT_SIZES = [48, 96]
 
 # 充分に大きな数値で、不足によって UX に影響を及ぼす目処は無いため、SSM ではなく settings にて管理
 MUTE_USERS_MAX_COUNT = 200
@@ -355,6 +361,51 @@ COMMENT_NOTIFICATION_TYPES = [
     COMMENT_THREAD_NOTIFICATION_TYPE
 ]
 
+# 全トークン履歴の csv 出力時に、1 回の eth_getLogs で対象とするブロック数の初期値と下限・上限
+TOKEN_HISTORY_EXPORT_BLOCK_RANGE = 100000
+TOKEN_HISTORY_EXPORT_MIN_BLOCK_RANGE = 1000
+TOKEN_HISTORY_EXPORT_MAX_BLOCK_RANGE = 1000000
+# 1 回のブロック範囲で取得するログ件数の目安。これを超えた場合は範囲を狭める
+TOKEN_HISTORY_EXPORT_TARGET_LOG_COUNT = 1000
+# 走査済ブロックまでの全トークン履歴（csv）を EoA 毎に保持する、インデックスの S3 上のキーの接頭辞
+TOKEN_HISTORY_INDEX_S3_PREFIX = 'token_history_index/'
+# 全トークン履歴の csv 出力ジョブの状態
+TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED = 'queued'
+TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING = 'processing'
+TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED = 'completed'
+TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND = 'not_found'
+TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED = 'failed'
+# ワーカーの 1 回の実行で処理するジョブの件数と、同時に処理するジョブの件数
+TOKEN_HISTORY_EXPORT_WORKER_BATCH_SIZE = 8
+TOKEN_HISTORY_EXPORT_WORKER_CONCURRENCY = 4
+# ジョブの最大試行回数。処理中のまま LEASE_SECONDS を経過したジョブは、ワーカーが異常終了したものとして再実行する。
+# 実行中のワーカーのジョブを再実行しないよう、LEASE_SECONDS はワーカーの Timeout（900 秒）より十分に長くする
+TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS = 3
+TOKEN_HISTORY_EXPORT_JOB_LEASE_SECONDS = 1200
+
+# TransactionStatusReconciler が投げ銭・記事購入・出金のトランザクションの完了を確認する際の receipt の同時取得数。
+# 完了を確認できないまま EXPIRE_SECONDS を経過したものは実行されなかったものとして扱う
+TRANSACTION_STATUS_RECONCILE_MAX_WORKERS = 10
+TRANSACTION_STATUS_RECONCILE_EXPIRE_SECONDS = 24 * 60 * 60
+# 出金は API の処理中に完了を確認するため、作成から STALE_SECONDS を経過しても doing のままのもののみを確認する
+TOKEN_SEND_RECONCILE_STALE_SECONDS = 10 * 60
+# バーンのトランザクションの送信中（burn_sending_at の設定後）のまま BURN_LEASE_SECONDS を経過したものは、
+# 送信した実行が異常終了したものとして再送信する。実行中の送信と重複しないよう、Reconciler の Timeout（300 秒）より長くする
+TRANSACTION_STATUS_RECONCILE_BURN_LEASE_SECONDS = 10 * 60
+# 送信済のトランザクションを再送信した場合のエラーメッセージ（送信済として扱う）
+SENT_TRANSACTION_ERROR_PATTERN = 'already known|known transaction|already imported'
+# nonce が使用済の場合のエラーメッセージ。同じ nonce の他のトランザクションが実行された場合もあるため、
+# 再送信したトランザクションの receipt が存在する場合のみ送信済として扱う
+NONCE_TOO_LOW_ERROR_PATTERN = 'nonce too low'
+# 出金の日次の合計額（TokenSendDailyTotal）は、対象日の終了から RETENTION_SECONDS を経過した後に TTL により削除する。
+# 対象日の出金が TransactionStatusReconciler により fail に確定する（最大 EXPIRE_SECONDS）までは保持する
+TOKEN_SEND_DAILY_TOTAL_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+TOKEN_DISTRIBUTION_TYPES = ['article', 'like', 'tip', 'bonus']
+# トークン付与情報を付与種別毎の合計値（TokenDistributionTotal）に集約するまでの猶予時間。
+# sort_key の順序と書き込みの順序が前後しても集約漏れが生じないよう、作成から猶予時間を経過したもののみを集約する
+TOKEN_DISTRIBUTION_TOTAL_SETTLE_SECONDS = 24 * 60 * 60
+
 ARTICLE_SCORE_INDEX_NAME = 'article_scores'
 ARTICLE_TIP_RANKING_INDEX_NAME = 'tip_ranking'
 TOPIC_INDEX_HASH_KEY = 'topic'
@@ -370,6 +421,16 @@ YAHOO_NONCE_EXPIRATION_MINUTES = 15
 YAHOO_LOGIN_REQUEST_SCOPE = 'openid%20email'
 YAHOO_NONCE_LENGTH = 10
 
+# OpenID Provider のディスカバリドキュメントと公開鍵の保持期間、及び未知の kid による公開鍵の再取得の最短間隔
+OIDC_KEY_CACHE_SECONDS = 60 * 60
+OIDC_KEY_CACHE_MIN_REFRESH_INTERVAL_SECONDS = 60
+
+# 外部プロバイダの API 呼び出しのタイムアウト（接続, 読み込み）と、冪等なリクエストの再試行の設定
+PROVIDER_HTTP_TIMEOUT = (3.05, 10)
+PROVIDER_HTTP_RETRY_COUNT = 2
+PROVIDER_HTTP_RETRY_BACKOFF_FACTOR = 0.3
+PROVIDER_HTTP_RETRY_STATUS_CODES = [500, 502, 503, 504]
+
 FACEBOOK_API_AUTHENTICATE_URL = 'https://www.facebook.com/dialog/oauth'
 FACEBOOK_API_ACCESSTOKEN_URL = 'https://graph.facebook.com/oauth/access_token'
 FACEBOOK_API_USERINFO_URL = 'https://graph.facebook.com/me'
@@ -403,17 +464,35 @@ ETH_ZERO_ADDRESS = '0000000000000000000000000000000000000000'
 ARTICLE_PURCHASE_TYPE = 'purchase'
 ARTICLE_PURCHASED_TYPE = 'purchased'
 ARTICLE_PURCHASE_ERROR_TYPE = 'purchase_error'
+ARTICLE_PURCHASE_NOTIFICATION_TYPES = [
+    ARTICLE_PURCHASE_TYPE,
+    ARTICLE_PURCHASED_TYPE,
+    ARTICLE_PURCHASE_ERROR_TYPE
+]
 
 # Private chain
 HISTORY_RANGE_DAYS = 30
 AVERAGE_BLOCK_TIME = 30
+# コンテナ内で保持するブロックの時刻の件数の上限
+BLOCK_TIMESTAMP_CACHE_SIZE = 65536
 TRANSACTION_CONFIRM_COUNT = 5
 
 AUTHLETE_CLIENT_ENDPOINT = 'https://api.authlete.com/api/client'
 AUTHLETE_SCOPE_READ = 'read'
 AUTHLETE_SCOPE_WRITE = 'write'
+# Authorizer がコンテナ内で保持するイントロスペクション結果の保持期間（トークンの有効期限を超えない）と件数の上限
+AUTHORIZER_INTROSPECTION_CACHE_SECONDS = 300
+AUTHORIZER_INTROSPECTION_CACHE_SIZE = 10000
+# Authlete の API 呼び出しのタイムアウト（接続, 読み込み）
+AUTHLETE_REQUEST_TIMEOUT = (3.05, 10)
 
 ARTICLE_HISTORY_PUT_INTERVAL = 60
+# 記事編集履歴の保存形式。'diff' の場合は一定間隔で作成するスナップショットとの圧縮差分を保存する('full' は本文をそのまま保存)
+ARTICLE_HISTORY_STORAGE_MODE = 'diff'
+# 1 つのスナップショットを基準に差分を保存する version 数の上限
+ARTICLE_HISTORY_SNAPSHOT_INTERVAL = 10
+# 差分形式で保存する本文の最小サイズ。DynamoDB の書き込み単位（1 KB）未満の本文は差分としても書き込み量が減らないため、そのまま保存する
+ARTICLE_HISTORY_DIFF_MIN_BODY_BYTES = 1024
 # chain id を 元に算出される検証用の値。EIP 155
 # 現状 private chain の chain id は 0x2323 だが検証用の値としては 0x4669 もしくは 0x466a が算出される
 # 計算の参考 https://github.com/MyEtherWallet/etherwallet/pull/1979/files#diff-6e71ea384f1daaf034cc00196569e772R72-R82
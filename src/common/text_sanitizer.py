@@ -1,44 +1,58 @@
 import settings
-import bleach
 import os
 import re
+from functools import lru_cache
 from urllib.parse import urlparse
+from bleach.sanitizer import Cleaner
 from jsonschema import ValidationError
 
 
 class TextSanitizer:
+    DIV_ALLOWED_CLASSES = frozenset([
+        'medium-insert-images',
+        'medium-insert-images medium-insert-images-wide',
+        'medium-insert-images medium-insert-images-left',
+        'medium-insert-images medium-insert-images-right',
+        'medium-insert-images medium-insert-images-grid'
+    ])
+    FIGURE_V2_ALLOWED_CLASSES = frozenset([
+        'media',
+        'image',
+        'image image-style-align-right',
+        'image image-style-align-left',
+    ])
+    CODE_V2_CLASS_PATTERN = re.compile('language-')
+
+    # Cleaner は生成時に html5lib のパーサ・シリアライザを構築するため、ポリシー毎に生成したものをコンテナ内で使い回す。
+    # 削減されるのは Cleaner の生成のみで、本文の解析・シリアライズの時間は本文の大きさに比例する
+    # （misc/benchmark_text_sanitizer.py で計測できる）
+    __cleaners = {}
+
     @staticmethod
     def sanitize_text(text):
         if text is None:
             return
 
-        return bleach.clean(text=text, tags=[])
+        return TextSanitizer.__get_cleaner('text').clean(text)
 
     @staticmethod
     def allow_img_src(tag, name, value):
         if name in 'alt':
             return True
         if name == 'src':
-            p = urlparse(value)
+            p = TextSanitizer.parse_url(value)
             return (not p.netloc) or p.netloc == os.environ['DOMAIN']
         return False
 
     @staticmethod
     def allow_div_attributes(tag, name, value):
         if name == 'class':
-            allow_classes = [
-                'medium-insert-images',
-                'medium-insert-images medium-insert-images-wide',
-                'medium-insert-images medium-insert-images-left',
-                'medium-insert-images medium-insert-images-right',
-                'medium-insert-images medium-insert-images-grid'
-            ]
-            if value in allow_classes:
+            if value in TextSanitizer.DIV_ALLOWED_CLASSES:
                 return True
         if name == 'data-alis-iframely-url':
-            p = urlparse(value)
+            p = TextSanitizer.parse_url(value)
             is_url = len(p.scheme) > 0 and len(p.netloc) > 0
-            is_clean = True if bleach.clean(value) == value else False
+            is_clean = True if TextSanitizer.__get_cleaner('default').clean(value) == value else False
             return is_url and is_clean
         if name == 'contenteditable':
             if value == 'false':
@@ -67,42 +81,26 @@ class TextSanitizer:
         if text is None:
             return
 
-        return bleach.clean(
-            text=text,
-            tags=settings.html_allowed_tags,
-            attributes={
-                'a': ['href'],
-                'img': TextSanitizer.allow_img_src,
-                'div': TextSanitizer.allow_div_attributes,
-                'figure': TextSanitizer.allow_figure_contenteditable,
-                'figcaption': TextSanitizer.allow_figcaption_attributes
-            }
-        )
+        return TextSanitizer.__get_cleaner('article_body').clean(text)
 
     @staticmethod
     def allow_img_v2(tag, name, value):
         if name == 'src':
-            p = urlparse(value)
+            p = TextSanitizer.parse_url(value)
             return (not p.netloc) or p.netloc == os.environ['DOMAIN']
         return False
 
     @staticmethod
     def allow_figure_v2(tag, name, value):
         if name == 'class':
-            allow_classes = [
-                'media',
-                'image',
-                'image image-style-align-right',
-                'image image-style-align-left',
-            ]
-            if value in allow_classes:
+            if value in TextSanitizer.FIGURE_V2_ALLOWED_CLASSES:
                 return True
         return False
 
     @staticmethod
     def allow_oembed_v2(tag, name, value):
         if name == 'url':
-            p = urlparse(value)
+            p = TextSanitizer.parse_url(value)
             is_url = len(p.scheme) > 0 and len(p.netloc) > 0
             return is_url
         return False
@@ -110,7 +108,7 @@ class TextSanitizer:
     @staticmethod
     def allow_code_v2(tag, name, value):
         if name == 'class':
-            if re.match("language-", value):
+            if TextSanitizer.CODE_V2_CLASS_PATTERN.match(value):
                 return True
         return False
 
@@ -119,17 +117,7 @@ class TextSanitizer:
         if text is None:
             return
 
-        return bleach.clean(
-            text=text,
-            tags=settings.html_allowed_tags_v2,
-            attributes={
-                'a': ['href'],
-                'img': TextSanitizer.allow_img_v2,
-                'figure': TextSanitizer.allow_figure_v2,
-                'oembed': TextSanitizer.allow_oembed_v2,
-                'code': TextSanitizer.allow_code_v2
-            }
-        )
+        return TextSanitizer.__get_cleaner('article_body_v2').clean(text)
 
     @staticmethod
     def validate_img_url(src):
@@ -137,3 +125,47 @@ class TextSanitizer:
         if p.netloc and p.netloc != os.environ['DOMAIN']:
             raise ValidationError('Not support url for img.')
         return True
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def parse_url(url):
+        # 本文中では同一の画像・埋め込み URL が繰り返し出現するため、パース結果をキャッシュする
+        return urlparse(url)
+
+    @staticmethod
+    def __get_cleaner(policy):
+        cleaner = TextSanitizer.__cleaners.get(policy)
+        if cleaner is None:
+            cleaner = Cleaner(**TextSanitizer.__get_cleaner_params(policy))
+            TextSanitizer.__cleaners[policy] = cleaner
+        return cleaner
+
+    @staticmethod
+    def __get_cleaner_params(policy):
+        if policy == 'text':
+            return {'tags': []}
+        if policy == 'default':
+            return {}
+        if policy == 'article_body':
+            return {
+                'tags': frozenset(settings.html_allowed_tags),
+                'attributes': {
+                    'a': ['href'],
+                    'img': TextSanitizer.allow_img_src,
+                    'div': TextSanitizer.allow_div_attributes,
+                    'figure': TextSanitizer.allow_figure_contenteditable,
+                    'figcaption': TextSanitizer.allow_figcaption_attributes
+                }
+            }
+        if policy == 'article_body_v2':
+            return {
+                'tags': frozenset(settings.html_allowed_tags_v2),
+                'attributes': {
+                    'a': ['href'],
+                    'img': TextSanitizer.allow_img_v2,
+                    'figure': TextSanitizer.allow_figure_v2,
+                    'oembed': TextSanitizer.allow_oembed_v2,
+                    'code': TextSanitizer.allow_code_v2
+                }
+            }
+        raise ValueError('Unknown sanitize policy: {0}'.format(policy))
@@ -0,0 +1,107 @@
+import os
+import time
+import calendar
+import settings
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from jsonschema import ValidationError
+
+
+class TokenSendUtil:
+    # 出金の状態。doing の出金は日次の合計額（TokenSendDailyTotal）に計上済であり、fail に更新する際に差し引く
+    SEND_STATUS_DOING = 'doing'
+    SEND_STATUS_DONE = 'done'
+    SEND_STATUS_FAIL = 'fail'
+
+    @staticmethod
+    def get_target_date(epoch):
+        return time.strftime('%Y-%m-%d', time.gmtime(epoch))
+
+    @staticmethod
+    def get_daily_total_expiration_time(target_date):
+        # 対象日の終了から保持期間を経過した時刻を、日次の合計額の TTL とする
+        target_date_epoch = calendar.timegm(time.strptime(target_date, '%Y-%m-%d'))
+        return target_date_epoch + 24 * 60 * 60 + settings.TOKEN_SEND_DAILY_TOTAL_RETENTION_SECONDS
+
+    @classmethod
+    def create_send_info(cls, dynamodb, send_info):
+        # 出金情報の作成と日次の合計額への計上を同一のトランザクションで行う。
+        # 計上後の合計額が限度額を超える場合は、並行する出金との競合も含めて作成を行わない。
+        # 当日の最初の出金（合計額が未作成）の場合も、出金額が限度額を超える場合は作成を行わない
+        daily_limit = Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE'])
+        try:
+            dynamodb.meta.client.transact_write_items(
+                TransactItems=[
+                    {
+                        'Put': {
+                            'TableName': os.environ['TOKEN_SEND_TABLE_NAME'],
+                            'Item': send_info,
+                            'ConditionExpression': 'attribute_not_exists(user_id)'
+                        }
+                    },
+                    {
+                        'Update': {
+                            'TableName': os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'],
+                            'Key': {'user_id': send_info['user_id'], 'target_date': send_info['target_date']},
+                            'UpdateExpression': 'ADD send_value :send_value SET expiration_time = :expiration_time',
+                            'ConditionExpression': '(attribute_not_exists(send_value) AND :send_value <= :daily_limit) OR '
+                                                   'send_value <= :remaining_value',
+                            'ExpressionAttributeValues': {
+                                ':send_value': send_info['send_value'],
+                                ':daily_limit': daily_limit,
+                                ':remaining_value': daily_limit - Decimal(send_info['send_value']),
+                                ':expiration_time': cls.get_daily_total_expiration_time(send_info['target_date'])
+                            }
+                        }
+                    }
+                ]
+            )
+        except ClientError as e:
+            if cls.__is_conditional_check_failed(e):
+                raise ValidationError('Token withdrawal limit has been exceeded.')
+            raise e
+
+    @classmethod
+    def update_send_status(cls, dynamodb, send_info, send_status):
+        # doing の出金情報のみを更新し、更新した場合は True を返却する（他の処理が更新済の場合は False）
+        # fail に更新する場合は、計上済の出金額を日次の合計額から差し引く
+        update_send_info = {
+            'TableName': os.environ['TOKEN_SEND_TABLE_NAME'],
+            'Key': {'user_id': send_info['user_id'], 'sort_key': send_info['sort_key']},
+            'UpdateExpression': 'SET send_status = :send_status REMOVE uncompleted',
+            'ConditionExpression': 'send_status = :doing',
+            'ExpressionAttributeValues': {':send_status': send_status, ':doing': cls.SEND_STATUS_DOING}
+        }
+        try:
+            if send_status != cls.SEND_STATUS_FAIL:
+                dynamodb.meta.client.update_item(**update_send_info)
+                return True
+
+            dynamodb.meta.client.transact_write_items(
+                TransactItems=[
+                    {'Update': update_send_info},
+                    {
+                        'Update': {
+                            'TableName': os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'],
+                            'Key': {'user_id': send_info['user_id'], 'target_date': send_info['target_date']},
+                            'UpdateExpression': 'ADD send_value :send_value SET expiration_time = :expiration_time',
+                            'ExpressionAttributeValues': {
+                                ':send_value': -Decimal(send_info['send_value']),
+                                ':expiration_time': cls.get_daily_total_expiration_time(send_info['target_date'])
+                            }
+                        }
+                    }
+                ]
+            )
+            return True
+        except ClientError as e:
+            if cls.__is_conditional_check_failed(e):
+                return False
+            raise e
+
+    @staticmethod
+    def __is_conditional_check_failed(client_error):
+        # トランザクションの場合は、条件を満たさなかったことがキャンセルの理由としてメッセージに含まれる
+        error = client_error.response['Error']
+        return error['Code'] == 'ConditionalCheckFailedException' or \
+            (error['Code'] == 'TransactionCanceledException' and 'ConditionalCheckFailed' in error['Message'])
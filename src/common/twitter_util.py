@@ -1,7 +1,8 @@
 import json
 import settings
 from urllib.parse import parse_qsl
-from requests_oauthlib import OAuth1Session
+from requests_oauthlib import OAuth1
+from provider_http_client import ProviderHttpClient
 from exceptions import TwitterOauthError
 
 
@@ -25,14 +26,15 @@ class TwitterUtil:
             response=response
         )
         cognito_user_id = self.__generate_user_id(access_token['user_id'])
-        twitter = OAuth1Session(
-            self.consumer_key,
-            self.consumer_secret,
-            access_token['oauth_token'],
-            access_token['oauth_token_secret'],
-        )
-        response = twitter.get(
-            settings.TWITTER_API_VERIFY_CREDENTIALS_URL + '?include_email=true'
+        response = ProviderHttpClient.get(
+            'twitter',
+            settings.TWITTER_API_VERIFY_CREDENTIALS_URL + '?include_email=true',
+            auth=OAuth1(
+                self.consumer_key,
+                self.consumer_secret,
+                access_token['oauth_token'],
+                access_token['oauth_token_secret']
+            )
         )
         if response.status_code is not 200:
             raise TwitterOauthError(
@@ -47,13 +49,14 @@ class TwitterUtil:
         }
 
     def generate_auth_url(self, callback_url):
-        twitter = OAuth1Session(
-            self.consumer_key,
-            self.consumer_secret
-        )
-        response = twitter.post(
+        response = ProviderHttpClient.post(
+            'twitter',
             settings.TWITTER_API_REQUEST_TOKEN_URL,
-            params={'oauth_callback': callback_url}
+            params={'oauth_callback': callback_url},
+            auth=OAuth1(
+                self.consumer_key,
+                self.consumer_secret
+            )
         )
         if response.status_code is not 200:
             raise TwitterOauthError(
@@ -76,15 +79,16 @@ class TwitterUtil:
         return settings.TWITTER_USERNAME_PREFIX + twitter_user_id
 
     def __get_access_token(self, oauth_token, oauth_verifier):
-        twitter = OAuth1Session(
-            self.consumer_key,
-            self.consumer_secret,
-            oauth_token,
-            oauth_verifier
-        )
-        return twitter.post(
+        return ProviderHttpClient.post(
+            'twitter',
             settings.TWITTER_API_ACCESS_TOKEN_URL,
-            params={'oauth_verifier': oauth_verifier}
+            params={'oauth_verifier': oauth_verifier},
+            auth=OAuth1(
+                self.consumer_key,
+                self.consumer_secret,
+                oauth_token,
+                oauth_verifier
+            )
         )
 
     @staticmethod
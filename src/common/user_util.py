@@ -6,6 +6,8 @@ import settings
 import logging
 import string
 import secrets
+from collections import namedtuple
+from crypto_util import CryptoUtil
 from exceptions import PrivateChainApiError
 from aws_requests_auth.aws_auth import AWSRequestsAuth
 from botocore.exceptions import ClientError
@@ -14,6 +16,10 @@ from not_authorized_error import NotAuthorizedError
 from not_verified_user_error import NotVerifiedUserError
 from boto3.dynamodb.conditions import Key
 
+# 外部プロバイダのユーザーのログインに必要な情報
+# user_id は紐付け済のユーザーが存在する場合はその user_id、存在しない場合は外部プロバイダのユーザーの ID
+ExternalProviderLoginInfo = namedtuple('ExternalProviderLoginInfo', ['exists', 'user_id', 'has_user_id', 'password'])
+
 
 class UserUtil:
 
@@ -69,13 +75,32 @@ class UserUtil:
                 raise e
 
     @staticmethod
-    def get_private_eth_address(cognito, user_id):
+    def get_private_eth_address(dynamodb, cognito, user_id):
         # user_id に紐づく private_eth_address を取得
+        # Cognito の admin API は呼び出し回数の上限が低いため、UserConfigurations を優先して参照する
+        user_configurations_table = dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
+        user_configurations = user_configurations_table.get_item(Key={
+            'user_id': user_id
+        }).get('Item')
+        if user_configurations is not None:
+            # ウォレットの登録（MeConfigurationsWalletAdd）により更新された private_eth_address を優先する
+            if user_configurations.get('private_eth_address') is not None:
+                return user_configurations['private_eth_address']
+            if user_configurations.get('cognito_private_eth_address') is not None:
+                return user_configurations['cognito_private_eth_address']
+
         user_info = UserUtil.get_cognito_user_info(cognito, user_id)
         private_eth_address = [a for a in user_info['UserAttributes'] if a.get('Name') == 'custom:private_eth_address']
         # private_eth_address が存在しないケースは想定していないため、取得出来ない場合は例外とする
         if len(private_eth_address) != 1:
             raise RecordNotFoundError('Record Not Found: private_eth_address')
+
+        # ウォレット未登録のユーザーの private_eth_address は、ウォレットの登録を判定する private_eth_address とは別の属性に保持する
+        user_configurations_table.update_item(
+            Key={'user_id': user_id},
+            UpdateExpression='set cognito_private_eth_address = :cognito_private_eth_address',
+            ExpressionAttributeValues={':cognito_private_eth_address': private_eth_address[0]['Value']}
+        )
         return private_eth_address[0]['Value']
 
     @staticmethod
@@ -94,6 +119,28 @@ class UserUtil:
             else:
                 raise e
 
+    @staticmethod
+    def get_external_provider_login_info(dynamodb, external_provider_user_id):
+        # ExternalProviderUsers の 1 回の読み込みで、登録の有無・紐付け済の user_id・復号したパスワードを取得する
+        external_provider_users_table = dynamodb.Table(os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'])
+        external_provider_user = external_provider_users_table.get_item(Key={
+            'external_provider_user_id': external_provider_user_id
+        }).get('Item')
+        if external_provider_user is None:
+            return ExternalProviderLoginInfo(exists=False, user_id=external_provider_user_id, has_user_id=False,
+                                             password=None)
+
+        has_user_id = 'user_id' in external_provider_user
+        return ExternalProviderLoginInfo(
+            exists=True,
+            user_id=external_provider_user['user_id'] if has_user_id else external_provider_user_id,
+            has_user_id=has_user_id,
+            password=CryptoUtil.decrypt_password(
+                external_provider_user['password'].encode(),
+                external_provider_user['iv'].encode()
+            )
+        )
+
     @staticmethod
     def is_external_provider_user(dynamodb, user_id):
         external_provider_users_table = dynamodb.Table(os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'])
@@ -0,0 +1,132 @@
+import os
+import time
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+
+class VerifiedUserAttributeUtil:
+    # 重複を許可しない検証済みのユーザー属性（email, phone_number）と、その値を登録したユーザーの対応を管理する。
+    # 検証を開始したユーザーは、検証済みの登録とは別に attribute_name を「{属性名}#pending#{user_id}」として登録する
+    ATTRIBUTE_NAMES = ['email', 'phone_number']
+    PENDING_SEPARATOR = '#pending#'
+
+    @staticmethod
+    def get_user_id(dynamodb, attribute_name, attribute_value):
+        verified_user_attributes_table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        item = verified_user_attributes_table.get_item(Key={
+            'attribute_value': attribute_value,
+            'attribute_name': attribute_name
+        }).get('Item')
+        return item['user_id'] if item is not None else None
+
+    @classmethod
+    def get_user_ids(cls, dynamodb, attribute_name, attribute_value):
+        # 検証済みとして登録したユーザーと、検証を開始したユーザーを、登録したユーザー、開始したユーザーの順に返却する
+        return [item['user_id'] for item in cls.__get_registered_items(dynamodb, attribute_name, attribute_value)]
+
+    @classmethod
+    def put_pending(cls, dynamodb, user_id, attribute_name, attribute_value):
+        # 検証の開始を記録する。検証済みの登録は更新しない。
+        # 検証の完了後もログインするまでは検証済みとして登録されないため、期限は設けず、
+        # 検証済みとして登録された時点、または属性の変更等により検証済みとならないことを確認した時点で削除する
+        verified_user_attributes_table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        verified_user_attributes_table.put_item(Item={
+            'attribute_value': attribute_value,
+            'attribute_name': attribute_name + cls.PENDING_SEPARATOR + user_id,
+            'user_id': user_id,
+            'created_at': int(time.time())
+        })
+
+    @classmethod
+    def put_verified_attributes(cls, dynamodb, cognito, user_pool_id, user_id, user_attributes):
+        # Cognito の userAttributes のうち検証済みの属性を登録する（登録済の場合は更新しない）。
+        # 他のユーザーが登録済の場合は、そのユーザーが属性を変更済の場合のみ更新する
+        verified_user_attributes_table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        for attribute_name in cls.ATTRIBUTE_NAMES:
+            attribute_value = user_attributes.get(attribute_name)
+            if not attribute_value or user_attributes.get(attribute_name + '_verified') != 'true':
+                continue
+            registered_user_id = cls.get_user_id(dynamodb, attribute_name, attribute_value)
+            if registered_user_id == user_id:
+                continue
+            if registered_user_id is not None and \
+                    cls.__is_verified_by(cognito, user_pool_id, registered_user_id, attribute_name, attribute_value):
+                continue
+
+            # 確認後に他の処理が更新した場合は、その更新を優先する
+            try:
+                verified_user_attributes_table.put_item(
+                    Item={
+                        'attribute_value': attribute_value,
+                        'attribute_name': attribute_name,
+                        'user_id': user_id,
+                        'created_at': int(time.time())
+                    },
+                    ConditionExpression='attribute_not_exists(user_id) OR user_id = :registered_user_id',
+                    ExpressionAttributeValues={':registered_user_id': registered_user_id}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    continue
+                raise e
+            verified_user_attributes_table.delete_item(Key={
+                'attribute_value': attribute_value,
+                'attribute_name': attribute_name + cls.PENDING_SEPARATOR + user_id
+            })
+
+    @classmethod
+    def exists(cls, dynamodb, cognito, user_pool_id, attribute_name, attribute_value, user_id=None):
+        # user_id 以外のユーザーが attribute_value を検証済みの属性として保持しているかを確認する。
+        # 検証を開始したユーザーは、ログインするまで検証済みとして登録されないため、同様に確認する
+        verified_user_attributes_table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        for item in cls.__get_registered_items(dynamodb, attribute_name, attribute_value):
+            if item['user_id'] == user_id:
+                continue
+            # 登録後に属性が変更されている場合があるため、他のユーザーの登録と重複した場合のみ Cognito の属性を確認する
+            user_attributes = cls.__get_user_attributes(cognito, user_pool_id, item['user_id'])
+            if cls.__is_verified(user_attributes, attribute_name, attribute_value):
+                return True
+            # 検証を開始したユーザーが削除済、または属性を変更済の場合は、検証済みとなることはないため登録を削除する
+            if item['attribute_name'] != attribute_name and \
+                    (user_attributes is None or user_attributes.get(attribute_name) != attribute_value):
+                verified_user_attributes_table.delete_item(Key={
+                    'attribute_value': attribute_value,
+                    'attribute_name': item['attribute_name']
+                })
+        return False
+
+    @classmethod
+    def __get_registered_items(cls, dynamodb, attribute_name, attribute_value):
+        # 検証済みの登録、検証を開始したユーザーの登録の順に返却する。同一ユーザーの登録は先のもののみ返却する
+        verified_user_attributes_table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        items = verified_user_attributes_table.query(
+            KeyConditionExpression=Key('attribute_value').eq(attribute_value) &
+            Key('attribute_name').begins_with(attribute_name)
+        )['Items']
+        registered_items = [item for item in items if item['attribute_name'] == attribute_name]
+        for item in items:
+            if item['attribute_name'].startswith(attribute_name + cls.PENDING_SEPARATOR) and \
+                    item['user_id'] not in [registered_item['user_id'] for registered_item in registered_items]:
+                registered_items.append(item)
+        return registered_items
+
+    @classmethod
+    def __is_verified_by(cls, cognito, user_pool_id, user_id, attribute_name, attribute_value):
+        return cls.__is_verified(cls.__get_user_attributes(cognito, user_pool_id, user_id), attribute_name,
+                                 attribute_value)
+
+    @staticmethod
+    def __get_user_attributes(cognito, user_pool_id, user_id):
+        # ユーザーが存在しない場合は None を返却する
+        try:
+            user_info = cognito.admin_get_user(UserPoolId=user_pool_id, Username=user_id)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'UserNotFoundException':
+                return None
+            raise e
+        return {a['Name']: a['Value'] for a in user_info['UserAttributes']}
+
+    @staticmethod
+    def __is_verified(user_attributes, attribute_name, attribute_value):
+        return user_attributes is not None and user_attributes.get(attribute_name) == attribute_value and \
+            user_attributes.get(attribute_name + '_verified') == 'true'
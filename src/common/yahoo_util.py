@@ -1,11 +1,12 @@
 import json
 import settings
-import requests
 import time
 import jwt
 import hashlib
 import base64
 from nonce_util import NonceUtil
+from oidc_key_cache import OidcKeyCache
+from provider_http_client import ProviderHttpClient
 from exceptions import YahooOauthError
 from exceptions import YahooVerifyException
 from botocore.exceptions import ClientError
@@ -71,7 +72,8 @@ class YahooUtil:
         }
 
         # アクセストークンの取得
-        response = requests.post(
+        response = ProviderHttpClient.post(
+            'yahoo',
             self.endpoints['token_endpoint'],
             headers=headers,
             data='grant_type=authorization_code&redirect_uri=' + self.callback_url + '&code=' + code
@@ -89,21 +91,15 @@ class YahooUtil:
         try:
             start_time = time.time()
             header = jwt.get_unverified_header(id_token)
-            response = requests.get(
-                settings.YAHOO_API_PUBLIC_KEY_URL
-            )
-            if response.status_code is not 200:
-                raise YahooOauthError(
-                    endpoint=settings.YAHOO_API_PUBLIC_KEY_URL,
-                    status_code=response.status_code,
-                    message=response.text
-                )
-            public_keys = json.loads(response.text)
+            public_key = OidcKeyCache.get_public_key(settings.YAHOO_API_PUBLIC_KEY_URL, header.get('kid'),
+                                                     YahooOauthError)
+            if public_key is None:
+                raise YahooVerifyException('id token was invalid since kid was unknown')
 
             # 6,7,8の検証
             decoded_data = jwt.decode(
                 id_token,
-                key=public_keys.get(header['kid']).encode('utf-8'),
+                key=public_key,
                 issuer=self.endpoints['issuer'],
                 audience=self.client_id,
                 algorithms='RS256')
@@ -142,7 +138,8 @@ class YahooUtil:
         return True
 
     def get_user_info(self, access_token):
-        response = requests.get(
+        response = ProviderHttpClient.get(
+            'yahoo',
             self.endpoints['userinfo_endpoint'] + '?access_token=' + access_token
         )
         if response.status_code is not 200:
@@ -162,15 +159,7 @@ class YahooUtil:
         }
 
     def __get_endpoins(self):
-        response = requests.get(settings.YAHOO_API_WELL_KNOWN_URL)
-
-        if response.status_code is not 200:
-            raise YahooOauthError(
-                endpoint=settings.YAHOO_API_WELL_KNOWN_URL,
-                status_code=response.status_code,
-                message=response.text
-            )
-        return json.loads(response.text)
+        return OidcKeyCache.get_discovery_document(settings.YAHOO_API_WELL_KNOWN_URL, YahooOauthError)
 
     def __generate_user_id(self, yahoo_user_id):
         return settings.YAHOO_USERNAME_PREFIX + yahoo_user_id
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from articles_eyecatch import ArticlesEyecatch
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
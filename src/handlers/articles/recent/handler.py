@@ -1,27 +1,9 @@
 # -*- coding: utf-8 -*-
-import os
-
-import boto3
+from clients import Clients
 from articles_recent import ArticlesRecent
-from elasticsearch import Elasticsearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
-
-dynamodb = boto3.resource('dynamodb')
-awsauth = AWS4Auth(
-    os.environ['AWS_ACCESS_KEY_ID'],
-    os.environ['AWS_SECRET_ACCESS_KEY'],
-    os.environ['AWS_REGION'],
-    'es',
-    session_token=os.environ['AWS_SESSION_TOKEN']
-)
 
-elasticsearch = Elasticsearch(
-    hosts=[{'host': os.environ['ELASTIC_SEARCH_ENDPOINT'], 'port': 443}],
-    http_auth=awsauth,
-    use_ssl=True,
-    verify_certs=True,
-    connection_class=RequestsHttpConnection
-)
+dynamodb = Clients.dynamodb()
+elasticsearch = Clients.elasticsearch()
 
 
 def lambda_handler(event, context):
@@ -67,6 +67,9 @@ class ArticlesSupportersIndex(LambdaBase):
             icon_image_url = user.get('icon_image_url')
             if icon_image_url is not None:
                 user_data['icon_image_url'] = icon_image_url
+            icon_image_urls = user.get('icon_image_urls')
+            if icon_image_urls is not None:
+                user_data['icon_image_urls'] = icon_image_urls
             users_with_tip.append(user_data)
 
         sorted_users_with_tip = sorted(users_with_tip, key=lambda item: item['sum_tip_value'], reverse=True)
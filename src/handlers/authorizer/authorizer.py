@@ -1,10 +1,13 @@
+import hashlib
 import json
 import logging
 import os
+import time
 
 import requests
 
 import settings
+from clients import Clients
 
 
 class Authorizer:
@@ -14,6 +17,9 @@ class Authorizer:
         self.event = event
         self.context = context
         self.logger = logging.getLogger()
+        # Authlete への接続とイントロスペクションの結果は Clients に保持し、コンテナ内で使い回す
+        self.session = Clients.get_or_create(('authlete_session',), requests.Session)
+        self.introspection_cache = Clients.get_or_create(('authorizer_introspection_cache',), dict)
 
     def main(self):
         self.logger.setLevel(logging.INFO)
@@ -26,9 +32,16 @@ class Authorizer:
         logging.info("resource_path: " + resource_path)
         logging.info(response)
 
-        if response['action'] == 'OK':
-            return self.__generate_policy(response['subject'], 'Allow', self.event['methodArn'])
-        elif response['action'] in ['BAD_REQUEST', 'FORBIDDEN']:
+        # API Gateway はトークン毎に policy をキャッシュし他の API の呼び出しにも用いるため、
+        # 対象の API のみではなく、トークンのスコープで呼び出し可能な API 全体を対象とした policy を返却する
+        # （FORBIDDEN の場合、対象の API はトークンのスコープで呼び出し可能な API に含まれないため拒否される）
+        if response['action'] in ['OK', 'FORBIDDEN']:
+            token_scopes = response.get('scopes') or (scopes if response['action'] == 'OK' else [])
+            resources = self.__get_scope_resources(self.event['methodArn'], token_scopes)
+            if resources:
+                return self.__generate_policy(response['subject'], 'Allow', resources)
+
+        if response['action'] in ['BAD_REQUEST', 'FORBIDDEN']:
             return self.__generate_policy(response['subject'], 'Deny', self.event['methodArn'])
         elif response['action'] == 'UNAUTHORIZED':
             raise Exception('Unauthorized')
@@ -37,19 +50,46 @@ class Authorizer:
             raise Exception('Internal Server Error')
 
     def __introspect(self, scopes):
+        cache_key = hashlib.sha256(self.event['authorizationToken'].encode('utf-8')).hexdigest() + ':' + \
+            ' '.join(sorted(scopes))
+        cached = self.introspection_cache.get(cache_key)
+        if cached is not None and cached['expires_at'] > time.time():
+            return cached['response']
+
         try:
             data = {'token': self.event["authorizationToken"], 'scopes': scopes}
-            response = requests.post(
+            response = self.session.post(
                 self.AUTHLETE_INTROSPECTION_ENDPOINT,
                 data=json.dumps(data),
                 auth=(os.environ['AUTHLETE_API_KEY'], os.environ['AUTHLETE_API_SECRET']),
-                headers={'Content-Type': 'application/json'}
+                headers={'Content-Type': 'application/json'},
+                timeout=settings.AUTHLETE_REQUEST_TIMEOUT
             )
         except requests.exceptions.RequestException as e:
             logging.info(e)
             raise Exception('Internal Server Error(RequestException)')
 
-        return json.loads(response.text)
+        result = json.loads(response.text)
+        self.__put_introspection_cache(cache_key, result)
+        return result
+
+    def __put_introspection_cache(self, cache_key, response):
+        # 有効なトークンに対する判定結果のみを、トークンの有効期限（expiresAt はミリ秒）を超えない範囲で保持する
+        if response.get('action') not in ['OK', 'FORBIDDEN'] or not response.get('expiresAt'):
+            return
+        now = time.time()
+        expires_at = min(now + settings.AUTHORIZER_INTROSPECTION_CACHE_SECONDS, response['expiresAt'] / 1000)
+        if expires_at <= now:
+            return
+
+        if len(self.introspection_cache) >= settings.AUTHORIZER_INTROSPECTION_CACHE_SIZE:
+            for key in [k for k, v in self.introspection_cache.items() if v['expires_at'] <= now]:
+                del self.introspection_cache[key]
+            # 期限切れのものを除いても上限に達している場合は、最も古いものから削除する
+            while len(self.introspection_cache) >= settings.AUTHORIZER_INTROSPECTION_CACHE_SIZE:
+                del self.introspection_cache[next(iter(self.introspection_cache))]
+
+        self.introspection_cache[cache_key] = {'response': response, 'expires_at': expires_at}
 
     def __generate_policy(self, principal_id, effect, resource):
         return {
@@ -66,6 +106,19 @@ class Authorizer:
             }
         }
 
+    def __get_scope_resources(self, arn, token_scopes):
+        # トークンのスコープで呼び出し可能な API の resource を、__get_required_scopes と同じ区分で返却する
+        if not token_scopes or settings.AUTHLETE_SCOPE_READ not in token_scopes:
+            return []
+
+        arn_elements = arn.split(':', maxsplit=5)
+        api_id, stage = arn_elements[5].split('/', maxsplit=3)[0:2]
+        base = ':'.join(arn_elements[0:5] + ['/'.join([api_id, stage])])
+
+        if settings.AUTHLETE_SCOPE_WRITE in token_scopes:
+            return [base + '/*/*']
+        return [base + '/GET/*', base + '/PUT/me/unread_notification_managers']
+
     def __get_required_scopes(self, http_method, resource_path):
         # 全てのAPIcallには最低でもread権限が必要
         scopes = [settings.AUTHLETE_SCOPE_READ]
@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 import os
-import boto3
 import settings
 from jsonschema import validate, ValidationError
 from cognito_trigger_base import CognitoTriggerBase
 from user_util import UserUtil
 from private_chain_util import PrivateChainUtil
+from verified_user_attribute_util import VerifiedUserAttributeUtil
 
 
 class CustomMessage(CognitoTriggerBase):
@@ -28,15 +28,12 @@ class CustomMessage(CognitoTriggerBase):
            params.get('phone_number_verified', '') != 'true' and \
            self.event['triggerSource'] != 'CustomMessage_ForgotPassword':
             validate(params, self.get_schema())
-            client = boto3.client('cognito-idp')
-            response = client.list_users(
-                    UserPoolId=self.event['userPoolId'],
-                    Filter='phone_number = "%s"' % params['phone_number'],
-                )
-            for user in response['Users']:
-                for attribute in user['Attributes']:
-                    if attribute['Name'] == 'phone_number_verified' and attribute['Value'] == 'true':
-                        raise ValidationError('This phone_number is already exists')
+            if VerifiedUserAttributeUtil.exists(self.dynamodb, self.cognito, self.event['userPoolId'], 'phone_number',
+                                                params['phone_number'], self.event['userName']):
+                raise ValidationError('This phone_number is already exists')
+            # 認証を開始したユーザーとして登録し、ログインにより検証済みとして登録されるまでの重複の確認に用いる
+            VerifiedUserAttributeUtil.put_pending(self.dynamodb, self.event['userName'], 'phone_number',
+                                                  params['phone_number'])
         # セキュリティ観点より、電話番号変更を実行させない。
         # これにより XSS が発生したとしても、電話番号認証が必要な処理は回避が可能
         if self.event['triggerSource'] == 'CustomMessage_VerifyUserAttribute':
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from custom_message import CustomMessage
 
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
-    custommessage = CustomMessage(event=event, context=context, dynamodb=dynamodb)
+    custommessage = CustomMessage(event=event, context=context, dynamodb=dynamodb, cognito=cognito)
     return custommessage.main()
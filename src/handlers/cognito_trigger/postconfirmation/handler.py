@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from post_confirmation import PostConfirmation
 
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
-    postconfirmation = PostConfirmation(event=event, context=context, dynamodb=dynamodb)
+    postconfirmation = PostConfirmation(event=event, context=context, dynamodb=dynamodb, cognito=cognito)
     postconfirmation.main()
     return event
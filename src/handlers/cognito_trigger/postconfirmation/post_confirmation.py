@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 from cognito_trigger_base import CognitoTriggerBase
+from verified_user_attribute_util import VerifiedUserAttributeUtil
 
 
 # Todo: LambdaBase → CognitoTriggerBase への変更
@@ -19,6 +20,10 @@ class PostConfirmation(CognitoTriggerBase):
             'sync_elasticsearch': 1
         }
         users.put_item(Item=user, ConditionExpression='attribute_not_exists(user_id)')
+        # サインアップ時に検証された email を、以降のサインアップでの重複の確認に用いる
+        VerifiedUserAttributeUtil.put_verified_attributes(
+            self.dynamodb, self.cognito, self.event['userPoolId'], self.event['userName'],
+            self.event['request']['userAttributes'])
         if os.environ['BETA_MODE_FLAG'] == "1":
             beta_users = self.dynamodb.Table(os.environ['BETA_USERS_TABLE_NAME'])
             beta_user = {
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from pre_authentication import PreAuthentication
 
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
-    preauthentication = PreAuthentication(event=event, context=context, dynamodb=dynamodb)
+    preauthentication = PreAuthentication(event=event, context=context, dynamodb=dynamodb, cognito=cognito)
     return preauthentication.main()
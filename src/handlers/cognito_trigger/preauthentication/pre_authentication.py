@@ -6,6 +6,7 @@ from lambda_base import LambdaBase
 from jsonschema import ValidationError
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
+from verified_user_attribute_util import VerifiedUserAttributeUtil
 
 
 # Todo: LambdaBase → CognitoTriggerBase への変更
@@ -36,14 +37,14 @@ class PreAuthentication(LambdaBase):
                     'statusCode': 500,
                     'body': json.dumps({'message': 'Internal server error'})
                 }
-        # 通常SignInのケース
-        if external_provider_user is None:
-            return self.event
         # ExternalProviderLoginのケース
-        elif self.__is_external_provider_login_validation_data(params):
-            return self.event
-        else:
+        if external_provider_user is not None and not self.__is_external_provider_login_validation_data(params):
             raise ValidationError('Please login with registered external provider')
+        # 認証後に変更された電話番号等は、ログイン時に検証済みの属性として登録する（通常SignIn・ExternalProviderLogin 共通）
+        VerifiedUserAttributeUtil.put_verified_attributes(
+            self.dynamodb, self.cognito, params['userPoolId'], params['userName'],
+            params['request'].get('userAttributes', {}))
+        return self.event
 
     @staticmethod
     def __is_external_provider_login_validation_data(params):
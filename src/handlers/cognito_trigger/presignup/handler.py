@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from pre_signup import PreSignUp
 
-cognito = boto3.client('cognito-idp')
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
@@ -5,6 +5,7 @@ from jsonschema import validate, ValidationError
 from lambda_base import LambdaBase
 from not_authorized_error import NotAuthorizedError
 from user_util import UserUtil
+from verified_user_attribute_util import VerifiedUserAttributeUtil
 
 
 # Todo: LambdaBase → CognitoTriggerBase への変更
@@ -66,14 +67,12 @@ class PreSignUp(LambdaBase):
                 if UserUtil.check_try_to_register_as_facebook_user(params['userName']):
                     raise ValidationError('This username is not allowed')
 
-            response = self.__filter_users(self.cognito, params)
-            self.__email_exist_check(response)
+            self.__email_exist_check(self.dynamodb, self.cognito, params)
         elif params['triggerSource'] == 'PreSignUp_AdminCreateUser':
             if (params['request'].get('validationData') is not None) and \
                    params['request']['validationData'].get('EXTERNAL_PROVIDER_LOGIN_MARK') == \
                    os.environ['EXTERNAL_PROVIDER_LOGIN_MARK']:
-                response = self.__filter_users(self.cognito, params)
-                self.__email_exist_check(response)
+                self.__email_exist_check(self.dynamodb, self.cognito, params)
             else:
                 raise NotAuthorizedError('Forbidden')
         # 現状CognitoTriggerは'PreSignUp_SignUp','PreSignUp_AdminCreateUser'の２種類のみなので異なるTriggerがリクエストされた場合は例外にする
@@ -96,15 +95,7 @@ class PreSignUp(LambdaBase):
             return self.event
 
     @staticmethod
-    def __email_exist_check(response):
-        for user in response['Users']:
-            for attribute in user['Attributes']:
-                if attribute['Name'] == 'email_verified' and attribute['Value'] == 'true':
-                    raise ValidationError('This email is already exists')
-
-    @staticmethod
-    def __filter_users(cognito, params):
-        return cognito.list_users(
-            UserPoolId=params['userPoolId'],
-            Filter='email = "%s"' % params['request']['userAttributes']['email'],
-        )
+    def __email_exist_check(dynamodb, cognito, params):
+        if VerifiedUserAttributeUtil.exists(dynamodb, cognito, params['userPoolId'], 'email',
+                                            params['request']['userAttributes']['email']):
+            raise ValidationError('This email is already exists')
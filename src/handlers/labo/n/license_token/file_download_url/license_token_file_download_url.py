@@ -1,12 +1,11 @@
 # -*- coding: utf-8 -*-
 import os
 import json
-import boto3
-from botocore.config import Config
 from jsonschema import validate
 from jsonschema import ValidationError
 from web3 import Web3
 from eth_account.messages import encode_defunct
+from clients import Clients
 from lambda_base import LambdaBase
 from parameter_util import ParameterUtil
 
@@ -75,7 +74,7 @@ class LicenseTokenFileDownloadUrl(LambdaBase):
         validate(self.params, self.get_schema())
 
     def exec_main_proc(self):
-        s3_cli = boto3.client('s3', config=Config(signature_version='s3v4'), region_name='ap-northeast-1')
+        s3_cli = Clients.get_client('s3', region_name='ap-northeast-1', signature_version='s3v4')
         bucket = os.environ['LABO_S3_BUCKET_NAME']
 
         # トークンを保持しているかチェック
@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 import os
 import json
-import boto3
-from botocore.config import Config
 from jsonschema import validate
 from jsonschema import ValidationError
+from clients import Clients
 from lambda_base import LambdaBase
 from parameter_util import ParameterUtil
 
@@ -38,7 +37,7 @@ class LicenseTokenFileUploadUrl(LambdaBase):
         validate(self.params, self.get_schema())
 
     def exec_main_proc(self):
-        s3_cli = boto3.client('s3', config=Config(signature_version='s3v4'), region_name='ap-northeast-1')
+        s3_cli = Clients.get_client('s3', region_name='ap-northeast-1', signature_version='s3v4')
 
         bucket = os.environ['LABO_S3_BUCKET_NAME']
         prefix = 'license_token/' + self.params['content_digest'] + '/'
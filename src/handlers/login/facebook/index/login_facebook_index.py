@@ -80,32 +80,15 @@ class LoginFacebookIndex(LambdaBase):
                 body={'message': 'Internal server error'}
             )
 
-        if UserUtil.exists_user(self.dynamodb, user_info['user_id']):
+        login_info = UserUtil.get_external_provider_login_info(self.dynamodb, user_info['user_id'])
+        if login_info.exists:
             try:
-                has_user_id = UserUtil.has_user_id(
-                    dynamodb=self.dynamodb,
-                    external_provider_user_id=user_info['user_id'],
-                )
-                if has_user_id is True:
-                    user_id = UserUtil.get_user_id(
-                        dynamodb=self.dynamodb,
-                        external_provider_user_id=user_info['user_id']
-                    )
-                else:
-                    user_id = user_info['user_id']
-
-                # パスワードの取得、デコード処理追加
-                password = CryptoUtil.get_external_provider_password(
-                    dynamodb=self.dynamodb,
-                    user_id=user_info['user_id']
-                )
-
                 response = UserUtil.external_provider_login(
                     cognito=self.cognito,
                     user_pool_id=os.environ['COGNITO_USER_POOL_ID'],
                     user_pool_app_id=os.environ['COGNITO_USER_POOL_APP_ID'],
-                    user_id=user_id,
-                    password=password,
+                    user_id=login_info.user_id,
+                    password=login_info.password,
                     provider=os.environ['EXTERNAL_PROVIDER_LOGIN_MARK']
                 )
                 return ResponseBuilder.response(
@@ -114,8 +97,8 @@ class LoginFacebookIndex(LambdaBase):
                         'access_token': response['AuthenticationResult']['AccessToken'],
                         'id_token': response['AuthenticationResult']['IdToken'],
                         'refresh_token': response['AuthenticationResult']['RefreshToken'],
-                        'last_auth_user': user_id,
-                        'has_user_id': has_user_id,
+                        'last_auth_user': login_info.user_id,
+                        'has_user_id': login_info.has_user_id,
                         'status': 'login'
                     }
                 )
@@ -1,8 +1,8 @@
-import boto3
+from clients import Clients
 from login_line_authorize_request import LoginLineAuthorizeRequest
 
-cognito = boto3.client('cognito-idp')
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
@@ -2,7 +2,6 @@
 import json
 import os
 import settings
-import requests
 import jwt
 import logging
 import traceback
@@ -13,6 +12,7 @@ from user_util import UserUtil
 from crypto_util import CryptoUtil
 from response_builder import ResponseBuilder
 from exceptions import LineOauthError
+from provider_http_client import ProviderHttpClient
 
 
 class LoginLineAuthorizeRequest(LambdaBase):
@@ -45,28 +45,15 @@ class LoginLineAuthorizeRequest(LambdaBase):
 
         user_id = settings.LINE_USERNAME_PREFIX + decoded_id_token['sub']
 
-        if UserUtil.exists_user(self.dynamodb, user_id):
+        login_info = UserUtil.get_external_provider_login_info(self.dynamodb, user_id)
+        if login_info.exists:
             try:
-                external_provider_users = self.dynamodb.Table(os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'])
-                external_provider_user = external_provider_users.get_item(Key={
-                    'external_provider_user_id': user_id
-                }).get('Item')
-                hash_data = external_provider_user['password']
-                byte_hash_data = hash_data.encode()
-                decoded_iv = external_provider_user['iv']
-                iv = decoded_iv.encode()
-                password = CryptoUtil.decrypt_password(byte_hash_data, iv)
-
-                has_user_id = UserUtil.has_user_id(self.dynamodb, user_id)
-                if external_provider_user is not None and 'user_id' in external_provider_user:
-                    user_id = external_provider_user['user_id']
-
                 response = UserUtil.external_provider_login(
                     cognito=self.cognito,
                     user_pool_id=os.environ['COGNITO_USER_POOL_ID'],
                     user_pool_app_id=os.environ['COGNITO_USER_POOL_APP_ID'],
-                    user_id=user_id,
-                    password=password,
+                    user_id=login_info.user_id,
+                    password=login_info.password,
                     provider=os.environ['EXTERNAL_PROVIDER_LOGIN_MARK']
                 )
 
@@ -76,8 +63,8 @@ class LoginLineAuthorizeRequest(LambdaBase):
                         'access_token': response['AuthenticationResult']['AccessToken'],
                         'id_token': response['AuthenticationResult']['IdToken'],
                         'refresh_token': response['AuthenticationResult']['RefreshToken'],
-                        'last_auth_user': user_id,
-                        'has_user_id': has_user_id,
+                        'last_auth_user': login_info.user_id,
+                        'has_user_id': login_info.has_user_id,
                         'status': 'login'
                     }
                 )
@@ -159,7 +146,7 @@ class LoginLineAuthorizeRequest(LambdaBase):
             'client_id': client_id,
             'client_secret': client_secret
         }
-        response = requests.post(settings.LINE_TOKEN_END_POINT, data=data, headers=headers)
+        response = ProviderHttpClient.post('line', settings.LINE_TOKEN_END_POINT, data=data, headers=headers)
         if response.status_code is not 200:
             raise LineOauthError(
                 endpoint=settings.LINE_TOKEN_END_POINT,
@@ -31,6 +31,13 @@ class MeArticlesDraftsBodyUpdate(LambdaBase):
         )
 
     def exec_main_proc(self):
+        # 保存済みの本文から変更が無い場合(自動保存等)はサニタイズ・保存処理を省略
+        article_content_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_TABLE_NAME'])
+        if DBUtil.is_same_article_body(article_content_table, self.params['article_id'], self.params.get('body')):
+            return {
+                'statusCode': 200
+            }
+
         # 下書き記事を保存
         expression_attribute_values = {
             ':body': TextSanitizer.sanitize_article_body_v2(self.params.get('body'))
@@ -2,11 +2,10 @@ import json
 import os
 import uuid
 
-import boto3
-from botocore.config import Config
 from jsonschema import validate
 
 import settings
+from clients import Clients
 from db_util import DBUtil
 from lambda_base import LambdaBase
 from parameter_util import ParameterUtil
@@ -36,7 +35,7 @@ class MeArticlesImageUploadUrlShow(LambdaBase):
         )
 
     def exec_main_proc(self):
-        s3_cli = boto3.client('s3', config=Config(signature_version='s3v4'), region_name='ap-northeast-1')
+        s3_cli = Clients.get_client('s3', region_name='ap-northeast-1', signature_version='s3v4')
         bucket = os.environ['DIST_S3_BUCKET_NAME']
 
         user_id = self.event['requestContext']['authorizer']['claims']['cognito:username']
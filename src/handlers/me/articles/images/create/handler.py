@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from me_articles_images_create import MeArticlesImagesCreate
 
-dynamodb = boto3.resource('dynamodb')
-s3 = boto3.resource('s3')
+dynamodb = Clients.dynamodb()
+s3 = Clients.s3()
 
 
 def lambda_handler(event, context):
@@ -2,13 +2,11 @@
 import os
 import settings
 import uuid
-import base64
 import json
 from db_util import DBUtil
+from image_util import ImageUtil
 from lambda_base import LambdaBase
-from jsonschema import validate, ValidationError
-from PIL import Image
-from io import BytesIO
+from jsonschema import validate
 from user_util import UserUtil
 
 
@@ -54,10 +52,9 @@ class MeArticlesImagesCreate(LambdaBase):
         }
 
     def validate_image_data(self, image_data):
-        try:
-            Image.open(BytesIO(base64.b64decode(image_data)))
-        except Exception:
-            raise ValidationError('Bad Request: No supported image format')
+        # デコード結果は exec_main_proc でもそのまま利用する
+        self.image_data = ImageUtil.decode_base64_image(image_data)
+        self.image = ImageUtil.open_image(self.image_data)
 
     def validate_params(self):
         UserUtil.verified_phone_and_email(self.event)
@@ -80,28 +77,55 @@ class MeArticlesImagesCreate(LambdaBase):
             if self.headers.get('content-type') is not None else self.headers.get('Content-Type')
         ext = content_type.split('/')[1]
         user_id = self.event['requestContext']['authorizer']['claims']['cognito:username']
-        key = settings.S3_ARTICLES_IMAGES_PATH + \
-            user_id + '/' + self.params['article_id'] + '/' + str(uuid.uuid4()) + '.' + ext
-        image_data = self.__get_save_image_data(base64.b64decode(self.params['article_image']), ext)
+        key_prefix = settings.S3_ARTICLES_IMAGES_PATH + \
+            user_id + '/' + self.params['article_id'] + '/' + str(uuid.uuid4())
+        key = key_prefix + '.' + ext
+        image_data = self.__get_save_image_data(ext)
+        image_width = self.image.size[0]
 
-        self.s3.Bucket(os.environ['DIST_S3_BUCKET_NAME']).put_object(
+        bucket = self.s3.Bucket(os.environ['DIST_S3_BUCKET_NAME'])
+        bucket.put_object(
             Body=image_data,
             Key=key,
             ContentType=content_type
         )
 
+        srcset = [self.__get_image_url(key) + ' ' + str(image_width) + 'w']
+        webp_srcset = []
+        # 縮小画像は Content-Type ではなく、画像データから判定した形式で保存する
+        # アニメーション GIF は縮小すると先頭フレームのみとなるため、縮小画像は生成しない
+        image_format = ImageUtil.get_image_format(self.image_data)
+        if image_format != 'gif':
+            for width, image in ImageUtil.create_variants(self.image, settings.ARTICLE_IMAGE_VARIANT_WIDTHS):
+                variant_key = key_prefix + '_w' + str(width) + '.' + image_format
+                bucket.put_object(Body=ImageUtil.encode(image, image_format), Key=variant_key,
+                                  ContentType='image/' + image_format)
+                webp_key = key_prefix + '_w' + str(width) + '.webp'
+                bucket.put_object(Body=ImageUtil.encode(image, 'webp'), Key=webp_key, ContentType='image/webp')
+
+                srcset.insert(0, self.__get_image_url(variant_key) + ' ' + str(width) + 'w')
+                webp_srcset.insert(0, self.__get_image_url(webp_key) + ' ' + str(width) + 'w')
+
+        response_body = {
+            'image_url': self.__get_image_url(key),
+            'srcset': ', '.join(srcset)
+        }
+        if webp_srcset:
+            response_body['webp_srcset'] = ', '.join(webp_srcset)
+
         return {
             'statusCode': 200,
-            'body': json.dumps({'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key})
+            'body': json.dumps(response_body)
         }
 
-    def __get_save_image_data(self, image_data, ext):
-        image = Image.open(BytesIO(image_data))
-        w, h = image.size
+    @staticmethod
+    def __get_image_url(key):
+        return 'https://' + os.environ['DOMAIN'] + '/' + key
+
+    def __get_save_image_data(self, ext):
+        w, h = self.image.size
         if w <= settings.ARTICLE_IMAGE_MAX_WIDTH and h <= settings.ARTICLE_IMAGE_MAX_HEIGHT:
-            return image_data
+            return self.image_data
 
-        image.thumbnail((settings.ARTICLE_IMAGE_MAX_WIDTH, settings.ARTICLE_IMAGE_MAX_HEIGHT), Image.ANTIALIAS)
-        buf = BytesIO()
-        image.save(buf, format=ext)
-        return buf.getvalue()
+        image = ImageUtil.thumbnail(self.image, (settings.ARTICLE_IMAGE_MAX_WIDTH, settings.ARTICLE_IMAGE_MAX_HEIGHT))
+        return ImageUtil.encode(image, ext)
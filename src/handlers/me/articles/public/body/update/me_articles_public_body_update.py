@@ -32,8 +32,14 @@ class MeArticlesPublicBodyUpdate(LambdaBase):
         )
 
     def exec_main_proc(self):
-        # 編集記事を保存
         article_content_edit_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_TABLE_NAME'])
+        # 編集中の本文から変更が無い場合(自動保存等)はサニタイズ・保存処理を省略
+        if DBUtil.is_same_article_body(article_content_edit_table, self.params['article_id'], self.params.get('body')):
+            return {
+                'statusCode': 200
+            }
+
+        # 編集記事を保存
         expression_attribute_values = {
             ':user_id': self.event['requestContext']['authorizer']['claims']['cognito:username'],
             ':body': TextSanitizer.sanitize_article_body_v2(self.params.get('body'))
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from me_articles_purchase_create import MeArticlesPurchaseCreate
 
-dynamodb = boto3.resource('dynamodb')
-cognito = boto3.client('cognito-idp')
+dynamodb = Clients.dynamodb()
+cognito = Clients.cognito()
 
 
 def lambda_handler(event, context):
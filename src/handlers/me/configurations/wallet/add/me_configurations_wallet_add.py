@@ -49,6 +49,8 @@ class MeConfigurationsWalletAdd(LambdaBase):
         if old_eth_address is not None:
             update_expression += ', old_private_eth_address = :old_private_eth_address'
             expression_attribute_values[':old_private_eth_address'] = old_eth_address
+        # ウォレット未登録時に UserUtil.get_private_eth_address が保持した旧アドレスは不要となるため削除する
+        update_expression += ' remove cognito_private_eth_address'
 
         # ウォレット情報をDBに登録
         user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
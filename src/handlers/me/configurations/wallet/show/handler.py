@@ -1,7 +1,7 @@
-import boto3
+from clients import Clients
 from me_configurations_wallet_show import MeConfigurationsWalletShow
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
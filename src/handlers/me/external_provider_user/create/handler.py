@@ -1,8 +1,8 @@
-import boto3
+from clients import Clients
 from me_external_provider_user_create import MeExternalProviderUserCreate
 
-dynamodb = boto3.resource('dynamodb')
-cognito = boto3.client('cognito-idp')
+dynamodb = Clients.dynamodb()
+cognito = Clients.cognito()
 
 
 def lambda_handler(event, context):
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from me_info_icon_create import MeInfoIconCreate
 
-dynamodb = boto3.resource('dynamodb')
-s3 = boto3.resource('s3')
+dynamodb = Clients.dynamodb()
+s3 = Clients.s3()
 
 
 def lambda_handler(event, context):
@@ -2,12 +2,11 @@
 import os
 import settings
 import uuid
-import base64
 import json
+from concurrent.futures import ThreadPoolExecutor
+from image_util import ImageUtil
 from lambda_base import LambdaBase
-from jsonschema import validate, ValidationError
-from PIL import Image
-from io import BytesIO
+from jsonschema import validate
 
 
 class MeInfoIconCreate(LambdaBase):
@@ -51,10 +50,9 @@ class MeInfoIconCreate(LambdaBase):
         }
 
     def validate_image_data(self, image_data):
-        try:
-            Image.open(BytesIO(base64.b64decode(image_data)))
-        except Exception:
-            raise ValidationError('Bad Request: No supported image format')
+        # デコード結果は exec_main_proc でもそのまま利用する
+        self.image_data = ImageUtil.decode_base64_image(image_data)
+        self.image = ImageUtil.open_image(self.image_data)
 
     def validate_params(self):
         # single
@@ -69,65 +67,86 @@ class MeInfoIconCreate(LambdaBase):
             if self.headers.get('content-type') is not None else self.headers.get('Content-Type')
         ext = content_type.split('/')[1]
         user_id = self.event['requestContext']['authorizer']['claims']['cognito:username']
-        key = settings.S3_INFO_ICON_PATH + \
-            user_id + '/icon/' + str(uuid.uuid4()) + '.' + ext
-        image_data = self.__get_save_image_data(base64.b64decode(self.params['icon_image']), ext)
+        key_prefix = settings.S3_INFO_ICON_PATH + \
+            user_id + '/icon/' + str(uuid.uuid4())
+        key = key_prefix + '.' + ext
+        icon_image = self.__get_icon_image()
 
-        self.s3.Bucket(os.environ['DIST_S3_BUCKET_NAME']).put_object(
-            Body=image_data,
-            Key=key,
-            ContentType=content_type
-        )
+        icon_image_url = self.__get_image_url(key)
+        icon_image_urls = {str(settings.USER_ICON_WIDTH): icon_image_url}
+        save_images = [(key, None, ext, content_type)]
+        # 縮小画像は Content-Type ではなく、画像データから判定した形式で保存する
+        image_format = ImageUtil.get_image_format(self.image_data)
+        for size in settings.USER_ICON_VARIANT_SIZES:
+            # 元画像がサイズ以下の場合は縮小せず、アイコンをそのまま用いる
+            if size >= max(icon_image.size):
+                icon_image_urls[str(size)] = icon_image_url
+                continue
+            variant_key = key_prefix + '_' + str(size) + '.' + image_format
+            icon_image_urls[str(size)] = self.__get_image_url(variant_key)
+            save_images.append((variant_key, size, image_format, 'image/' + image_format))
+
+        # サイズ毎の縮小・エンコード・保存は独立しているため並行して行う。各スレッドでデコードが重複しないよう事前に読み込む
+        if len(save_images) > 1:
+            icon_image.load()
+        with ThreadPoolExecutor(max_workers=len(save_images)) as executor:
+            list(executor.map(lambda save_image: self.__put_icon_image(icon_image, *save_image), save_images))
 
-        icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
-        self.__update_user_info(icon_image_url)
+        self.__update_user_info(icon_image_url, icon_image_urls)
 
         return {
             'statusCode': 200,
-            'body': json.dumps({'icon_image_url': icon_image_url})
+            'body': json.dumps({'icon_image_url': icon_image_url, 'icon_image_urls': icon_image_urls})
         }
 
-    def __update_user_info(self, icon_image_url):
+    @staticmethod
+    def __get_image_url(key):
+        return 'https://' + os.environ['DOMAIN'] + '/' + key
+
+    def __put_icon_image(self, icon_image, key, size, ext, content_type):
+        if size is None:
+            image_data = self.image_data if icon_image is self.image else ImageUtil.encode(icon_image, ext)
+        else:
+            image_data = ImageUtil.encode(ImageUtil.resize_to_fit(icon_image, (size, size)), ext)
+
+        # boto3 の resource はスレッドセーフではないため、client を用いる
+        self.s3.meta.client.put_object(
+            Bucket=os.environ['DIST_S3_BUCKET_NAME'],
+            Body=image_data,
+            Key=key,
+            ContentType=content_type
+        )
+
+    def __update_user_info(self, icon_image_url, icon_image_urls):
         users_table = self.dynamodb.Table(os.environ['USERS_TABLE_NAME'])
 
         users_table.update_item(
             Key={
                 'user_id': self.event['requestContext']['authorizer']['claims']['cognito:username'],
             },
-            UpdateExpression='set icon_image_url=:icon_image_url',
+            UpdateExpression='set icon_image_url=:icon_image_url, icon_image_urls=:icon_image_urls',
             ExpressionAttributeValues={
                 ':icon_image_url': icon_image_url,
+                ':icon_image_urls': icon_image_urls
             }
         )
 
-    def __get_save_image_data(self, image_data, ext):
-        image = Image.open(BytesIO(image_data))
+    def __get_icon_image(self):
+        image = self.image
         w, h = image.size
         if w <= settings.USER_ICON_WIDTH and h <= settings.USER_ICON_HEIGHT:
-            return image_data
+            return image
 
         # resize to icon size
         if w >= h and (h > settings.USER_ICON_HEIGHT):
             resize_rate = h / settings.USER_ICON_HEIGHT
-            image.thumbnail((w / resize_rate, settings.USER_ICON_HEIGHT), Image.ANTIALIAS)
+            image = ImageUtil.thumbnail(image, (w / resize_rate, settings.USER_ICON_HEIGHT))
         elif (h > w) and (w > settings.USER_ICON_WIDTH):
             resize_rate = w / settings.USER_ICON_WIDTH
-            image.thumbnail((settings.USER_ICON_WIDTH, h / resize_rate), Image.ANTIALIAS)
+            image = ImageUtil.thumbnail(image, (settings.USER_ICON_WIDTH, h / resize_rate))
 
         # crop image to square
         w, h = image.size
         crop_width = settings.USER_ICON_WIDTH if w >= settings.USER_ICON_WIDTH else w
         crop_height = settings.USER_ICON_HEIGHT if h >= settings.USER_ICON_HEIGHT else h
-        crop_image = self.__crop_center(image, crop_width, crop_height)
-        buf = BytesIO()
-        crop_image.save(buf, format=ext)
-        return buf.getvalue()
-
-    def __crop_center(self, image_data, crop_width, crop_height):
-        w, h = image_data.size
-        return image_data.crop((
-            (w - crop_width) // 2,
-            (h - crop_height) // 2,
-            (w + crop_width) // 2,
-            (h + crop_height) // 2
-        ))
+        return ImageUtil.crop_center(image, crop_width, crop_height)
@@ -1,7 +1,7 @@
-import boto3
+from clients import Clients
 from me_users_fraud_create import MeUsersFraudCreate
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
@@ -1,8 +1,8 @@
-import boto3
+from clients import Clients
 
 from me_wallet_distributed_tokens_show import MeWalletDistributedTokensShow
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
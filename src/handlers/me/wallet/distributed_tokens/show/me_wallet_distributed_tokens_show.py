@@ -1,7 +1,10 @@
 import json
 import os
+import time
 
+import settings
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 
 from db_util import DBUtil
 from decimal_encoder import DecimalEncoder
@@ -18,24 +21,64 @@ class MeWalletDistributedTokensShow(LambdaBase):
     def exec_main_proc(self):
         user_id = self.event['requestContext']['authorizer']['claims']['cognito:username']
 
-        token_distribution_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TABLE_NAME'])
-
-        query_params = {
-            'IndexName': 'user_id-sort_key-index',
-            'KeyConditionExpression': Key('user_id').eq(user_id)
-        }
-        items = DBUtil.query_all_items(token_distribution_table, query_params)
+        # 集約済の合計値に、集約済の sort_key より新しいトークン付与情報のみを加算する
+        total = self.__get_distribution_total(user_id)
+        last_sort_key = total.get('last_sort_key', 0)
+        items = self.__get_distributions_after(user_id, last_sort_key)
 
-        result = {
-            'article': 0,
-            'like': 0,
-            'tip': 0,
-            'bonus': 0
-        }
+        result = {distribution_type: total.get(distribution_type, 0) for distribution_type in settings.TOKEN_DISTRIBUTION_TYPES}
         for item in items:
             result[item['distribution_type']] += item['quantity']
 
+        self.__compact_distribution_total(user_id, last_sort_key, items)
+
         return {
             'statusCode': 200,
             'body': json.dumps(result, cls=DecimalEncoder)
         }
+
+    def __get_distribution_total(self, user_id):
+        token_distribution_total_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TOTAL_TABLE_NAME'])
+        return token_distribution_total_table.get_item(Key={'user_id': user_id}).get('Item', {})
+
+    def __get_distributions_after(self, user_id, sort_key):
+        token_distribution_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TABLE_NAME'])
+
+        query_params = {
+            'IndexName': 'user_id-sort_key-index',
+            'KeyConditionExpression': Key('user_id').eq(user_id) & Key('sort_key').gt(sort_key)
+        }
+        return DBUtil.query_all_items(token_distribution_table, query_params)
+
+    def __compact_distribution_total(self, user_id, last_sort_key, items):
+        # 猶予時間を経過したトークン付与情報を合計値に集約し、次回以降の取得対象から除外する
+        settled_sort_key = int((time.time() - settings.TOKEN_DISTRIBUTION_TOTAL_SETTLE_SECONDS) * 1000000)
+        settled_items = [item for item in items if item['sort_key'] <= settled_sort_key]
+        if not settled_items:
+            return
+
+        quantities = {distribution_type: 0 for distribution_type in settings.TOKEN_DISTRIBUTION_TYPES}
+        for item in settled_items:
+            quantities[item['distribution_type']] += item['quantity']
+
+        update_expression = 'SET last_sort_key = :last_sort_key ADD ' + \
+            ', '.join(['#{0} :{0}'.format(distribution_type) for distribution_type in quantities])
+        expression_attribute_values = {':{0}'.format(k): v for k, v in quantities.items()}
+        expression_attribute_values.update({
+            ':last_sort_key': max([item['sort_key'] for item in settled_items]),
+            ':prev_sort_key': last_sort_key
+        })
+
+        token_distribution_total_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TOTAL_TABLE_NAME'])
+        try:
+            # 並行するリクエストが先に集約した場合は、二重に加算しないよう更新を行わない
+            token_distribution_total_table.update_item(
+                Key={'user_id': user_id},
+                UpdateExpression=update_expression,
+                ConditionExpression='attribute_not_exists(last_sort_key) OR last_sort_key = :prev_sort_key',
+                ExpressionAttributeNames={'#{0}'.format(k): k for k in quantities},
+                ExpressionAttributeValues=expression_attribute_values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
-import logging
 import os
-import traceback
 from decimal import Decimal
 
 import settings
@@ -37,13 +35,19 @@ class MeWalletTip(LambdaBase):
 
         # single
         validate(self.params, self.get_schema())
+        # 署名の検証・パラメータの検証で共有するため、raw_transaction は 1 回のみ decode する
+        self.signed_transactions = {
+            key: PrivateChainUtil.parse_raw_transaction(self.params[key])
+            for key in ['tip_signed_transaction', 'burn_signed_transaction']
+            if self.params.get(key) is not None
+        }
         # 署名が正しいこと
         PrivateChainUtil.validate_raw_transaction_signature(
-            self.params['tip_signed_transaction'],
+            self.signed_transactions['tip_signed_transaction'],
             self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
         )
         PrivateChainUtil.validate_raw_transaction_signature(
-            self.params['burn_signed_transaction'],
+            self.signed_transactions['burn_signed_transaction'],
             self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
         )
 
@@ -54,6 +58,11 @@ class MeWalletTip(LambdaBase):
             self.params['article_id'],
             status='public'
         )
+        # 前回の投げ銭・記事購入のバーン処理が完了していること
+        DBUtil.validate_no_pending_burn(
+            self.dynamodb,
+            self.event['requestContext']['authorizer']['claims']['cognito:username']
+        )
 
     def exec_main_proc(self):
         ################
@@ -64,7 +73,7 @@ class MeWalletTip(LambdaBase):
         article_info = article_info_table.get_item(Key={'article_id': self.params['article_id']}).get('Item')
         # eth_address
         from_user_eth_address = self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
-        to_user_eth_address = UserUtil.get_private_eth_address(self.cognito, article_info['user_id'])
+        to_user_eth_address = UserUtil.get_private_eth_address(self.dynamodb, self.cognito, article_info['user_id'])
         # transaction_count
         transaction_count = PrivateChainUtil.get_transaction_count(from_user_eth_address)
 
@@ -78,14 +87,14 @@ class MeWalletTip(LambdaBase):
         # validate raw_transaction
         # tip
         tip_data = PrivateChainUtil.get_data_from_raw_transaction(
-            self.params['tip_signed_transaction'],
+            self.signed_transactions['tip_signed_transaction'],
             transaction_count
         )
         PrivateChainUtil.validate_erc20_transfer_data(tip_data, to_user_eth_address)
         # burn
         transaction_count = PrivateChainUtil.increment_transaction_count(transaction_count)
         burn_data = PrivateChainUtil.get_data_from_raw_transaction(
-            self.params['burn_signed_transaction'],
+            self.signed_transactions['burn_signed_transaction'],
             transaction_count
         )
         PrivateChainUtil.validate_erc20_transfer_data(burn_data, '0x' + os.environ['BURN_ADDRESS'])
@@ -105,20 +114,9 @@ class MeWalletTip(LambdaBase):
         # send_raw_transaction
         #######################
         transaction_hash = PrivateChainUtil.send_raw_transaction(self.params['tip_signed_transaction'])
-        burn_transaction = None
-        try:
-            # 投げ銭が成功した時のみバーン処理を行う
-            if PrivateChainUtil.is_transaction_completed(transaction_hash):
-                # バーンのトランザクション処理
-                burn_transaction = PrivateChainUtil.send_raw_transaction(self.params['burn_signed_transaction'])
-            else:
-                logging.info('Burn was not executed because tip transaction was uncompleted.')
-        except Exception as err:
-            logging.fatal(err)
-            traceback.print_exc()
-        finally:
-            # create tip info
-            self.__create_tip_info(transaction_hash, tip_value, burn_transaction, article_info)
+        # create tip info
+        # 投げ銭が成功した時のみ行うバーン処理は、投げ銭の完了を確認した TransactionStatusReconciler が行う
+        self.__create_tip_info(transaction_hash, tip_value, article_info)
 
         return {
             'statusCode': 200
@@ -134,7 +132,7 @@ class MeWalletTip(LambdaBase):
             return True
         return False
 
-    def __create_tip_info(self, transaction_hash, tip_value, burn_transaction, article_info):
+    def __create_tip_info(self, transaction_hash, tip_value, article_info):
         tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
 
         sort_key = TimeUtil.generate_sort_key()
@@ -149,7 +147,9 @@ class MeWalletTip(LambdaBase):
             'article_id': self.params['article_id'],
             'article_title': article_info['title'],
             'transaction': transaction_hash,
-            'burn_transaction': burn_transaction,
+            'burn_transaction': None,
+            'burn_signed_transaction': self.params['burn_signed_transaction'],
+            'burn_uncompleted': 1,
             'uncompleted': 1,
             'sort_key': sort_key,
             'target_date': time.strftime('%Y-%m-%d', time.gmtime(epoch)),
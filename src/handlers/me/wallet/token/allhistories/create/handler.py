@@ -1,13 +1,28 @@
 # -*- coding: utf-8 -*-
-import boto3
+from clients import Clients
 from me_wallet_token_allhistories_create import MeWalletTokenAllhistoriesCreate
+from token_history_export_worker import TokenHistoryExportWorker
 
-cognito = boto3.client('cognito-idp')
-dynamodb = boto3.resource('dynamodb')
-s3 = boto3.resource('s3')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
+s3 = Clients.s3()
 
 
 def lambda_handler(event, context):
     me_wallet_token_allhistories_create = MeWalletTokenAllhistoriesCreate(event=event, context=context,
                                                                           dynamodb=dynamodb, s3=s3, cognito=cognito)
     return me_wallet_token_allhistories_create.main()
+
+
+def index_handler(event, context):
+    # 利用の多いユーザーの全トークン履歴のインデックスを事前に最新のブロックまで更新する
+    # event: {"user_ids": ["user_id", ...]}
+    me_wallet_token_allhistories_create = MeWalletTokenAllhistoriesCreate(event=event, context=context,
+                                                                          dynamodb=dynamodb, s3=s3, cognito=cognito)
+    for user_id in event['user_ids']:
+        me_wallet_token_allhistories_create.update_token_history_index(user_id)
+
+
+def worker_handler(event, context):
+    # 登録された全トークン履歴の csv 出力ジョブを処理する（定期実行）
+    return TokenHistoryExportWorker(dynamodb=dynamodb, s3=s3, cognito=cognito).run()
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
+import json
 import settings
 import os
+import io
+import csv
 import time
 import hashlib
-import boto3
-import io
 import pytz
-from decimal import Decimal, ROUND_FLOOR
 from datetime import datetime
+from botocore.exceptions import ClientError
+from block_time_util import BlockTimeUtil
+from clients import Clients
+from s3_multipart_writer import S3MultipartWriter
 from time_util import TimeUtil
 from user_util import UserUtil
 from web3 import Web3, HTTPProvider
@@ -17,7 +21,17 @@ from record_not_found_error import RecordNotFoundError
 
 class MeWalletTokenAllhistoriesCreate(LambdaBase):
     web3 = None
+    block_time_util = None
+    date_texts = None
+    time_texts = None
+    contract_addresses = None
     jst = pytz.timezone('Asia/Tokyo')
+    TRANSFER_EVENT_TOPIC = Web3.sha3(text='Transfer(address,address,uint256)').hex()
+    MINT_EVENT_TOPIC = Web3.sha3(text='Mint(address,uint256)').hex()
+    INDEX_LAST_BLOCK_METADATA_KEY = 'last-scanned-block'
+    WEI_PER_MILLI_ETHER = 10 ** 15
+    # 日本時間は夏時間が無いため、UTC からの固定の時差で時刻を算出する
+    JST_OFFSET_SECONDS = 9 * 60 * 60
 
     def get_schema(self):
         pass
@@ -30,32 +44,72 @@ class MeWalletTokenAllhistoriesCreate(LambdaBase):
         UserUtil.validate_private_eth_address(self.dynamodb, user_id)
 
     def exec_main_proc(self):
-        # 必要なパラメーターを取得する
-        self.web3 = Web3(HTTPProvider(os.environ['PRIVATE_CHAIN_OPERATION_URL']))
-        address = self.web3.toChecksumAddress(os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS'])
+        # csv の作成は時間を要するためワーカーが非同期に行う。ここではジョブの登録のみを行い、結果は通知で伝える
         user_id = self.event['requestContext']['authorizer']['claims']['cognito:username']
-        eoa = self.__get_user_private_eth_address(user_id)
-
-        # csvファイルを生成するためのdataの格納先の生成
-        data_for_csv = io.StringIO()
+        # identityIdの項目はeventの中に存在するが、IAM認証でないと取得できないためlambda側でidtokenを使い取得する実装をした
+        # ワーカーは idtoken を持たないため、リクエスト時に取得してジョブに保持する
+        job_id = self.__enqueue_job(user_id, self.__get_user_cognito_identity_id())
 
-        # private chainからトークンのTransferとMintのデータを取得し、csvに書き込むためのデータを準備する
-        self.setTransferHistoryToData(address, eoa, data_for_csv)
-        self.setMintHistoryToData(address, eoa, data_for_csv)
+        return {
+            'statusCode': 202,
+            'body': json.dumps({'job_id': job_id})
+        }
 
-        # If the file is empty, then error will be raised
-        if len(data_for_csv.getvalue()) == 0:
-            raise RecordNotFoundError('Record Not Found')
+    def export_token_history(self, user_id, identity_id):
+        # csv を出力し、ダウンロード用の url を返却する。通知はジョブの終了を記録した後にワーカーが行う
+        # 必要なパラメーターを取得する
+        self.__init_web3()
+        eoa = self.__get_user_private_eth_address(user_id)
 
-        # 生成したデータをs3にアップロードし、生成したcsvのurlをannounce_urlとしてリターンする
-        announce_url = self.extract_file_to_s3(user_id, data_for_csv)
+        # 前回までに走査したブロックの履歴はインデックスから複製し、private chainからはそれ以降のブロックのみを取得する
+        bucket = os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET']
+        key = self.__get_csv_key(user_id, identity_id)
+        index_object = self.s3.Object(bucket, self.__get_index_key(eoa))
+        latest_block = self.web3.eth.blockNumber
+        last_block, index_body = self.__get_index(index_object)
+        metadata = {self.INDEX_LAST_BLOCK_METADATA_KEY: str(latest_block)}
+        with S3MultipartWriter(self.s3.Object(bucket, key), metadata=metadata) as data_for_csv:
+            self.__write_token_history(eoa, index_body, last_block, latest_block, data_for_csv)
+
+            # If the file is empty, then error will be raised
+            if data_for_csv.size == 0:
+                # 履歴が存在しない場合も、走査済のブロックはインデックスに記録する
+                index_object.put(Body=b'', Metadata=metadata)
+                raise RecordNotFoundError('Record Not Found')
+
+        # 出力した csv を新たなインデックスとする（S3 上での複製のため、データの再送信は行わない）
+        if latest_block > last_block:
+            index_object.copy_from(CopySource={'Bucket': bucket, 'Key': key})
+
+        return 'https://' + bucket + '.s3-ap-northeast-1.amazonaws.com/' + key
+
+    def notify_export_result(self, user_id, status, announce_url=None):
+        # ジョブの結果をユーザーに通知する。完了時は csv の url を通知する
+        if status == settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED:
+            announce_body = '全トークン履歴のcsvのダウンロード準備が完了しました。本通知をクリックしてダウンロードしてください。'
+        elif status == settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND:
+            announce_body = 'トークンの履歴が存在しないため、全トークン履歴のcsvは作成されませんでした。'
+        else:
+            announce_body = '全トークン履歴のcsvの作成に失敗しました。時間をおいて再度お試しください。'
+        self.__notification(user_id, announce_body, announce_url)
 
-        # ユーザーにcsvのurlを通知する
-        self.__notification(user_id, announce_url)
+    def update_token_history_index(self, user_id):
+        # csv の出力を行わずにインデックスのみを最新のブロックまで更新する（利用の多いユーザーの事前更新用）
+        self.__init_web3()
+        eoa = self.__get_user_private_eth_address(user_id)
 
-        return {
-            'statusCode': 200
-        }
+        bucket = os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET']
+        index_object = self.s3.Object(bucket, self.__get_index_key(eoa))
+        latest_block = self.web3.eth.blockNumber
+        last_block, index_body = self.__get_index(index_object)
+        if latest_block <= last_block:
+            if index_body is not None:
+                index_body.close()
+            return
+
+        metadata = {self.INDEX_LAST_BLOCK_METADATA_KEY: str(latest_block)}
+        with S3MultipartWriter(index_object, metadata=metadata) as data_for_index:
+            self.__write_token_history(eoa, index_body, last_block, latest_block, data_for_index)
 
     def padLeft(self, eoa):
         return '0x000000000000000000000000' + eoa[2:]
@@ -64,9 +118,7 @@ class MeWalletTokenAllhistoriesCreate(LambdaBase):
         return '0x' + eoa[26:]
 
     def add_type(self, from_eoa, to_eoa, eoa):
-        alis_bridge_contract_address = os.environ['PRIVATE_CHAIN_BRIDGE_ADDRESS']
-        # ssm上のBURN_ADDRESSは0xを省略しているため
-        burn_address = '0x' + os.environ['BURN_ADDRESS']
+        alis_bridge_contract_address, burn_address = self.__get_contract_addresses()
 
         if from_eoa == eoa and to_eoa == alis_bridge_contract_address:
             return 'withdraw'
@@ -87,95 +139,177 @@ class MeWalletTokenAllhistoriesCreate(LambdaBase):
 
     def filter_transfer_data(self, transfer_result, eoa, data_for_csv):
         # 取得したデータのうち、csvファイルに書き込むデータのみを抽出し、data_for_csvに成型して書き込む
-        for i in range(len(transfer_result)):
-            time = datetime.fromtimestamp(
-                self.web3.eth.getBlock(transfer_result[i]['blockNumber'])['timestamp']).astimezone(self.jst)
-            strtime = datetime.strftime(time, "%Y/%m/%d %H:%M:%S")
-            transactionHash = transfer_result[i]['transactionHash'].hex()
-            type = self.add_type(self.removeLeft(transfer_result[i]['topics'][1].hex()),
-                                 self.removeLeft(transfer_result[i]['topics'][2].hex()), eoa)
-            amountEth = Decimal(str(self.web3.fromWei(int(transfer_result[i]['data'], 16), 'ether'))).quantize(
-                Decimal("0.001"), rounding=ROUND_FLOOR)
-            amountWei = int(transfer_result[i]['data'], 16)
-            content_text = strtime + ',' + transactionHash + ',' + type + ',' + str(amountEth) + ',' \
-                + str(amountWei) + '\n'
-            data_for_csv.write(content_text)
-
-    def setTransferHistoryToData(self, address, eoa, data_for_csv):
+        transfers = [('0x' + bytes.hex(log['topics'][1])[24:], '0x' + bytes.hex(log['topics'][2])[24:])
+                     for log in transfer_result]
+        self.__write_rows(transfer_result, transfers, eoa, data_for_csv)
+
+    def setTokenHistoryToData(self, address, eoa, data_for_csv, from_block, latest_block):
+        # チェーン全体を一度に取得せず、ブロックの範囲毎に取得・書き込みを行うことで、保持するログを一定量に抑える
+        block_range = settings.TOKEN_HISTORY_EXPORT_BLOCK_RANGE
+        while from_block <= latest_block:
+            to_block = min(from_block + block_range - 1, latest_block)
+            log_count = self.setTransferHistoryToData(address, eoa, data_for_csv, from_block, to_block)
+            log_count += self.setMintHistoryToData(address, eoa, data_for_csv, from_block, to_block)
+            from_block = to_block + 1
+
+            # ログが多い範囲では範囲を狭め、少ない範囲では広げることで、1 回あたりの取得件数と RPC の回数を抑える
+            if log_count > settings.TOKEN_HISTORY_EXPORT_TARGET_LOG_COUNT:
+                block_range = max(block_range // 2, settings.TOKEN_HISTORY_EXPORT_MIN_BLOCK_RANGE)
+            elif log_count < settings.TOKEN_HISTORY_EXPORT_TARGET_LOG_COUNT // 4:
+                block_range = min(block_range * 2, settings.TOKEN_HISTORY_EXPORT_MAX_BLOCK_RANGE)
+
+    def setTransferHistoryToData(self, address, eoa, data_for_csv, from_block, to_block):
         # topics[0]の値がERC20のTransferイベントに一致し、topics[1](from)の値が今回データを生成するEoAにマッチするものを取得
-        fromfilter = self.web3.eth.filter({
+        transfer_result_from = self.web3.eth.getLogs({
             "address": address,
-            "fromBlock": 1,
-            "toBlock": 'latest',
-            "topics": [self.web3.sha3(text="Transfer(address,address,uint256)").hex(),
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [self.TRANSFER_EVENT_TOPIC,
                        self.padLeft(eoa)
                        ],
         })
+        self.filter_transfer_data(transfer_result_from, eoa, data_for_csv)
 
         # topics[0]の値がERC20のTransferイベントに一致し、topics[2](to)の値が今回データを生成するEoAにマッチするものを取得
-        tofilter = self.web3.eth.filter({
+        transfer_result_to = self.web3.eth.getLogs({
             "address": address,
-            "fromBlock": 1,
-            "toBlock": 'latest',
-            "topics": [self.web3.sha3(text="Transfer(address,address,uint256)").hex(),
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [self.TRANSFER_EVENT_TOPIC,
                        None,
                        self.padLeft(eoa)
                        ],
         })
-
-        # filterしたデータをすべて取得するメソッドを実行後、必要なデータだけをcsvに書き込むためのfilterを実行する
-        transfer_result_from = fromfilter.get_all_entries()
-        self.filter_transfer_data(transfer_result_from, eoa, data_for_csv)
-        transfer_result_to = tofilter.get_all_entries()
         self.filter_transfer_data(transfer_result_to, eoa, data_for_csv)
 
+        return len(transfer_result_from) + len(transfer_result_to)
+
     def filter_mint_data(self, mint_result, eoa, data_for_csv):
         # 取得したデータのうち、csvファイルに書き込むデータのみを抽出し、data_for_csvに成型して書き込む
-        for i in range(len(mint_result)):
-            time = datetime.fromtimestamp(
-                self.web3.eth.getBlock(mint_result[i]['blockNumber'])['timestamp']).astimezone(self.jst)
-            strtime = time.strftime("%Y/%m/%d %H:%M:%S")
-            transactionHash = mint_result[i]['transactionHash'].hex()
-            # mintデータの場合はfromを'---'に設定し、typeを判別している
-            type = self.add_type('---', self.removeLeft(mint_result[i]['topics'][1].hex()), eoa)
-            amountEth = Decimal(str(self.web3.fromWei(int(mint_result[i]['data'], 16), 'ether'))).quantize(
-                Decimal("0.001"), rounding=ROUND_FLOOR)
-            amountWei = int(mint_result[i]['data'], 16)
-            content_text = strtime + ',' + transactionHash + ',' + type + ',' + str(amountEth) + ','\
-                + str(amountWei) + '\n'
-            data_for_csv.write(content_text)
-
-    def setMintHistoryToData(self, address, eoa, data_for_csv):
+        # mintデータの場合はfromを'---'に設定し、typeを判別している
+        transfers = [('---', '0x' + bytes.hex(log['topics'][1])[24:]) for log in mint_result]
+        self.__write_rows(mint_result, transfers, eoa, data_for_csv)
+
+    def setMintHistoryToData(self, address, eoa, data_for_csv, from_block, to_block):
         # topics[0]の値がMintに一致し、topics[1]の値が今回データを生成するEoAにマッチするものを取得
-        to_filter = self.web3.eth.filter({
+        mint_result = self.web3.eth.getLogs({
             "address": address,
-            "fromBlock": 1,
-            "toBlock": 'latest',
-            "topics": [self.web3.sha3(text="Mint(address,uint256)").hex(),
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [self.MINT_EVENT_TOPIC,
                        self.padLeft(eoa)
                        ],
         })
-
-        # filterしたデータをすべて取得するメソッドを実行後、必要なデータだけをcsvに書き込むためのfilterを実行する
-        mint_result = to_filter.get_all_entries()
         self.filter_mint_data(mint_result, eoa, data_for_csv)
 
-    def extract_file_to_s3(self, user_id, data_for_csv):
-        bucket = os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET']
-        # identityIdの項目はeventの中に存在するが、IAM認証でないと取得できないためlambda側でidtokenを使い取得する実装をした
-        identityId = self.__get_user_cognito_identity_id()
-        key = 'private/' + identityId + '/' + user_id + '_' + datetime.now().astimezone(self.jst).strftime(
-            '%Y-%m-%d-%H-%M-%S') + '.csv'
-        self.upload_file(bucket, key, data_for_csv.getvalue())
+        return len(mint_result)
 
-        # announce_urlに生成したcsvのurlを渡す
-        announce_url = 'https://' + bucket + '.s3-ap-northeast-1.amazonaws.com/' + key
-        return announce_url
+    def __init_web3(self):
+        self.web3 = Web3(HTTPProvider(os.environ['PRIVATE_CHAIN_OPERATION_URL']))
+        # 同一ブロックのログや、以前の出力で取得済のブロックについては、ブロックの取得を行わない
+        self.block_time_util = BlockTimeUtil(lambda block_number: self.web3.eth.getBlock(block_number)['timestamp'])
+        self.date_texts = {}
+        self.time_texts = {}
+
+    def __write_token_history(self, eoa, index_body, last_block, latest_block, data_for_csv):
+        # インデックスの内容（last_block までの履歴）を書き込んだ後、last_block 以降のブロックの履歴を追記する
+        if index_body is not None:
+            for chunk in iter(lambda: index_body.read(S3MultipartWriter.MIN_PART_SIZE), b''):
+                data_for_csv.write_bytes(chunk)
+
+        address = self.web3.toChecksumAddress(os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS'])
+        self.setTokenHistoryToData(address, eoa, data_for_csv, last_block + 1, latest_block)
+
+    def __get_index_key(self, eoa):
+        return settings.TOKEN_HISTORY_INDEX_S3_PREFIX + eoa.lower() + '.csv'
+
+    def __get_index(self, index_object):
+        # 走査済のブロックと内容が食い違わないよう、メタデータと内容は 1 回の get で取得する
+        # インデックスが存在しない場合は、全てのブロックを走査対象とする
+        try:
+            response = index_object.get()
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return 0, None
+            raise
+        return int(response['Metadata'].get(self.INDEX_LAST_BLOCK_METADATA_KEY, 0)), response['Body']
+
+    def __write_rows(self, logs, transfers, eoa, data_for_csv):
+        # ログの配列単位で各列をまとめて生成し、csv モジュールで成型した結果を 1 回で書き込む
+        # topics は removeLeft と同様に末尾 20 バイトをアドレスとし、種別は送受信者の組み合わせ毎に 1 回のみ判定する
+        types = {transfer: self.add_type(transfer[0], transfer[1], eoa) for transfer in set(transfers)}
+        amounts = [int(log['data'], 16) for log in logs]
+        rows = zip(
+            [self.__get_block_time_text(log['blockNumber']) for log in logs],
+            ['0x' + bytes.hex(log['transactionHash']) for log in logs],
+            [types[transfer] for transfer in transfers],
+            [self.__get_eth_amount_text(amount) for amount in amounts],
+            amounts
+        )
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator='\n').writerows(rows)
+        data_for_csv.write(buf.getvalue())
+
+    def __get_eth_amount_text(self, amount_wei):
+        # wei を ether 単位の小数点以下 3 桁（切り捨て）で表す。Decimal を介さず整数演算のみで算出する
+        return '{0}.{1:03d}'.format(*divmod(amount_wei // self.WEI_PER_MILLI_ETHER, 1000))
+
+    def __get_contract_addresses(self):
+        # 行毎に環境変数を参照しないよう、初回の参照時に保持する
+        if self.contract_addresses is None:
+            # ssm上のBURN_ADDRESSは0xを省略しているため
+            self.contract_addresses = (os.environ['PRIVATE_CHAIN_BRIDGE_ADDRESS'], '0x' + os.environ['BURN_ADDRESS'])
+        return self.contract_addresses
+
+    def __get_block_time_text(self, block_number):
+        # datetime を介さずに "%Y/%m/%d %H:%M:%S"（日本時間）の形式とする。日付・時刻の文字列はそれぞれ 1 回のみ生成する
+        days, seconds = divmod(self.block_time_util.get_timestamp(block_number) + self.JST_OFFSET_SECONDS, 86400)
+        date_text = self.date_texts.get(days)
+        if date_text is None:
+            date_text = datetime.utcfromtimestamp(days * 86400).strftime('%Y/%m/%d ')
+            self.date_texts[days] = date_text
+        time_text = self.time_texts.get(seconds)
+        if time_text is None:
+            time_text = '{0:02d}:{1:02d}:{2:02d}'.format(seconds // 3600, seconds // 60 % 60, seconds % 60)
+            self.time_texts[seconds] = time_text
+        return date_text + time_text
+
+    def __get_csv_key(self, user_id, identity_id):
+        return 'private/' + identity_id + '/' + user_id + '_' + datetime.now().astimezone(self.jst).strftime(
+            '%Y-%m-%d-%H-%M-%S') + '.csv'
 
-    def upload_file(self, bucket, key, data_for_csv):
-        s3Obj = self.s3.Object(bucket, key)
-        res = s3Obj.put(Body=data_for_csv)
-        return res
+    def __enqueue_job(self, user_id, identity_id):
+        # 登録したジョブ、または登録済の未完了のジョブの job_id を返却する
+        job_table = self.dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+        job_id = self.__get_randomhash()
+        epoch = int(time.time())
+
+        # ジョブはユーザー毎に 1 件とし、処理待ち・処理中のジョブが存在しない場合のみ登録する
+        try:
+            job_table.put_item(
+                Item={
+                    'user_id': user_id,
+                    'job_id': job_id,
+                    'identity_id': identity_id,
+                    'status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED,
+                    'attempts': 0,
+                    'created_at': epoch,
+                    'updated_at': epoch
+                },
+                ConditionExpression='attribute_not_exists(user_id) OR #status IN (:completed, :not_found, :failed)',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':completed': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED,
+                    ':not_found': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND,
+                    ':failed': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # 登録済のジョブが未完了の場合は、重複して登録しない
+            return job_table.get_item(Key={'user_id': user_id}, ConsistentRead=True)['Item']['job_id']
+        return job_id
 
     def __get_user_private_eth_address(self, user_id):
         # user_id に紐づく private_eth_address を取得
@@ -196,20 +330,22 @@ class MeWalletTokenAllhistoriesCreate(LambdaBase):
             ExpressionAttributeValues={':unread': True}
         )
 
-    def __notification(self, user_id, announce_url):
+    def __notification(self, user_id, announce_body, announce_url=None):
         notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
 
         notification_id = self.__get_randomhash()
 
-        notification_table.put_item(Item={
+        item = {
             'notification_id': notification_id,
             'user_id': user_id,
             'sort_key': TimeUtil.generate_sort_key(),
             'type': settings.CSVDOWNLOAD_NOTIFICATION_TYPE,
             'created_at': int(time.time()),
-            'announce_body': '全トークン履歴のcsvのダウンロード準備が完了しました。本通知をクリックしてダウンロードしてください。',
-            'announce_url': announce_url
-        })
+            'announce_body': announce_body
+        }
+        if announce_url is not None:
+            item['announce_url'] = announce_url
+        notification_table.put_item(Item=item)
 
         self.__update_unread_notification_manager(user_id)
 
@@ -223,7 +359,7 @@ class MeWalletTokenAllhistoriesCreate(LambdaBase):
         cognito_user_pool_id = os.environ['COGNITO_USER_POOL_ID']
 
         logins = {'cognito-idp.' + region + '.amazonaws.com/' + cognito_user_pool_id: id_token}
-        client = boto3.client('cognito-identity', region_name=region)
+        client = Clients.get_client('cognito-identity', region_name=region)
         cognito_identity_id = client.get_id(
             IdentityPoolId=identity_pool_id,
             Logins=logins
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import logging
+import threading
+import boto3
+import settings
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from me_wallet_token_allhistories_create import MeWalletTokenAllhistoriesCreate
+from record_not_found_error import RecordNotFoundError
+
+
+class TokenHistoryExportWorker:
+    def __init__(self, dynamodb, s3, cognito=None):
+        self.dynamodb = dynamodb
+        self.s3 = s3
+        self.cognito = cognito
+        self.__local = threading.local()
+
+    def run(self):
+        # 登録順に処理待ちのジョブを取得し、同時に処理する件数を制限して処理する
+        jobs = self.__get_pending_jobs()
+        with ThreadPoolExecutor(max_workers=settings.TOKEN_HISTORY_EXPORT_WORKER_CONCURRENCY) as executor:
+            return list(executor.map(self.process_job, jobs))
+
+    def process_job(self, job):
+        dynamodb, s3 = self.__get_thread_resources()
+        job_table = dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+
+        # 他のワーカーが処理を開始したジョブは対象外とする
+        attempts = self.__start_job(job_table, job)
+        if attempts is None:
+            return None
+
+        announce_url = None
+        try:
+            announce_url = MeWalletTokenAllhistoriesCreate(
+                {}, {}, dynamodb=dynamodb, s3=s3, cognito=self.cognito).export_token_history(job['user_id'], job['identity_id'])
+            status = settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED
+        except RecordNotFoundError:
+            status = settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND
+        except Exception as err:
+            logging.getLogger().fatal('token history export failed: {0}, {1}'.format(job['job_id'], err))
+            # 最大試行回数に達するまでは、処理待ちに戻して次回以降の実行で再試行する
+            if attempts < settings.TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS:
+                status = settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED
+            else:
+                status = settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED
+
+        # 処理中に期限を過ぎ、他のワーカーが再実行を開始した場合は結果を反映せず、通知も行わない
+        if not self.__finish_job(job_table, job, attempts, status):
+            return None
+        self.__notify_result(job, status, announce_url)
+        return status
+
+    def __get_pending_jobs(self):
+        job_table = self.dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+        limit = settings.TOKEN_HISTORY_EXPORT_WORKER_BATCH_SIZE
+
+        jobs = job_table.query(
+            IndexName='status-created_at-index',
+            KeyConditionExpression=Key('status').eq(settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED),
+            Limit=limit
+        )['Items']
+
+        # 処理中のまま期限を過ぎたジョブは、ワーカーが異常終了したものとして再実行の対象とする
+        lease_expired_jobs = job_table.query(
+            IndexName='status-created_at-index',
+            KeyConditionExpression=Key('status').eq(settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING),
+            FilterExpression=Attr('updated_at').lt(int(time.time()) - settings.TOKEN_HISTORY_EXPORT_JOB_LEASE_SECONDS)
+        )['Items']
+        for job in lease_expired_jobs:
+            if job['attempts'] >= settings.TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS:
+                if self.__finish_job(job_table, job, job['attempts'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED):
+                    self.__notify_result(job, settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED)
+            else:
+                jobs.append(job)
+
+        return sorted(jobs, key=lambda job: job['created_at'])[:limit]
+
+    def __start_job(self, job_table, job):
+        # 処理待ち、または期限を過ぎた処理中のジョブのみを条件付きで処理中に更新し、試行回数を返却する
+        epoch = int(time.time())
+        try:
+            response = job_table.update_item(
+                Key={'user_id': job['user_id']},
+                UpdateExpression='SET #status = :processing, updated_at = :updated_at ADD attempts :one',
+                ConditionExpression='job_id = :job_id AND '
+                                    '(#status = :queued OR (#status = :processing AND updated_at < :lease_expired))',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':job_id': job['job_id'],
+                    ':queued': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED,
+                    ':processing': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING,
+                    ':updated_at': epoch,
+                    ':lease_expired': epoch - settings.TOKEN_HISTORY_EXPORT_JOB_LEASE_SECONDS,
+                    ':one': 1
+                },
+                ReturnValues='UPDATED_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise
+        return int(response['Attributes']['attempts'])
+
+    def __finish_job(self, job_table, job, attempts, status):
+        # 自身が開始した試行（試行回数が一致する処理中のジョブ）の場合のみ更新し、更新できたかを返却する
+        try:
+            job_table.update_item(
+                Key={'user_id': job['user_id']},
+                UpdateExpression='SET #status = :status, updated_at = :updated_at',
+                ConditionExpression='job_id = :job_id AND #status = :processing AND attempts = :attempts',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':job_id': job['job_id'],
+                    ':processing': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING,
+                    ':attempts': attempts,
+                    ':status': status,
+                    ':updated_at': int(time.time())
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+    def __notify_result(self, job, status, announce_url=None):
+        # 再試行のため処理待ちに戻した場合は通知しない
+        if status == settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED:
+            return
+        dynamodb, s3 = self.__get_thread_resources()
+        MeWalletTokenAllhistoriesCreate({}, {}, dynamodb=dynamodb, s3=s3, cognito=self.cognito).notify_export_result(
+            job['user_id'], status, announce_url)
+
+    def __get_thread_resources(self):
+        # boto3 のリソースはスレッドセーフではないため、接続先を引き継いだリソースをスレッド毎に作成する
+        if getattr(self.__local, 'resources', None) is None:
+            session = boto3.session.Session()
+            self.__local.resources = tuple(
+                session.resource(
+                    resource.meta.service_name,
+                    endpoint_url=resource.meta.client.meta.endpoint_url,
+                    region_name=resource.meta.client.meta.region_name
+                )
+                for resource in [self.dynamodb, self.s3]
+            )
+        return self.__local.resources
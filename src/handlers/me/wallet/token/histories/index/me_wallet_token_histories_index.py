@@ -2,6 +2,8 @@
 import settings
 import os
 import json
+import time
+from block_time_util import BlockTimeUtil
 from private_chain_util import PrivateChainUtil
 from user_util import UserUtil
 from lambda_base import LambdaBase
@@ -20,14 +22,18 @@ class MeWalletTokenHistoriesIndex(LambdaBase):
         UserUtil.validate_private_eth_address(self.dynamodb, user_id)
 
     def exec_main_proc(self):
-        # 履歴取得対象の開始ブロック番号を算出
-        to_block = self.__get_current_block_number()
-        from_block = str(hex(
-            int(to_block, 16) - int(settings.HISTORY_RANGE_DAYS * 24 * 60 * 60 / settings.AVERAGE_BLOCK_TIME)
-        ))
+        # 履歴取得対象の期間内で最初のブロックを、ブロックの時刻から探索する
+        latest_block = int(self.__get_current_block_number(), 16)
+        block_time_util = BlockTimeUtil(self.__get_timestamp_by_block_number)
+        from_block_number = block_time_util.find_first_block(
+            int(time.time()) - settings.HISTORY_RANGE_DAYS * 24 * 60 * 60,
+            latest_block
+        )
+        to_block = hex(latest_block)
+        from_block = hex(from_block_number)
 
-        # 開始ブロック番号のタイムスタンプ値を取得
-        target_timestamp = self.__get_timestamp_by_block_number(from_block)
+        # 開始ブロック番号のタイムスタンプ値を取得（探索時に取得済のためキャッシュから取得される）
+        target_timestamp = hex(block_time_util.get_timestamp(from_block_number))
 
         # relay event を取得
         eth_address = self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
@@ -54,9 +60,9 @@ class MeWalletTokenHistoriesIndex(LambdaBase):
     def __get_timestamp_by_block_number(self, block_number):
         url = 'https://' + os.environ['PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/eth/get_block_by_number'
         payload_dict = {
-            'block_num': block_number,
+            'block_num': hex(block_number),
         }
-        return PrivateChainUtil.send_transaction(request_url=url, payload_dict=payload_dict).get('timestamp')
+        return int(PrivateChainUtil.send_transaction(request_url=url, payload_dict=payload_dict)['timestamp'], 16)
 
     def __get_relay_events_specified_block_range(self, from_block, to_block, user_eth_address):
         url = 'https://' + os.environ['PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/wallet/relay_events'
@@ -3,16 +3,15 @@ import os
 import settings
 import time
 import json
-from decimal import Decimal
-from db_util import DBUtil
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 from private_chain_util import PrivateChainUtil
 from time_util import TimeUtil
+from token_send_util import TokenSendUtil
 from jsonschema import validate
 from lambda_base import LambdaBase
 from jsonschema import ValidationError
 from user_util import UserUtil
+from db_util import DBUtil
 from exceptions import SendTransactionError, ReceiptError
 
 
@@ -38,21 +37,33 @@ class MeWalletTokenSend(LambdaBase):
                                               self.event['requestContext']['authorizer']['claims']['cognito:username'])
         # single
         validate(self.params, self.get_schema())
+        # 署名の検証・パラメータの検証で共有するため、raw_transaction は 1 回のみ decode する
+        self.signed_transactions = {
+            key: PrivateChainUtil.parse_raw_transaction(self.params[key])
+            for key in ['init_approve_signed_transaction', 'approve_signed_transaction', 'relay_signed_transaction']
+            if self.params.get(key) is not None
+        }
         # 署名が正しいこと
         if self.params.get('init_approve_signed_transaction') is not None:
             PrivateChainUtil.validate_raw_transaction_signature(
-                self.params['init_approve_signed_transaction'],
+                self.signed_transactions['init_approve_signed_transaction'],
                 self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
             )
         PrivateChainUtil.validate_raw_transaction_signature(
-            self.params['approve_signed_transaction'],
+            self.signed_transactions['approve_signed_transaction'],
             self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
         )
         PrivateChainUtil.validate_raw_transaction_signature(
-            self.params['relay_signed_transaction'],
+            self.signed_transactions['relay_signed_transaction'],
             self.event['requestContext']['authorizer']['claims']['custom:private_eth_address']
         )
 
+        # 前回の投げ銭・記事購入のバーン処理が完了していること
+        DBUtil.validate_no_pending_burn(
+            self.dynamodb,
+            self.event['requestContext']['authorizer']['claims']['cognito:username']
+        )
+
         # pinコードを検証
         self.__validate_pin_code(self.params['access_token'], self.params['pin_code'])
 
@@ -77,7 +88,7 @@ class MeWalletTokenSend(LambdaBase):
                 raise ValidationError('init_approve_signed_transaction is invalid.')
             # data
             init_approve_data = PrivateChainUtil.get_data_from_raw_transaction(
-                self.params['init_approve_signed_transaction'],
+                self.signed_transactions['init_approve_signed_transaction'],
                 transaction_count
             )
             PrivateChainUtil.validate_erc20_approve_data(init_approve_data)
@@ -87,19 +98,15 @@ class MeWalletTokenSend(LambdaBase):
 
         # approve_signed_transaction
         approve_data = PrivateChainUtil.get_data_from_raw_transaction(
-            self.params['approve_signed_transaction'],
+            self.signed_transactions['approve_signed_transaction'],
             transaction_count
         )
         PrivateChainUtil.validate_erc20_approve_data(approve_data)
-        # 日次の限度額を超えていた場合は例外
-        sum_price = self.__get_token_send_value_today(user_id)
-        if Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE']) < sum_price + Decimal(int(approve_data[72:], 16)):
-            raise ValidationError('Token withdrawal limit has been exceeded.')
         transaction_count = PrivateChainUtil.increment_transaction_count(transaction_count)
 
         # relay_signed_transaction
         relay_data = PrivateChainUtil.get_data_from_raw_transaction(
-            self.params['relay_signed_transaction'],
+            self.signed_transactions['relay_signed_transaction'],
             transaction_count
         )
         PrivateChainUtil.validate_erc20_relay_data(relay_data)
@@ -109,102 +116,82 @@ class MeWalletTokenSend(LambdaBase):
         if approve_value != relay_value:
             raise ValidationError('approve and relay values do not match.')
 
+        # 出金情報を作成し、日次の合計額に出金額を計上する。
+        # 並行する出金も含めて日次の限度額を超える場合は、トランザクションを送信する前に例外とする
+        send_info = self.__create_send_info(sort_key, user_id, relay_value)
+
         #######################
         # send_raw_transaction
         #######################
-        # 既に approve されている場合（allowance の戻り値が 0 ではない場合）、該当の approve を削除する（0 で更新）
-        if int(allowance, 16) != 0:
-            PrivateChainUtil.send_raw_transaction(self.params.get('init_approve_signed_transaction'))
-
-        # approve 実施
-        approve_transaction_hash = PrivateChainUtil.send_raw_transaction(self.params.get('approve_signed_transaction'))
-        self.__create_send_info_with_approve_transaction_hash(
-            sort_key, user_id, approve_transaction_hash, relay_value
-        )
+        # relay を送信するまでは出金が行われないため、例外が発生した場合はステータスを fail に更新し計上した出金額を戻す
+        try:
+            # 既に approve されている場合（allowance の戻り値が 0 ではない場合）、該当の approve を削除する（0 で更新）
+            if int(allowance, 16) != 0:
+                PrivateChainUtil.send_raw_transaction(self.params.get('init_approve_signed_transaction'))
+
+            # approve 実施
+            approve_transaction_hash = PrivateChainUtil.send_raw_transaction(
+                self.params.get('approve_signed_transaction'))
+            self.__update_send_info(sort_key, user_id, 'approve_transaction', approve_transaction_hash)
+        except Exception as e:
+            TokenSendUtil.update_send_status(self.dynamodb, send_info, TokenSendUtil.SEND_STATUS_FAIL)
+            raise e
 
-        # token_send_table への書き込み完了後に出金関連の例外が発生した場合は、token_send_table のステータスを fail に更新する
+        # relay の送信後に出金関連の例外が発生した場合は、token_send_table のステータスを fail に更新する。
+        # それ以外の例外の場合は doing のまま残し、TransactionStatusReconciler が relay の receipt から状態を確定する
         try:
             # relay 実施
             relay_transaction_hash = PrivateChainUtil.send_raw_transaction(self.params.get('relay_signed_transaction'))
-            self.__update_send_info_with_relay_transaction_hash(sort_key, user_id, relay_transaction_hash)
+            self.__update_send_info(sort_key, user_id, 'relay_transaction_hash', relay_transaction_hash)
             # transaction の完了を確認
             is_completed = PrivateChainUtil.is_transaction_completed(relay_transaction_hash)
         except SendTransactionError as e:
             # ステータスを fail に更新し中断
-            self.__update_send_info_with_send_status(sort_key, user_id, 'fail')
+            TokenSendUtil.update_send_status(self.dynamodb, send_info, TokenSendUtil.SEND_STATUS_FAIL)
             raise e
         except ReceiptError:
             # send_value の値が残高を超えた場合や、処理最小・最大値の範囲に収まっていない場合に ReceiptError が発生するため
             # ValidationError として処理を中断する
             # ステータスを fail に更新
-            self.__update_send_info_with_send_status(sort_key, user_id, 'fail')
+            TokenSendUtil.update_send_status(self.dynamodb, send_info, TokenSendUtil.SEND_STATUS_FAIL)
             raise ValidationError('send_value')
 
         # transaction が完了していた場合、ステータスを done に更新
         if is_completed:
-            self.__update_send_info_with_send_status(sort_key, user_id, 'done')
+            TokenSendUtil.update_send_status(self.dynamodb, send_info, TokenSendUtil.SEND_STATUS_DONE)
 
         return {
             'statusCode': 200,
             'body': json.dumps({'is_completed': is_completed})
         }
 
-    def __get_token_send_value_today(self, user_id):
-        # 今日日付の文字列を取得
-        target_date = time.strftime('%Y-%m-%d', time.gmtime(int(time.time())))
-        # 今日日付に紐づく出金データを全て取得する
-        token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
-        query_params = {
-            'IndexName': 'target_date-user_id-index',
-            'KeyConditionExpression': Key('target_date').eq(target_date) & Key('user_id').eq(user_id)
-        }
-        result = DBUtil.query_all_items(token_send_table, query_params)
-        # 今日日付の出金額の合計を算出（doing の状態も含める）
-        # todo: 当 API 処理完了時に send_status が doing となっていたデータについては更新されない状態となっている。
-        # 別途 batch 処理等で doing 状態のデータを done or fail に更新させる必要がある。
-        return sum([Decimal(i.get('send_value')) for i in result if i.get('send_status') in ['done', 'doing']])
-
-    def __create_send_info_with_approve_transaction_hash(self, sort_key, user_id, approve_transaction_hash, send_value):
-        token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+    def __create_send_info(self, sort_key, user_id, send_value):
         epoch = int(time.time())
         send_info = {
             'user_id': user_id,
             'send_value': send_value,
-            'approve_transaction': approve_transaction_hash,
-            'send_status': 'doing',
+            'send_status': TokenSendUtil.SEND_STATUS_DOING,
+            # doing の間のみ設定し、完了を確認できなかった出金を TransactionStatusReconciler が uncompleted-index から取得する
+            'uncompleted': 1,
             'sort_key': sort_key,
             'created_at': int(time.time()),
-            'target_date':  time.strftime('%Y-%m-%d', time.gmtime(epoch))
+            'target_date':  TokenSendUtil.get_target_date(epoch)
         }
 
-        token_send_table.put_item(
-            Item=send_info,
-            ConditionExpression='attribute_not_exists(user_id)'
-        )
-
-    def __update_send_info_with_relay_transaction_hash(self, sort_key, user_id, relay_transaction_hash):
-        token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
-        token_send_table.update_item(
-            Key={
-                'user_id': user_id,
-                'sort_key': sort_key
-            },
-            UpdateExpression='set relay_transaction_hash=:relay_transaction_hash',
-            ExpressionAttributeValues={
-                ':relay_transaction_hash': relay_transaction_hash,
-            }
-        )
+        TokenSendUtil.create_send_info(self.dynamodb, send_info)
+        return send_info
 
-    def __update_send_info_with_send_status(self, sort_key, user_id, send_status):
+    def __update_send_info(self, sort_key, user_id, attribute_name, transaction_hash):
         token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
         token_send_table.update_item(
             Key={
                 'user_id': user_id,
                 'sort_key': sort_key
             },
-            UpdateExpression='set send_status=:send_status',
+            UpdateExpression='set #attr=:transaction_hash',
+            ExpressionAttributeNames={'#attr': attribute_name},
             ExpressionAttributeValues={
-                ':send_status': send_status,
+                ':transaction_hash': transaction_hash,
             }
         )
 
@@ -1,8 +1,8 @@
-import boto3
+from clients import Clients
 from sign_up_line_authorize_url import SignUpLineAuthorizeUrl
 
-cognito = boto3.client('cognito-idp')
-dynamodb = boto3.resource('dynamodb')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+from clients import Clients
+from transaction_status_reconciler import TransactionStatusReconciler
+
+dynamodb = Clients.dynamodb()
+
+
+def lambda_handler(event, context):
+    return TransactionStatusReconciler(dynamodb).run()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import logging
+import settings
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from db_util import DBUtil
+from exceptions import ReceiptError
+from notification_util import NotificationUtil
+from private_chain_util import PrivateChainUtil
+from token_send_util import TokenSendUtil
+
+
+class TransactionStatusReconciler:
+    STATUS_DOING = 'doing'
+    STATUS_DONE = 'done'
+    STATUS_FAIL = 'fail'
+
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+
+    def run(self):
+        # 完了を確認できていない投げ銭・記事購入・出金のトランザクションの receipt をまとめて取得し、状態を確定する
+        tips = self.__get_burn_pending_tips()
+        paid_articles = self.__get_doing_paid_articles()
+        uncompleted_paid_articles = self.__get_uncompleted_paid_articles()
+        send_infos = self.__get_stale_send_infos()
+
+        transactions = [tip['transaction'] for tip in tips] + \
+            [paid_article['purchase_transaction'] for paid_article in paid_articles] + \
+            [send_info['relay_transaction_hash'] for send_info in send_infos if send_info.get('relay_transaction_hash')]
+        transaction_statuses = self.__get_transaction_statuses(transactions)
+
+        return {
+            'tips': self.__reconcile_all(tips, self.__reconcile_tip, transaction_statuses),
+            'paid_articles': self.__reconcile_all(paid_articles, self.__reconcile_paid_article, transaction_statuses) +
+            self.__reconcile_all(uncompleted_paid_articles, self.__complete_paid_article, transaction_statuses),
+            'token_sends': self.__reconcile_all(send_infos, self.__reconcile_send_info, transaction_statuses)
+        }
+
+    @staticmethod
+    def __reconcile_all(items, reconcile, transaction_statuses):
+        result = []
+        for item in items:
+            try:
+                reconciled = reconcile(item, transaction_statuses)
+            except Exception as err:
+                # 1 件の失敗で他の確認を止めないよう、次回以降の実行で再確認する
+                logging.getLogger().fatal('transaction status reconciliation failed: {0}, {1}'.format(item, err))
+                continue
+            if reconciled is not None:
+                result.append(reconciled)
+        return result
+
+    @classmethod
+    def __get_transaction_statuses(cls, transactions):
+        # receipt の取得は 1 件ずつ待機が発生するため並行して行い、取得に失敗したものは結果に含めない
+        with ThreadPoolExecutor(max_workers=settings.TRANSACTION_STATUS_RECONCILE_MAX_WORKERS) as executor:
+            futures = {transaction: executor.submit(cls.__get_transaction_status, transaction)
+                       for transaction in set(transactions)}
+
+        result = {}
+        for transaction, future in futures.items():
+            try:
+                result[transaction] = future.result()
+            except Exception as err:
+                logging.getLogger().fatal('failed to get transaction receipt: {0}, {1}'.format(transaction, err))
+        return result
+
+    @classmethod
+    def __get_transaction_status(cls, transaction):
+        try:
+            if PrivateChainUtil.is_transaction_receipt_completed(transaction):
+                return cls.STATUS_DONE
+            return cls.STATUS_DOING
+        except ReceiptError:
+            # 残高不足等によりトランザクションが実行されなかった場合
+            return cls.STATUS_FAIL
+
+    @classmethod
+    def __get_status(cls, transaction_statuses, transaction, created_at):
+        # receipt の取得に失敗した場合は None を返却し、次回以降の実行で再確認する
+        if transaction is not None:
+            if transaction not in transaction_statuses:
+                return None
+            if transaction_statuses[transaction] != cls.STATUS_DOING:
+                return transaction_statuses[transaction]
+
+        # トランザクションが送信されていない、または取り込まれないまま期限を過ぎたものは実行されなかったものとする
+        if created_at < int(time.time()) - settings.TRANSACTION_STATUS_RECONCILE_EXPIRE_SECONDS:
+            return cls.STATUS_FAIL
+        return cls.STATUS_DOING
+
+    def __get_burn_pending_tips(self):
+        # 投げ銭の完了（uncompleted の解除）は SucceededTip への集計処理が行うため、バーン処理が未実施のもののみを対象とする
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        query_params = {
+            'IndexName': 'burn_uncompleted-index',
+            'KeyConditionExpression': Key('burn_uncompleted').eq(1)
+        }
+        return DBUtil.query_all_items(tip_table, query_params)
+
+    def __reconcile_tip(self, tip, transaction_statuses):
+        status = self.__get_status(transaction_statuses, tip['transaction'], tip['created_at'])
+        if status is None or status == self.STATUS_DOING:
+            return None
+
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        key = {'user_id': tip['user_id'], 'sort_key': tip['sort_key']}
+        # 投げ銭が成功した時のみバーン処理を行う
+        if status == self.STATUS_DONE:
+            if not self.__send_burn_transaction(tip_table, key, tip):
+                return None
+        else:
+            logging.info('Burn was not executed because tip transaction was failed.')
+            if not self.__update_item(tip_table, {
+                'Key': key,
+                'UpdateExpression': 'REMOVE burn_uncompleted, burn_signed_transaction',
+                'ConditionExpression': 'attribute_exists(burn_uncompleted)'
+            }):
+                return None
+        return {'user_id': tip['user_id'], 'sort_key': int(tip['sort_key']), 'status': status}
+
+    def __get_doing_paid_articles(self):
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        query_params = {
+            'IndexName': 'status-index',
+            'KeyConditionExpression': Key('status').eq(self.STATUS_DOING)
+        }
+        return DBUtil.query_all_items(paid_articles_table, query_params)
+
+    def __get_uncompleted_paid_articles(self):
+        # 状態の確定後の処理（通知・バーン処理）が完了していないもの
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        query_params = {
+            'IndexName': 'uncompleted-index',
+            'KeyConditionExpression': Key('uncompleted').eq(1)
+        }
+        return DBUtil.query_all_items(paid_articles_table, query_params)
+
+    def __reconcile_paid_article(self, paid_article, transaction_statuses):
+        status = self.__get_status(transaction_statuses, paid_article['purchase_transaction'], paid_article['created_at'])
+        if status is None or status == self.STATUS_DOING:
+            return None
+
+        # 状態の確定と同時に、以降に行う処理（通知、購入が成功した場合はバーン処理）を未完了として記録する。
+        # 途中で失敗した場合も、未完了の処理は次回以降の実行で uncompleted-index から取得して再実施する
+        paid_article = dict(paid_article, status=status, uncompleted=1, notification_uncompleted=1)
+        update_expression = 'SET #attr = :transaction_status, uncompleted = :one, notification_uncompleted = :one'
+        if status == self.STATUS_DONE and paid_article.get('burn_signed_transaction') is not None:
+            paid_article['burn_uncompleted'] = 1
+            update_expression += ', burn_uncompleted = :one'
+
+        # 並行する実行が先に更新した場合は、通知やバーン処理を重複して行わないよう以降の処理を行わない
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        if not self.__update_item(paid_articles_table, {
+            'Key': {'article_id': paid_article['article_id'], 'sort_key': paid_article['sort_key']},
+            'UpdateExpression': update_expression,
+            'ConditionExpression': '#attr = :doing',
+            'ExpressionAttributeNames': {'#attr': 'status'},
+            'ExpressionAttributeValues': {':transaction_status': status, ':doing': self.STATUS_DOING, ':one': 1}
+        }):
+            return None
+
+        return self.__complete_paid_article(paid_article, transaction_statuses)
+
+    def __complete_paid_article(self, paid_article, transaction_statuses):
+        # 各処理は再実施しても重複しないため、未完了の処理を順に行い、全て完了した場合のみ uncompleted を解除する
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        key = {'article_id': paid_article['article_id'], 'sort_key': paid_article['sort_key']}
+        status = paid_article['status']
+
+        # lock用のpaid_statusの:statusを更新
+        paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
+        paid_status_table.update_item(
+            Key={'article_id': paid_article['article_id'], 'user_id': paid_article['user_id']},
+            UpdateExpression='set #attr = :transaction_status',
+            ExpressionAttributeNames={'#attr': 'status'},
+            ExpressionAttributeValues={':transaction_status': status}
+        )
+
+        # 購入のトランザクションが成功した時は著者へ、購入者へは成否を通知する
+        if paid_article.get('notification_uncompleted') is not None:
+            if status == self.STATUS_DONE:
+                NotificationUtil.update_unread_notification_manager(self.dynamodb, paid_article['article_user_id'])
+                NotificationUtil.notify_article_purchase(self.dynamodb, paid_article, paid_article['article_user_id'],
+                                                         settings.ARTICLE_PURCHASED_TYPE)
+            NotificationUtil.update_unread_notification_manager(self.dynamodb, paid_article['user_id'])
+            NotificationUtil.notify_article_purchase(
+                self.dynamodb, paid_article, paid_article['user_id'],
+                settings.ARTICLE_PURCHASE_TYPE if status == self.STATUS_DONE else settings.ARTICLE_PURCHASE_ERROR_TYPE
+            )
+            paid_articles_table.update_item(Key=key, UpdateExpression='REMOVE notification_uncompleted')
+
+        # バーンのトランザクションの発行に失敗した場合は例外とし、次回以降の実行で再実施する
+        if paid_article.get('burn_uncompleted') is not None:
+            if not self.__send_burn_transaction(paid_articles_table, key, paid_article):
+                return None
+
+        if not self.__update_item(paid_articles_table, {
+            'Key': key,
+            'UpdateExpression': 'REMOVE uncompleted',
+            'ConditionExpression': 'attribute_not_exists(notification_uncompleted) AND attribute_not_exists(burn_uncompleted)'
+        }):
+            return None
+        return {'article_id': paid_article['article_id'], 'sort_key': int(paid_article['sort_key']), 'status': status}
+
+    def __send_burn_transaction(self, table, key, item):
+        # 並行する実行が同一のバーンのトランザクションを送信しないよう、送信前に条件付きで送信中（burn_sending_at）とする。
+        # 送信中のまま期限を過ぎたものは、送信した実行が異常終了したものとして再送信する（送信済の場合も成功として扱う）
+        sending_at = int(time.time())
+        if not self.__update_item(table, {
+            'Key': key,
+            'UpdateExpression': 'SET burn_sending_at = :sending_at',
+            'ConditionExpression': 'attribute_exists(burn_uncompleted) AND '
+                                   '(attribute_not_exists(burn_sending_at) OR burn_sending_at < :lease_expired)',
+            'ExpressionAttributeValues': {
+                ':sending_at': sending_at,
+                ':lease_expired': sending_at - settings.TRANSACTION_STATUS_RECONCILE_BURN_LEASE_SECONDS
+            }
+        }):
+            return False
+
+        try:
+            burn_transaction = PrivateChainUtil.send_raw_transaction_idempotently(item['burn_signed_transaction'])
+        except Exception as e:
+            # 次回以降の実行で再送信できるよう、送信中を解除する
+            self.__update_item(table, {
+                'Key': key,
+                'UpdateExpression': 'REMOVE burn_sending_at',
+                'ConditionExpression': 'burn_sending_at = :sending_at',
+                'ExpressionAttributeValues': {':sending_at': sending_at}
+            })
+            raise e
+
+        # 期限を過ぎて他の実行が再送信中の場合は、その実行が更新する
+        return self.__update_item(table, {
+            'Key': key,
+            'UpdateExpression': 'SET burn_transaction = :burn_transaction '
+                                'REMOVE burn_uncompleted, burn_signed_transaction, burn_sending_at',
+            'ConditionExpression': 'burn_sending_at = :sending_at',
+            'ExpressionAttributeValues': {':burn_transaction': burn_transaction, ':sending_at': sending_at}
+        })
+
+    def __get_stale_send_infos(self):
+        token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+        query_params = {
+            'IndexName': 'uncompleted-index',
+            'KeyConditionExpression': Key('uncompleted').eq(1),
+            'FilterExpression': Attr('created_at').lt(int(time.time()) - settings.TOKEN_SEND_RECONCILE_STALE_SECONDS)
+        }
+        return DBUtil.query_all_items(token_send_table, query_params)
+
+    def __reconcile_send_info(self, send_info, transaction_statuses):
+        # fail に更新する場合は、TokenSendUtil が日次の合計額から出金額を差し引く
+        send_status = self.__get_status(transaction_statuses, send_info.get('relay_transaction_hash'),
+                                        send_info['created_at'])
+        if send_status is None or send_status == TokenSendUtil.SEND_STATUS_DOING:
+            return None
+        if not TokenSendUtil.update_send_status(self.dynamodb, send_info, send_status):
+            return None
+        return {'user_id': send_info['user_id'], 'sort_key': int(send_info['sort_key']), 'status': send_status}
+
+    @staticmethod
+    def __update_item(table, update_params):
+        # 条件を満たさず更新しなかった場合は False を返却する
+        try:
+            table.update_item(**update_params)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise e
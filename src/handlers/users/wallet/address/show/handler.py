@@ -1,9 +1,10 @@
-import boto3
+from clients import Clients
 from users_wallet_address_show import UsersWalletAddressShow
 
-cognito = boto3.client('cognito-idp')
+cognito = Clients.cognito()
+dynamodb = Clients.dynamodb()
 
 
 def lambda_handler(event, context):
-    users_wallet_address_show = UsersWalletAddressShow(event, context, cognito=cognito)
+    users_wallet_address_show = UsersWalletAddressShow(event, context, dynamodb, cognito=cognito)
     return users_wallet_address_show.main()
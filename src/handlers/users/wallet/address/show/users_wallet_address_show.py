@@ -20,7 +20,7 @@ class UsersWalletAddressShow(LambdaBase):
 
     def exec_main_proc(self):
         # get private_eth_address
-        private_eth_address = UserUtil.get_private_eth_address(self.cognito, self.params['user_id'])
+        private_eth_address = UserUtil.get_private_eth_address(self.dynamodb, self.cognito, self.params['user_id'])
 
         return {
             'statusCode': 200,
@@ -0,0 +1,80 @@
+import settings
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from block_time_util import BlockTimeUtil
+
+
+class TestBlockTimeUtil(TestCase):
+    def setUp(self):
+        BlockTimeUtil.clear_cache()
+
+    def tearDown(self):
+        BlockTimeUtil.clear_cache()
+
+    def test_get_timestamp_ok_with_cache(self):
+        get_block_timestamp = MagicMock(side_effect=lambda block_number: block_number * 10)
+
+        self.assertEqual(BlockTimeUtil(get_block_timestamp).get_timestamp(5), 50)
+        # インスタンスを跨いでキャッシュが利用される
+        self.assertEqual(BlockTimeUtil(get_block_timestamp).get_timestamp(5), 50)
+        self.assertEqual(get_block_timestamp.call_count, 1)
+
+    def test_get_timestamp_ok_evict_least_recently_used(self):
+        get_block_timestamp = MagicMock(side_effect=lambda block_number: block_number * 10)
+        block_time_util = BlockTimeUtil(get_block_timestamp)
+
+        with patch('settings.BLOCK_TIMESTAMP_CACHE_SIZE', 2):
+            block_time_util.get_timestamp(1)
+            block_time_util.get_timestamp(2)
+            block_time_util.get_timestamp(1)
+            block_time_util.get_timestamp(3)
+            get_block_timestamp.reset_mock()
+
+            block_time_util.get_timestamp(1)
+            block_time_util.get_timestamp(2)
+
+        self.assertEqual([c[0][0] for c in get_block_timestamp.call_args_list], [2])
+
+    def test_find_first_block_ok(self):
+        # 平均ブロック生成時間と異なる 20 秒間隔で生成されたチェーン
+        now = 1550000000
+        latest_block = 200000
+        get_block_timestamp = MagicMock(side_effect=lambda block_number: now - (latest_block - block_number) * 20)
+        block_time_util = BlockTimeUtil(get_block_timestamp)
+
+        with patch('time.time', MagicMock(return_value=now)):
+            for target_timestamp, expected in [
+                (now - 30 * 24 * 60 * 60, 70400),
+                (now - 30 * 24 * 60 * 60 + 1, 70401),
+                (now - 20, 199999),
+                (now, 200000),
+                (now + 1, 200000),
+                (0, 1)
+            ]:
+                self.assertEqual(block_time_util.find_first_block(target_timestamp, latest_block), expected)
+
+    def test_find_first_block_ok_with_accurate_estimation(self):
+        now = 1550000000
+        latest_block = 200000
+        get_block_timestamp = MagicMock(
+            side_effect=lambda block_number: now - (latest_block - block_number) * settings.AVERAGE_BLOCK_TIME)
+
+        with patch('time.time', MagicMock(return_value=now)):
+            result = BlockTimeUtil(get_block_timestamp).find_first_block(now - 30 * 24 * 60 * 60, latest_block)
+
+        self.assertEqual(result, 113600)
+        # 推定したブロックと、その直前のブロックのみを取得する
+        self.assertEqual(sorted([c[0][0] for c in get_block_timestamp.call_args_list]), [113599, 113600])
+
+    def test_find_first_block_ok_logarithmic_calls(self):
+        now = 1550000000
+        latest_block = 1000000
+        # ブロックの生成が長期間停止していた期間を含むチェーン
+        get_block_timestamp = MagicMock(
+            side_effect=lambda block_number: block_number * 5 + (100000000 if block_number > 900000 else 0))
+
+        with patch('time.time', MagicMock(return_value=now)):
+            result = BlockTimeUtil(get_block_timestamp).find_first_block(3000000, latest_block)
+
+        self.assertEqual(result, 600000)
+        self.assertLessEqual(get_block_timestamp.call_count, 45)
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from clients import Clients, LazyClient
+
+
+class TestClients(TestCase):
+    def setUp(self):
+        Clients.clear()
+
+    def tearDown(self):
+        Clients.clear()
+
+    def test_dynamodb_ok(self):
+        with patch.dict(os.environ, {'AWS_REGION': 'ap-northeast-1', 'DYNAMODB_ENDPOINT_URL': 'http://localhost:8000/'}):
+            dynamodb = Clients.dynamodb()
+            # 利用されるまではセッション及びクライアントを作成しない
+            self.assertIsNone(Clients.session)
+            self.assertEqual(Clients.instances, {})
+
+            dynamodb.Table('test_table')
+            resource = dynamodb.get_instance()
+            self.assertEqual(resource.meta.client.meta.endpoint_url, 'http://localhost:8000/')
+            self.assertEqual(resource.meta.client.meta.region_name, 'ap-northeast-1')
+            # 同一コンテナ内では作成済のセッション及びクライアントを使い回す
+            self.assertIs(Clients.dynamodb().get_instance(), resource)
+            self.assertIs(Clients.get_resource('dynamodb'), resource)
+            self.assertEqual(len(Clients.instances), 1)
+
+    def test_get_client_ok(self):
+        with patch.dict(os.environ, {'AWS_REGION': 'us-east-1'}):
+            client = Clients.get_client('s3', region_name='ap-northeast-1', signature_version='s3v4')
+            self.assertEqual(client.meta.region_name, 'ap-northeast-1')
+            self.assertEqual(client.meta.config.signature_version, 's3v4')
+            self.assertIs(Clients.get_client('s3', region_name='ap-northeast-1', signature_version='s3v4'), client)
+            self.assertIsNot(Clients.get_client('s3'), client)
+            self.assertEqual(Clients.get_client('s3').meta.region_name, 'us-east-1')
+
+    def test_lazy_client_ok(self):
+        factory = MagicMock()
+        lazy_client = LazyClient(factory)
+        factory.assert_not_called()
+
+        lazy_client.get_item(Key={'id': 'a'})
+        lazy_client.put_item(Item={'id': 'a'})
+        factory.assert_called_once_with()
+        factory.return_value.get_item.assert_called_once_with(Key={'id': 'a'})
+        factory.return_value.put_item.assert_called_once_with(Item={'id': 'a'})
+
+    def test_lazy_client_ok_with_threads(self):
+        def create():
+            # 作成中に他のスレッドが参照した場合も、重複して作成しない
+            time.sleep(0.01)
+            return MagicMock()
+
+        factory = MagicMock(side_effect=create)
+        lazy_client = LazyClient(factory)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            instances = list(executor.map(lambda _: lazy_client.get_instance(), range(8)))
+        factory.assert_called_once_with()
+        self.assertTrue(all(instance is instances[0] for instance in instances))
+
+    def test_get_or_create_ok_with_threads(self):
+        def create():
+            time.sleep(0.01)
+            return object()
+
+        factory = MagicMock(side_effect=create)
+        barrier = threading.Barrier(8)
+
+        def get(_):
+            barrier.wait()
+            return Clients.get_or_create(('test', 'key'), factory)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            values = list(executor.map(get, range(8)))
+        factory.assert_called_once_with()
+        self.assertTrue(all(value is values[0] for value in values))
+
+    def test_get_or_create_ok_with_slow_factory(self):
+        # 作成に時間がかかる key がある場合も、他の key の取得は待たされない
+        started = threading.Event()
+        finished = threading.Event()
+
+        def create_slow():
+            started.set()
+            finished.wait(5)
+            return 'slow'
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(Clients.get_or_create, ('test', 'slow'), create_slow)
+            started.wait(5)
+            self.assertEqual(Clients.get_or_create(('test', 'fast'), lambda: 'fast'), 'fast')
+            self.assertFalse(future.done())
+            finished.set()
+            self.assertEqual(future.result(5), 'slow')
+
+    def test_get_or_create_ok_with_is_valid(self):
+        factory = MagicMock(side_effect=[{'version': 1}, {'version': 2}])
+        self.assertEqual(Clients.get_or_create(('test', 'key'), factory), {'version': 1})
+        self.assertEqual(Clients.get_or_create(('test', 'key'), factory, is_valid=lambda v: True), {'version': 1})
+        # is_valid が False を返す場合は再作成する
+        self.assertEqual(Clients.get_or_create(('test', 'key'), factory, is_valid=lambda v: False), {'version': 2})
+        self.assertEqual(factory.call_count, 2)
+
+        Clients.clear()
+        self.assertEqual(Clients.instances, {})
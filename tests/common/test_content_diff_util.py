@@ -0,0 +1,52 @@
+from unittest import TestCase
+from boto3.dynamodb.types import Binary
+from content_diff_util import ContentDiffUtil
+
+
+class TestContentDiffUtil(TestCase):
+    def test_compress_and_decompress_ok(self):
+        text = '<p>テスト本文</p>' * 1000
+
+        compressed = ContentDiffUtil.compress(text)
+
+        self.assertLess(len(compressed), len(text.encode('utf-8')))
+        self.assertEqual(ContentDiffUtil.decompress(compressed), text)
+        self.assertEqual(ContentDiffUtil.decompress(Binary(compressed)), text)
+
+    def test_create_and_apply_diff_ok(self):
+        base_text = '<p>見出し</p>' + '<p>本文1</p>' * 2000 + '<p>末尾</p>'
+        text = '<p>見出し</p>' + '<p>本文1</p>' * 1000 + '<p>追記しました</p>' + '<p>本文1</p>' * 1000 + '<p>末尾</p>'
+
+        diff = ContentDiffUtil.create_diff(base_text, text)
+
+        self.assertLess(len(diff), 100)
+        self.assertEqual(ContentDiffUtil.apply_diff(base_text, diff), text)
+        self.assertEqual(ContentDiffUtil.apply_diff(base_text, Binary(diff)), text)
+
+    def test_create_and_apply_diff_ok_same_text(self):
+        text = '<p>本文</p>'
+
+        diff = ContentDiffUtil.create_diff(text, text)
+
+        self.assertEqual(ContentDiffUtil.apply_diff(text, diff), text)
+
+    def test_create_and_apply_diff_ok_empty_text(self):
+        self.assertEqual(ContentDiffUtil.apply_diff('', ContentDiffUtil.create_diff('', '')), '')
+        self.assertEqual(ContentDiffUtil.apply_diff('', ContentDiffUtil.create_diff('', '<p>a</p>')), '<p>a</p>')
+        self.assertEqual(ContentDiffUtil.apply_diff('<p>a</p>', ContentDiffUtil.create_diff('<p>a</p>', '')), '')
+
+    def test_create_and_apply_diff_ok_overlapped_prefix_and_suffix(self):
+        base_text = 'aaaa'
+        text = 'aaaaaa'
+
+        diff = ContentDiffUtil.create_diff(base_text, text)
+
+        self.assertEqual(ContentDiffUtil.apply_diff(base_text, diff), text)
+
+    def test_create_and_apply_diff_ok_with_scattered_changes(self):
+        base_text = ''.join(['<p>段落{0}</p>'.format(i) for i in range(3000)])
+        text = base_text.replace('段落10<', '変更10<').replace('段落2990<', '変更2990<')
+
+        diff = ContentDiffUtil.create_diff(base_text, text)
+
+        self.assertEqual(ContentDiffUtil.apply_diff(base_text, diff), text)
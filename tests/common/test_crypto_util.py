@@ -47,3 +47,39 @@ class TestCryptoUtil(TestCase):
             'user_id'
         )
         self.assertEqual(password, 'nNU8E9E6OSe9tRQn')
+
+    def test_encrypt_password_ok(self):
+        aes_iv = os.urandom(settings.AES_IV_BYTES)
+        iv = base64.b64encode(aes_iv).decode()
+
+        encrypted_password = CryptoUtil.encrypt_password('nNU8E9E6OSe9tRQn', aes_iv)
+        self.assertTrue(encrypted_password.startswith('v2$'))
+        self.assertEqual(CryptoUtil.get_cipher_version(encrypted_password), CryptoUtil.CIPHER_VERSION_GCM)
+        self.assertEqual(CryptoUtil.decrypt_password(encrypted_password.encode(), iv.encode()), 'nNU8E9E6OSe9tRQn')
+
+    def test_decrypt_password_ok_cbc(self):
+        # バージョンが付与されていない暗号文は AES-CBC として復号する
+        aes_iv = os.urandom(settings.AES_IV_BYTES)
+        iv = base64.b64encode(aes_iv).decode()
+
+        encrypted_password = CryptoUtil.encrypt_password('nNU8E9E6OSe9tRQn', aes_iv, CryptoUtil.CIPHER_VERSION_CBC)
+        self.assertEqual(CryptoUtil.get_cipher_version(encrypted_password), CryptoUtil.CIPHER_VERSION_CBC)
+        self.assertEqual(CryptoUtil.decrypt_password(encrypted_password.encode(), iv.encode()), 'nNU8E9E6OSe9tRQn')
+
+    def test_decrypt_password_ng_tampered(self):
+        aes_iv = os.urandom(settings.AES_IV_BYTES)
+        iv = base64.b64encode(aes_iv).decode()
+        encrypted_password = CryptoUtil.encrypt_password('nNU8E9E6OSe9tRQn', aes_iv)
+
+        data = bytearray(base64.b64decode(encrypted_password[3:]))
+        data[0] ^= 1
+        with self.assertRaises(ValueError):
+            CryptoUtil.decrypt_password('v2$' + base64.b64encode(bytes(data)).decode(), iv)
+
+    def test_encrypt_passwords_ok(self):
+        aes_ivs = [os.urandom(settings.AES_IV_BYTES) for _ in range(3)]
+        plain_text_passwords = ['password0', 'password1', 'password2']
+
+        encrypted_passwords = CryptoUtil.encrypt_passwords(list(zip(plain_text_passwords, aes_ivs)))
+        ivs = [base64.b64encode(aes_iv).decode() for aes_iv in aes_ivs]
+        self.assertEqual(CryptoUtil.decrypt_passwords(list(zip(encrypted_passwords, ivs))), plain_text_passwords)
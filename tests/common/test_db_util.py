@@ -261,6 +261,7 @@ class TestDBUtil(TestCase):
         TestsUtil.create_table(self.dynamodb, os.environ['SCREENED_ARTICLE_TABLE_NAME'], [])
         # backup settings
         self.tmp_put_interval = settings.ARTICLE_HISTORY_PUT_INTERVAL
+        self.tmp_storage_mode = settings.ARTICLE_HISTORY_STORAGE_MODE
 
     @classmethod
     def tearDownClass(cls):
@@ -279,6 +280,7 @@ class TestDBUtil(TestCase):
                 wait(TableName=os.environ[delete_table])
         # restore settings
         settings.ARTICLE_HISTORY_PUT_INTERVAL = self.tmp_put_interval
+        settings.ARTICLE_HISTORY_STORAGE_MODE = self.tmp_storage_mode
 
     def test_exists_article_ok(self):
         result = DBUtil.exists_article(
@@ -652,6 +654,39 @@ class TestDBUtil(TestCase):
                 price
             )
 
+    def test_validate_no_pending_burn(self):
+        tip_items = [
+            {'user_id': 'burnuser001', 'sort_key': 1520150552000001, 'burn_uncompleted': 1, 'uncompleted': 1,
+             'burn_signed_transaction': '0x01', 'target_date': '2018-03-04'},
+            {'user_id': 'burnuser004', 'sort_key': 1520150552000002, 'uncompleted': 1, 'burn_transaction': '0x02',
+             'target_date': '2018-03-04'}
+        ]
+        TestsUtil.create_table(self.dynamodb, os.environ['TIP_TABLE_NAME'], tip_items)
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        paid_articles_items = [
+            # 購入のトランザクションの完了待ち
+            {'article_id': 'burnarticle001', 'sort_key': 1520150552000001, 'user_id': 'burnuser002',
+             'status': 'doing', 'burn_signed_transaction': '0x03'},
+            # 購入の完了後、バーンのトランザクションの送信待ち
+            {'article_id': 'burnarticle002', 'sort_key': 1520150552000002, 'user_id': 'burnuser003',
+             'status': 'done', 'uncompleted': 1, 'burn_uncompleted': 1, 'burn_signed_transaction': '0x04'},
+            # 購入に失敗したもの（バーンは行わない）
+            {'article_id': 'burnarticle003', 'sort_key': 1520150552000003, 'user_id': 'burnuser004',
+             'status': 'fail', 'uncompleted': 1, 'notification_uncompleted': 1, 'burn_signed_transaction': '0x05'}
+        ]
+        for item in paid_articles_items:
+            paid_articles_table.put_item(Item=item)
+
+        try:
+            for user_id in ['burnuser001', 'burnuser002', 'burnuser003']:
+                with self.assertRaises(ValidationError):
+                    DBUtil.validate_no_pending_burn(self.dynamodb, user_id)
+            self.assertTrue(DBUtil.validate_no_pending_burn(self.dynamodb, 'burnuser004'))
+        finally:
+            self.dynamodb.Table(os.environ['TIP_TABLE_NAME']).delete()
+            for item in paid_articles_items:
+                paid_articles_table.delete_item(Key={'article_id': item['article_id'], 'sort_key': item['sort_key']})
+
     # 1件でもdoneかdoingが存在すればエラーを起こす
     def test_validate_not_purchased(self):
         with self.assertRaises(ValidationError):
@@ -727,12 +762,29 @@ class TestDBUtil(TestCase):
             )
 
     # article_content_edit_history の作成
+    def test_is_same_article_body_ok(self):
+        article_content_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_TABLE_NAME'])
+        self.assertTrue(DBUtil.is_same_article_body(article_content_table, 'testid000001', 'test_body'))
+
+    def test_is_same_article_body_ng_different_body(self):
+        article_content_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_TABLE_NAME'])
+        self.assertFalse(DBUtil.is_same_article_body(article_content_table, 'testid000001', 'test_body_updated'))
+
+    def test_is_same_article_body_ng_not_exists_body(self):
+        article_content_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_TABLE_NAME'])
+        self.assertFalse(DBUtil.is_same_article_body(article_content_table, 'testid000003', 'test_body'))
+
+    def test_is_same_article_body_ng_not_exists_article(self):
+        article_content_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_TABLE_NAME'])
+        self.assertFalse(DBUtil.is_same_article_body(article_content_table, 'not_exists', 'test_body'))
+
     def test_put_article_content_edit_history_ok(self):
         user_id = 'test-user'
         article_id = 'test-article_id'
         body = 'test-body'
         article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
         settings.ARTICLE_HISTORY_PUT_INTERVAL = 0
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'full'
 
         # 初回作成
         version = '00'
@@ -783,6 +835,7 @@ class TestDBUtil(TestCase):
         body = 'test-body'
         article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
         settings.ARTICLE_HISTORY_PUT_INTERVAL = 0
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'full'
 
         # 合計で 101 回保存（ループさせる）
         for i in range(101):
@@ -828,6 +881,7 @@ class TestDBUtil(TestCase):
         body = 'test-body'
         article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
         settings.ARTICLE_HISTORY_PUT_INTERVAL = 1
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'full'
 
         # 合計で 3 回保存
         for i in range(3):
@@ -859,6 +913,7 @@ class TestDBUtil(TestCase):
         article_id = 'test-article_id'
         body = 'test-body'
         article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'full'
 
         with freeze_time() as frozen_datetime:
             # 規定時間経過後に保存
@@ -902,6 +957,125 @@ class TestDBUtil(TestCase):
         for key in expected_item_2.keys():
             self.assertEqual(expected_item_2[key], actual_items[1][key])
 
+    # article_content_edit_history の作成（差分形式、ループ有り）
+    def test_put_article_content_edit_history_ok_with_diff_mode(self):
+        user_id = 'test-user'
+        article_id = 'test-article_id'
+        body = '<p>test-body</p>' * 1000
+        article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
+        settings.ARTICLE_HISTORY_PUT_INTERVAL = 0
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'diff'
+
+        # 合計で 121 回保存（ループさせる）
+        for i in range(121):
+            DBUtil.put_article_content_edit_history(
+                dynamodb=self.dynamodb,
+                user_id=user_id,
+                article_id=article_id,
+                sanitized_body=body + str(i),
+            )
+
+        items = article_content_edit_history_table.scan()['Items']
+        history_items = [item for item in items if 'sort_key' in item]
+        base_items = [item for item in items if 'sort_key' not in item]
+        # version のデータは 100 件で、本文そのものは保持していないこと
+        self.assertEqual(len(history_items), 100)
+        for item in history_items:
+            self.assertIsNone(item.get('body'))
+            self.assertIsNotNone(item['body_diff'])
+        # スナップショットは参照されているもののみ残っていること
+        self.assertEqual(
+            {item['article_edit_history_id'] for item in base_items},
+            {item['base_id'] for item in history_items}
+        )
+        self.assertLessEqual(len(base_items), 100 // settings.ARTICLE_HISTORY_SNAPSHOT_INTERVAL + 1)
+        # index にはスナップショットが含まれないこと
+        index_items = article_content_edit_history_table.query(
+            IndexName='article_id-sort_key-index',
+            KeyConditionExpression=Key('article_id').eq(article_id)
+        )['Items']
+        self.assertEqual(len(index_items), 100)
+
+        # 全ての version で本文が復元できること
+        for i in range(21, 121):
+            version = str(i % 100).zfill(2)
+            actual_item = DBUtil.get_article_content_edit_history(
+                dynamodb=self.dynamodb,
+                user_id=user_id,
+                article_id=article_id,
+                version=version
+            )
+            self.assertEqual(actual_item['body'], body + str(i))
+            self.assertEqual(actual_item['version'], version)
+            self.assertIsNone(actual_item.get('body_diff'))
+            self.assertIsNone(actual_item.get('base_id'))
+
+    # 差分形式でも、小さな本文は差分とせずそのまま保存すること
+    def test_put_article_content_edit_history_ok_with_diff_mode_small_body(self):
+        user_id = 'test-user'
+        article_id = 'test-article_id'
+        large_body = '<p>test-body</p>' * 1000
+        article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
+        settings.ARTICLE_HISTORY_PUT_INTERVAL = 0
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'diff'
+
+        # 小さな本文と大きな本文を交互に保存し、ループさせる
+        bodies = [('test-body' if i % 3 == 0 else large_body) + str(i) for i in range(105)]
+        for body in bodies:
+            DBUtil.put_article_content_edit_history(
+                dynamodb=self.dynamodb,
+                user_id=user_id,
+                article_id=article_id,
+                sanitized_body=body
+            )
+
+        items = article_content_edit_history_table.scan()['Items']
+        history_items = [item for item in items if 'sort_key' in item]
+        base_items = [item for item in items if 'sort_key' not in item]
+        small_items = [item for item in history_items if item.get('body') is not None]
+        self.assertEqual(len(history_items), 100)
+        self.assertEqual(len(small_items), len([i for i in range(5, 105) if i % 3 == 0]))
+        for item in small_items:
+            self.assertTrue(item['body'].startswith('test-body'))
+            self.assertIsNone(item.get('base_id'))
+        # スナップショットは参照されているもののみ残っていること
+        self.assertEqual(
+            {item['article_edit_history_id'] for item in base_items},
+            {item['base_id'] for item in history_items if item.get('base_id') is not None}
+        )
+
+        # 全ての version で本文が復元できること
+        for i in range(5, 105):
+            actual_item = DBUtil.get_article_content_edit_history(
+                dynamodb=self.dynamodb,
+                user_id=user_id,
+                article_id=article_id,
+                version=str(i % 100).zfill(2)
+            )
+            self.assertEqual(actual_item['body'], bodies[i])
+
+    def test_get_article_content_edit_history_ok_with_full_mode_item(self):
+        # 差分形式導入前に保存された履歴も取得できること
+        article_content_edit_history_table = self.dynamodb.Table(os.environ['ARTICLE_CONTENT_EDIT_HISTORY_TABLE_NAME'])
+        article_content_edit_history_table.put_item(Item={
+            'user_id': 'test-user',
+            'article_edit_history_id': 'test-full-article_00',
+            'body': 'test-body',
+            'article_id': 'test-full-article',
+            'version': '00',
+            'sort_key': 1520150272000000,
+            'update_at': 1520150272
+        })
+        settings.ARTICLE_HISTORY_STORAGE_MODE = 'diff'
+
+        actual_item = DBUtil.get_article_content_edit_history(
+            dynamodb=self.dynamodb,
+            user_id='test-user',
+            article_id='test-full-article',
+            version='00'
+        )
+        self.assertEqual(actual_item['body'], 'test-body')
+
     def test_get_article_content_edit_history_ok(self):
         settings.ARTICLE_HISTORY_PUT_INTERVAL = 0
         # テスト用データ作成
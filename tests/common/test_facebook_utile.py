@@ -74,7 +74,7 @@ class TestFacebookUtil(TestCase):
                 )
 
     def test_get_access_token_ok(self):
-        with patch('facebook_util.requests.get') as requests_mock:
+        with patch('facebook_util.ProviderHttpClient.get') as requests_mock:
             requests_mock.return_value = FacebookFakeResponse(
                 status_code=200,
                 text=json.dumps({
@@ -90,7 +90,7 @@ class TestFacebookUtil(TestCase):
 
     def test_get_access_token_ng(self):
         with self.assertRaises(FacebookOauthError):
-            with patch('facebook_util.requests.get') as requests_mock:
+            with patch('facebook_util.ProviderHttpClient.get') as requests_mock:
                 requests_mock.return_value = FacebookFakeResponse(
                     status_code=400,
                     text='error'
@@ -101,7 +101,7 @@ class TestFacebookUtil(TestCase):
                 )
 
     def test_get_user_info_ok(self):
-        with patch('facebook_util.requests.get') as requests_mock, \
+        with patch('facebook_util.ProviderHttpClient.get') as requests_mock, \
          patch.object(self.fb, '_FacebookUtil__verify_access_token', return_value=True):
             requests_mock.return_value = FacebookFakeResponse(
                 status_code=200,
@@ -118,7 +118,7 @@ class TestFacebookUtil(TestCase):
             self.assertEqual(user['email'], 'anyone@alis.io')
 
     def test_get_user_info_ok_with_example_email(self):
-        with patch('facebook_util.requests.get') as requests_mock, \
+        with patch('facebook_util.ProviderHttpClient.get') as requests_mock, \
          patch.object(self.fb, '_FacebookUtil__verify_access_token', return_value=True):
             requests_mock.return_value = FacebookFakeResponse(
                 status_code=200,
@@ -135,7 +135,7 @@ class TestFacebookUtil(TestCase):
 
     def test_get_user_info_ng_with_oauth_error(self):
         with self.assertRaises(FacebookOauthError):
-            with patch('facebook_util.requests.get') as requests_mock, \
+            with patch('facebook_util.ProviderHttpClient.get') as requests_mock, \
                  patch.object(self.fb, '_FacebookUtil__verify_access_token', return_value=True):
                     requests_mock.return_value = FacebookFakeResponse(
                         status_code=400,
@@ -150,7 +150,7 @@ class TestFacebookUtil(TestCase):
 
     def test_get_user_info_ng_with_verify_error(self):
         with self.assertRaises(FacebookVerifyException):
-            with patch('facebook_util.requests.get') as requests_mock, \
+            with patch('facebook_util.ProviderHttpClient.get') as requests_mock, \
                  patch.object(self.fb, '_FacebookUtil__verify_access_token', return_value=False):
                     requests_mock.return_value = FacebookFakeResponse(
                         status_code=200,
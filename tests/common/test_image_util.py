@@ -0,0 +1,121 @@
+import base64
+from io import BytesIO
+from unittest import TestCase
+from PIL import Image
+from jsonschema import ValidationError
+from image_util import ImageUtil
+
+
+class TestImageUtil(TestCase):
+    @staticmethod
+    def create_image_data(size, image_format):
+        buf = BytesIO()
+        Image.new('RGB', size).save(buf, format=image_format)
+        return buf.getvalue()
+
+    def test_decode_base64_image_ok(self):
+        for image_format in ['jpeg', 'png', 'gif']:
+            image_data = self.create_image_data((10, 10), image_format)
+
+            result = ImageUtil.decode_base64_image(base64.b64encode(image_data).decode('ascii'))
+
+            self.assertEqual(result, image_data)
+            self.assertEqual(ImageUtil.get_image_format(result), image_format)
+
+    def test_decode_base64_image_ng_not_supported_format(self):
+        image_data = self.create_image_data((10, 10), 'bmp')
+
+        with self.assertRaises(ValidationError):
+            ImageUtil.decode_base64_image(base64.b64encode(image_data).decode('ascii'))
+
+    def test_decode_base64_image_ng_invalid_base64(self):
+        for image_base64 in ['', 'a', 'a' * 1024]:
+            with self.assertRaises(ValidationError):
+                ImageUtil.decode_base64_image(image_base64)
+
+    def test_open_image_ng_broken_header(self):
+        image_data = self.create_image_data((10, 10), 'png')
+
+        with self.assertRaises(ValidationError):
+            ImageUtil.open_image(image_data[:16])
+
+    def test_thumbnail_ok_jpeg_with_draft(self):
+        image = ImageUtil.open_image(self.create_image_data((3200, 2400), 'jpeg'))
+
+        result = ImageUtil.thumbnail(image, (400, 300))
+
+        self.assertEqual(result.size, (400, 300))
+        # 縮小した状態でデコードされている
+        self.assertEqual(image.decoderconfig[0], 8)
+
+    def test_thumbnail_ok_png(self):
+        image = ImageUtil.open_image(self.create_image_data((401, 300), 'png'))
+
+        result = ImageUtil.thumbnail(image, (400, 300))
+
+        self.assertEqual(result.size, (400, 299))
+
+    def test_create_variants_ok(self):
+        image = ImageUtil.open_image(self.create_image_data((3840, 2160), 'jpeg'))
+
+        result = [(width, variant.size) for width, variant in ImageUtil.create_variants(image, [320, 640, 1280, 1920])]
+
+        self.assertEqual(result, [(1920, (1920, 1080)), (1280, (1280, 720)), (640, (640, 360)), (320, (320, 180))])
+        # 最大の縮小画像の幅で縮小デコードされている
+        self.assertEqual(image.decoderconfig[0], 2)
+
+    def test_create_variants_ok_only_smaller_widths(self):
+        image = ImageUtil.open_image(self.create_image_data((640, 482), 'png'))
+
+        result = [(width, variant.size) for width, variant in ImageUtil.create_variants(image, [320, 640, 1280])]
+
+        self.assertEqual(result, [(320, (320, 241))])
+        self.assertEqual(list(ImageUtil.create_variants(Image.new('RGB', (1, 1)), [320])), [])
+
+    def test_create_variants_ok_palette_image(self):
+        for mode in ['P', 'LA']:
+            image = ImageUtil.open_image(self.create_image_data((640, 480), 'png'))
+            image = image.convert(mode)
+
+            result = [(width, variant.size, variant.mode) for width, variant in ImageUtil.create_variants(image, [320])]
+
+            # 最近傍法で縮小されないよう RGBA に変換されている
+            self.assertEqual(result, [(320, (320, 240), 'RGBA')])
+
+    def test_resize_to_fit_ok(self):
+        image = Image.new('RGB', (240, 120))
+
+        result = ImageUtil.resize_to_fit(image, (48, 48))
+
+        self.assertEqual(result.size, (48, 24))
+        # 元画像は変更されない
+        self.assertEqual(image.size, (240, 120))
+
+    def test_resize_to_fit_ok_palette_image(self):
+        image = Image.new('P', (240, 240))
+
+        result = ImageUtil.resize_to_fit(image, (96, 96))
+
+        self.assertEqual(result.size, (96, 96))
+        self.assertEqual(result.mode, 'RGBA')
+
+    def test_crop_center_ok(self):
+        image = Image.new('RGB', (300, 240))
+
+        result = ImageUtil.crop_center(image, 240, 240)
+
+        self.assertEqual(result.size, (240, 240))
+
+    def test_encode_ok(self):
+        for image_format in ['jpeg', 'png', 'gif', 'webp']:
+            result = Image.open(BytesIO(ImageUtil.encode(Image.new('RGB', (20, 10)), image_format)))
+
+            self.assertEqual(result.format, image_format.upper())
+            self.assertEqual(result.size, (20, 10))
+
+    def test_encode_ok_jpeg_with_alpha(self):
+        for mode in ['RGBA', 'P', 'LA']:
+            result = Image.open(BytesIO(ImageUtil.encode(Image.new(mode, (20, 10)), 'jpeg')))
+
+            self.assertEqual(result.format, 'JPEG')
+            self.assertEqual(result.mode, 'RGB')
@@ -213,3 +213,63 @@ class TestLambdaBase(TestCase):
             mock_logger_info.assert_called_with({
                 'body': 'invalid body'
             })
+
+    def test_filter_event_for_log_ok_with_large_body(self):
+        with patch('settings.not_logging_parameters', {'access_token'}), \
+                patch('settings.LOG_BODY_MAX_LENGTH', 100), \
+                patch('json.loads', wraps=json.loads) as mock_json_loads, \
+                patch('logging.Logger.info') as mock_logger_info:
+            body = '{"access_token": "secret", "article_image": "' + 'a' * 1000 + '"}'
+            event = {
+                'body': body,
+                'other_part': {}
+            }
+            lambda_impl = self.TestLambdaImpl(event, {})
+            lambda_impl.exec_main_proc = MagicMock(side_effect=Exception())
+
+            lambda_impl.main()
+
+            expected_preview = '{"access_token": "xxxxx", "article_image": "' + 'a' * 55
+            mock_logger_info.assert_called_with({
+                'body': expected_preview + '...(truncated {0} chars)'.format(len(body) - 100),
+                'other_part': {}
+            })
+            # params の取得時のみパースされ、ログ出力時には巨大な body の再パースは行わない
+            self.assertEqual(1, mock_json_loads.call_count)
+            # 元のイベントは変更されない
+            self.assertEqual(body, lambda_impl.event['body'])
+
+    def test_filter_event_for_log_ok_with_large_body_truncated_in_not_logging_param(self):
+        with patch('settings.not_logging_parameters', {'access_token'}), \
+                patch('settings.LOG_BODY_MAX_LENGTH', 30), \
+                patch('logging.Logger.info') as mock_logger_info:
+            body = '{"access_token": "' + 'b' * 1000 + '"}'
+            event = {
+                'body': body
+            }
+            lambda_impl = self.TestLambdaImpl(event, {})
+            lambda_impl.exec_main_proc = MagicMock(side_effect=Exception())
+
+            lambda_impl.main()
+
+            mock_logger_info.assert_called_with({
+                'body': '{"access_token": "xxxxx"' + '...(truncated {0} chars)'.format(len(body) - 30)
+            })
+
+    def test_filter_event_for_log_ok_without_not_logging_params(self):
+        with patch('settings.not_logging_parameters', {'access_token'}), \
+                patch('json.loads', wraps=json.loads) as mock_json_loads, \
+                patch('logging.Logger.info') as mock_logger_info:
+            event = {
+                'body': '{"logging_param": "aaaaa"}'
+            }
+            lambda_impl = self.TestLambdaImpl(event, {})
+            lambda_impl.exec_main_proc = MagicMock(side_effect=Exception())
+
+            lambda_impl.main()
+
+            mock_logger_info.assert_called_with({
+                'body': '{"logging_param": "aaaaa"}'
+            })
+            # params の取得時のみパースされ、ログ出力時にはパースされない
+            self.assertEqual(1, mock_json_loads.call_count)
@@ -1,4 +1,5 @@
 import os
+import time
 from nonce_util import NonceUtil
 from unittest import TestCase
 from unittest.mock import MagicMock
@@ -31,6 +32,7 @@ class TestNonceUtil(TestCase):
             'nonce': nonce
         }).get('Item')
         self.assertEqual(len(result), 4)
+        self.assertRegex(nonce, '^[a-zA-Z0-9]{10}$')
 
     def test_generate_ng(self):
         with self.assertRaises(ClientError):
@@ -68,6 +70,37 @@ class TestNonceUtil(TestCase):
         )
 
         self.assertTrue(result)
+        # 検証済の nonce は削除され、再利用できない
+        self.assertIsNone(table.get_item(Key={'nonce': 'xxxx'}).get('Item'))
+        result = NonceUtil.verify(
+            dynamodb=self.dynamodb,
+            nonce='xxxx',
+            provider='test',
+            type='test'
+        )
+        self.assertFalse(result)
+
+    def test_verify_ng_with_expired_nonce(self):
+        table = self.dynamodb.Table(os.environ['NONCE_TABLE_NAME'])
+        param = {
+            'nonce': 'xxxx',
+            'provider': 'test',
+            'type': 'test',
+            'expiration_time': int(time.time()) - 1
+        }
+        table.put_item(
+            Item=param,
+            ConditionExpression='attribute_not_exists(nonce)'
+        )
+
+        result = NonceUtil.verify(
+            dynamodb=self.dynamodb,
+            nonce='xxxx',
+            provider='test',
+            type='test'
+        )
+
+        self.assertFalse(result)
 
     def test_verify_ng_with_do_not_match_nonce(self):
         table = self.dynamodb.Table(os.environ['NONCE_TABLE_NAME'])
@@ -134,3 +167,5 @@ class TestNonceUtil(TestCase):
         )
 
         self.assertFalse(result)
+        # 検証に失敗した nonce は削除されない
+        self.assertIsNotNone(table.get_item(Key={'nonce': 'xxxx'}).get('Item'))
@@ -89,6 +89,60 @@ class TestNotificationUtil(TestCase):
 
             self.assertEqual(notification, expected_notification)
 
+    def test_notify_article_purchase_with_invalid_type(self):
+        paid_article = {
+            'article_id': 'ARTICLEID01',
+            'user_id': 'purchase_user01',
+            'article_user_id': 'article_user01',
+            'article_title': 'AAAAAAAAAAAAAAAA',
+            'price': 100 * (10 ** 18),
+            'sort_key': 1520150552000001
+        }
+
+        with self.assertRaises(ValueError):
+            NotificationUtil.notify_article_purchase(self.dynamodb, paid_article, 'purchase_user01', 'ALIS')
+
+    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
+    @patch('time.time', MagicMock(return_value=1520150552.000003))
+    def test_notify_article_purchase(self):
+        paid_article = {
+            'article_id': 'ARTICLEID01',
+            'user_id': 'purchase_user01',
+            'article_user_id': 'article_user01',
+            'article_title': 'AAAAAAAAAAAAAAAA',
+            'price': 100 * (10 ** 18),
+            'sort_key': 1520150552000001
+        }
+
+        for purchase_type in settings.ARTICLE_PURCHASE_NOTIFICATION_TYPES:
+            NotificationUtil.notify_article_purchase(self.dynamodb, paid_article, 'target_user_id', purchase_type)
+            # 同一の購入情報に対する通知は重複して作成されない
+            NotificationUtil.notify_article_purchase(self.dynamodb, paid_article, 'target_user_id', purchase_type)
+
+            notification_id = '-'.join([purchase_type, 'target_user_id', paid_article['article_id'],
+                                        str(paid_article['sort_key'])])
+
+            notification = self.notification_table.get_item(
+                Key={'notification_id': notification_id}
+            ).get('Item')
+
+            expected_notification = {
+                'notification_id': notification_id,
+                'user_id': 'target_user_id',
+                'acted_user_id': paid_article['user_id'],
+                'article_id': paid_article['article_id'],
+                'article_user_id': paid_article['article_user_id'],
+                'article_title': paid_article['article_title'],
+                'sort_key': 1520150552000003,
+                'type': purchase_type,
+                'price': 100 * (10 ** 18),
+                'created_at': 1520150552
+            }
+
+            self.assertEqual(notification, expected_notification)
+
+        self.assertEqual(len(self.notification_table.scan()['Items']), len(settings.ARTICLE_PURCHASE_NOTIFICATION_TYPES))
+
     def test_update_unread_notification_manager(self):
 
         before = self.unread_notification_manager_table.scan()['Items']
@@ -0,0 +1,78 @@
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from Crypto.PublicKey import RSA
+
+from clients import Clients
+from exceptions import YahooOauthError
+from oidc_key_cache import OidcKeyCache
+
+
+class TestOidcKeyCache(TestCase):
+    public_key_url = 'https://example.com/public-keys'
+    well_known_url = 'https://example.com/.well-known/openid-configuration'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pem = RSA.generate(1024).publickey().exportKey().decode('utf-8')
+
+    def setUp(self):
+        Clients.clear()
+
+    def tearDown(self):
+        Clients.clear()
+
+    @staticmethod
+    def fake_response(body, status_code=200):
+        return MagicMock(status_code=status_code, text=json.dumps(body))
+
+    def test_get_discovery_document_ok(self):
+        document = {'issuer': 'https://example.com', 'token_endpoint': 'https://example.com/token'}
+        with patch('oidc_key_cache.ProviderHttpClient.get', MagicMock(return_value=self.fake_response(document))) as get_mock:
+            with patch('time.time', MagicMock(return_value=1520150552.0)):
+                self.assertEqual(OidcKeyCache.get_discovery_document(self.well_known_url, YahooOauthError), document)
+                self.assertEqual(OidcKeyCache.get_discovery_document(self.well_known_url, YahooOauthError), document)
+            self.assertEqual(get_mock.call_count, 1)
+
+            # 保持期間を過ぎた場合は再取得する
+            with patch('time.time', MagicMock(return_value=1520150552.0 + 60 * 60 + 1)):
+                OidcKeyCache.get_discovery_document(self.well_known_url, YahooOauthError)
+            self.assertEqual(get_mock.call_count, 2)
+
+    def test_get_discovery_document_ng(self):
+        with patch('oidc_key_cache.ProviderHttpClient.get', MagicMock(return_value=self.fake_response({}, 500))):
+            with self.assertRaises(YahooOauthError):
+                OidcKeyCache.get_discovery_document(self.well_known_url, YahooOauthError)
+        self.assertEqual(Clients.instances, {})
+
+    def test_get_public_key_ok(self):
+        keys = {'kid_01': self.pem}
+        with patch('oidc_key_cache.ProviderHttpClient.get', MagicMock(return_value=self.fake_response(keys))) as get_mock:
+            with patch('time.time', MagicMock(return_value=1520150552.0)):
+                key = OidcKeyCache.get_public_key(self.public_key_url, 'kid_01', YahooOauthError)
+                self.assertIsInstance(key, RSA.RsaKey)
+                self.assertIs(OidcKeyCache.get_public_key(self.public_key_url, 'kid_01', YahooOauthError), key)
+            self.assertEqual(get_mock.call_count, 1)
+
+            # 保持期間を過ぎた場合は再取得する
+            with patch('time.time', MagicMock(return_value=1520150552.0 + 60 * 60 + 1)):
+                OidcKeyCache.get_public_key(self.public_key_url, 'kid_01', YahooOauthError)
+            self.assertEqual(get_mock.call_count, 2)
+
+    def test_get_public_key_ok_with_unknown_kid(self):
+        with patch('oidc_key_cache.ProviderHttpClient.get', MagicMock(return_value=self.fake_response({'kid_01': self.pem}))):
+            with patch('time.time', MagicMock(return_value=1520150552.0)):
+                OidcKeyCache.get_public_key(self.public_key_url, 'kid_01', YahooOauthError)
+
+        keys = {'kid_01': self.pem, 'kid_02': self.pem}
+        with patch('oidc_key_cache.ProviderHttpClient.get', MagicMock(return_value=self.fake_response(keys))) as get_mock:
+            # 前回の取得から間もない場合は、未知の kid であっても再取得しない
+            with patch('time.time', MagicMock(return_value=1520150552.0 + 60)):
+                self.assertIsNone(OidcKeyCache.get_public_key(self.public_key_url, 'kid_02', YahooOauthError))
+            self.assertEqual(get_mock.call_count, 0)
+
+            with patch('time.time', MagicMock(return_value=1520150552.0 + 61)):
+                self.assertIsInstance(OidcKeyCache.get_public_key(self.public_key_url, 'kid_02', YahooOauthError),
+                                      RSA.RsaKey)
+            self.assertEqual(get_mock.call_count, 1)
@@ -0,0 +1,78 @@
+import os
+from tests_util import TestsUtil
+from parsed_raw_transaction import ParsedRawTransaction
+from web3 import Account, Web3
+from jsonschema import ValidationError
+from unittest import TestCase
+from unittest.mock import patch
+
+
+class TestParsedRawTransaction(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        TestsUtil.set_all_private_chain_valuables_to_env()
+        cls.test_account = Account.create()
+
+    def sign_transaction(self, **params):
+        transaction = {
+            'nonce': 10,
+            'gasPrice': 0,
+            'gas': 100000,
+            'to': Account.create().address,
+            'value': 0,
+            'data': '0xa9059cbb',
+            'chainId': 8995
+        }
+        transaction.update(params)
+        transaction = {k: v for k, v in transaction.items() if v is not None}
+        return Account.sign_transaction(transaction, self.test_account.key).rawTransaction.hex()
+
+    def test_fields_ok(self):
+        to_address = Web3.toChecksumAddress(os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS'])
+        parsed = ParsedRawTransaction(self.sign_transaction(to=Account.create().address, nonce=10))
+        self.assertEqual(parsed.nonce, 10)
+        self.assertEqual(parsed.value, 0)
+        self.assertEqual(parsed.data, 'a9059cbb')
+        self.assertEqual(parsed.method, 'a9059cbb')
+        self.assertIn(parsed.v, [8995 * 2 + 35, 8995 * 2 + 36])
+
+        parsed = ParsedRawTransaction(self.sign_transaction(to=to_address, nonce=0))
+        self.assertEqual(parsed.nonce, 0)
+        self.assertEqual(parsed.to_address.lower(), to_address.lower())
+
+    def test_sender_ok(self):
+        # chain_id の有無に関わらず Account.recover_transaction と同じアドレスを復元する
+        for chain_id in [8995, 1, None]:
+            raw_transaction = self.sign_transaction(chainId=chain_id)
+            with self.subTest(chain_id=chain_id):
+                parsed = ParsedRawTransaction(raw_transaction)
+                self.assertEqual(parsed.sender, self.test_account.address)
+                self.assertEqual(parsed.sender, Account.recover_transaction(raw_transaction))
+
+    def test_sender_ok_recover_once(self):
+        parsed = ParsedRawTransaction(self.sign_transaction())
+        with patch.object(parsed, '_ParsedRawTransaction__recover_sender',
+                          wraps=parsed._ParsedRawTransaction__recover_sender) as mock_recover:
+            parsed.validate_signature(self.test_account.address)
+            parsed.validate_signature(self.test_account.address)
+            self.assertEqual(parsed.sender, self.test_account.address)
+            self.assertEqual(mock_recover.call_count, 1)
+
+    def test_validate_signature_ng(self):
+        parsed = ParsedRawTransaction(self.sign_transaction())
+        with self.assertRaises(ValidationError) as e:
+            parsed.validate_signature('0x123456789a123456789a123456789a123456789a')
+        self.assertEqual(e.exception.args[0], 'Signature is invalid')
+
+    def test_validate_fields_ok(self):
+        parsed = ParsedRawTransaction(self.sign_transaction(
+            to=Web3.toChecksumAddress(os.environ['PRIVATE_CHAIN_ALIS_TOKEN_ADDRESS'])
+        ))
+        self.assertEqual(parsed.validate_fields('0xa'), 'a9059cbb')
+
+    def test_init_ng_invalid_raw_transaction(self):
+        for raw_transaction in ['0xabcdef', '0xzz', '0x' + '00' * 10]:
+            with self.subTest(raw_transaction=raw_transaction):
+                with self.assertRaises(ValidationError) as e:
+                    ParsedRawTransaction(raw_transaction)
+                self.assertEqual(e.exception.args[0], 'raw_transaction is invalid')
@@ -76,6 +76,42 @@ class TestPrivateChainUtil(TestCase):
             self.assertEqual(test_url, kwargs['request_url'])
             self.assertEqual(expect_payload, kwargs['payload_dict'])
 
+    def test_send_raw_transaction_idempotently_ok(self):
+        test_raw_transaction = '0xabcdef0123456789'
+        with patch('private_chain_util.PrivateChainUtil.send_transaction') as mock_send_transaction:
+            mock_send_transaction.return_value = '0x10'
+            self.assertEqual(PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction), '0x10')
+
+            # 送信済のトランザクションとして拒否された場合は、raw_transaction のハッシュを返却する
+            expected = Web3.sha3(hexstr=test_raw_transaction).hex()
+            for message in ['already known', 'known transaction: abcdef']:
+                mock_send_transaction.side_effect = SendTransactionError({'code': -32000, 'message': message})
+                self.assertEqual(PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction), expected)
+
+            mock_send_transaction.side_effect = SendTransactionError('status code not 200')
+            with self.assertRaises(SendTransactionError):
+                PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction)
+
+    def test_send_raw_transaction_idempotently_with_nonce_too_low(self):
+        test_raw_transaction = '0xabcdef0123456789'
+        expected = Web3.sha3(hexstr=test_raw_transaction).hex()
+        with patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction, \
+                patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_is_completed:
+            mock_send_raw_transaction.side_effect = SendTransactionError({'code': -32000, 'message': 'nonce too low'})
+
+            # 再送信したトランザクションの receipt が存在する場合は送信済とする
+            mock_is_completed.return_value = True
+            self.assertEqual(PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction), expected)
+            mock_is_completed.assert_called_with(expected)
+            mock_is_completed.side_effect = ReceiptError('Receipt exists, but Not exists mined logs.')
+            self.assertEqual(PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction), expected)
+
+            # 同じ nonce の他のトランザクションが実行され、receipt が存在しない場合は例外とする
+            mock_is_completed.side_effect = None
+            mock_is_completed.return_value = False
+            with self.assertRaises(SendTransactionError):
+                PrivateChainUtil.send_raw_transaction_idempotently(test_raw_transaction)
+
     @patch('requests.post',
            MagicMock(return_value=FakeResponse(status_code=200, text='{"result": {"logs": [{"type": "mined"}]}}')))
     @patch('aws_requests_auth.aws_auth.AWSRequestsAuth', MagicMock(return_value='dummy'))
@@ -160,6 +196,25 @@ class TestPrivateChainUtil(TestCase):
             tran = '0x1234567890123456789012345678901234567890'
             PrivateChainUtil.is_transaction_completed(transaction=tran)
 
+    @patch('aws_requests_auth.aws_auth.AWSRequestsAuth', MagicMock(return_value='dummy'))
+    @patch('time.sleep')
+    def test_is_transaction_receipt_completed_ok(self, mock_sleep):
+        tran = '0x1234567890123456789012345678901234567890'
+        with patch('requests.post') as mock_post:
+            mock_post.return_value = FakeResponse(status_code=200, text='{"result": {"logs": [{"type": "mined"}]}}')
+            self.assertEqual(PrivateChainUtil.is_transaction_receipt_completed(tran), True)
+
+            # 完了していない場合も、待機・再取得は行わない
+            mock_post.reset_mock()
+            mock_post.return_value = FakeResponse(status_code=200, text='{}')
+            self.assertEqual(PrivateChainUtil.is_transaction_receipt_completed(tran), False)
+            self.assertEqual(mock_post.call_count, 1)
+            mock_sleep.assert_not_called()
+
+            mock_post.return_value = FakeResponse(status_code=200, text='{"result": {"logs": [{"type": "dummy"}]}}')
+            with self.assertRaises(ReceiptError):
+                PrivateChainUtil.is_transaction_receipt_completed(tran)
+
     @patch('requests.post',
            MagicMock(return_value=FakeResponse(status_code=200, text='{"result": {"logs": [{"type": "dummy"}]}}')))
     @patch('aws_requests_auth.aws_auth.AWSRequestsAuth', MagicMock(return_value='dummy'))
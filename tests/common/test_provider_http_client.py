@@ -0,0 +1,63 @@
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import settings
+from clients import Clients
+from provider_http_client import ProviderHttpClient
+
+
+class TestProviderHttpClient(TestCase):
+    def setUp(self):
+        Clients.clear()
+
+    def tearDown(self):
+        Clients.clear()
+
+    def test_get_session_ok(self):
+        session = ProviderHttpClient.get_session('graph.facebook.com')
+        # 同一ホストの場合は接続を使い回す
+        self.assertIs(ProviderHttpClient.get_session('graph.facebook.com'), session)
+        self.assertIsNot(ProviderHttpClient.get_session('api.twitter.com'), session)
+
+        retry = session.get_adapter('https://graph.facebook.com/me').max_retries
+        self.assertEqual(retry.total, settings.PROVIDER_HTTP_RETRY_COUNT)
+        self.assertEqual(retry.status_forcelist, settings.PROVIDER_HTTP_RETRY_STATUS_CODES)
+        # POST は応答の読み込みエラー及び 5xx の場合に再試行しない
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+
+    def test_request_ok(self):
+        session_mock = MagicMock()
+        session_mock.request.return_value = MagicMock(status_code=200)
+        with patch('provider_http_client.requests.Session', MagicMock(return_value=session_mock)) as session_class_mock, \
+                patch('provider_http_client.logging.info') as logging_mock:
+            response = ProviderHttpClient.get('facebook', 'https://graph.facebook.com/me?fields=id')
+            ProviderHttpClient.post('facebook', 'https://graph.facebook.com/oauth/access_token', data='a=b', timeout=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_class_mock.call_count, 1)
+        self.assertEqual(session_mock.request.call_args_list[0][0], ('GET', 'https://graph.facebook.com/me?fields=id'))
+        self.assertEqual(session_mock.request.call_args_list[0][1], {'timeout': settings.PROVIDER_HTTP_TIMEOUT})
+        self.assertEqual(session_mock.request.call_args_list[1][1], {'data': 'a=b', 'timeout': 1})
+
+        log = json.loads(logging_mock.call_args_list[0][0][0])
+        self.assertEqual(log['metric'], 'provider_http_latency')
+        self.assertEqual(log['provider'], 'facebook')
+        self.assertEqual(log['host'], 'graph.facebook.com')
+        self.assertEqual(log['method'], 'GET')
+        self.assertEqual(log['status_code'], 200)
+        self.assertIsInstance(log['elapsed_ms'], float)
+
+    def test_request_ng(self):
+        session_mock = MagicMock()
+        session_mock.request.side_effect = Exception('timeout')
+        with patch('provider_http_client.requests.Session', MagicMock(return_value=session_mock)), \
+                patch('provider_http_client.logging.info') as logging_mock:
+            with self.assertRaises(Exception):
+                ProviderHttpClient.get('yahoo', 'https://userinfo.yahooapis.jp/yconnect/v2/attribute')
+
+        # 例外の場合もレイテンシを出力する
+        log = json.loads(logging_mock.call_args[0][0])
+        self.assertEqual(log['provider'], 'yahoo')
+        self.assertIsNone(log['status_code'])
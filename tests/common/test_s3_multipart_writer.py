@@ -0,0 +1,68 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from s3_multipart_writer import S3MultipartWriter
+
+
+class TestS3MultipartWriter(TestCase):
+    def setUp(self):
+        self.s3_object = MagicMock()
+        self.multipart_upload = self.s3_object.initiate_multipart_upload.return_value
+        self.multipart_upload.Part.return_value.upload.side_effect = [{'ETag': 'etag1'}, {'ETag': 'etag2'}]
+
+    def test_write_ok_single_put(self):
+        with S3MultipartWriter(self.s3_object, part_size=10) as writer:
+            writer.write('あいう')
+
+        self.assertEqual(writer.size, 9)
+        self.s3_object.put.assert_called_once_with(Body='あいう'.encode('utf-8'))
+        self.s3_object.initiate_multipart_upload.assert_not_called()
+
+    def test_write_ok_multipart(self):
+        with S3MultipartWriter(self.s3_object, part_size=10) as writer:
+            writer.write('a' * 6)
+            writer.write('b' * 6)
+            writer.write('c' * 3)
+
+        self.assertEqual(writer.size, 15)
+        self.s3_object.put.assert_not_called()
+        self.assertEqual(
+            [c[1]['Body'] for c in self.multipart_upload.Part.return_value.upload.call_args_list],
+            [b'a' * 6 + b'b' * 6, b'c' * 3]
+        )
+        self.assertEqual([c[0][0] for c in self.multipart_upload.Part.call_args_list], [1, 2])
+        self.multipart_upload.complete.assert_called_once_with(MultipartUpload={'Parts': [
+            {'PartNumber': 1, 'ETag': 'etag1'},
+            {'PartNumber': 2, 'ETag': 'etag2'}
+        ]})
+
+    def test_write_ok_with_metadata(self):
+        with S3MultipartWriter(self.s3_object, part_size=10, metadata={'key': 'value'}) as writer:
+            writer.write_bytes(b'a' * 12)
+
+        self.assertEqual(writer.size, 12)
+        self.s3_object.initiate_multipart_upload.assert_called_once_with(Metadata={'key': 'value'})
+
+        s3_object = MagicMock()
+        with S3MultipartWriter(s3_object, part_size=10, metadata={'key': 'value'}) as writer:
+            writer.write_bytes(b'a')
+
+        s3_object.put.assert_called_once_with(Body=b'a', Metadata={'key': 'value'})
+
+    def test_write_ng_abort_with_exception(self):
+        with self.assertRaises(ValueError):
+            with S3MultipartWriter(self.s3_object, part_size=10) as writer:
+                writer.write('a' * 12)
+                raise ValueError()
+
+        self.multipart_upload.abort.assert_called_once_with()
+        self.multipart_upload.complete.assert_not_called()
+        self.s3_object.put.assert_not_called()
+
+    def test_write_ng_abort_without_multipart_upload(self):
+        with self.assertRaises(ValueError):
+            with S3MultipartWriter(self.s3_object, part_size=10) as writer:
+                writer.write('a')
+                raise ValueError()
+
+        self.s3_object.initiate_multipart_upload.assert_not_called()
+        self.s3_object.put.assert_not_called()
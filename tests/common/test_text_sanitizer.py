@@ -1,4 +1,6 @@
 from unittest import TestCase
+from unittest.mock import patch
+from bleach.sanitizer import Cleaner
 from text_sanitizer import TextSanitizer
 from jsonschema import ValidationError
 import os
@@ -367,6 +369,26 @@ class TestTextSanitizer(TestCase):
 
         self.assertEqual(result, expected_html)
 
+    def test_sanitize_article_body_v2_reuse_cleaner(self):
+        with patch.dict(TextSanitizer._TextSanitizer__cleaners, clear=True), \
+                patch('text_sanitizer.Cleaner', wraps=Cleaner) as mock_cleaner:
+            target_html = '<p>test</p><img src="https://{domain}/test.png">'.format(domain=os.environ['DOMAIN'])
+
+            first_result = TextSanitizer.sanitize_article_body_v2(target_html)
+            second_result = TextSanitizer.sanitize_article_body_v2(target_html)
+
+            self.assertEqual(first_result, target_html)
+            self.assertEqual(second_result, target_html)
+            self.assertEqual(mock_cleaner.call_count, 1)
+
+    def test_sanitize_text_and_article_body_use_different_cleaner(self):
+        with patch.dict(TextSanitizer._TextSanitizer__cleaners, clear=True):
+            target_html = '<p>test</p>'
+
+            self.assertEqual(TextSanitizer.sanitize_text(target_html), '&lt;p&gt;test&lt;/p&gt;')
+            self.assertEqual(TextSanitizer.sanitize_article_body(target_html), target_html)
+            self.assertEqual(TextSanitizer.sanitize_text(target_html), '&lt;p&gt;test&lt;/p&gt;')
+
     def test_validate_img_url_ok(self):
         img_url = 'https://' + os.environ['DOMAIN'] + '/img/test.jpg'
         result = TextSanitizer.validate_img_url(img_url)
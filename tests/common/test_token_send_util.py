@@ -0,0 +1,115 @@
+import os
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch
+from jsonschema import ValidationError
+from tests_util import TestsUtil
+from token_send_util import TokenSendUtil
+
+
+class TestTokenSendUtil(TestCase):
+    dynamodb = TestsUtil.get_dynamodb_client()
+
+    def setUp(self):
+        TestsUtil.set_all_tables_name_to_env()
+        TestsUtil.delete_all_tables(self.dynamodb)
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_TABLE_NAME'], [])
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'], [
+            {'user_id': 'user_01', 'target_date': '2018-03-03', 'send_value': Decimal(500)},
+            {'user_id': 'user_01', 'target_date': '2018-03-04', 'send_value': Decimal(300)}
+        ])
+        os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE'] = '1000'
+        self.token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+
+    def tearDown(self):
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+    def get_daily_total(self, user_id, target_date):
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        return token_send_daily_total_table.get_item(
+            Key={'user_id': user_id, 'target_date': target_date})['Item']['send_value']
+
+    def create_send_info(self, sort_key, send_value):
+        return {
+            'user_id': 'user_01',
+            'send_value': send_value,
+            'approve_transaction': 'approve_transaction_hash',
+            'send_status': 'doing',
+            'uncompleted': 1,
+            'sort_key': sort_key,
+            'created_at': 1520150552,
+            'target_date': '2018-03-04'
+        }
+
+    @patch('settings.TOKEN_SEND_DAILY_TOTAL_RETENTION_SECONDS', 100)
+    def test_get_daily_total_expiration_time_ok(self):
+        # 2018-03-05 00:00:00 UTC から保持期間を経過した時刻
+        self.assertEqual(TokenSendUtil.get_daily_total_expiration_time('2018-03-04'), 1520208000 + 100)
+
+    def test_create_send_info_ok(self):
+        send_info = self.create_send_info(1520150552000003, 700)
+        TokenSendUtil.create_send_info(self.dynamodb, send_info)
+
+        self.assertEqual(self.token_send_table.scan()['Items'], [send_info])
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 1000)
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-03'), 500)
+        # 日次の合計額には TTL を設定する
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        self.assertEqual(
+            token_send_daily_total_table.get_item(Key={'user_id': 'user_01', 'target_date': '2018-03-04'})['Item'][
+                'expiration_time'],
+            TokenSendUtil.get_daily_total_expiration_time('2018-03-04')
+        )
+
+    def test_create_send_info_ng_over_limit(self):
+        with self.assertRaises(ValidationError):
+            TokenSendUtil.create_send_info(self.dynamodb, self.create_send_info(1520150552000003, 701))
+
+        # 出金情報の作成と日次の合計額の更新は、いずれも行われない
+        self.assertEqual(self.token_send_table.scan()['Items'], [])
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 300)
+
+    def test_create_send_info_ng_over_limit_first_send_of_day(self):
+        # 当日の合計額が未作成の場合も、限度額を超える出金は作成しない
+        send_info = dict(self.create_send_info(1520236952000003, 1001), target_date='2018-03-05')
+        with self.assertRaises(ValidationError):
+            TokenSendUtil.create_send_info(self.dynamodb, send_info)
+
+        self.assertEqual(self.token_send_table.scan()['Items'], [])
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        self.assertIsNone(token_send_daily_total_table.get_item(
+            Key={'user_id': 'user_01', 'target_date': '2018-03-05'}).get('Item'))
+
+        # 限度額と等しい出金は作成する
+        TokenSendUtil.create_send_info(self.dynamodb, dict(send_info, send_value=1000))
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-05'), 1000)
+
+    def test_update_send_status_ok(self):
+        done_send_info = self.create_send_info(1520150552000003, 100)
+        fail_send_info = self.create_send_info(1520150552000004, 200)
+        TokenSendUtil.create_send_info(self.dynamodb, done_send_info)
+        TokenSendUtil.create_send_info(self.dynamodb, fail_send_info)
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 600)
+
+        self.assertTrue(TokenSendUtil.update_send_status(self.dynamodb, done_send_info, 'done'))
+        self.assertTrue(TokenSendUtil.update_send_status(self.dynamodb, fail_send_info, 'fail'))
+
+        items = {item['sort_key']: item for item in self.token_send_table.scan()['Items']}
+        self.assertEqual(items[1520150552000003]['send_status'], 'done')
+        self.assertEqual(items[1520150552000004]['send_status'], 'fail')
+        self.assertNotIn('uncompleted', items[1520150552000003])
+        self.assertNotIn('uncompleted', items[1520150552000004])
+        # fail となった出金のみ日次の合計額から差し引かれる
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 400)
+
+    def test_update_send_status_ok_already_updated(self):
+        send_info = self.create_send_info(1520150552000003, 100)
+        TokenSendUtil.create_send_info(self.dynamodb, send_info)
+        TokenSendUtil.update_send_status(self.dynamodb, send_info, 'fail')
+
+        # 更新済の出金情報は更新せず、日次の合計額から二重に差し引かない
+        self.assertFalse(TokenSendUtil.update_send_status(self.dynamodb, send_info, 'fail'))
+        self.assertFalse(TokenSendUtil.update_send_status(self.dynamodb, send_info, 'done'))
+
+        self.assertEqual(self.token_send_table.scan()['Items'][0]['send_status'], 'fail')
+        self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 300)
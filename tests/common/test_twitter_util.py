@@ -13,13 +13,12 @@ class TestUserUtil(TestCase):
         )
 
     def test_get_user_info_ok(self):
-        with patch('twitter_util.OAuth1Session') as oauth_mock:
-            instance = oauth_mock.return_value
-            instance.post.return_value = TwitterFakeResponse(
+        with patch('twitter_util.ProviderHttpClient') as client_mock:
+            client_mock.post.return_value = TwitterFakeResponse(
                 status_code=200,
                 content='user_id=1234&oauth_token=fake_oauth_token&oauth_token_secret=fake_oauth_token_secret'.encode('utf-8')
             )
-            instance.get.return_value = TwitterFakeResponse(
+            client_mock.get.return_value = TwitterFakeResponse(
                 status_code=200,
                 text=json.dumps({
                     'user_id': '1234',
@@ -33,13 +32,19 @@ class TestUserUtil(TestCase):
             self.assertEqual(response['user_id'], 'Twitter-1234')
             self.assertEqual(response['email'], 'anyone@alis.io')
 
+            # アクセストークンで署名した上で、ユーザー情報を取得する
+            args, kwargs = client_mock.get.call_args
+            self.assertEqual(args[1], 'https://api.twitter.com/1.1/account/verify_credentials.json?include_email=true')
+            self.assertEqual(kwargs['auth'].client.resource_owner_key, 'fake_oauth_token')
+            self.assertEqual(kwargs['auth'].client.resource_owner_secret, 'fake_oauth_token_secret')
+
     def test_get_user_info_ok_return_fake_email(self):
-        with patch('twitter_util.OAuth1Session') as oauth_mock:
-            oauth_mock.return_value.post.return_value = TwitterFakeResponse(
+        with patch('twitter_util.ProviderHttpClient') as client_mock:
+            client_mock.post.return_value = TwitterFakeResponse(
                 status_code=200,
                 content='user_id=1234&oauth_token=fake_oauth_token&oauth_token_secret=fake_oauth_token_secret'.encode('utf-8')
             )
-            oauth_mock.return_value.get.return_value = TwitterFakeResponse(
+            client_mock.get.return_value = TwitterFakeResponse(
                 status_code=200,
                 text=json.dumps({
                     'user_id': '1234'
@@ -51,11 +56,11 @@ class TestUserUtil(TestCase):
             )
             self.assertEqual(response['user_id'], 'Twitter-1234')
             self.assertEqual(response['email'], 'Twitter-1234@example.com')
-            oauth_mock.return_value.post.return_value = TwitterFakeResponse(
+            client_mock.post.return_value = TwitterFakeResponse(
                 status_code=200,
                 content='user_id=1234&oauth_token=fake_oauth_token&oauth_token_secret=fake_oauth_token_secret'.encode('utf-8')
             )
-            oauth_mock.return_value.get.return_value = TwitterFakeResponse(
+            client_mock.get.return_value = TwitterFakeResponse(
                 status_code=200,
                 text=json.dumps({
                     'user_id': '1234',
@@ -71,9 +76,8 @@ class TestUserUtil(TestCase):
 
     def test_get_user_info_ng_with_twitterexception(self):
         with self.assertRaises(TwitterOauthError):
-            with patch('twitter_util.OAuth1Session') as oauth_mock:
-                instance = oauth_mock.return_value
-                instance.post.return_value = TwitterFakeResponse(
+            with patch('twitter_util.ProviderHttpClient') as client_mock:
+                client_mock.post.return_value = TwitterFakeResponse(
                     status_code=400,
                     text='error'
                 )
@@ -83,8 +87,8 @@ class TestUserUtil(TestCase):
                 )
 
     def test_generate_auth_url_ok(self):
-        with patch('twitter_util.OAuth1Session.post') as oauth_mock:
-            oauth_mock.return_value = TwitterFakeResponse(
+        with patch('twitter_util.ProviderHttpClient.post') as client_mock:
+            client_mock.return_value = TwitterFakeResponse(
                 status_code=200,
                 content='oauth_token=fake_oauth_token'.encode('utf-8')
             )
@@ -95,8 +99,8 @@ class TestUserUtil(TestCase):
 
     def test_generate_auth_url_ng_with_twitterexception(self):
         with self.assertRaises(TwitterOauthError):
-            with patch('twitter_util.OAuth1Session.post') as oauth_mock:
-                oauth_mock.return_value = TwitterFakeResponse(
+            with patch('twitter_util.ProviderHttpClient.post') as client_mock:
+                client_mock.return_value = TwitterFakeResponse(
                     status_code=400,
                     text='error'
                 )
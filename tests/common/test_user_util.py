@@ -1,6 +1,9 @@
 import os
+import base64
 import boto3
-from user_util import UserUtil
+import settings
+from crypto_util import CryptoUtil
+from user_util import UserUtil, ExternalProviderLoginInfo
 from not_verified_user_error import NotVerifiedUserError
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
@@ -184,6 +187,34 @@ class TestUserUtil(TestCase):
     def test_exists_user_ng(self):
         self.assertFalse(UserUtil.exists_user(self.dynamodb, 'test-user'))
 
+    def test_get_external_provider_login_info_ok(self):
+        aes_iv = os.urandom(settings.AES_IV_BYTES)
+        encrypted_password = CryptoUtil.encrypt_password('nNU8E9E6OSe9tRQn', aes_iv)
+        iv = base64.b64encode(aes_iv).decode()
+        external_provider_users_table = self.dynamodb.Table(os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'])
+        external_provider_users_table.put_item(Item={
+            'external_provider_user_id': 'Twitter-1234', 'password': encrypted_password, 'iv': iv, 'email': 'email'
+        })
+        external_provider_users_table.put_item(Item={
+            'external_provider_user_id': 'Twitter-5678', 'password': encrypted_password, 'iv': iv, 'email': 'email',
+            'user_id': 'linked_user_id'
+        })
+
+        self.assertEqual(
+            UserUtil.get_external_provider_login_info(self.dynamodb, 'Twitter-1234'),
+            ExternalProviderLoginInfo(exists=True, user_id='Twitter-1234', has_user_id=False, password='nNU8E9E6OSe9tRQn')
+        )
+        self.assertEqual(
+            UserUtil.get_external_provider_login_info(self.dynamodb, 'Twitter-5678'),
+            ExternalProviderLoginInfo(exists=True, user_id='linked_user_id', has_user_id=True, password='nNU8E9E6OSe9tRQn')
+        )
+
+    def test_get_external_provider_login_info_ok_not_exists(self):
+        self.assertEqual(
+            UserUtil.get_external_provider_login_info(self.dynamodb, 'Twitter-1234'),
+            ExternalProviderLoginInfo(exists=False, user_id='Twitter-1234', has_user_id=False, password=None)
+        )
+
     def test_is_external_provider_user_ok(self):
         self.assertTrue(UserUtil.is_external_provider_user(self.dynamodb, 'user_id'))
 
@@ -437,8 +468,35 @@ class TestUserUtil(TestCase):
                 }
             ]
         })
-        result = UserUtil.get_private_eth_address(self.cognito, 'test')
+        result = UserUtil.get_private_eth_address(self.dynamodb, self.cognito, 'test')
+        self.assertEqual(test_address, result)
+
+        # Cognito から取得した private_eth_address を保持し、以降は Cognito を参照しない
+        user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
+        self.assertEqual(
+            user_configurations_table.get_item(Key={'user_id': 'test'})['Item'],
+            {'user_id': 'test', 'cognito_private_eth_address': test_address}
+        )
+        self.cognito.admin_get_user = MagicMock()
+        result = UserUtil.get_private_eth_address(self.dynamodb, self.cognito, 'test')
         self.assertEqual(test_address, result)
+        self.cognito.admin_get_user.assert_not_called()
+        # ウォレット登録済を判定する private_eth_address は更新しない
+        self.assertFalse(UserUtil.exists_private_eth_address(self.dynamodb, 'test'))
+
+    def test_get_private_eth_address_ok_exists_configuration_data(self):
+        self.cognito.admin_get_user = MagicMock()
+        user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
+        user_configurations_table.update_item(
+            Key={'user_id': 'test-user1'},
+            UpdateExpression='set cognito_private_eth_address = :cognito_private_eth_address',
+            ExpressionAttributeValues={':cognito_private_eth_address': '0x401BA17D89D795B3C6e373c5062F1C3F8979e73B'}
+        )
+
+        # ウォレット登録済の場合は、登録された private_eth_address を返却する
+        result = UserUtil.get_private_eth_address(self.dynamodb, self.cognito, 'test-user1')
+        self.assertEqual('0x1234567890123456789012345678901234567890', result)
+        self.cognito.admin_get_user.assert_not_called()
 
     def test_get_private_eth_address_ng_not_exists_private_eth_address(self):
         with self.assertRaises(RecordNotFoundError) as e:
@@ -450,7 +508,7 @@ class TestUserUtil(TestCase):
                     }
                 ]
             })
-            UserUtil.get_private_eth_address(self.cognito, 'test')
+            UserUtil.get_private_eth_address(self.dynamodb, self.cognito, 'test')
         self.assertEqual(e.exception.args[0], 'Record Not Found: private_eth_address')
 
     def test_exists_wallet_address_ok_exists_configuration_data(self):
@@ -0,0 +1,167 @@
+import os
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from tests_util import TestsUtil
+from verified_user_attribute_util import VerifiedUserAttributeUtil
+
+
+class TestVerifiedUserAttributeUtil(TestCase):
+    dynamodb = TestsUtil.get_dynamodb_client()
+
+    def setUp(self):
+        TestsUtil.set_all_tables_name_to_env()
+        TestsUtil.delete_all_tables(self.dynamodb)
+        TestsUtil.create_table(self.dynamodb, os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'], [
+            {'attribute_value': 'test@example.com', 'attribute_name': 'email', 'user_id': 'test-user01',
+             'created_at': 1520150552},
+            {'attribute_value': '+819011111111', 'attribute_name': 'phone_number', 'user_id': 'test-user01',
+             'created_at': 1520150552}
+        ])
+        self.cognito = MagicMock()
+        self.cognito.admin_get_user.return_value = {
+            'UserAttributes': [
+                {'Name': 'email', 'Value': 'test@example.com'},
+                {'Name': 'email_verified', 'Value': 'true'},
+                {'Name': 'phone_number', 'Value': '+819022222222'},
+                {'Name': 'phone_number_verified', 'Value': 'true'}
+            ]
+        }
+
+    def tearDown(self):
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+    def test_exists_ok(self):
+        self.assertTrue(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'email', 'test@example.com'))
+        self.cognito.admin_get_user.assert_called_once_with(UserPoolId='user_pool_id', Username='test-user01')
+
+    def test_exists_ok_not_registered(self):
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'email', 'other@example.com'))
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'phone_number', 'test@example.com'))
+        # 本人が登録した値の場合は重複としない
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'email', 'test@example.com', 'test-user01'))
+        self.cognito.admin_get_user.assert_not_called()
+
+    def test_exists_ok_changed_attribute(self):
+        # 登録後に電話番号が変更されている場合は重複としない
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'phone_number', '+819011111111', 'test-user02'))
+
+        self.cognito.admin_get_user.side_effect = ClientError(
+            {'Error': {'Code': 'UserNotFoundException'}}, 'operation_name')
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, self.cognito, 'user_pool_id', 'email', 'test@example.com'))
+
+    @patch('time.time', MagicMock(return_value=1520150553.000003))
+    def test_exists_ok_pending_user_verified(self):
+        # 検証を開始したユーザーが、ログイン前（検証済みとして登録される前）に検証を完了している場合
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user02', 'phone_number', '+819022222222')
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user03', 'phone_number', '+819022222222')
+
+        def admin_get_user(UserPoolId, Username):
+            if Username == 'test-user02':
+                return self.cognito.admin_get_user.return_value
+            return {'UserAttributes': [{'Name': 'phone_number', 'Value': '+819022222222'},
+                                       {'Name': 'phone_number_verified', 'Value': 'false'}]}
+
+        cognito = MagicMock()
+        cognito.admin_get_user.side_effect = admin_get_user
+        self.assertTrue(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, cognito, 'user_pool_id', 'phone_number', '+819022222222', 'test-user04'))
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, cognito, 'user_pool_id', 'phone_number', '+819022222222', 'test-user02'))
+
+        # 検証を開始したユーザーの登録は、検証済みの登録を更新しない
+        self.assertEqual(
+            VerifiedUserAttributeUtil.get_user_id(self.dynamodb, 'phone_number', '+819011111111'), 'test-user01')
+        self.assertIsNone(VerifiedUserAttributeUtil.get_user_id(self.dynamodb, 'phone_number', '+819022222222'))
+
+    def test_exists_ok_pending_user_verified_without_login(self):
+        # 検証を完了したユーザーがログインしないまま 24 時間以上経過した場合も、重複として扱う
+        with patch('time.time', MagicMock(return_value=1520150552)):
+            VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user02', 'phone_number', '+819022222222')
+
+        with patch('time.time', MagicMock(return_value=1520150552 + 30 * 24 * 60 * 60)):
+            self.assertEqual(VerifiedUserAttributeUtil.get_user_ids(self.dynamodb, 'phone_number', '+819022222222'),
+                             ['test-user02'])
+            self.assertTrue(VerifiedUserAttributeUtil.exists(
+                self.dynamodb, self.cognito, 'user_pool_id', 'phone_number', '+819022222222', 'test-user03'))
+        self.cognito.admin_get_user.assert_called_once_with(UserPoolId='user_pool_id', Username='test-user02')
+
+    @patch('time.time', MagicMock(return_value=1520150553.000003))
+    def test_exists_ok_pending_user_not_verified(self):
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user02', 'phone_number', '+819033333333')
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user03', 'phone_number', '+819033333333')
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user04', 'phone_number', '+819033333333')
+
+        def admin_get_user(UserPoolId, Username):
+            # test-user02 は検証中、test-user03 は電話番号を変更済、test-user04 は削除済
+            if Username == 'test-user02':
+                return {'UserAttributes': [{'Name': 'phone_number', 'Value': '+819033333333'},
+                                           {'Name': 'phone_number_verified', 'Value': 'false'}]}
+            if Username == 'test-user03':
+                return self.cognito.admin_get_user.return_value
+            raise ClientError({'Error': {'Code': 'UserNotFoundException'}}, 'operation_name')
+
+        cognito = MagicMock()
+        cognito.admin_get_user.side_effect = admin_get_user
+        self.assertFalse(VerifiedUserAttributeUtil.exists(
+            self.dynamodb, cognito, 'user_pool_id', 'phone_number', '+819033333333', 'test-user05'))
+
+        # 検証済みとなることがない登録のみ削除され、検証中のユーザーの登録は保持される
+        self.assertEqual(VerifiedUserAttributeUtil.get_user_ids(self.dynamodb, 'phone_number', '+819033333333'),
+                         ['test-user02'])
+
+    @patch('time.time', MagicMock(return_value=1520150553.000003))
+    def test_put_verified_attributes_ok(self):
+        VerifiedUserAttributeUtil.put_pending(self.dynamodb, 'test-user02', 'email', 'test02@example.com')
+        VerifiedUserAttributeUtil.put_verified_attributes(self.dynamodb, self.cognito, 'user_pool_id', 'test-user02', {
+            'email': 'test02@example.com',
+            'email_verified': 'true',
+            'phone_number': '+819033333333',
+            'phone_number_verified': 'false'
+        })
+        VerifiedUserAttributeUtil.put_verified_attributes(self.dynamodb, self.cognito, 'user_pool_id', 'test-user01', {
+            'email': 'test@example.com',
+            'email_verified': 'true',
+            'phone_number': '+819022222222',
+            'phone_number_verified': 'true'
+        })
+
+        table = self.dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        items = sorted(table.scan()['Items'], key=lambda x: x['attribute_value'])
+        # 検証済みの属性のみ登録され、登録済の属性は更新されない。検証を開始したユーザーの登録は削除される
+        self.assertEqual(items, [
+            {'attribute_value': '+819011111111', 'attribute_name': 'phone_number', 'user_id': 'test-user01',
+             'created_at': 1520150552},
+            {'attribute_value': '+819022222222', 'attribute_name': 'phone_number', 'user_id': 'test-user01',
+             'created_at': 1520150553},
+            {'attribute_value': 'test02@example.com', 'attribute_name': 'email', 'user_id': 'test-user02',
+             'created_at': 1520150553},
+            {'attribute_value': 'test@example.com', 'attribute_name': 'email', 'user_id': 'test-user01',
+             'created_at': 1520150552}
+        ])
+        self.cognito.admin_get_user.assert_not_called()
+
+    @patch('time.time', MagicMock(return_value=1520150553.000003))
+    def test_put_verified_attributes_ok_registered_by_other_user(self):
+        user_attributes = {
+            'email': 'test@example.com',
+            'email_verified': 'true',
+            'phone_number': '+819011111111',
+            'phone_number_verified': 'true'
+        }
+        # 登録したユーザーが検証済みの属性として保持している場合は更新しない
+        VerifiedUserAttributeUtil.put_verified_attributes(
+            self.dynamodb, self.cognito, 'user_pool_id', 'test-user02', user_attributes)
+        self.assertEqual(VerifiedUserAttributeUtil.get_user_id(self.dynamodb, 'email', 'test@example.com'),
+                         'test-user01')
+
+        # 登録したユーザーが属性を変更済の場合は更新する
+        self.assertEqual(VerifiedUserAttributeUtil.get_user_id(self.dynamodb, 'phone_number', '+819011111111'),
+                         'test-user02')
+        self.assertEqual(self.cognito.admin_get_user.call_count, 2)
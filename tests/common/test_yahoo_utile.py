@@ -60,7 +60,7 @@ class TestYahooUtil(TestCase):
                 )
 
     def test_get_access_token_ok(self):
-        with patch('yahoo_util.requests.post') as requests_mock:
+        with patch('yahoo_util.ProviderHttpClient.post') as requests_mock:
             requests_mock.return_value = YahooFakeResponse(
                 status_code=200,
                 text=json.dumps({
@@ -78,7 +78,7 @@ class TestYahooUtil(TestCase):
 
     def test_get_access_token_ng(self):
         with self.assertRaises(YahooOauthError):
-            with patch('yahoo_util.requests.post') as requests_mock:
+            with patch('yahoo_util.ProviderHttpClient.post') as requests_mock:
                 requests_mock.return_value = YahooFakeResponse(
                     status_code=400,
                     text=json.dumps({
@@ -97,6 +97,7 @@ class TestYahooUtil(TestCase):
     def test_verify_access_token_ok(self):
         with patch('yahoo_util.jwt.decode') as jwt_mock, \
                 patch('yahoo_util.jwt.get_unverified_header') as jwt_mock_h, \
+                patch('yahoo_util.OidcKeyCache.get_public_key') as public_key_mock, \
                 patch('yahoo_util.NonceUtil.verify') as nonce_mock:
             jwt_mock.return_value = {
                 'iss': 'https://auth.login.yahoo.co.jp/yconnect/v2',
@@ -118,9 +119,27 @@ class TestYahooUtil(TestCase):
                 id_token='id_token'
             )
             self.assertTrue(response)
+            self.assertEqual(jwt_mock.call_args[1]['key'], public_key_mock.return_value)
+            public_key_mock.assert_called_with(
+                'https://auth.login.yahoo.co.jp/yconnect/v2/public-keys',
+                '0cc175b9c0f1b6a831c399e269772661',
+                YahooOauthError
+            )
+
+    def test_verify_access_token_ng_with_unknown_kid(self):
+        with self.assertRaises(YahooVerifyException):
+            with patch('yahoo_util.jwt.get_unverified_header') as jwt_mock_h, \
+                    patch('yahoo_util.OidcKeyCache.get_public_key') as public_key_mock:
+                jwt_mock_h.return_value = {'kid': 'unknown'}
+                public_key_mock.return_value = None
+                self.yahoo.verify_access_token(
+                    dynamodb=dynamodb,
+                    access_token='access_token',
+                    id_token='id_token'
+                )
 
     def test_get_user_info_ok(self):
-        with patch('yahoo_util.requests.get') as requests_mock:
+        with patch('yahoo_util.ProviderHttpClient.get') as requests_mock:
             requests_mock.return_value = YahooFakeResponse(
                 status_code=200,
                 text=json.dumps({
@@ -138,7 +157,7 @@ class TestYahooUtil(TestCase):
 
     def test_get_user_info_ng(self):
         with self.assertRaises(YahooOauthError):
-            with patch('yahoo_util.requests.get') as requests_mock:
+            with patch('yahoo_util.ProviderHttpClient.get') as requests_mock:
                 requests_mock.return_value = YahooFakeResponse(
                     status_code=400,
                     text=json.dumps({
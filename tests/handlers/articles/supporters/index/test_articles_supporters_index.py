@@ -20,6 +20,7 @@ class TestArticlesSupportersIndex(TestCase):
                 'user_display_name': 'user00001',
                 'self_introduction': 'self_introduction00001',
                 'icon_image_url': 'http://example.com',
+                'icon_image_urls': {'48': 'http://example.com/48', '96': 'http://example.com/96', '240': 'http://example.com'}
             },
             {
                 'user_id': 'user00002',
@@ -138,6 +139,7 @@ class TestArticlesSupportersIndex(TestCase):
                 'user_id': 'user00001',
                 'user_display_name': 'user00001',
                 'icon_image_url': 'http://example.com',
+                'icon_image_urls': {'48': 'http://example.com/48', '96': 'http://example.com/96', '240': 'http://example.com'},
                 'sum_tip_value': 20000000000000000000  # 20 ALIS
             }
         ]
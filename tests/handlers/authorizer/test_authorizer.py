@@ -1,3 +1,4 @@
+import json
 import os
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
@@ -5,12 +6,14 @@ from unittest.mock import MagicMock, patch
 import requests
 
 from authorizer import Authorizer
+from clients import Clients
 
 
 class TestAuthorizer(TestCase):
     def setUp(self):
         os.environ['AUTHLETE_API_KEY'] = 'hoge'
         os.environ['AUTHLETE_API_SECRET'] = 'fuga'
+        Clients.clear()
 
     def tearDown(self):
         pass
@@ -32,13 +35,39 @@ class TestAuthorizer(TestCase):
                     {
                         "Action": 'execute-api:Invoke',
                         "Effect": 'Allow',
-                        "Resource": 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet'
+                        "Resource": [
+                            'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/*',
+                            'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/PUT/me/unread_notification_managers'
+                        ]
                     }
                 ]
             }
         }
         self.assertEqual(result, expected)
 
+    def test_main_ok_with_scopes(self):
+        # トークンのスコープで呼び出し可能な API 全体を対象とした policy を返却する
+        # method, token_scopes, action, expected(resource)の順でテストケースを定義
+        base = 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/prd'
+        cases = [
+            ['GET', ['read'], 'OK', [base + '/GET/*', base + '/PUT/me/unread_notification_managers']],
+            ['POST', ['read'], 'FORBIDDEN', [base + '/GET/*', base + '/PUT/me/unread_notification_managers']],
+            ['GET', ['read', 'write'], 'OK', [base + '/*/*']],
+            ['POST', ['read', 'write'], 'OK', [base + '/*/*']]
+        ]
+
+        for case in cases:
+            event = {
+                'methodArn': base + '/' + case[0] + '/me/articles/drafts',
+                'authorizationToken': 'ABCDEFG'
+            }
+            response = {'action': case[2], 'subject': 'John', 'scopes': case[1]}
+            with patch('authorizer.Authorizer._Authorizer__introspect', MagicMock(return_value=response)):
+                with self.subTest():
+                    result = Authorizer(event, {}).main()
+                    self.assertEqual(result['policyDocument']['Statement'][0]['Effect'], 'Allow')
+                    self.assertEqual(result['policyDocument']['Statement'][0]['Resource'], case[3])
+
     def test_main_deny_api_call(self):
         event = {
             'methodArn': 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet',
@@ -92,7 +121,7 @@ class TestAuthorizer(TestCase):
 
         self.assertEqual(e.exception.args[0], 'Internal Server Error')
 
-    @patch('requests.post', MagicMock(side_effect=requests.exceptions.RequestException()))
+    @patch('requests.Session.post', MagicMock(side_effect=requests.exceptions.RequestException()))
     def test_introspect(self):
         event = {
             'methodArn': 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet',
@@ -106,6 +135,44 @@ class TestAuthorizer(TestCase):
 
         self.assertEqual(e.exception.args[0], 'Internal Server Error(RequestException)')
 
+    @patch('time.time', MagicMock(return_value=1520150552.0))
+    def test_introspect_with_cache(self):
+        event = {
+            'methodArn': 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet',
+            'authorizationToken': 'ABCDEFG'
+        }
+        response = {'action': 'OK', 'subject': 'John', 'scopes': ['read'], 'expiresAt': 1520150652000}
+
+        with patch('requests.Session.post', MagicMock(return_value=MagicMock(text=json.dumps(response)))) as post:
+            self.assertEqual(Authorizer(event, {})._Authorizer__introspect(['read']), response)
+            self.assertEqual(Authorizer(event, {})._Authorizer__introspect(['read']), response)
+            self.assertEqual(post.call_count, 1)
+            self.assertEqual(post.call_args[1]['timeout'], (3.05, 10))
+
+            # 要求するスコープが異なる場合は再度問い合わせる
+            Authorizer(event, {})._Authorizer__introspect(['read', 'write'])
+            self.assertEqual(post.call_count, 2)
+
+        # トークンの有効期限を超えて保持しない
+        with patch('time.time', MagicMock(return_value=1520150652.0)), \
+                patch('requests.Session.post', MagicMock(return_value=MagicMock(text=json.dumps(response)))) as post:
+            Authorizer(event, {})._Authorizer__introspect(['read'])
+            self.assertEqual(post.call_count, 1)
+
+    def test_introspect_without_cache(self):
+        event = {
+            'methodArn': 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet',
+            'authorizationToken': 'ABCDEFG'
+        }
+
+        # 無効なトークンに対する結果は保持しない
+        for response in [{'action': 'UNAUTHORIZED'}, {'action': 'BAD_REQUEST'}, {'action': 'OK', 'subject': 'John'}]:
+            with patch('requests.Session.post', MagicMock(return_value=MagicMock(text=json.dumps(response)))) as post:
+                with self.subTest():
+                    Authorizer(event, {})._Authorizer__introspect(['read'])
+                    Authorizer(event, {})._Authorizer__introspect(['read'])
+                    self.assertEqual(post.call_count, 2)
+
     def test_generate_policy(self):
         event = {
             'methodArn': 'arn:aws:execute-api:ap-northeast-1:000000000000:abcdefghij/*/GET/articles/images:batchGet',
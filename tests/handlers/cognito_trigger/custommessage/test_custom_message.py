@@ -30,6 +30,16 @@ class TestCustomMessage(TestCase):
             }
         ]
         TestsUtil.create_table(dynamodb, os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'], external_provider_user_items)
+        verified_user_attribute_items = [
+            {
+                'attribute_value': '+819011112222',
+                'attribute_name': 'phone_number',
+                'user_id': 'verified_user',
+                'created_at': 1520150552
+            }
+        ]
+        TestsUtil.create_table(dynamodb, os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'],
+                               verified_user_attribute_items)
 
     def tearDown(self):
         TestsUtil.delete_all_tables(dynamodb)
@@ -72,176 +82,160 @@ class TestCustomMessage(TestCase):
     @patch('private_chain_util.PrivateChainUtil.send_transaction',
            MagicMock(return_value='0x0000000000000000000000000000000000000000000000000000000000000000'))
     def test_main_ok_get_verification_code_for_phone_number_first_time(self):
-        with patch('custom_message.boto3.client') as mock:
-            cognito_mock = MagicMock()
-            cognito_mock.user_list = MagicMock(return_value=[])
-            mock.return_value = cognito_mock
-            os.environ['DOMAIN'] = "alis.example.com"
-            event = {
-                        'version': '1',
-                        'region': 'us-east-1',
-                        'userPoolId': 'us-east-1_xxxxxxxxx',
-                        'userName': 'hoge1',
-                        'callerContext': {
-                            'awsSdkVersion': 'aws-sdk-js-2.6.4',
-                            'clientId': 'abcdefghijklmnopqrstuvwxy'
-                        },
-                        'triggerSource': 'CustomMessage_VerifyUserAttribute',
-                        'request': {
-                            'userAttributes': {
-                                'sub': '12345678-877a-4925-85e1-137c022e8c33',
-                                'email_verified': 'true',
-                                'cognito:user_status': 'UNCONFIRMED',
-                                'phone_number_verified': 'false',
-                                'phone_number': '+819000001234',
-                                'email': 'hoge1@example.net',
-                                'custom:private_eth_address': '0xaaaa'
-                            },
-                            'codeParameter': '{####}',
-                            'usernameParameter': None
+        os.environ['DOMAIN'] = "alis.example.com"
+        event = {
+                    'version': '1',
+                    'region': 'us-east-1',
+                    'userPoolId': 'us-east-1_xxxxxxxxx',
+                    'userName': 'hoge1',
+                    'callerContext': {
+                        'awsSdkVersion': 'aws-sdk-js-2.6.4',
+                        'clientId': 'abcdefghijklmnopqrstuvwxy'
+                    },
+                    'triggerSource': 'CustomMessage_VerifyUserAttribute',
+                    'request': {
+                        'userAttributes': {
+                            'sub': '12345678-877a-4925-85e1-137c022e8c33',
+                            'email_verified': 'true',
+                            'cognito:user_status': 'UNCONFIRMED',
+                            'phone_number_verified': 'false',
+                            'phone_number': '+819000001234',
+                            'email': 'hoge1@example.net',
+                            'custom:private_eth_address': '0xaaaa'
                         },
-                        'response': {
-                            'smsMessage': None,
-                            'emailMessage': None,
-                            'emailSubject': None
-                        }
+                        'codeParameter': '{####}',
+                        'usernameParameter': None
+                    },
+                    'response': {
+                        'smsMessage': None,
+                        'emailMessage': None,
+                        'emailSubject': None
                     }
-            custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
-            response = custom_message.main()
-            self.assertRegex(response['response']['smsMessage'],
-                             'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
-            self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
-            self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
+                }
+        custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
+        response = custom_message.main()
+        self.assertRegex(response['response']['smsMessage'],
+                         'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
+        self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
+        self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
 
     @patch('private_chain_util.PrivateChainUtil.send_transaction',
            MagicMock(return_value='0x0000000000000000000000000000000000000000000000000000000000000000'))
     def test_main_ok_get_verification_code_for_phone_number_already_confirmed(self):
-        with patch('custom_message.boto3.client') as mock:
-            cognito_mock = MagicMock()
-            cognito_mock.user_list = MagicMock(return_value=[])
-            mock.return_value = cognito_mock
-            os.environ['DOMAIN'] = "alis.example.com"
-            event = {
-                        'version': '1',
-                        'region': 'us-east-1',
-                        'userPoolId': 'us-east-1_xxxxxxxxx',
-                        'userName': 'hoge1',
-                        'callerContext': {
-                            'awsSdkVersion': 'aws-sdk-js-2.6.4',
-                            'clientId': 'abcdefghijklmnopqrstuvwxy'
-                        },
-                        'triggerSource': 'CustomMessage_VerifyUserAttribute',
-                        'request': {
-                            'userAttributes': {
-                                'sub': '12345678-877a-4925-85e1-137c022e8c33',
-                                'email_verified': 'true',
-                                'cognito:user_status': 'UNCONFIRMED',
-                                'phone_number_verified': 'true',
-                                'phone_number': '+819000001234',
-                                'email': 'hoge1@example.net',
-                                'custom:private_eth_address': '0xaaaa'
-                            },
-                            'codeParameter': '{####}',
-                            'usernameParameter': None
+        os.environ['DOMAIN'] = "alis.example.com"
+        event = {
+                    'version': '1',
+                    'region': 'us-east-1',
+                    'userPoolId': 'us-east-1_xxxxxxxxx',
+                    'userName': 'hoge1',
+                    'callerContext': {
+                        'awsSdkVersion': 'aws-sdk-js-2.6.4',
+                        'clientId': 'abcdefghijklmnopqrstuvwxy'
+                    },
+                    'triggerSource': 'CustomMessage_VerifyUserAttribute',
+                    'request': {
+                        'userAttributes': {
+                            'sub': '12345678-877a-4925-85e1-137c022e8c33',
+                            'email_verified': 'true',
+                            'cognito:user_status': 'UNCONFIRMED',
+                            'phone_number_verified': 'true',
+                            'phone_number': '+819000001234',
+                            'email': 'hoge1@example.net',
+                            'custom:private_eth_address': '0xaaaa'
                         },
-                        'response': {
-                            'smsMessage': None,
-                            'emailMessage': None,
-                            'emailSubject': None
-                        }
+                        'codeParameter': '{####}',
+                        'usernameParameter': None
+                    },
+                    'response': {
+                        'smsMessage': None,
+                        'emailMessage': None,
+                        'emailSubject': None
                     }
-            custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
-            response = custom_message.main()
-            self.assertRegex(response['response']['smsMessage'],
-                             'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
-            self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
-            self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
+                }
+        custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
+        response = custom_message.main()
+        self.assertRegex(response['response']['smsMessage'],
+                         'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
+        self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
+        self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
 
     @patch('private_chain_util.PrivateChainUtil.send_transaction',
            MagicMock(return_value='0x0000000000000000000000000000000000000000000000000000000011111111'))
     def test_main_ok_get_verification_code_for_phone_number_already_confirmed_with_exists_token(self):
-        with patch('custom_message.boto3.client') as mock:
-            cognito_mock = MagicMock()
-            cognito_mock.user_list = MagicMock(return_value=[])
-            mock.return_value = cognito_mock
-            os.environ['DOMAIN'] = "alis.example.com"
-            event = {
-                        'version': '1',
-                        'region': 'us-east-1',
-                        'userPoolId': 'us-east-1_xxxxxxxxx',
-                        'userName': 'hoge1',
-                        'callerContext': {
-                            'awsSdkVersion': 'aws-sdk-js-2.6.4',
-                            'clientId': 'abcdefghijklmnopqrstuvwxy'
-                        },
-                        'triggerSource': 'CustomMessage_VerifyUserAttribute',
-                        'request': {
-                            'userAttributes': {
-                                'sub': '12345678-877a-4925-85e1-137c022e8c33',
-                                'email_verified': 'true',
-                                'cognito:user_status': 'UNCONFIRMED',
-                                'phone_number_verified': 'true',
-                                'phone_number': '+819000001234',
-                                'email': 'hoge1@example.net',
-                                'custom:private_eth_address': '0xaaaa'
-                            },
-                            'codeParameter': '{####}',
-                            'usernameParameter': None
+        os.environ['DOMAIN'] = "alis.example.com"
+        event = {
+                    'version': '1',
+                    'region': 'us-east-1',
+                    'userPoolId': 'us-east-1_xxxxxxxxx',
+                    'userName': 'hoge1',
+                    'callerContext': {
+                        'awsSdkVersion': 'aws-sdk-js-2.6.4',
+                        'clientId': 'abcdefghijklmnopqrstuvwxy'
+                    },
+                    'triggerSource': 'CustomMessage_VerifyUserAttribute',
+                    'request': {
+                        'userAttributes': {
+                            'sub': '12345678-877a-4925-85e1-137c022e8c33',
+                            'email_verified': 'true',
+                            'cognito:user_status': 'UNCONFIRMED',
+                            'phone_number_verified': 'true',
+                            'phone_number': '+819000001234',
+                            'email': 'hoge1@example.net',
+                            'custom:private_eth_address': '0xaaaa'
                         },
-                        'response': {
-                            'smsMessage': None,
-                            'emailMessage': None,
-                            'emailSubject': None
-                        }
+                        'codeParameter': '{####}',
+                        'usernameParameter': None
+                    },
+                    'response': {
+                        'smsMessage': None,
+                        'emailMessage': None,
+                        'emailSubject': None
                     }
-            custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
-            response = custom_message.main()
-            self.assertRegex(response['response']['smsMessage'],
-                             'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
-            self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
-            self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
+                }
+        custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
+        response = custom_message.main()
+        self.assertRegex(response['response']['smsMessage'],
+                         'ALISです。\n' + event['userName'] + 'さんの認証コードは {####} です。.*')
+        self.assertRegex(response['response']['emailMessage'], '.*ALISをご利用いただきありがとうございます。.*')
+        self.assertEqual(response['response']['emailSubject'], '【ALIS】登録のご案内：メールアドレスの確認')
 
     @patch('private_chain_util.PrivateChainUtil.send_transaction',
            MagicMock(return_value='0x0000000000000000000000000000000000000000000000000000000011111111'))
     def test_main_ng_get_verification_code_after_updated_phone_number_with_exists_token(self):
-        with patch('custom_message.boto3.client') as mock:
-            cognito_mock = MagicMock()
-            cognito_mock.user_list = MagicMock(return_value=[])
-            mock.return_value = cognito_mock
-            os.environ['DOMAIN'] = "alis.example.com"
-            event = {
-                        'version': '1',
-                        'region': 'us-east-1',
-                        'userPoolId': 'us-east-1_xxxxxxxxx',
-                        'userName': 'hoge1',
-                        'callerContext': {
-                            'awsSdkVersion': 'aws-sdk-js-2.6.4',
-                            'clientId': 'abcdefghijklmnopqrstuvwxy'
-                        },
-                        'triggerSource': 'CustomMessage_VerifyUserAttribute',
-                        'request': {
-                            'userAttributes': {
-                                'sub': '12345678-877a-4925-85e1-137c022e8c33',
-                                'email_verified': 'true',
-                                'cognito:user_status': 'UNCONFIRMED',
-                                'phone_number_verified': 'false',
-                                'phone_number': '+819000001234',
-                                'email': 'hoge1@example.net',
-                                'custom:private_eth_address': '0xaaaa'
-                            },
-                            'codeParameter': '{####}',
-                            'usernameParameter': None
+        os.environ['DOMAIN'] = "alis.example.com"
+        event = {
+                    'version': '1',
+                    'region': 'us-east-1',
+                    'userPoolId': 'us-east-1_xxxxxxxxx',
+                    'userName': 'hoge1',
+                    'callerContext': {
+                        'awsSdkVersion': 'aws-sdk-js-2.6.4',
+                        'clientId': 'abcdefghijklmnopqrstuvwxy'
+                    },
+                    'triggerSource': 'CustomMessage_VerifyUserAttribute',
+                    'request': {
+                        'userAttributes': {
+                            'sub': '12345678-877a-4925-85e1-137c022e8c33',
+                            'email_verified': 'true',
+                            'cognito:user_status': 'UNCONFIRMED',
+                            'phone_number_verified': 'false',
+                            'phone_number': '+819000001234',
+                            'email': 'hoge1@example.net',
+                            'custom:private_eth_address': '0xaaaa'
                         },
-                        'response': {
-                            'smsMessage': None,
-                            'emailMessage': None,
-                            'emailSubject': None
-                        }
+                        'codeParameter': '{####}',
+                        'usernameParameter': None
+                    },
+                    'response': {
+                        'smsMessage': None,
+                        'emailMessage': None,
+                        'emailSubject': None
                     }
-            custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
-            with self.assertRaises(Exception) as e:
-                custom_message.main()
-            self.assertEqual('Do not allow phone number updates', str(e.exception))
+                }
+        custom_message = CustomMessage(event=event, context="", dynamodb=dynamodb)
+        with self.assertRaises(Exception) as e:
+            custom_message.main()
+        self.assertEqual('Do not allow phone number updates', str(e.exception))
 
     def test_invalid_phone_number(self):
         os.environ['DOMAIN'] = "alis.example.com"
@@ -523,3 +517,84 @@ class TestCustomMessage(TestCase):
         with self.assertRaises(Exception) as e:
             custommessage.main()
         self.assertEqual("external provider's user can not execute", str(e.exception))
+
+    def __create_verify_phone_number_event(self, phone_number):
+        return {
+            'version': '1',
+            'region': 'us-east-1',
+            'userPoolId': 'us-east-1_xxxxxxxxx',
+            'userName': 'hoge1',
+            'callerContext': {
+                'awsSdkVersion': 'aws-sdk-js-2.6.4',
+                'clientId': 'abcdefghijklmnopqrstuvwxy'
+            },
+            'triggerSource': 'CustomMessage_VerifyUserAttribute',
+            'request': {
+                'userAttributes': {
+                    'sub': '12345678-877a-4925-85e1-137c022e8c33',
+                    'email_verified': 'true',
+                    'cognito:user_status': 'CONFIRMED',
+                    'phone_number_verified': 'false',
+                    'phone_number': phone_number,
+                    'email': 'hoge1@example.net'
+                },
+                'codeParameter': '{####}',
+                'usernameParameter': None
+            },
+            'response': {
+                'smsMessage': None,
+                'emailMessage': None,
+                'emailSubject': None
+            }
+        }
+
+    def test_main_ok_put_verified_user_attribute(self):
+        os.environ['DOMAIN'] = "alis.example.com"
+        cognito = MagicMock()
+        event = self.__create_verify_phone_number_event('+819033334444')
+        CustomMessage(event=event, context="", dynamodb=dynamodb, cognito=cognito).main()
+
+        # 検証済みとは別に、認証を開始したユーザーとして登録され、Cognito の list_users は呼び出さない
+        table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        self.assertIsNone(
+            table.get_item(Key={'attribute_value': '+819033334444', 'attribute_name': 'phone_number'}).get('Item'))
+        item = table.get_item(Key={'attribute_value': '+819033334444',
+                                   'attribute_name': 'phone_number#pending#hoge1'})['Item']
+        self.assertEqual(item['user_id'], 'hoge1')
+        cognito.list_users.assert_not_called()
+        cognito.admin_get_user.assert_not_called()
+
+    def test_main_ng_already_exists_phone_number(self):
+        os.environ['DOMAIN'] = "alis.example.com"
+        cognito = MagicMock()
+        cognito.admin_get_user.return_value = {
+            'UserAttributes': [
+                {'Name': 'phone_number', 'Value': '+819011112222'},
+                {'Name': 'phone_number_verified', 'Value': 'true'}
+            ]
+        }
+        event = self.__create_verify_phone_number_event('+819011112222')
+        with self.assertRaises(Exception) as e:
+            CustomMessage(event=event, context="", dynamodb=dynamodb, cognito=cognito).main()
+        self.assertEqual('This phone_number is already exists', str(e.exception))
+        cognito.admin_get_user.assert_called_once_with(UserPoolId='us-east-1_xxxxxxxxx', Username='verified_user')
+
+    def test_main_ok_already_changed_phone_number(self):
+        os.environ['DOMAIN'] = "alis.example.com"
+        cognito = MagicMock()
+        cognito.admin_get_user.return_value = {
+            'UserAttributes': [
+                {'Name': 'phone_number', 'Value': '+819055556666'},
+                {'Name': 'phone_number_verified', 'Value': 'true'}
+            ]
+        }
+        event = self.__create_verify_phone_number_event('+819011112222')
+        CustomMessage(event=event, context="", dynamodb=dynamodb, cognito=cognito).main()
+
+        # 登録したユーザーが電話番号を変更済の場合も、検証済みの登録は認証の開始時には更新しない
+        table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        item = table.get_item(Key={'attribute_value': '+819011112222', 'attribute_name': 'phone_number'})['Item']
+        self.assertEqual(item['user_id'], 'verified_user')
+        item = table.get_item(Key={'attribute_value': '+819011112222',
+                                   'attribute_name': 'phone_number#pending#hoge1'})['Item']
+        self.assertEqual(item['user_id'], 'hoge1')
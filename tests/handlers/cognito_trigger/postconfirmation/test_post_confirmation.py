@@ -20,6 +20,7 @@ class TestPostConfirmation(TestCase):
         TestsUtil.delete_all_tables(dynamodb)
         TestsUtil.create_table(dynamodb, os.environ['USERS_TABLE_NAME'], user_tables_items)
         TestsUtil.create_table(dynamodb, os.environ['BETA_USERS_TABLE_NAME'], beta_tables)
+        TestsUtil.create_table(dynamodb, os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'], [])
 
     @classmethod
     def tearDownClass(cls):
@@ -28,6 +29,7 @@ class TestPostConfirmation(TestCase):
     def test_create_userid(self):
         os.environ['BETA_MODE_FLAG'] = "0"
         event = {
+                'userPoolId': 'user_pool_id',
                 'userName': 'hogehoge',
                 'request': {
                     'userAttributes': {
@@ -43,9 +45,28 @@ class TestPostConfirmation(TestCase):
         self.assertEqual(items['Item']['user_id'], items['Item']['user_display_name'])
         self.assertEqual(items['Item']['sync_elasticsearch'], 1)
 
+    def test_create_userid_with_verified_email(self):
+        os.environ['BETA_MODE_FLAG'] = "0"
+        event = {
+                'userPoolId': 'user_pool_id',
+                'userName': 'verified-user',
+                'request': {
+                    'userAttributes': {
+                        'phone_number': '',
+                        'email': 'verified@example.com',
+                        'email_verified': 'true'
+                    }
+                }
+        }
+        PostConfirmation(event=event, context="", dynamodb=dynamodb).main()
+        table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        item = table.get_item(Key={'attribute_value': 'verified@example.com', 'attribute_name': 'email'})['Item']
+        self.assertEqual(item['user_id'], 'verified-user')
+
     def test_create_userid_already_exists(self):
         os.environ['BETA_MODE_FLAG'] = "0"
         event = {
+                'userPoolId': 'user_pool_id',
                 'userName': 'testid000000',
                 'request': {
                     'userAttributes': {
@@ -61,6 +82,7 @@ class TestPostConfirmation(TestCase):
     def test_beta_user_confirm(self):
         os.environ['BETA_MODE_FLAG'] = "1"
         event = {
+                'userPoolId': 'user_pool_id',
                 'userName': 'hugahuga',
                 'request': {
                     'userAttributes': {
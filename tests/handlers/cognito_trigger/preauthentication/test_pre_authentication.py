@@ -18,6 +18,7 @@ class TestPreAuthentication(TestCase):
         TestsUtil.set_all_tables_name_to_env()
         TestsUtil.delete_all_tables(dynamodb)
         TestsUtil.create_table(dynamodb, os.environ['EXTERNAL_PROVIDER_USERS_TABLE_NAME'], external_provider_user_items)
+        TestsUtil.create_table(dynamodb, os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'], [])
 
     @classmethod
     def tearDownClass(cls):
@@ -105,6 +106,56 @@ class TestPreAuthentication(TestCase):
         response = pre_authentication.main()
         self.assertEqual(event, response)
 
+    def test_normal_user_ok_login_with_verified_phone_number(self):
+        event = {
+            'userPoolId': 'us-east-xxxxxxxx',
+            'userName': 'verified_user',
+            'triggerSource': 'PreAuthentication_Authentication',
+            'request': {
+                'userAttributes': {
+                    'email': 'verified@example.com',
+                    'email_verified': 'true',
+                    'phone_number': '+819011112222',
+                    'phone_number_verified': 'true'
+                }
+            }
+        }
+        response = PreAuthentication(event=event, context="", dynamodb=dynamodb).main()
+        self.assertEqual(event, response)
+
+        # 検証済みの属性として登録される
+        table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        for attribute_name in ['email', 'phone_number']:
+            item = table.get_item(Key={
+                'attribute_value': event['request']['userAttributes'][attribute_name],
+                'attribute_name': attribute_name
+            })['Item']
+            self.assertEqual(item['user_id'], 'verified_user')
+
+    def test_external_provider_user_ok_login_with_verified_phone_number(self):
+        event = {
+            'userPoolId': 'us-east-xxxxxxxx',
+            'userName': 'external_provider_user',
+            'triggerSource': 'PreAuthentication_Authentication',
+            'request': {
+                'userAttributes': {
+                    'email': 'external@example.com',
+                    'phone_number': '+819033334444',
+                    'phone_number_verified': 'true'
+                },
+                'validationData': {'EXTERNAL_PROVIDER_LOGIN_MARK': 'test_marker'}
+            }
+        }
+        response = PreAuthentication(event=event, context="", dynamodb=dynamodb).main()
+        self.assertEqual(event, response)
+
+        # 外部プロバイダでのログインの場合も、検証済みの属性のみ登録される
+        table = dynamodb.Table(os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'])
+        item = table.get_item(Key={'attribute_value': '+819033334444', 'attribute_name': 'phone_number'})['Item']
+        self.assertEqual(item['user_id'], 'external_provider_user')
+        self.assertIsNone(table.get_item(
+            Key={'attribute_value': 'external@example.com', 'attribute_name': 'email'}).get('Item'))
+
     def test_has_user_id_login_ok(self):
         event = {
             'version': '1',
@@ -19,6 +19,12 @@ class TestPreSignUp(TestCase):
         TestsUtil.set_all_tables_name_to_env()
         TestsUtil.delete_all_tables(dynamodb)
         TestsUtil.create_table(dynamodb, os.environ['BETA_USERS_TABLE_NAME'], items)
+        verified_user_attribute_items = [
+            {'attribute_value': 'verified@example.com', 'attribute_name': 'email', 'user_id': 'verified-user',
+             'created_at': 1520150552}
+        ]
+        TestsUtil.create_table(dynamodb, os.environ['VERIFIED_USER_ATTRIBUTES_TABLE_NAME'],
+                               verified_user_attribute_items)
 
     @classmethod
     def tearDownClass(cls):
@@ -104,8 +110,6 @@ class TestPreSignUp(TestCase):
         response = presignup.main()
         self.assertEqual(response['statusCode'], 400)
 
-    @patch("pre_signup.PreSignUp._PreSignUp__filter_users",
-           MagicMock(return_value='xxxxxxx'))
     @patch("pre_signup.PreSignUp._PreSignUp__email_exist_check",
            MagicMock(return_value='xxxxxxx'))
     def test_validate_ok(self):
@@ -121,8 +125,6 @@ class TestPreSignUp(TestCase):
         response = presignup.main()
         self.assertEqual(response['userName'], 'yamasita')
 
-    @patch("pre_signup.PreSignUp._PreSignUp__filter_users",
-           MagicMock(return_value='xxxxxxx'))
     @patch("pre_signup.PreSignUp._PreSignUp__email_exist_check",
            MagicMock(return_value='xxxxxxx'))
     def test_correct_beta_user(self):
@@ -142,6 +144,40 @@ class TestPreSignUp(TestCase):
         response = presignup.main()
         self.assertEqual(response['userName'], 'yamasita')
 
+    def test_validate_ng_already_exists_email(self):
+        os.environ['BETA_MODE_FLAG'] = "0"
+        cognito = MagicMock()
+        cognito.admin_get_user.return_value = {
+            'UserAttributes': [
+                {'Name': 'email', 'Value': 'verified@example.com'},
+                {'Name': 'email_verified', 'Value': 'true'}
+            ]
+        }
+        event = {
+            'userName': 'yamasita',
+            'userPoolId': 'us-east-xxxxxxxx',
+            'request': {
+                'userAttributes': {
+                    'phone_number': '',
+                    'email': 'verified@example.com'
+                },
+                'validationData': None
+            },
+            'triggerSource': 'PreSignUp_SignUp'
+        }
+        response = PreSignUp(event=event, context="", dynamodb=dynamodb, cognito=cognito).main()
+        self.assertEqual(response['statusCode'], 400)
+        self.assertEqual(json.loads(response['body']), {'message': 'Invalid parameter: This email is already exists'})
+        cognito.admin_get_user.assert_called_once_with(UserPoolId='us-east-xxxxxxxx', Username='verified-user')
+
+        # 検証済みの email として登録されていない場合は Cognito を参照しない
+        cognito.admin_get_user.reset_mock()
+        event['request']['userAttributes']['email'] = 'new@example.com'
+        response = PreSignUp(event=event, context="", dynamodb=dynamodb, cognito=cognito).main()
+        self.assertEqual(response['userName'], 'yamasita')
+        cognito.admin_get_user.assert_not_called()
+        cognito.list_users.assert_not_called()
+
     def test_already_used_email(self):
         os.environ['BETA_MODE_FLAG'] = "1"
         event = {
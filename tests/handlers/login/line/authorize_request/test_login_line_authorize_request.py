@@ -3,6 +3,7 @@ import json
 import settings
 from unittest import TestCase
 from login_line_authorize_request import LoginLineAuthorizeRequest
+from user_util import ExternalProviderLoginInfo
 from unittest.mock import patch, MagicMock
 from tests_util import TestsUtil
 from botocore.exceptions import ClientError
@@ -67,7 +68,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
 
             event['body'] = json.dumps(event['body'])
 
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='LINE-Uxxxxx', has_user_id=False, password=None)
             user_mock.force_non_verified_phone.return_value = None
             crypto_mock.encrypt_password.return_value = '&yjgFwFeOpd0{0=&y566'
             user_mock.add_external_provider_user_info.return_value = None
@@ -103,8 +105,7 @@ class TestLoginLineAuthorizeRequest(TestCase):
     @patch("login_line_authorize_request.LoginLineAuthorizeRequest._LoginLineAuthorizeRequest__get_line_jwt",
            MagicMock(return_value='xxxxxxx'))
     def test_main_login_ok(self):
-        with patch('login_line_authorize_request.UserUtil') as user_mock, \
-             patch('login_line_authorize_request.CryptoUtil') as crypto_mock:
+        with patch('login_line_authorize_request.UserUtil') as user_mock:
             event = {
                 'body': {
                     'code': 'testcode',
@@ -113,8 +114,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
 
             event['body'] = json.dumps(event['body'])
 
-            user_mock.exists_user.return_value = True
-            crypto_mock.decrypt_password.return_value = 'password'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='LINE-U_test_user', has_user_id=False, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -122,7 +123,6 @@ class TestLoginLineAuthorizeRequest(TestCase):
                     'RefreshToken': 'ccccc'
                 }
             }
-            user_mock.has_user_id.return_value = False
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 200)
@@ -148,8 +148,7 @@ class TestLoginLineAuthorizeRequest(TestCase):
     @patch("login_line_authorize_request.LoginLineAuthorizeRequest._LoginLineAuthorizeRequest__get_line_jwt",
            MagicMock(return_value='xxxxxxx'))
     def test_main_login_ok_has_user_id(self):
-        with patch('login_line_authorize_request.UserUtil') as user_mock,\
-             patch('login_line_authorize_request.CryptoUtil') as crypto_mock:
+        with patch('login_line_authorize_request.UserUtil') as user_mock:
             event = {
                 'body': {
                     'code': 'testcode',
@@ -158,8 +157,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
 
             event['body'] = json.dumps(event['body'])
 
-            user_mock.exists_user.return_value = True
-            crypto_mock.decrypt_password.return_value = 'password'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user', has_user_id=True, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -167,7 +166,6 @@ class TestLoginLineAuthorizeRequest(TestCase):
                     'RefreshToken': 'ccccc'
                 }
             }
-            user_mock.has_user_id.return_value = True
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 200)
@@ -201,7 +199,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
             }
 
             event['body'] = json.dumps(event['body'])
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='LINE-Uxxxxx', has_user_id=False, password=None)
             user_mock.create_external_provider_user.side_effect = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -209,7 +208,6 @@ class TestLoginLineAuthorizeRequest(TestCase):
             user_mock.force_non_verified_phone.return_value = None
             user_mock.add_user_profile.return_value = None
             user_mock.add_external_provider_user_info.return_value = None
-            user_mock.has_user_id.return_value = True
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 500)
@@ -230,8 +228,7 @@ class TestLoginLineAuthorizeRequest(TestCase):
     @patch("login_line_authorize_request.LoginLineAuthorizeRequest._LoginLineAuthorizeRequest__get_line_jwt",
            MagicMock(return_value='xxxxxxx'))
     def test_main_login_with_exception(self):
-        with patch('login_line_authorize_request.UserUtil') as user_mock, \
-             patch('login_line_authorize_request.CryptoUtil') as crypto_mock:
+        with patch('login_line_authorize_request.UserUtil') as user_mock:
             event = {
                 'body': {
                     'code': 'testcode',
@@ -240,13 +237,12 @@ class TestLoginLineAuthorizeRequest(TestCase):
 
             event['body'] = json.dumps(event['body'])
 
-            user_mock.exists_user.return_value = True
-            crypto_mock.decrypt_password.return_value = 'password'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='LINE-U_test_user', has_user_id=False, password='password')
             user_mock.external_provider_login.side_effect = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
             )
-            user_mock.has_user_id.return_value = False
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 500)
@@ -275,7 +271,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
             }
 
             event['body'] = json.dumps(event['body'])
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='LINE-Uxxxxx', has_user_id=False, password=None)
             user_mock.create_external_provider_user.side_effect = ClientError(
                 {'Error': {'Code': 'UsernameExistsException'}},
                 'operation_name'
@@ -283,7 +280,6 @@ class TestLoginLineAuthorizeRequest(TestCase):
             user_mock.force_non_verified_phone.return_value = None
             user_mock.add_user_profile.return_value = None
             user_mock.add_external_provider_user_info.return_value = None
-            user_mock.has_user_id.return_value = False
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 400)
@@ -330,7 +326,8 @@ class TestLoginLineAuthorizeRequest(TestCase):
 
             event['body'] = json.dumps(event['body'])
 
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='LINE-U_test_user', has_user_id=False, password=None)
 
             response = LoginLineAuthorizeRequest(event=event, context="", dynamodb=dynamodb).main()
             self.assertEqual(response['statusCode'], 400)
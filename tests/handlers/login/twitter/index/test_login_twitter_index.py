@@ -2,6 +2,7 @@ import os
 import json
 from botocore.exceptions import ClientError
 from unittest import TestCase
+from user_util import ExternalProviderLoginInfo
 from unittest.mock import patch
 from login_twitter_index import LoginTwitterIndex
 from exceptions import TwitterOauthError
@@ -78,7 +79,8 @@ class TestLoginTwitterIndex(TestCase):
                 'email': 'Twitter-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='Twitter-1234', has_user_id=False, password=None)
             user_mock.create_external_provider_user.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -110,17 +112,14 @@ class TestLoginTwitterIndex(TestCase):
 
     def test_main_ok_with_existing_user_and_user_id(self):
         with patch('login_twitter_index.TwitterUtil') as twitter_mock, \
-         patch('login_twitter_index.UserUtil') as user_mock, \
-         patch('login_twitter_index.CryptoUtil') as crypto_mock:
+         patch('login_twitter_index.UserUtil') as user_mock:
             twitter_mock.return_value.get_user_info.return_value = {
                 'user_id': 'Twitter-12345',
                 'email': 'Twitter-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = True
-            crypto_mock.decrypt_password.return_value = 'password'
-            user_mock.get_user_id.return_value = 'user_id'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user_id', has_user_id=True, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -159,15 +158,14 @@ class TestLoginTwitterIndex(TestCase):
 
     def test_main_ok_with_existing_user_and_no_user_id(self):
         with patch('login_twitter_index.TwitterUtil') as twitter_mock, \
-         patch('login_twitter_index.UserUtil') as user_mock, patch('login_twitter_index.CryptoUtil') as crypto_mock:
+         patch('login_twitter_index.UserUtil') as user_mock:
             twitter_mock.return_value.get_user_info.return_value = {
                 'user_id': 'Twitter-1234',
                 'email': 'Twitter-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = False
-            crypto_mock.decrypt_password.return_value = 'password'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='Twitter-1234', has_user_id=False, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -258,8 +256,8 @@ class TestLoginTwitterIndex(TestCase):
                 'email': 'Twitter-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = True
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user_id', has_user_id=True, password='password')
             user_mock.external_provider_login.side_effect = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -276,7 +274,7 @@ class TestLoginTwitterIndex(TestCase):
             self.assertEqual(
                 json.loads(response['body']),
                 {
-                    'message': 'Internal server error: LoginTwitterIndex'
+                    'message': 'Internal server error'
                 }
             )
 
@@ -288,7 +286,8 @@ class TestLoginTwitterIndex(TestCase):
                 'email': 'Twitter-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='Twitter-1234', has_user_id=False, password=None)
             user_mock.create_external_provider_user.return_value = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -296,7 +295,6 @@ class TestLoginTwitterIndex(TestCase):
             user_mock.force_non_verified_phone.return_value = None
             user_mock.add_user_profile.return_value = None
             user_mock.add_external_provider_user_info.return_value = None
-            user_mock.has_user_id.return_value = True
             params = {
                 'body': {
                     'oauth_token': 'fake_oauth_token',
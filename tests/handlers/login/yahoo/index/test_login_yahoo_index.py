@@ -2,6 +2,7 @@ import os
 import json
 from botocore.exceptions import ClientError
 from unittest import TestCase
+from user_util import ExternalProviderLoginInfo
 from unittest.mock import patch
 from login_yahoo_index import LoginYahooIndex
 from exceptions import YahooOauthError
@@ -84,7 +85,8 @@ class TestLoginYahooIndex(TestCase):
             crypto_mock.encrypt_password.return_value = '&yjgFwFeOpd0{0=&y566'
             yahoo_mock.return_value.verify_state_nonce.return_value = True
             yahoo_mock.return_value.verify_access_token.return_value = True
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='Yahoo-1234', has_user_id=False, password=None)
             user_mock.create_external_provider_user.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -116,7 +118,7 @@ class TestLoginYahooIndex(TestCase):
 
     def test_main_ok_with_existing_user_and_user_id(self):
         with patch('login_yahoo_index.YahooUtil') as yahoo_mock, \
-         patch('login_yahoo_index.UserUtil') as user_mock, patch('login_yahoo_index.CryptoUtil') as crypto_mock:
+         patch('login_yahoo_index.UserUtil') as user_mock:
             yahoo_mock.return_value.get_user_info.return_value = {
                 'user_id': 'Yahoo-12345',
                 'email': 'Yahoo-1234@example.com',
@@ -128,10 +130,8 @@ class TestLoginYahooIndex(TestCase):
             }
             yahoo_mock.return_value.verify_state_nonce.return_value = True
             yahoo_mock.return_value.verify_access_token.return_value = True
-            crypto_mock.get_external_provider_password.return_value = 'password'
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = True
-            user_mock.get_user_id.return_value = 'user_id'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user_id', has_user_id=True, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -170,8 +170,7 @@ class TestLoginYahooIndex(TestCase):
 
     def test_main_ok_with_existing_user_and_no_user_id(self):
         with patch('login_yahoo_index.YahooUtil') as yahoo_mock, \
-         patch('login_yahoo_index.UserUtil') as user_mock, \
-         patch('login_yahoo_index.CryptoUtil') as crypto_mock:
+         patch('login_yahoo_index.UserUtil') as user_mock:
             yahoo_mock.return_value.get_user_info.return_value = {
                 'user_id': 'Yahoo-1234',
                 'email': 'Yahoo-1234@example.com',
@@ -183,10 +182,8 @@ class TestLoginYahooIndex(TestCase):
             }
             yahoo_mock.return_value.verify_state_nonce.return_value = True
             yahoo_mock.return_value.verify_access_token.return_value = True
-            crypto_mock.get_external_provider_password.return_value = 'password'
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = False
-            crypto_mock.decrypt_password.return_value = 'password'
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='Yahoo-1234', has_user_id=False, password='password')
             user_mock.external_provider_login.return_value = {
                 'AuthenticationResult': {
                     'AccessToken': 'aaaaa',
@@ -271,7 +268,7 @@ class TestLoginYahooIndex(TestCase):
 
     def test_main_ng_with_invalid_state_and_existing_user(self):
         with patch('login_yahoo_index.YahooUtil') as yahoo_mock, \
-         patch('login_yahoo_index.UserUtil') as user_mock, patch('login_yahoo_index.CryptoUtil') as crypto_mock:
+         patch('login_yahoo_index.UserUtil') as user_mock:
             yahoo_mock.return_value.get_user_info.return_value = {
                 'user_id': 'yahoo-1234',
                 'email': 'yahoo-1234@example.com',
@@ -283,9 +280,8 @@ class TestLoginYahooIndex(TestCase):
             }
             yahoo_mock.return_value.verify_state_nonce.return_value = False
             yahoo_mock.return_value.verify_access_token.return_value = True
-            crypto_mock.get_external_provider_password.return_value = 'password'
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = True
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user_id', has_user_id=True, password='password')
             user_mock.external_provider_login.side_effect = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -314,8 +310,8 @@ class TestLoginYahooIndex(TestCase):
                 'email': 'yahoo-1234@example.com',
                 'display_name': 'my_name'
             }
-            user_mock.exists_user.return_value = True
-            user_mock.has_user_id.return_value = True
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=True, user_id='user_id', has_user_id=True, password='password')
             user_mock.external_provider_login.side_effect = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -332,13 +328,13 @@ class TestLoginYahooIndex(TestCase):
             self.assertEqual(
                 json.loads(response['body']),
                 {
-                    'message': 'Internal server error: LoginYahooIndex'
+                    'message': 'Internal server error'
                 }
             )
 
     def test_main_ng_with_awsexception_and_new_user(self):
         with patch('login_yahoo_index.YahooUtil') as yahoo_mock, \
-         patch('login_yahoo_index.UserUtil') as user_mock, patch('login_yahoo_index.CryptoUtil') as crypto_mock:
+         patch('login_yahoo_index.UserUtil') as user_mock:
             yahoo_mock.return_value.get_user_info.return_value = {
                 'user_id': 'yahoo-1234',
                 'email': 'yahoo-1234@example.com',
@@ -350,8 +346,8 @@ class TestLoginYahooIndex(TestCase):
             }
             yahoo_mock.return_value.verify_state_nonce.return_value = True
             yahoo_mock.return_value.verify_access_token.return_value = True
-            crypto_mock.get_external_provider_password.return_value = 'password'
-            user_mock.exists_user.return_value = False
+            user_mock.get_external_provider_login_info.return_value = \
+                ExternalProviderLoginInfo(exists=False, user_id='yahoo-1234', has_user_id=False, password=None)
             user_mock.create_external_provider_user.return_value = ClientError(
                 {'Error': {'Code': 'xxxxxx'}},
                 'operation_name'
@@ -359,7 +355,6 @@ class TestLoginYahooIndex(TestCase):
             user_mock.force_non_verified_phone.return_value = None
             user_mock.add_user_profile.return_value = None
             user_mock.add_external_provider_user_info.return_value = None
-            user_mock.has_user_id.return_value = True
             params = {
                 'body': {
                     'code': 'code',
@@ -178,6 +178,36 @@ class TestMeArticlesDraftsBodyUpdate(TestCase):
             target = [content for content in article_content_after if content['article_id'] == 'draftId00003'][0]
             self.assertEqual(value, target[key])
 
+    def test_main_ok_with_same_body(self):
+        params = {
+            'pathParameters': {
+                'article_id': 'draftId00001'
+            },
+            'body': {
+                'body': 'sample_body1'
+            },
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': 'test01',
+                        'phone_number_verified': 'true',
+                        'email_verified': 'true'
+                    }
+                }
+            }
+        }
+
+        params['body'] = json.dumps(params['body'])
+
+        with patch('me_articles_drafts_body_update.TextSanitizer') as mock_sanitizer, \
+                patch('me_articles_drafts_body_update.DBUtil.put_article_content_edit_history') as mock_put_history:
+            response = MeArticlesDraftsBodyUpdate(params, {}, self.dynamodb).main()
+
+            self.assertEqual(response['statusCode'], 200)
+            # 本文に変更が無い場合はサニタイズ・履歴の保存を行わない
+            self.assertFalse(mock_sanitizer.sanitize_article_body_v2.called)
+            self.assertFalse(mock_put_history.called)
+
     def test_call_validate_article_existence(self):
         params = {
             'pathParameters': {
@@ -200,6 +230,7 @@ class TestMeArticlesDraftsBodyUpdate(TestCase):
         params['body'] = json.dumps(params['body'])
 
         mock_lib = MagicMock()
+        mock_lib.is_same_article_body.return_value = False
         with patch('me_articles_drafts_body_update.DBUtil', mock_lib):
             MeArticlesDraftsBodyUpdate(params, {}, self.dynamodb).main()
             args, kwargs = mock_lib.validate_article_existence.call_args
@@ -263,6 +294,7 @@ class TestMeArticlesDraftsBodyUpdate(TestCase):
         params['body'] = json.dumps(params['body'])
 
         mock_lib = MagicMock()
+        mock_lib.is_same_article_body.return_value = False
         with patch('me_articles_drafts_body_update.DBUtil', mock_lib):
             MeArticlesDraftsBodyUpdate(params, {}, self.dynamodb).main()
             args, kwargs = mock_lib.put_article_content_edit_history.call_args
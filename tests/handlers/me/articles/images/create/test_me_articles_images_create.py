@@ -64,6 +64,13 @@ class TestMeArticlesImagesCreate(TestCase):
                 return True
         return False
 
+    @staticmethod
+    def get_srcset(key_prefix, ext, widths):
+        return ', '.join([
+            'https://' + os.environ['DOMAIN'] + '/' + key_prefix + '_w' + str(width) + '.' + ext + ' ' + str(width) + 'w'
+            for width in widths
+        ])
+
     @patch('uuid.uuid4', MagicMock(return_value='uuid'))
     def test_main_ok_status_public(self):
         image_data = Image.new('RGB', (1, 1))
@@ -99,7 +106,8 @@ class TestMeArticlesImagesCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + image_file_name
         expected_item = {
-            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key
+            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': 'https://' + os.environ['DOMAIN'] + '/' + key + ' 1w'
         }
         self.assertEqual(json.loads(response['body']), expected_item)
         self.assertTrue(self.equal_size_to_s3_image(key, image_data.size))
@@ -139,7 +147,8 @@ class TestMeArticlesImagesCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + image_file_name
         expected_item = {
-            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key
+            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': 'https://' + os.environ['DOMAIN'] + '/' + key + ' 1w'
         }
         self.assertEqual(json.loads(response['body']), expected_item)
         self.assertTrue(self.equal_size_to_s3_image(key, image_data.size))
@@ -178,11 +187,65 @@ class TestMeArticlesImagesCreate(TestCase):
         image_url_path = target_article_info['user_id'] + '/' + target_article_info['article_id'] + '/'
         image_file_name = 'uuid.' + image_format
         key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + image_file_name
+        key_prefix = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + 'uuid'
         expected_item = {
-            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key
+            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': self.get_srcset(key_prefix, image_format, [320, 640, 1280, 1920]) +
+            ', https://' + os.environ['DOMAIN'] + '/' + key + ' 3840w',
+            'webp_srcset': self.get_srcset(key_prefix, 'webp', [320, 640, 1280, 1920])
         }
         self.assertEqual(json.loads(response['body']), expected_item)
         self.assertTrue(self.equal_size_to_s3_image(key, (3840, 2159)))
+        for width, height in [(320, 180), (640, 360), (1280, 720), (1920, 1080)]:
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.' + image_format, (width, height)))
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.webp', (width, height)))
+
+    @patch('uuid.uuid4', MagicMock(return_value='uuid'))
+    def test_main_ok_content_type_mismatch(self):
+        # Content-Type と画像データの形式が異なる場合も、縮小画像は画像データの形式で保存する
+        image_data = Image.new('RGBA', (800, 600))
+        buf = BytesIO()
+        image_data.save(buf, format='png')
+
+        target_article_info = self.article_info_table_items[0]
+        params = {
+            'headers': {
+                'content-type': 'image/jpeg'
+            },
+            'pathParameters': {
+                'article_id': target_article_info['article_id']
+            },
+            'body': json.dumps({'article_image': base64.b64encode(buf.getvalue()).decode('ascii')}),
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': target_article_info['user_id'],
+                        'phone_number_verified': 'true',
+                        'email_verified': 'true'
+                    }
+                }
+            }
+        }
+
+        response = MeArticlesImagesCreate(params, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+
+        self.assertEqual(response['statusCode'], 200)
+
+        image_url_path = target_article_info['user_id'] + '/' + target_article_info['article_id'] + '/'
+        key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + 'uuid.jpeg'
+        key_prefix = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + 'uuid'
+        expected_item = {
+            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': self.get_srcset(key_prefix, 'png', [320, 640]) + ', https://' + os.environ['DOMAIN'] + '/' + key +
+            ' 800w',
+            'webp_srcset': self.get_srcset(key_prefix, 'webp', [320, 640])
+        }
+        self.assertEqual(json.loads(response['body']), expected_item)
+        # 元画像はそのまま保存される
+        self.assertTrue(self.equal_size_to_s3_image(key, (800, 600)))
+        for width, height in [(320, 240), (640, 480)]:
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.png', (width, height)))
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.webp', (width, height)))
 
     @patch('uuid.uuid4', MagicMock(return_value='uuid'))
     def test_main_ok_height_over_gif(self):
@@ -219,7 +282,8 @@ class TestMeArticlesImagesCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + image_file_name
         expected_item = {
-            'image_url':  'https://' + os.environ['DOMAIN'] + '/' + key
+            'image_url':  'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': 'https://' + os.environ['DOMAIN'] + '/' + key + ' 3838w'
         }
         self.assertEqual(json.loads(response['body']), expected_item)
         self.assertTrue(self.equal_size_to_s3_image(key, (3838, 2160)))
@@ -258,11 +322,18 @@ class TestMeArticlesImagesCreate(TestCase):
         image_url_path = target_article_info['user_id'] + '/' + target_article_info['article_id'] + '/'
         image_file_name = 'uuid.' + image_format
         key = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + image_file_name
+        key_prefix = settings.S3_ARTICLES_IMAGES_PATH + image_url_path + 'uuid'
         expected_item = {
-            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key
+            'image_url': 'https://' + os.environ['DOMAIN'] + '/' + key,
+            'srcset': self.get_srcset(key_prefix, image_format, [320, 640, 1280, 1920]) +
+            ', https://' + os.environ['DOMAIN'] + '/' + key + ' 3840w',
+            'webp_srcset': self.get_srcset(key_prefix, 'webp', [320, 640, 1280, 1920])
         }
         self.assertEqual(json.loads(response['body']), expected_item)
         self.assertTrue(self.equal_size_to_s3_image(key, image_data.size))
+        for width, height in [(320, 180), (640, 360), (1280, 720), (1920, 1080)]:
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.' + image_format, (width, height)))
+            self.assertTrue(self.equal_size_to_s3_image(key_prefix + '_w' + str(width) + '.webp', (width, height)))
 
     def test_validation_with_no_params(self):
         params = {
@@ -197,6 +197,36 @@ class TestMeArticlesPublicBodyUpdate(TestCase):
         for key, value in json.loads(params['body']).items():
             self.assertEqual(value, article_content_edit[key])
 
+    def test_main_ok_with_same_body(self):
+        params = {
+            'pathParameters': {
+                'article_id': 'publicId0001'
+            },
+            'body': {
+                'body': 'edit_body1'
+            },
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': 'test01',
+                        'phone_number_verified': 'true',
+                        'email_verified': 'true'
+                    }
+                }
+            }
+        }
+
+        params['body'] = json.dumps(params['body'])
+
+        with patch('me_articles_public_body_update.TextSanitizer') as mock_sanitizer, \
+                patch('me_articles_public_body_update.DBUtil.put_article_content_edit_history') as mock_put_history:
+            response = MeArticlesPublicBodyUpdate(params, {}, self.dynamodb).main()
+
+            self.assertEqual(response['statusCode'], 200)
+            # 本文に変更が無い場合はサニタイズ・履歴の保存を行わない
+            self.assertFalse(mock_sanitizer.sanitize_article_body_v2.called)
+            self.assertFalse(mock_put_history.called)
+
     def test_call_validate_article_existence(self):
         params = {
             'pathParameters': {
@@ -219,6 +249,7 @@ class TestMeArticlesPublicBodyUpdate(TestCase):
         params['body'] = json.dumps(params['body'])
 
         mock_lib = MagicMock()
+        mock_lib.is_same_article_body.return_value = False
         with patch('me_articles_public_body_update.DBUtil', mock_lib):
             MeArticlesPublicBodyUpdate(params, {}, self.dynamodb).main()
             args, kwargs = mock_lib.validate_article_existence.call_args
@@ -282,6 +313,7 @@ class TestMeArticlesPublicBodyUpdate(TestCase):
         params['body'] = json.dumps(params['body'])
 
         mock_lib = MagicMock()
+        mock_lib.is_same_article_body.return_value = False
         with patch('me_articles_public_body_update.DBUtil', mock_lib):
             MeArticlesPublicBodyUpdate(params, {}, self.dynamodb).main()
             args, kwargs = mock_lib.put_article_content_edit_history.call_args
@@ -1,6 +1,5 @@
 import os
 import json
-import settings
 import re
 from decimal import Decimal
 from unittest import TestCase
@@ -9,7 +8,6 @@ from unittest.mock import patch, MagicMock
 from tests_util import TestsUtil
 from web3 import Web3, HTTPProvider
 from private_chain_util import PrivateChainUtil
-from exceptions import SendTransactionError
 
 
 class TestMeArticlesPurchaseCreate(TestCase):
@@ -150,6 +148,7 @@ class TestMeArticlesPurchaseCreate(TestCase):
         TestsUtil.create_table(self.dynamodb, os.environ['ARTICLE_HISTORY_TABLE_NAME'],
                                self.article_history_table_items)
         TestsUtil.create_table(self.dynamodb, os.environ['PAID_ARTICLES_TABLE_NAME'], paid_article_items)
+        TestsUtil.create_table(self.dynamodb, os.environ['TIP_TABLE_NAME'], [])
 
         self.unread_notification_manager_table \
             = self.dynamodb.Table(os.environ['UNREAD_NOTIFICATION_MANAGER_TABLE_NAME'])
@@ -190,15 +189,9 @@ class TestMeArticlesPurchaseCreate(TestCase):
 
         self.assertEqual(response['statusCode'], 400)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction',
+           MagicMock(return_value='purchase_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
-    @patch("me_articles_purchase_create.MeArticlesPurchaseCreate._MeArticlesPurchaseCreate__get_randomhash",
-           MagicMock(side_effect=[
-               "d6f09fcaa6f409b7dde72957fdc17992d570e12ad23e8e968c29ab9aaea4df3d",
-               "0e12ad23e8e968c29ab9aaea4df3dd6f09fcaa6f409b7dde72957fdc17992d57"
-           ]))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000010))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_paid_status_fail(self):
@@ -233,7 +226,7 @@ class TestMeArticlesPurchaseCreate(TestCase):
 
             response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
             self.assertEqual(response['statusCode'], 200)
-            self.assertEqual(json.loads(response['body']), {"status": "done"})
+            self.assertEqual(json.loads(response['body']), {"status": "doing"})
             paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
             paid_articles = paid_articles_table.scan()['Items']
             self.assertEqual(len(paid_articles), 2)
@@ -244,66 +237,37 @@ class TestMeArticlesPurchaseCreate(TestCase):
                 'article_title': target_article['title'],
                 'price': Decimal(target_article['price']),
                 'article_id': target_article['article_id'],
-                'status': 'done',
+                'status': 'doing',
                 'purchase_transaction': 'purchase_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
                 'sort_key': Decimal(1520150552000010),
                 'created_at': Decimal(int(1520150552.000003)),
                 'history_created_at': Decimal(1520150270)
             }
 
-            expect_notifications = [
-                {
-                    'notification_id': 'd6f09fcaa6f409b7dde72957fdc17992d570e12ad23e8e968c29ab9aaea4df3d',
-                    'user_id': target_article['user_id'],
-                    'acted_user_id': act_user_id,
-                    'article_id': target_article['article_id'],
-                    'article_user_id': target_article['user_id'],
-                    'article_title': target_article['title'],
-                    'sort_key': Decimal(1520150552000010),
-                    'type': settings.ARTICLE_PURCHASED_TYPE,
-                    'price': Decimal(100 * (10 ** 18)),
-                    'created_at': Decimal(int(1520150552.000003))
-                }, {
-                    'notification_id': '0e12ad23e8e968c29ab9aaea4df3dd6f09fcaa6f409b7dde72957fdc17992d57',
-                    'user_id': act_user_id,
-                    'acted_user_id': act_user_id,
-                    'article_id': target_article['article_id'],
-                    'article_user_id': target_article['user_id'],
-                    'article_title': target_article['title'],
-                    'sort_key': Decimal(1520150552000010),
-                    'type': settings.ARTICLE_PURCHASE_TYPE,
-                    'price': Decimal(100 * (10 ** 18)),
-                    'created_at': Decimal(int(1520150552.000003))
-                }
-            ]
-
-            # 記事購入に成功した場合は購入者と著者へ通知を行う
-            actual_notifications = self.notification_table.scan()['Items']
-            self.assertEqual(TestMeArticlesPurchaseCreate.__sorted_notifications(expect_notifications),
-                             TestMeArticlesPurchaseCreate.__sorted_notifications(actual_notifications))
-            # 失敗データが残っている状態で、新しい購入処理が成功すること
+            # 購入の完了の確認と通知は TransactionStatusReconciler が行うため、通知を作成しないこと
+            self.assertEqual(self.notification_table.scan()['Items'], [])
+            # 失敗データが残っている状態で、新しい購入処理を受け付けること
             self.assertEqual(paid_articles[0]['status'], 'fail')
             self.assertEqual(expected_purchase_article, paid_articles[1])
-            self.assertEqual(len(self.unread_notification_manager_table.scan()['Items']), 2)
-            # paid_statusがfailからdoneになること。paid_statusの件数が3件のままであること
+            self.assertEqual(len(self.unread_notification_manager_table.scan()['Items']), 0)
+            # paid_statusがfailからdoingになること。paid_statusの件数が3件のままであること
             paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
             paid_status = paid_status_table.get_item(Key={
                 'user_id': act_user_id,
                 'article_id': target_article['article_id']
             }).get('Item')
-            self.assertEqual(paid_status.get('status'), 'done')
+            self.assertEqual(paid_status.get('status'), 'doing')
             self.assertEqual(paid_status.get('created_at'), 1520150552)
             self.assertEqual(len(paid_status_table.scan()['Items']), 3)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction',
+           MagicMock(return_value='purchase_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=False))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_main_ok_transaction_unconfirmed(self):
-        target_article = self.article_info_table_items[2]
+    def test_main_ok_min_value(self):
+        target_article = self.article_info_table_items[0]
         test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
         burn_value = int(test_purchase_value / Decimal(9))
         to_address = format(10, '064x')
@@ -347,13 +311,13 @@ class TestMeArticlesPurchaseCreate(TestCase):
                 'article_id': target_article['article_id'],
                 'status': 'doing',
                 'purchase_transaction': 'purchase_transaction_hash',
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
                 'sort_key': Decimal(1520150552000003),
                 'created_at': Decimal(int(1520150552.000003)),
                 'history_created_at': Decimal(1520150270)
             }
 
             self.assertEqual(expected_purchase_article, paid_articles[0])
-            self.assertEqual(len(self.unread_notification_manager_table.scan()['Items']), 0)
             # paid_statusが4件になること。生成したpaid_statusのstatusがdoingであること
             paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
             paid_status = paid_status_table.get_item(Key={
@@ -364,78 +328,9 @@ class TestMeArticlesPurchaseCreate(TestCase):
             self.assertEqual(paid_status.get('created_at'), 1520150552)
             self.assertEqual(len(paid_status_table.scan()['Items']), 4)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
-    @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
-    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
-    @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_main_ok_min_value(self):
-        target_article = self.article_info_table_items[0]
-        test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
-        burn_value = int(test_purchase_value / Decimal(9))
-        to_address = format(10, '064x')
-        raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
-        act_user_id = 'purchaseuser001'
-        with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
-            mock_get_private_eth_address.return_value = '0x' + to_address[24:]
-            event = {
-                'body': {
-                    'purchase_signed_transaction': raw_transactions['purchase'].rawTransaction.hex(),
-                    'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex()
-                },
-                'requestContext': {
-                    'authorizer': {
-                        'claims': {
-                            'cognito:username': act_user_id,
-                            'custom:private_eth_address': self.test_account.address,
-                            'phone_number_verified': 'true',
-                            'email_verified': 'true'
-                        }
-                    }
-                },
-                'pathParameters': {
-                    'article_id': target_article['article_id']
-                }
-            }
-            event['body'] = json.dumps(event['body'])
-
-            response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
-            self.assertEqual(response['statusCode'], 200)
-            self.assertEqual(json.loads(response['body']), {"status": "done"})
-            paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
-            paid_articles = paid_articles_table.scan()['Items']
-            self.assertEqual(len(paid_articles), 2)
-
-            expected_purchase_article = {
-                'user_id': event['requestContext']['authorizer']['claims']['cognito:username'],
-                'article_user_id': target_article['user_id'],
-                'article_title': target_article['title'],
-                'price': Decimal(target_article['price']),
-                'article_id': target_article['article_id'],
-                'status': 'done',
-                'purchase_transaction': 'purchase_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
-                'sort_key': Decimal(1520150552000003),
-                'created_at': Decimal(int(1520150552.000003)),
-                'history_created_at': Decimal(1520150270)
-            }
-
-            self.assertEqual(expected_purchase_article, paid_articles[0])
-            # paid_statusが4件になること。生成したpaid_statusのstatusがdoneであること
-            paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
-            paid_status = paid_status_table.get_item(Key={
-                'user_id': act_user_id,
-                'article_id': target_article['article_id']
-            }).get('Item')
-            self.assertEqual(paid_status.get('status'), 'done')
-            self.assertEqual(paid_status.get('created_at'), 1520150552)
-            self.assertEqual(len(paid_status_table.scan()['Items']), 4)
-
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction',
+           MagicMock(return_value='purchase_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_max_value(self):
@@ -470,7 +365,7 @@ class TestMeArticlesPurchaseCreate(TestCase):
 
             response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
             self.assertEqual(response['statusCode'], 200)
-            self.assertEqual(json.loads(response['body']), {"status": "done"})
+            self.assertEqual(json.loads(response['body']), {"status": "doing"})
             paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
             paid_articles = paid_articles_table.scan()['Items']
             self.assertEqual(len(paid_articles), 2)
@@ -481,9 +376,9 @@ class TestMeArticlesPurchaseCreate(TestCase):
                 'article_title': target_article['title'],
                 'price': Decimal(target_article['price']),
                 'article_id': target_article['article_id'],
-                'status': 'done',
+                'status': 'doing',
                 'purchase_transaction': 'purchase_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
                 'sort_key': Decimal(1520150552000003),
                 'created_at': Decimal(int(1520150552.000003)),
                 'history_created_at': Decimal(1520150268)
@@ -623,6 +518,9 @@ class TestMeArticlesPurchaseCreate(TestCase):
         to_address = format(10, '064x')
         raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
         act_user_id = 'purchaseuser001'
+        # 著者のウォレットが UserConfigurations にも登録されていない場合
+        user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
+        user_configurations_table.delete_item(Key={'user_id': self.article_info_table_items[0]['user_id']})
         with patch('me_articles_purchase_create.UserUtil.get_cognito_user_info') as mock_get_cognito_user_info:
             mock_get_cognito_user_info.return_value = {
                 'UserAttributes': [{
@@ -659,85 +557,15 @@ class TestMeArticlesPurchaseCreate(TestCase):
             paid_articles = paid_articles_table.scan()['Items']
             self.assertEqual(len(paid_articles), 1)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
-    @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed',
-           MagicMock(side_effect=SendTransactionError()))
-    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
-    @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_main_ok_transaction_fail(self):
-        target_article = self.article_info_table_items[1]
-        test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
-        burn_value = int(test_purchase_value / Decimal(9))
-        to_address = format(10, '064x')
-        raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
-        act_user_id = 'purchaseuser001'
-        with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
-            mock_get_private_eth_address.return_value = '0x' + to_address[24:]
-            event = {
-                'body': {
-                    'purchase_signed_transaction': raw_transactions['purchase'].rawTransaction.hex(),
-                    'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex()
-                },
-                'requestContext': {
-                    'authorizer': {
-                        'claims': {
-                            'cognito:username': act_user_id,
-                            'custom:private_eth_address': self.test_account.address,
-                            'phone_number_verified': 'true',
-                            'email_verified': 'true'
-                        }
-                    }
-                },
-                'pathParameters': {
-                    'article_id': target_article['article_id']
-                }
-            }
-            event['body'] = json.dumps(event['body'])
-
-            response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
-
-            self.assertEqual(response['statusCode'], 200)
-            self.assertEqual(json.loads(response['body']), {"status": "fail"})
-            paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
-            paid_articles = paid_articles_table.scan()['Items']
-            self.assertEqual(len(paid_articles), 2)
-
-            expected_purchase_article = {
-                'user_id': event['requestContext']['authorizer']['claims']['cognito:username'],
-                'article_user_id': target_article['user_id'],
-                'article_title': target_article['title'],
-                'price': Decimal(target_article['price']),
-                'article_id': target_article['article_id'],
-                'status': 'fail',
-                'purchase_transaction': 'purchase_transaction_hash',
-                'sort_key': Decimal(1520150552000003),
-                'created_at': Decimal(int(1520150552.000003)),
-                'history_created_at': Decimal(1520150268)
-            }
-
-            self.assertEqual(expected_purchase_article, paid_articles[0])
-            self.assertEqual(len(self.unread_notification_manager_table.scan()['Items']), 1)
-
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', Exception()]))
+    # 連続APIリクエストに対応するテスト(statusがdoingの場合)
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
-    @patch("me_articles_purchase_create.MeArticlesPurchaseCreate._MeArticlesPurchaseCreate__get_randomhash",
-           MagicMock(side_effect=[
-               "d6f09fcaa6f409b7dde72957fdc17992d570e12ad23e8e968c29ab9aaea4df3d",
-               "0e12ad23e8e968c29ab9aaea4df3dd6f09fcaa6f409b7dde72957fdc17992d57"
-           ]))
-    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000010))
-    @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_purchase_succeeded_but_failed_to_burn(self):
-        target_article = self.article_info_table_items[3]
+    def test_double_request_doing_ng(self):
+        target_article = self.article_info_table_items[0]
         test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
         burn_value = int(test_purchase_value / Decimal(9))
         to_address = format(10, '064x')
         raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
-        act_user_id = 'purchaseuser001'
+        act_user_id = 'doublerequest001'
         with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
             mock_get_private_eth_address.return_value = '0x' + to_address[24:]
             event = {
@@ -762,78 +590,27 @@ class TestMeArticlesPurchaseCreate(TestCase):
             event['body'] = json.dumps(event['body'])
 
             response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
-            self.assertEqual(response['statusCode'], 200)
-            self.assertEqual(json.loads(response['body']), {"status": "done"})
-            paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
-            paid_articles = paid_articles_table.scan()['Items']
-            self.assertEqual(len(paid_articles), 2)
-
-            expected_purchase_article = {
-                'user_id': event['requestContext']['authorizer']['claims']['cognito:username'],
-                'article_user_id': target_article['user_id'],
-                'article_title': target_article['title'],
-                'price': Decimal(target_article['price']),
-                'article_id': target_article['article_id'],
-                'status': 'done',
-                'purchase_transaction': 'purchase_transaction_hash',
-                'sort_key': Decimal(1520150552000010),
-                'created_at': Decimal(int(1520150552.000003)),
-                'history_created_at': Decimal(1520150270)
-            }
-
-            expect_notifications = [
-                {
-                    'notification_id': 'd6f09fcaa6f409b7dde72957fdc17992d570e12ad23e8e968c29ab9aaea4df3d',
-                    'user_id': target_article['user_id'],
-                    'acted_user_id': act_user_id,
-                    'article_id': target_article['article_id'],
-                    'article_user_id': target_article['user_id'],
-                    'article_title': target_article['title'],
-                    'sort_key': Decimal(1520150552000010),
-                    'type': settings.ARTICLE_PURCHASED_TYPE,
-                    'price': Decimal(100 * (10 ** 18)),
-                    'created_at': Decimal(int(1520150552.000003))
-                }, {
-                    'notification_id': '0e12ad23e8e968c29ab9aaea4df3dd6f09fcaa6f409b7dde72957fdc17992d57',
-                    'user_id': act_user_id,
-                    'acted_user_id': act_user_id,
-                    'article_id': target_article['article_id'],
-                    'article_user_id': target_article['user_id'],
-                    'article_title': target_article['title'],
-                    'sort_key': Decimal(1520150552000010),
-                    'type': settings.ARTICLE_PURCHASE_TYPE,
-                    'price': Decimal(100 * (10 ** 18)),
-                    'created_at': Decimal(int(1520150552.000003))
-                }
-            ]
-
-            # 記事購入に成功した場合は購入者と著者へ通知を行う
-            actual_notifications = self.notification_table.scan()['Items']
-            self.assertEqual(TestMeArticlesPurchaseCreate.__sorted_notifications(expect_notifications),
-                             TestMeArticlesPurchaseCreate.__sorted_notifications(actual_notifications))
-            # 失敗データが残っている状態で、新しい購入処理が成功すること
-            self.assertEqual(paid_articles[0]['status'], 'fail')
-            self.assertEqual(expected_purchase_article, paid_articles[1])
-            self.assertEqual(len(self.unread_notification_manager_table.scan()['Items']), 2)
-            # paid_statusがfailからdoneになること。paid_statusの件数が3件のままであること
+            self.assertEqual(response['statusCode'], 400)
+            self.assertEqual(response['body'], '{"message": "Invalid parameter: You have already purchased"}')
+            # paid statusの件数が3件から変更されていないこと。statusがdoingのままであること
             paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
             paid_status = paid_status_table.get_item(Key={
-                'user_id': act_user_id,
-                'article_id': target_article['article_id']
+                'user_id': 'doublerequest001',
+                'article_id': 'publicId0001'
             }).get('Item')
-            self.assertEqual(paid_status.get('status'), 'done')
+            self.assertEqual(paid_status.get('status'), 'doing')
             self.assertEqual(paid_status.get('created_at'), 1520150552)
             self.assertEqual(len(paid_status_table.scan()['Items']), 3)
 
-    # 連続APIリクエストに対応するテスト(statusがdoingの場合)
+    # 連続APIリクエストに対応するテスト(statusがdoneの場合)
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    def test_double_request_doing_ng(self):
+    def test_double_request_done_ng(self):
         target_article = self.article_info_table_items[0]
         test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
         burn_value = int(test_purchase_value / Decimal(9))
         to_address = format(10, '064x')
         raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
-        act_user_id = 'doublerequest001'
+        act_user_id = 'doublerequest002'
         with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
             mock_get_private_eth_address.return_value = '0x' + to_address[24:]
             event = {
@@ -870,16 +647,28 @@ class TestMeArticlesPurchaseCreate(TestCase):
             self.assertEqual(paid_status.get('created_at'), 1520150552)
             self.assertEqual(len(paid_status_table.scan()['Items']), 3)
 
-    # 連続APIリクエストに対応するテスト(statusがdoneの場合)
+    # 前回の投げ銭のバーンのトランザクションが未送信の場合は、同じ nonce を使わないよう受け付けない
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    def test_double_request_done_ng(self):
+    def test_main_ng_with_pending_burn(self):
+        act_user_id = 'purchaseuser001'
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        tip_table.put_item(Item={
+            'user_id': act_user_id,
+            'sort_key': 1520150552000001,
+            'transaction': 'tip_transaction_hash',
+            'burn_signed_transaction': '0x' + 'a' * 100,
+            'burn_uncompleted': 1,
+            'uncompleted': 1,
+            'target_date': '2018-03-04',
+            'created_at': 1520150552
+        })
         target_article = self.article_info_table_items[0]
         test_purchase_value = int(target_article['price'] * Decimal(9) / Decimal(10))
         burn_value = int(test_purchase_value / Decimal(9))
         to_address = format(10, '064x')
         raw_transactions = self.create_singed_transactions(to_address, test_purchase_value, burn_value)
-        act_user_id = 'doublerequest002'
-        with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
+        with patch('me_articles_purchase_create.UserUtil.get_private_eth_address') as mock_get_private_eth_address, \
+                patch('me_articles_purchase_create.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
             mock_get_private_eth_address.return_value = '0x' + to_address[24:]
             event = {
                 'body': {
@@ -904,21 +693,15 @@ class TestMeArticlesPurchaseCreate(TestCase):
 
             response = MeArticlesPurchaseCreate(event, {}, self.dynamodb, cognito=None).main()
             self.assertEqual(response['statusCode'], 400)
-            self.assertEqual(response['body'], '{"message": "Invalid parameter: You have already purchased"}')
-            # paid statusの件数が3件から変更されていないこと。statusがdoingのままであること
+            self.assertEqual(response['body'], '{"message": "Invalid parameter: Previous burn transaction is pending"}')
+            mock_send_raw_transaction.assert_not_called()
+            # paid status が作成されていないこと
             paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
-            paid_status = paid_status_table.get_item(Key={
-                'user_id': 'doublerequest001',
-                'article_id': 'publicId0001'
-            }).get('Item')
-            self.assertEqual(paid_status.get('status'), 'doing')
-            self.assertEqual(paid_status.get('created_at'), 1520150552)
             self.assertEqual(len(paid_status_table.scan()['Items']), 3)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['purchase_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction',
+           MagicMock(return_value='purchase_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_call_validate_methods(self):
@@ -973,10 +756,10 @@ class TestMeArticlesPurchaseCreate(TestCase):
             self.assertEqual(act_user_id, args[1])
             # validate_raw_transaction_signature
             args, _ = mock_validate_signature.call_args_list[0]
-            self.assertEqual(raw_transactions['purchase'].rawTransaction.hex(), args[0])
+            self.assertEqual(raw_transactions['purchase'].rawTransaction.hex(), args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             args, _ = mock_validate_signature.call_args_list[1]
-            self.assertEqual(raw_transactions['burn'].rawTransaction.hex(), args[0])
+            self.assertEqual(raw_transactions['burn'].rawTransaction.hex(), args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             # validate_erc20_transfer_data
             args, _ = mock_validate_erc20_transfer_data.call_args_list[0]
@@ -994,7 +777,7 @@ class TestMeArticlesPurchaseCreate(TestCase):
             self.assertEqual(burn_data, args[0])
             self.assertEqual('0x' + os.environ['BURN_ADDRESS'], args[1])
 
-            self.assertEqual(json.loads(response['body']), {"status": "done"})
+            self.assertEqual(json.loads(response['body']), {"status": "doing"})
             paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
             paid_articles = paid_articles_table.scan()['Items']
             self.assertEqual(len(paid_articles), 2)
@@ -1005,9 +788,9 @@ class TestMeArticlesPurchaseCreate(TestCase):
                 'article_title': target_article['title'],
                 'price': Decimal(target_article['price']),
                 'article_id': target_article['article_id'],
-                'status': 'done',
+                'status': 'doing',
                 'purchase_transaction': 'purchase_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
                 'sort_key': Decimal(1520150552000003),
                 'created_at': Decimal(int(1520150552.000003)),
                 'history_created_at': Decimal(1520150268)
@@ -1129,11 +912,3 @@ class TestMeArticlesPurchaseCreate(TestCase):
             'purchase': self.web3.eth.account.sign_transaction(purchase_transaction, self.test_account.key),
             'burn': self.web3.eth.account.sign_transaction(burn_transaction, self.test_account.key)
         }
-
-    @staticmethod
-    def __sorted_notifications(notifications):
-        result = []
-        for item in notifications:
-            result.append(sorted(item.items(), key=lambda x: x[0]))
-
-        return sorted(result)
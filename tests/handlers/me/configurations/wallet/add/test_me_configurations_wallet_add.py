@@ -37,7 +37,8 @@ class TestMeConfigurationsWalletAdd(TestCase):
             },
             {
                 'user_id': 'exists-user2',
-                'mute_users': {'mute-user-00', 'mute-user-01'}
+                'mute_users': {'mute-user-00', 'mute-user-01'},
+                'cognito_private_eth_address': '0x401BA17D89D795B3C6e373c5062F1C3F8979e73B'
             }
         ]
         TestsUtil.create_table(
@@ -182,6 +183,7 @@ class TestMeConfigurationsWalletAdd(TestCase):
         ).main()
         user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
         actual = user_configurations_table.get_item(Key={'user_id': test_user})['Item']
+        # ウォレット未登録時に保持していた private_eth_address は削除される
         expected = {
             'user_id': test_user,
             'mute_users': {'mute-user-00', 'mute-user-01'},
@@ -58,6 +58,15 @@ class TestMeInfoIconCreate(TestCase):
                 return True
         return False
 
+    @staticmethod
+    def get_icon_image_urls(key, variant_sizes):
+        icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = {str(size): icon_image_url for size in [240, 48, 96]}
+        for size in variant_sizes:
+            root, ext = os.path.splitext(key)
+            icon_image_urls[str(size)] = 'https://' + os.environ['DOMAIN'] + '/' + root + '_' + str(size) + ext
+        return icon_image_urls
+
     @patch('uuid.uuid4', MagicMock(return_value='uuid'))
     def test_main_ok(self):
         image_data = Image.new('RGB', (1, 1))
@@ -90,17 +99,20 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
@@ -138,17 +150,20 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [48, 96])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
@@ -186,22 +201,63 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [48, 96])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
         expected_size = (settings.USER_ICON_WIDTH, settings.USER_ICON_HEIGHT)
         self.assertTrue(self.equal_size_to_s3_image(key, expected_size))
+        for size in settings.USER_ICON_VARIANT_SIZES:
+            variant_key = settings.S3_INFO_ICON_PATH + image_url_path + 'uuid_' + str(size) + '.' + image_format
+            self.assertTrue(self.equal_size_to_s3_image(variant_key, (size, size)))
+
+    @patch('uuid.uuid4', MagicMock(return_value='uuid'))
+    def test_main_ok_over_size_png_with_content_type_jpeg(self):
+        # Content-Type と異なる形式の画像の場合、縮小画像は画像データの形式で保存する
+        image_data = Image.new('RGBA', (settings.USER_ICON_WIDTH + 100, settings.USER_ICON_HEIGHT + 50))
+        buf = BytesIO()
+        image_data.save(buf, format='png')
+
+        target_user = self.users_table_items[1]
+        params = {
+            'headers': {
+                'content-type': 'image/jpeg'
+            },
+            'body': json.dumps({'icon_image': base64.b64encode(buf.getvalue()).decode('ascii')}),
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': target_user['user_id']
+                    }
+                }
+            }
+        }
+
+        response = MeInfoIconCreate(params, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+
+        self.assertEqual(response['statusCode'], 200)
+        key_prefix = settings.S3_INFO_ICON_PATH + target_user['user_id'] + '/icon/uuid'
+        icon_image_urls = json.loads(response['body'])['icon_image_urls']
+        bucket = self.s3.Bucket(os.environ['DIST_S3_BUCKET_NAME'])
+        for size in settings.USER_ICON_VARIANT_SIZES:
+            variant_key = key_prefix + '_' + str(size) + '.png'
+            self.assertEqual(icon_image_urls[str(size)], 'https://' + os.environ['DOMAIN'] + '/' + variant_key)
+            s3_object = bucket.Object(variant_key).get()
+            self.assertEqual(s3_object['ContentType'], 'image/png')
+            self.assertEqual(Image.open(BytesIO(s3_object['Body'].read())).format, 'PNG')
 
     @patch('uuid.uuid4', MagicMock(return_value='uuid'))
     def test_main_ok_over_size_and_height_gt_width_gif(self):
@@ -235,22 +291,28 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [48, 96])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
         expected_size = (settings.USER_ICON_WIDTH, settings.USER_ICON_HEIGHT)
         self.assertTrue(self.equal_size_to_s3_image(key, expected_size))
+        for size in settings.USER_ICON_VARIANT_SIZES:
+            variant_key = settings.S3_INFO_ICON_PATH + image_url_path + 'uuid_' + str(size) + '.' + image_format
+            self.assertTrue(self.equal_size_to_s3_image(variant_key, (size, size)))
 
     @patch('uuid.uuid4', MagicMock(return_value='uuid'))
     def test_main_ok_over_size_only_width(self):
@@ -284,17 +346,20 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [48, 96])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
@@ -333,17 +398,20 @@ class TestMeInfoIconCreate(TestCase):
         image_file_name = 'uuid.' + image_format
         key = settings.S3_INFO_ICON_PATH + image_url_path + image_file_name
         icon_image_url = 'https://' + os.environ['DOMAIN'] + '/' + key
+        icon_image_urls = self.get_icon_image_urls(key, [48, 96])
         expected_item = {
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected_item)
         # dynamodb
         expected_items = {
             'user_id': target_user['user_id'],
-            'icon_image_url': icon_image_url
+            'icon_image_url': icon_image_url,
+            'icon_image_urls': icon_image_urls
         }
-        users_param_names = ['user_id', 'icon_image_url']
+        users_param_names = ['user_id', 'icon_image_url', 'icon_image_urls']
         for name in users_param_names:
             self.assertEqual(expected_items[name], user_item[name])
         # s3
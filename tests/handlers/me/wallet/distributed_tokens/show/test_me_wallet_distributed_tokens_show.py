@@ -1,8 +1,11 @@
 import json
 import os
+import time
 from unittest import TestCase
+from unittest.mock import patch
 
 from tests_util import TestsUtil
+from db_util import DBUtil
 
 from me_wallet_distributed_tokens_show import MeWalletDistributedTokensShow
 
@@ -63,6 +66,8 @@ class TestMeWalletDistributedTokensShow(TestCase):
 
         self.token_distribution_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TABLE_NAME'])
         TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_DISTRIBUTION_TABLE_NAME'], items)
+        self.token_distribution_total_table = self.dynamodb.Table(os.environ['TOKEN_DISTRIBUTION_TOTAL_TABLE_NAME'])
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_DISTRIBUTION_TOTAL_TABLE_NAME'], [])
 
     def tearDown(self):
         TestsUtil.delete_all_tables(self.dynamodb)
@@ -90,3 +95,88 @@ class TestMeWalletDistributedTokensShow(TestCase):
         self.assertTrue(response['statusCode'])
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), expected)
+
+        # 猶予時間を経過したトークン付与情報は合計値に集約される
+        total = self.token_distribution_total_table.get_item(Key={'user_id': 'user01'})['Item']
+        self.assertEqual(total['last_sort_key'], 1536184800000000)
+        self.assertEqual({k: total[k] for k in expected}, expected)
+
+    def test_main_ok_with_distribution_total(self):
+        params = {
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': 'user01'
+                    }
+                }
+            }
+        }
+        MeWalletDistributedTokensShow(params, {}, dynamodb=self.dynamodb).main()
+
+        # 集約後に作成されたトークン付与情報
+        now = int(time.time())
+        self.token_distribution_table.put_item(Item={
+            'distribution_id': 'user01-{0}-bonus'.format(now * 1000000),
+            'user_id': 'user01',
+            'distribution_type': 'bonus',
+            'quantity': 4000000000000000000,
+            'created_at': now,
+            'sort_key': now * 1000000
+        })
+
+        with patch('me_wallet_distributed_tokens_show.DBUtil.query_all_items',
+                   wraps=DBUtil.query_all_items) as query_all_items_mock:
+            response = MeWalletDistributedTokensShow(params, {}, dynamodb=self.dynamodb).main()
+
+            # 集約済の sort_key より新しいトークン付与情報のみを取得する
+            self.assertEqual(len(query_all_items_mock.call_args_list), 1)
+
+        expected = {
+            'article': 6000000000000000000,
+            'like': 5000000000000000000,
+            'tip': 1000000000000000000,
+            'bonus': 4000000000000000000
+        }
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(json.loads(response['body']), expected)
+
+        # 猶予時間を経過していないトークン付与情報は集約しない
+        total = self.token_distribution_total_table.get_item(Key={'user_id': 'user01'})['Item']
+        self.assertEqual(total['last_sort_key'], 1536184800000000)
+        self.assertEqual(total['bonus'], 0)
+
+        with patch('time.time', return_value=now + 24 * 60 * 60):
+            response = MeWalletDistributedTokensShow(params, {}, dynamodb=self.dynamodb).main()
+
+        self.assertEqual(json.loads(response['body']), expected)
+        total = self.token_distribution_total_table.get_item(Key={'user_id': 'user01'})['Item']
+        self.assertEqual(total['last_sort_key'], now * 1000000)
+        self.assertEqual(total['bonus'], 4000000000000000000)
+
+    def test_main_ok_with_compacted_by_another_request(self):
+        params = {
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': 'user01'
+                    }
+                }
+            }
+        }
+        # 取得後に並行するリクエストが集約を行った場合は、二重に加算しない
+        self.token_distribution_total_table.put_item(Item={
+            'user_id': 'user01',
+            'article': 6000000000000000000,
+            'like': 5000000000000000000,
+            'tip': 1000000000000000000,
+            'bonus': 0,
+            'last_sort_key': 1536184800000000
+        })
+        with patch('me_wallet_distributed_tokens_show.MeWalletDistributedTokensShow.'
+                   '_MeWalletDistributedTokensShow__get_distribution_total', return_value={}):
+            response = MeWalletDistributedTokensShow(params, {}, dynamodb=self.dynamodb).main()
+
+        self.assertEqual(response['statusCode'], 200)
+        total = self.token_distribution_total_table.get_item(Key={'user_id': 'user01'})['Item']
+        self.assertEqual(total['article'], 6000000000000000000)
+        self.assertEqual(total['like'], 5000000000000000000)
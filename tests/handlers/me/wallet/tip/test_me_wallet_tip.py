@@ -45,6 +45,7 @@ class TestMeWalletTip(TestCase):
         ]
         TestsUtil.create_table(self.dynamodb, os.environ['ARTICLE_INFO_TABLE_NAME'], self.article_info_table_items)
         TestsUtil.create_table(self.dynamodb, os.environ['TIP_TABLE_NAME'], {})
+        TestsUtil.create_table(self.dynamodb, os.environ['PAID_ARTICLES_TABLE_NAME'], [])
 
         user_configurations_items = [
             {
@@ -65,11 +66,9 @@ class TestMeWalletTip(TestCase):
         response = MeWalletTip(event, {}, dynamodb=self.dynamodb).main()
         self.assertEqual(response['statusCode'], 400)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['tip_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(return_value='tip_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
     @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_min_value(self):
@@ -114,7 +113,9 @@ class TestMeWalletTip(TestCase):
                 'article_id': target_article_id,
                 'article_title': self.article_info_table_items[0]['title'],
                 'transaction': 'tip_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
+                'burn_transaction': None,
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
+                'burn_uncompleted': Decimal(1),
                 'uncompleted': Decimal(1),
                 'sort_key': Decimal(1520150552000003),
                 'target_date': '2018-03-04',
@@ -123,11 +124,9 @@ class TestMeWalletTip(TestCase):
 
             self.assertEqual(expected_tip, tips[0])
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['tip_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(return_value='tip_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
     @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_max_value(self):
@@ -172,7 +171,9 @@ class TestMeWalletTip(TestCase):
                 'article_id': target_article_id,
                 'article_title': self.article_info_table_items[0]['title'],
                 'transaction': 'tip_transaction_hash',
-                'burn_transaction': 'burn_transaction_hash',
+                'burn_transaction': None,
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
+                'burn_uncompleted': Decimal(1),
                 'uncompleted': Decimal(1),
                 'sort_key': Decimal(1520150552000003),
                 'target_date': '2018-03-04',
@@ -183,17 +184,17 @@ class TestMeWalletTip(TestCase):
 
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
     @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=False))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_main_ok_with_wrong_transaction_status(self):
+    def test_main_ok_without_polling(self):
         test_tip_value = 10
         to_address = format(10, '064x')
         burn_value = int(test_tip_value / Decimal(10))
         raw_transactions = self.create_singed_transactions(to_address, test_tip_value, burn_value)
 
         with patch('me_wallet_tip.UserUtil.get_private_eth_address') as mock_get_private_eth_address,\
-                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction,\
+                patch('private_chain_util.PrivateChainUtil.is_transaction_completed') as mock_is_transaction_completed:
 
             mock_get_private_eth_address.return_value = '0x' + to_address[24:]
             mock_send_raw_transaction.return_value = 'tip_transaction_hash'
@@ -232,6 +233,8 @@ class TestMeWalletTip(TestCase):
                 'article_title': self.article_info_table_items[0]['title'],
                 'transaction': 'tip_transaction_hash',
                 'burn_transaction': None,
+                'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex(),
+                'burn_uncompleted': Decimal(1),
                 'uncompleted': Decimal(1),
                 'sort_key': Decimal(1520150552000003),
                 'target_date': '2018-03-04',
@@ -239,8 +242,9 @@ class TestMeWalletTip(TestCase):
             }
 
             self.assertEqual(expected_tip, tips[0])
-            # tip_transaction のみ実行されていること
+            # tip_transaction のみ実行され、完了の確認（ポーリング）は行わないこと
             self.assertEqual(mock_send_raw_transaction.call_count, 1)
+            self.assertEqual(mock_is_transaction_completed.call_count, 0)
 
     # 109 しかtokenを持ってないユーザーで 110 tokenを投げ銭する
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
@@ -281,64 +285,6 @@ class TestMeWalletTip(TestCase):
             tips = tip_table.scan()['Items']
             self.assertEqual(len(tips), 0)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['tip_transaction_hash', 'burn_transaction_hash']))
-    @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
-    @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(side_effect=Exception()))
-    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
-    @patch('time.time', MagicMock(return_value=1520150552.000003))
-    def test_main_ok_with_exception_in_is_transaction_completed(self):
-        test_tip_value = 10
-        to_address = format(10, '064x')
-        burn_value = int(test_tip_value / Decimal(10))
-        raw_transactions = self.create_singed_transactions(to_address, test_tip_value, burn_value)
-
-        with patch('me_wallet_tip.UserUtil.get_private_eth_address') as mock_get_private_eth_address:
-            mock_get_private_eth_address.return_value = '0x' + to_address[24:]
-            target_article_id = self.article_info_table_items[0]['article_id']
-
-            event = {
-                'body': {
-                    'article_id': target_article_id,
-                    'tip_signed_transaction': raw_transactions['tip'].rawTransaction.hex(),
-                    'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex()
-                },
-                'requestContext': {
-                    'authorizer': {
-                        'claims': {
-                            'cognito:username': 'act_user_01',
-                            'custom:private_eth_address': self.test_account.address,
-                            'phone_number_verified': 'true',
-                            'email_verified': 'true'
-                        }
-                    }
-                }
-            }
-            event['body'] = json.dumps(event['body'])
-
-            response = MeWalletTip(event, {}, self.dynamodb, cognito=None).main()
-            self.assertEqual(response['statusCode'], 200)
-            tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
-            tips = tip_table.scan()['Items']
-            self.assertEqual(len(tips), 1)
-
-            expected_tip = {
-                'user_id': event['requestContext']['authorizer']['claims']['cognito:username'],
-                'to_user_id': self.article_info_table_items[0]['user_id'],
-                'tip_value': Decimal(test_tip_value),
-                'article_id': target_article_id,
-                'article_title': self.article_info_table_items[0]['title'],
-                'transaction': 'tip_transaction_hash',
-                'burn_transaction': None,
-                'uncompleted': Decimal(1),
-                'sort_key': Decimal(1520150552000003),
-                'target_date': '2018-03-04',
-                'created_at': Decimal(int(1520150552.000003))
-            }
-
-            self.assertEqual(expected_tip, tips[0])
-
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
     @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
     def test_main_ng_same_user(self):
@@ -383,6 +329,9 @@ class TestMeWalletTip(TestCase):
         to_address = format(10, '064x')
         burn_value = int(test_tip_value / Decimal(10))
         raw_transactions = self.create_singed_transactions(to_address, test_tip_value, burn_value)
+        # 著者のウォレットが UserConfigurations にも登録されていない場合
+        user_configurations_table = self.dynamodb.Table(os.environ['USER_CONFIGURATIONS_TABLE_NAME'])
+        user_configurations_table.delete_item(Key={'user_id': self.article_info_table_items[0]['user_id']})
 
         with patch('me_wallet_tip.UserUtil.get_cognito_user_info') as mock_get_cognito_user_info:
             mock_get_cognito_user_info.return_value = {
@@ -534,11 +483,58 @@ class TestMeWalletTip(TestCase):
             tips = tip_table.scan()['Items']
             self.assertEqual(len(tips), 0)
 
-    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
-        side_effect=['tip_transaction_hash', 'burn_transaction_hash']))
+    @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
+    def test_main_ng_with_pending_burn(self):
+        # 前回の投げ銭のバーンのトランザクションが未送信の場合は、同じ nonce を使わないよう受け付けない
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        tip_table.put_item(Item={
+            'user_id': 'act_user_01',
+            'sort_key': 1520150552000001,
+            'transaction': 'tip_transaction_hash',
+            'burn_signed_transaction': '0x' + 'a' * 100,
+            'burn_uncompleted': 1,
+            'uncompleted': 1,
+            'target_date': '2018-03-04',
+            'created_at': 1520150552
+        })
+        test_tip_value = 10
+        to_address = format(10, '064x')
+        burn_value = int(test_tip_value / Decimal(10))
+        raw_transactions = self.create_singed_transactions(to_address, test_tip_value, burn_value)
+
+        with patch('me_wallet_tip.UserUtil.get_private_eth_address') as mock_get_private_eth_address, \
+                patch('me_wallet_tip.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_get_private_eth_address.return_value = '0x' + to_address[24:]
+            event = {
+                'body': {
+                    'article_id': self.article_info_table_items[0]['article_id'],
+                    'tip_signed_transaction': raw_transactions['tip'].rawTransaction.hex(),
+                    'burn_signed_transaction': raw_transactions['burn'].rawTransaction.hex()
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': 'act_user_01',
+                            'custom:private_eth_address': self.test_account.address,
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+            event['body'] = json.dumps(event['body'])
+
+            response = MeWalletTip(event, {}, self.dynamodb, cognito=None).main()
+            self.assertEqual(response['statusCode'], 400)
+            self.assertIsNotNone(re.match('{"message": "Invalid parameter: Previous burn transaction is pending',
+                                          response['body']))
+            mock_send_raw_transaction.assert_not_called()
+            tips = tip_table.scan()['Items']
+            self.assertEqual(len(tips), 1)
+
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(return_value='tip_transaction_hash'))
     @patch('private_chain_util.PrivateChainUtil.get_transaction_count', MagicMock(return_value='0x5'))
     @patch('private_chain_util.PrivateChainUtil.get_balance', MagicMock(return_value=format(10 ** 30, '#x')))
-    @patch('private_chain_util.PrivateChainUtil.is_transaction_completed', MagicMock(return_value=True))
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
     def test_main_ok_call_validate_methods(self):
@@ -586,10 +582,10 @@ class TestMeWalletTip(TestCase):
             self.assertEqual('act_user_01', args[1])
             # validate_raw_transaction_signature
             args, _ = mock_validate_signature.call_args_list[0]
-            self.assertEqual(raw_transactions['tip'].rawTransaction.hex(), args[0])
+            self.assertEqual(raw_transactions['tip'].rawTransaction.hex(), args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             args, _ = mock_validate_signature.call_args_list[1]
-            self.assertEqual(raw_transactions['burn'].rawTransaction.hex(), args[0])
+            self.assertEqual(raw_transactions['burn'].rawTransaction.hex(), args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             # validate_erc20_transfer_data
             args, _ = mock_validate_erc20_transfer_data.call_args_list[0]
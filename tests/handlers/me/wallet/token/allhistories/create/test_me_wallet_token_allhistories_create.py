@@ -1,9 +1,14 @@
+import io
 import os
 import json
 import boto3
+import settings
+from datetime import datetime
 from unittest import TestCase
 from me_wallet_token_allhistories_create import MeWalletTokenAllhistoriesCreate
-from unittest.mock import patch, MagicMock
+from token_history_export_worker import TokenHistoryExportWorker
+from block_time_util import BlockTimeUtil
+from unittest.mock import patch, MagicMock, PropertyMock
 from tests_util import TestsUtil
 from hexbytes import HexBytes
 
@@ -15,8 +20,10 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
     def setUp(self):
         TestsUtil.set_aws_auth_to_env()
         TestsUtil.set_all_private_chain_valuables_to_env()
+        BlockTimeUtil.clear_cache()
         TestsUtil.set_all_s3_buckets_name_to_env()
         TestsUtil.create_all_s3_buckets(self.s3)
+        self.s3.Bucket(os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET']).objects.all().delete()
         TestsUtil.set_all_tables_name_to_env()
         TestsUtil.delete_all_tables(self.dynamodb)
 
@@ -56,10 +63,26 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
             }
         ]
         TestsUtil.create_table(self.dynamodb, os.environ['USER_CONFIGURATIONS_TABLE_NAME'], user_configurations_items)
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'], [])
 
     def TearDown(self):
         TestsUtil.delete_all_tables(self.dynamodb)
 
+    def get_uploaded_csv(self, prefix):
+        bucket = self.s3.Bucket(os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET'])
+        keys = sorted([obj.key for obj in bucket.objects.filter(Prefix=prefix)])
+        return bucket.Object(keys[-1]).get()['Body'].read().decode('utf-8')
+
+    def export_token_history(self, event):
+        # ジョブを登録した後にワーカーを実行し、ジョブの状態を返却する
+        response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+        self.assertEqual(response['statusCode'], 202)
+        TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+
+        job_table = self.dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+        job = job_table.get_item(Key={'user_id': event['requestContext']['authorizer']['claims']['cognito:username']})
+        return job['Item']['status']
+
     def assert_bad_request(self, params):
         target_function = MeWalletTokenAllhistoriesCreate(params, {}, self.dynamodb, cognito=None)
         response = target_function.main()
@@ -77,7 +100,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
         '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
         MagicMock(return_value='identityId_dummy'))
     def test_main_ok(self):
-        with patch('web3.eth.Eth.filter') as web3_eth_filter_mock, \
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
                 patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
             user_util_mock.get_cognito_user_info.return_value = {
                 'UserAttributes': [{
@@ -85,7 +109,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                     'Value': '0x1111111111111111111111111111111111111111'
                 }]
             }
-            web3_eth_filter_mock.return_value = PrivateChainEthFilterFakeResponse()
+            web3_eth_get_logs_mock.side_effect = PrivateChainEthFilterFakeResponse().get_logs
+            web3_eth_block_number_mock.return_value = 836877
 
             event = {
                 'headers': {
@@ -110,8 +135,7 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
             notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
             notification_before = notification_table.scan()['Items']
 
-            response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
-            self.assertEqual(response['statusCode'], 200)
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
 
             notification_after = notification_table.scan()['Items']
 
@@ -127,6 +151,63 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
             self.assertEqual(unread_notification_manager_after['unread'], True)
             self.assertEqual(notification_type, 'csvdownload')
 
+    @patch(
+        'me_wallet_token_allhistories_create.MeWalletTokenAllhistoriesCreate.'
+        '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
+        MagicMock(return_value='identityId_dummy'))
+    def test_main_ok_with_queued_job(self):
+        event = {
+            'headers': {
+                'Authorization': 'idtoken_dummy'
+            },
+            'requestContext': {
+                'authorizer': {
+                    'claims': {
+                        'cognito:username': 'user_01',
+                        'cognito-identity': 'ap-northeast-1:hogehoge',
+                        'custom:private_eth_address': '0x1111111111111111111111111111111111111111',
+                        'phone_number_verified': 'true',
+                        'email_verified': 'true'
+                    }
+                }
+            }
+        }
+        job_table = self.dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_mock:
+            response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+            self.assertEqual(response['statusCode'], 202)
+
+            job = job_table.get_item(Key={'user_id': 'user_01'})['Item']
+            job_id = job['job_id']
+            self.assertEqual(json.loads(response['body']), {'job_id': job_id})
+            self.assertEqual(job['identity_id'], 'identityId_dummy')
+            self.assertEqual(job['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED)
+            self.assertEqual(job['attempts'], 0)
+
+            # 処理待ちのジョブが存在する間は、新たなジョブを登録せず、登録済のジョブを返却する
+            response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+            self.assertEqual(response['statusCode'], 202)
+            self.assertEqual(json.loads(response['body']), {'job_id': job_id})
+            self.assertEqual(job_table.get_item(Key={'user_id': 'user_01'})['Item']['job_id'], job_id)
+            self.assertEqual(len(job_table.scan()['Items']), 1)
+
+            # リクエスト時には private chain への問い合わせを行わない
+            web3_eth_get_logs_mock.assert_not_called()
+
+        # 処理が完了したジョブは、新たなジョブに置き換える
+        job_table.update_item(
+            Key={'user_id': 'user_01'},
+            UpdateExpression='SET #status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED}
+        )
+        response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
+        job = job_table.get_item(Key={'user_id': 'user_01'})['Item']
+        self.assertNotEqual(job['job_id'], job_id)
+        self.assertEqual(json.loads(response['body']), {'job_id': job['job_id']})
+        self.assertEqual(job['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED)
+
     @patch('web3.eth.Eth.getBlock',
            MagicMock(return_value={'timestamp': 1546268400}))
     @patch(
@@ -134,7 +215,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
         '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
         MagicMock(return_value='identityId_dummy'))
     def test_ok_with_several_data(self):
-        with patch('web3.eth.Eth.filter') as web3_eth_filter_with_several_data_mock, \
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_with_several_data_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
                 patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
             user_util_mock.get_cognito_user_info.return_value = {
                 'UserAttributes': [{
@@ -142,7 +224,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                     'Value': '0x1111111111111111111111111111111111111111'
                 }]
             }
-            web3_eth_filter_with_several_data_mock.return_value = PrivateChainEthFilterFakeResponseWithSeveralData()
+            web3_eth_get_logs_with_several_data_mock.side_effect = PrivateChainEthFilterFakeResponseWithSeveralData().get_logs
+            web3_eth_block_number_mock.return_value = 836877
 
             event = {
                 'headers': {
@@ -161,8 +244,159 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                 }
             }
 
-            response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
-            self.assertEqual(response['statusCode'], 200)
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+
+            csv_rows = self.get_uploaded_csv('private/identityId_dummy/user_01_').splitlines()
+            self.assertEqual(len(csv_rows), 6)
+            self.assertEqual(
+                csv_rows[0],
+                '2019/01/01 00:00:00,0xf45f335a0bb17d112e870f98218ebd5159e5d7ab9f1739677d7c0b3df4879456,burn,1.000,'
+                '1000000000000000000'
+            )
+
+    @patch(
+        'me_wallet_token_allhistories_create.MeWalletTokenAllhistoriesCreate.'
+        '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
+        MagicMock(return_value='identityId_dummy'))
+    def test_ok_with_block_range_chunks(self):
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
+                patch('web3.eth.Eth.getBlock') as web3_eth_get_block_mock, \
+                patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
+            user_util_mock.get_cognito_user_info.return_value = {
+                'UserAttributes': [{
+                    'Name': 'custom:private_eth_address',
+                    'Value': '0x1111111111111111111111111111111111111111'
+                }]
+            }
+            fake_response = PrivateChainEthFilterFakeResponseWithSeveralData()
+            for logs, block_number in zip(fake_response.logs, [1, 150000, 250000]):
+                for log in logs:
+                    log['blockNumber'] = block_number
+            web3_eth_get_logs_mock.side_effect = fake_response.get_logs
+            web3_eth_block_number_mock.return_value = 250000
+            web3_eth_get_block_mock.return_value = {'timestamp': 1546268400}
+
+            event = {
+                'headers': {
+                    'Authorization': 'idtoken_dummy'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': 'user_01',
+                            'cognito-identity': 'ap-northeast-1:hogehoge',
+                            'custom:private_eth_address': '0x1111111111111111111111111111111111111111',
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+
+            # 1〜100000 の範囲はログが少ないため、次の範囲は 200000 ブロックに広げて取得する
+            block_ranges = [(c[0][0]['fromBlock'], c[0][0]['toBlock']) for c in web3_eth_get_logs_mock.call_args_list]
+            self.assertEqual(block_ranges, [(1, 100000)] * 3 + [(100001, 250000)] * 3)
+            # ブロックの時刻はブロック毎に 1 回のみ取得する
+            self.assertEqual(web3_eth_get_block_mock.call_count, 3)
+            self.assertEqual(len(self.get_uploaded_csv('private/identityId_dummy/user_01_').splitlines()), 6)
+
+    @patch('web3.eth.Eth.getBlock',
+           MagicMock(return_value={'timestamp': 1546268400}))
+    @patch(
+        'me_wallet_token_allhistories_create.MeWalletTokenAllhistoriesCreate.'
+        '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
+        MagicMock(return_value='identityId_dummy'))
+    def test_ok_with_token_history_index(self):
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
+                patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock, \
+                patch('me_wallet_token_allhistories_create.datetime') as datetime_mock:
+            user_util_mock.get_cognito_user_info.return_value = {
+                'UserAttributes': [{
+                    'Name': 'custom:private_eth_address',
+                    'Value': '0x1111111111111111111111111111111111111111'
+                }]
+            }
+            fake_response = PrivateChainEthFilterFakeResponseWithSeveralData()
+            for logs in fake_response.logs:
+                logs[0]['blockNumber'] = 1
+                logs[1]['blockNumber'] = 200000
+            web3_eth_get_logs_mock.side_effect = fake_response.get_logs
+            datetime_mock.fromtimestamp.side_effect = datetime.fromtimestamp
+
+            event = {
+                'headers': {
+                    'Authorization': 'idtoken_dummy'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': 'user_01',
+                            'cognito-identity': 'ap-northeast-1:hogehoge',
+                            'custom:private_eth_address': '0x1111111111111111111111111111111111111111',
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+
+            # 1 回目は全てのブロックを走査し、インデックスを作成する
+            datetime_mock.now.return_value = datetime(2019, 1, 1, 0, 0, 0)
+            web3_eth_block_number_mock.return_value = 100000
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+            first_csv = self.get_uploaded_csv('private/identityId_dummy/user_01_')
+            self.assertEqual(len(first_csv.splitlines()), 3)
+
+            index_object = self.s3.Object(os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET'],
+                                          'token_history_index/0x1111111111111111111111111111111111111111.csv')
+            self.assertEqual(index_object.get()['Metadata'], {'last-scanned-block': '100000'})
+
+            # 2 回目はインデックスの履歴に、走査済のブロック以降の履歴のみを追記する
+            web3_eth_get_logs_mock.reset_mock()
+            datetime_mock.now.return_value = datetime(2019, 1, 1, 0, 0, 1)
+            web3_eth_block_number_mock.return_value = 250000
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+
+            block_ranges = [(c[0][0]['fromBlock'], c[0][0]['toBlock']) for c in web3_eth_get_logs_mock.call_args_list]
+            self.assertEqual(block_ranges, [(100001, 200000)] * 3 + [(200001, 250000)] * 3)
+            second_csv = self.get_uploaded_csv('private/identityId_dummy/user_01_')
+            self.assertTrue(second_csv.startswith(first_csv))
+            self.assertEqual(len(second_csv.splitlines()), 6)
+            self.assertEqual(index_object.get()['Body'].read().decode('utf-8'), second_csv)
+            self.assertEqual(index_object.get()['Metadata'], {'last-scanned-block': '250000'})
+
+    @patch('web3.eth.Eth.getBlock',
+           MagicMock(return_value={'timestamp': 1546268400}))
+    def test_update_token_history_index_ok(self):
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
+                patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
+            user_util_mock.get_cognito_user_info.return_value = {
+                'UserAttributes': [{
+                    'Name': 'custom:private_eth_address',
+                    'Value': '0x1111111111111111111111111111111111111111'
+                }]
+            }
+            web3_eth_get_logs_mock.side_effect = PrivateChainEthFilterFakeResponseWithSeveralData().get_logs
+            web3_eth_block_number_mock.return_value = 836877
+
+            target = MeWalletTokenAllhistoriesCreate({}, {}, dynamodb=self.dynamodb, s3=self.s3)
+            target.update_token_history_index('user_01')
+
+            index_object = self.s3.Object(os.environ['ALL_TOKEN_HISTORY_CSV_DOWNLOAD_S3_BUCKET'],
+                                          'token_history_index/0x1111111111111111111111111111111111111111.csv')
+            response = index_object.get()
+            self.assertEqual(response['Metadata'], {'last-scanned-block': '836877'})
+            self.assertEqual(len(response['Body'].read().decode('utf-8').splitlines()), 6)
+
+            # 新たなブロックが無い場合はチェーンを走査しない
+            web3_eth_get_logs_mock.reset_mock()
+            target.update_token_history_index('user_01')
+            web3_eth_get_logs_mock.assert_not_called()
 
     @patch('web3.eth.Eth.getBlock',
            MagicMock(return_value={'timestamp': 1546268400}))
@@ -171,7 +405,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
         '_MeWalletTokenAllhistoriesCreate__get_user_cognito_identity_id',
         MagicMock(return_value='identityId_dummy'))
     def test_ok_with_no_data(self):
-        with patch('web3.eth.Eth.filter') as web3_eth_filter_with_no_data_mock, \
+        with patch('web3.eth.Eth.getLogs') as web3_eth_get_logs_with_no_data_mock, \
+                patch('web3.eth.Eth.blockNumber', new_callable=PropertyMock) as web3_eth_block_number_mock, \
                 patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
             user_util_mock.get_cognito_user_info.return_value = {
                 'UserAttributes': [{
@@ -179,7 +414,8 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                     'Value': '0x1111111111111111111111111111111111111111'
                 }]
             }
-            web3_eth_filter_with_no_data_mock.return_value = PrivateChainEthFilterFakeResponseWithNoData()
+            web3_eth_get_logs_with_no_data_mock.side_effect = PrivateChainEthFilterFakeResponseWithNoData().get_logs
+            web3_eth_block_number_mock.return_value = 836877
 
             event = {
                 'headers': {
@@ -198,8 +434,13 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                 }
             }
 
-            response = MeWalletTokenAllhistoriesCreate(event, {}, dynamodb=self.dynamodb, s3=self.s3).main()
-            self.assertEqual(response['statusCode'], 404)
+            self.assertEqual(self.export_token_history(event), settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND)
+
+            # 履歴が存在しない場合も、その旨を通知する
+            notifications = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME']).scan()['Items']
+            notification = [n for n in notifications if n['user_id'] == 'user_01'][0]
+            self.assertEqual(notification['type'], 'csvdownload')
+            self.assertIsNone(notification.get('announce_url'))
 
     def test_add_type_ok(self):
         with patch('me_wallet_token_allhistories_create.UserUtil') as user_util_mock:
@@ -258,6 +499,34 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
                 event, {}, self.dynamodb).add_type('---', None, user_eoa)
             self.assertEqual(response, 'unknown')
 
+    def test_filter_data_ok(self):
+        with patch('web3.eth.Eth.getBlock') as web3_eth_get_block_mock:
+            # 2018/12/31 23:59:59(UTC) と 2019/01/01 00:00:00(UTC)
+            web3_eth_get_block_mock.side_effect = lambda block_number: {'timestamp': 1546300799 + block_number}
+            eoa = '0x1111111111111111111111111111111111111111'
+            fake_response = PrivateChainEthFilterFakeResponse()
+            transfer_logs = fake_response.logs[0] + fake_response.logs[1]
+            transfer_logs[0]['blockNumber'] = 0
+            transfer_logs[0]['data'] = hex(1234567890123456789)
+            transfer_logs[1]['blockNumber'] = 1
+            transfer_logs[1]['data'] = hex(999999999999999)
+            mint_logs = fake_response.logs[2]
+
+            target = MeWalletTokenAllhistoriesCreate({}, {})
+            target._MeWalletTokenAllhistoriesCreate__init_web3()
+            data_for_csv = io.StringIO()
+            target.filter_transfer_data(transfer_logs, eoa, data_for_csv)
+            target.filter_mint_data(mint_logs, eoa, data_for_csv)
+
+            self.assertEqual(data_for_csv.getvalue().splitlines(), [
+                '2019/01/01 08:59:59,0xf45f335a0bb17d112e870f98218ebd5159e5d7ab9f1739677d7c0b3df4879456,burn,1.234,'
+                '1234567890123456789',
+                '2019/01/01 09:00:00,0xf45f335a0bb17d112e870f98218ebd5159e5d7ab9f1739677d7c0b3df4879457,get from user,'
+                '0.000,999999999999999',
+                '2019/01/11 01:27:56,0xf45f335a0bb17d112e870f98218ebd5159e5d7ab9f1739677d7c0b3df4879458,get by like,'
+                '1.000,1000000000000000000'
+            ])
+
     def test_ng_migration_checking(self):
         event = {
             'requestContext': {
@@ -278,10 +547,19 @@ class TestMeWalletTokenAllHistoriesCreate(TestCase):
         self.assertEqual(json.loads(response['body'])['message'], 'Not exists private_eth_address')
 
 
+def filter_fake_logs(logs, filter_params):
+    # eth_getLogs と同様に、ブロックの範囲と topics で絞り込む
+    return [
+        log for log in logs
+        if filter_params['fromBlock'] <= log['blockNumber'] <= filter_params['toBlock'] and
+        all([topic is None or log['topics'][i].hex() == topic for i, topic in enumerate(filter_params['topics'])])
+    ]
+
+
 class PrivateChainEthFilterFakeResponse:
     def __init__(self):
-        self.eth_filter_mock_value = MagicMock()
-        self.eth_filter_mock_value.side_effect = [
+        # Transfer(from) / Transfer(to) / Mint のログ
+        self.logs = [
             [{'address': '0x1383B25f9ba231e3a1a1E45c0b5689d778D44AD5',
               'blockHash': HexBytes('0xf32e073349e4ca49c5e193b161ea1b9ba7dc9c2a9bf1271725c99bb5c690bba7'),
               'blockNumber': 836877, 'data': '0x0000000000000000000000000000000000000000000000000de0b6b3a7640000',
@@ -317,14 +595,14 @@ class PrivateChainEthFilterFakeResponse:
               'type': 'mined'}],
         ]
 
-    def get_all_entries(self):
-        return self.eth_filter_mock_value()
+    def get_logs(self, filter_params):
+        return filter_fake_logs(sum(self.logs, []), filter_params)
 
 
 class PrivateChainEthFilterFakeResponseWithSeveralData:
     def __init__(self):
-        self.eth_filter_mock_value = MagicMock()
-        self.eth_filter_mock_value.side_effect = [
+        # Transfer(from) / Transfer(to) / Mint のログ
+        self.logs = [
             [{'address': '0x1383B25f9ba231e3a1a1E45c0b5689d778D44AD5',
               'blockHash': HexBytes('0xf32e073349e4ca49c5e193b161ea1b9ba7dc9c2a9bf1271725c99bb5c690bba7'),
               'blockNumber': 836877, 'data': '0x0000000000000000000000000000000000000000000000000de0b6b3a7640000',
@@ -393,11 +671,10 @@ class PrivateChainEthFilterFakeResponseWithSeveralData:
               'type': 'mined'}],
         ]
 
-    def get_all_entries(self):
-        return self.eth_filter_mock_value()
+    def get_logs(self, filter_params):
+        return filter_fake_logs(sum(self.logs, []), filter_params)
 
 
 class PrivateChainEthFilterFakeResponseWithNoData:
-    def get_all_entries(self):
-        value = {}
-        return value
+    def get_logs(self, filter_params):
+        return []
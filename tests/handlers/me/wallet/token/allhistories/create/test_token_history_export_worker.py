@@ -0,0 +1,202 @@
+import os
+import time
+import boto3
+import settings
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from token_history_export_worker import TokenHistoryExportWorker
+from record_not_found_error import RecordNotFoundError
+from tests_util import TestsUtil
+
+
+class TestTokenHistoryExportWorker(TestCase):
+    dynamodb = TestsUtil.get_dynamodb_client()
+    s3 = boto3.resource('s3', endpoint_url='http://localhost:4572/')
+
+    def setUp(self):
+        TestsUtil.set_aws_auth_to_env()
+        TestsUtil.set_all_private_chain_valuables_to_env()
+        TestsUtil.set_all_s3_buckets_name_to_env()
+        TestsUtil.set_all_tables_name_to_env()
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+        now = int(time.time())
+        self.job_items = [
+            {
+                'user_id': 'user_01',
+                'job_id': 'job_01',
+                'identity_id': 'identity_01',
+                'status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED,
+                'attempts': 0,
+                'created_at': now - 30,
+                'updated_at': now - 30
+            },
+            {
+                'user_id': 'user_02',
+                'job_id': 'job_02',
+                'identity_id': 'identity_02',
+                'status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED,
+                'attempts': 0,
+                'created_at': now - 20,
+                'updated_at': now - 20
+            },
+            {
+                'user_id': 'user_03',
+                'job_id': 'job_03',
+                'identity_id': 'identity_03',
+                'status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED,
+                'attempts': 1,
+                'created_at': now - 10,
+                'updated_at': now - 10
+            }
+        ]
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'], self.job_items)
+        self.job_table = self.dynamodb.Table(os.environ['TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME'])
+
+    def tearDown(self):
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+    def get_job(self, user_id):
+        return self.job_table.get_item(Key={'user_id': user_id})['Item']
+
+    def test_run_ok(self):
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock:
+            export_token_history_mock = target_mock.return_value.export_token_history
+            export_token_history_mock.side_effect = ['https://example.com/user_01.csv', RecordNotFoundError('Record Not Found')]
+
+            with patch('settings.TOKEN_HISTORY_EXPORT_WORKER_CONCURRENCY', 1):
+                result = TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+
+        self.assertEqual(result, [settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED,
+                                  settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND])
+        # 登録順に処理する
+        self.assertEqual([c[0] for c in export_token_history_mock.call_args_list],
+                         [('user_01', 'identity_01'), ('user_02', 'identity_02')])
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+        self.assertEqual(self.get_job('user_01')['attempts'], 1)
+        self.assertEqual(self.get_job('user_02')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND)
+        self.assertEqual(self.get_job('user_03')['attempts'], 1)
+        # ジョブの終了を記録した後に結果を通知する。完了時は csv の url を通知する
+        self.assertEqual([c[0] for c in target_mock.return_value.notify_export_result.call_args_list], [
+            ('user_01', settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED, 'https://example.com/user_01.csv'),
+            ('user_02', settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_NOT_FOUND, None)
+        ])
+
+    def test_run_ok_with_batch_size(self):
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock, \
+                patch('settings.TOKEN_HISTORY_EXPORT_WORKER_BATCH_SIZE', 1):
+            TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+
+            target_mock.return_value.export_token_history.assert_called_once_with('user_01', 'identity_01')
+
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+        self.assertEqual(self.get_job('user_02')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED)
+
+    def test_run_ok_with_retry(self):
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock, \
+                patch('settings.TOKEN_HISTORY_EXPORT_WORKER_BATCH_SIZE', 1):
+            target_mock.return_value.export_token_history.side_effect = Exception('private chain error')
+
+            # 最大試行回数に達するまでは処理待ちに戻す
+            for attempts in range(1, settings.TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS):
+                TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+                self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED)
+                self.assertEqual(self.get_job('user_01')['attempts'], attempts)
+            target_mock.return_value.notify_export_result.assert_not_called()
+
+            TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+
+            target_mock.return_value.notify_export_result.assert_called_once_with(
+                'user_01', settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED, None)
+
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED)
+        self.assertEqual(self.get_job('user_01')['attempts'], settings.TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS)
+
+    def test_run_ok_with_lease_expired_job(self):
+        lease_expired = int(time.time()) - settings.TOKEN_HISTORY_EXPORT_JOB_LEASE_SECONDS - 1
+        for user_id, attempts, updated_at in [
+            ('user_01', 1, lease_expired),
+            ('user_02', settings.TOKEN_HISTORY_EXPORT_JOB_MAX_ATTEMPTS, lease_expired),
+            ('user_03', 1, int(time.time()))
+        ]:
+            self.job_table.update_item(
+                Key={'user_id': user_id},
+                UpdateExpression='SET #status = :status, attempts = :attempts, updated_at = :updated_at',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={
+                    ':status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING,
+                    ':attempts': attempts,
+                    ':updated_at': updated_at
+                }
+            )
+
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock:
+            TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run()
+
+            # 期限を過ぎた処理中のジョブのみを再実行し、最大試行回数に達したジョブは失敗として通知する
+            target_mock.return_value.export_token_history.assert_called_once_with('user_01', 'identity_01')
+            self.assertEqual([c[0] for c in target_mock.return_value.notify_export_result.call_args_list], [
+                ('user_02', settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED, None),
+                ('user_01', settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED,
+                 target_mock.return_value.export_token_history.return_value)
+            ])
+
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_COMPLETED)
+        self.assertEqual(self.get_job('user_01')['attempts'], 2)
+        self.assertEqual(self.get_job('user_02')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_FAILED)
+        self.assertEqual(self.get_job('user_03')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING)
+
+    def test_process_job_ok_with_started_job(self):
+        # 他のワーカーが処理を開始したジョブは処理しない
+        self.job_table.update_item(
+            Key={'user_id': 'user_01'},
+            UpdateExpression='SET #status = :status',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':status': settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING}
+        )
+
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock:
+            result = TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).process_job(self.job_items[0])
+
+            target_mock.return_value.export_token_history.assert_not_called()
+
+        self.assertIsNone(result)
+        self.assertEqual(self.get_job('user_01')['attempts'], 0)
+
+    def test_process_job_ok_with_replaced_job(self):
+        # ユーザーが新たなジョブを登録済の場合は、古いジョブを処理しない
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock:
+            job = dict(self.job_items[0], job_id='job_old')
+            result = TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).process_job(job)
+
+            target_mock.return_value.export_token_history.assert_not_called()
+
+        self.assertIsNone(result)
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_QUEUED)
+
+    def test_process_job_ok_with_lease_taken_over(self):
+        # 処理中に期限を過ぎ、他のワーカーが再実行を開始したジョブは結果を反映せず、完了の通知も行わない
+        def export_token_history(user_id, identity_id):
+            self.job_table.update_item(
+                Key={'user_id': user_id},
+                UpdateExpression='ADD attempts :one',
+                ExpressionAttributeValues={':one': 1}
+            )
+            return 'https://example.com/user_01.csv'
+
+        with patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate') as target_mock:
+            target_mock.return_value.export_token_history.side_effect = export_token_history
+            result = TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).process_job(self.job_items[0])
+
+            target_mock.return_value.notify_export_result.assert_not_called()
+
+        self.assertIsNone(result)
+        self.assertEqual(self.get_job('user_01')['status'], settings.TOKEN_HISTORY_EXPORT_JOB_STATUS_PROCESSING)
+        self.assertEqual(self.get_job('user_01')['attempts'], 2)
+
+    @patch('token_history_export_worker.MeWalletTokenAllhistoriesCreate', MagicMock())
+    def test_run_ok_with_no_jobs(self):
+        for job in self.job_items:
+            self.job_table.delete_item(Key={'user_id': job['user_id']})
+
+        self.assertEqual(TokenHistoryExportWorker(dynamodb=self.dynamodb, s3=self.s3).run(), [])
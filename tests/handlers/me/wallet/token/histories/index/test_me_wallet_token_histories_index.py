@@ -4,6 +4,7 @@ import settings
 from unittest import TestCase
 from me_wallet_token_histories_index import MeWalletTokenHistoriesIndex
 from unittest.mock import patch
+from block_time_util import BlockTimeUtil
 from tests_util import TestsUtil
 
 
@@ -24,6 +25,9 @@ class TestMeWalletTokenHistoriesIndex(TestCase):
         ]
         TestsUtil.create_table(self.dynamodb, os.environ['USER_CONFIGURATIONS_TABLE_NAME'], user_configurations_items)
 
+    def setUp(self):
+        BlockTimeUtil.clear_cache()
+
     def assert_bad_request(self, params):
         target_function = MeWalletTokenHistoriesIndex(params, {}, self.dynamodb, cognito=None)
         response = target_function.main()
@@ -31,24 +35,29 @@ class TestMeWalletTokenHistoriesIndex(TestCase):
         self.assertEqual(response['statusCode'], 400)
 
     def test_main_ok(self):
-        with patch('private_chain_util.PrivateChainUtil.send_transaction') as mock_send_transaction:
+        with patch('private_chain_util.PrivateChainUtil.send_transaction') as mock_send_transaction, \
+                patch('time.time') as mock_time:
             # mock の初期化
+            # 平均ブロック生成時間どおりに生成されたチェーンとし、最新ブロックの時刻を現在時刻とする
+            latest_block_number = 200000
+            now = 1555383864
             target_range_number = int(settings.HISTORY_RANGE_DAYS * 24 * 60 * 60 / settings.AVERAGE_BLOCK_TIME)
-            from_block_number = 1
-            return_block_number = hex(from_block_number + target_range_number)
-            return_get_timestamp_by_block_number = {"result": {"timestamp": "0x5cb54638"}}
-            return_relay_events = {
-                "result": [{"hoge": "hoge1"}, {"hoge": "hoge2"}]
-            }
-            return_apply_relay_events = {
-                "result": [{"fuga": "fuga1"}, {"fuga": "fuga2"}, {"fuga": "fuga3"}]
-            }
-            mock_send_transaction.side_effect = [
-                return_block_number,
-                return_get_timestamp_by_block_number,
-                return_relay_events,
-                return_apply_relay_events
-            ]
+            from_block_number = latest_block_number - target_range_number
+            return_relay_events = [{"hoge": "hoge1"}, {"hoge": "hoge2"}]
+            return_apply_relay_events = [{"fuga": "fuga1"}, {"fuga": "fuga2"}, {"fuga": "fuga3"}]
+
+            def send_transaction(request_url, payload_dict=None):
+                if request_url.endswith('/eth/block_number'):
+                    return hex(latest_block_number)
+                if request_url.endswith('/eth/get_block_by_number'):
+                    block_number = int(payload_dict['block_num'], 16)
+                    return {'timestamp': hex(now - (latest_block_number - block_number) * settings.AVERAGE_BLOCK_TIME)}
+                if request_url.endswith('/wallet/relay_events'):
+                    return return_relay_events
+                return return_apply_relay_events
+
+            mock_send_transaction.side_effect = send_transaction
+            mock_time.return_value = now
 
             # テスト対象実施
             private_eth_address = '0x1000000000000000000000000000000000000000'
@@ -69,43 +78,58 @@ class TestMeWalletTokenHistoriesIndex(TestCase):
 
             # ステータス確認
             self.assertEqual(response['statusCode'], 200)
+            self.assertEqual(json.loads(response['body']), {
+                'timestamp': hex(now - target_range_number * settings.AVERAGE_BLOCK_TIME),
+                'relay_events': return_relay_events,
+                'apply_relay_events': return_apply_relay_events
+            })
 
             # 各種メソッド呼び出し確認
             # send_transaction
-            self.assertEqual(len(mock_send_transaction.call_args_list), 4)
+            self.assertEqual(len(mock_send_transaction.call_args_list), 5)
             args_block_number = {
                 'request_url': 'https://' + os.environ[
                     'PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/eth/block_number',
             }
             self.assertEqual(mock_send_transaction.call_args_list[0][1], args_block_number)
-            args_get_block_by_number = {
-                'request_url': 'https://' + os.environ[
-                    'PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/eth/get_block_by_number',
-                'payload_dict': {
-                    'block_num': hex(from_block_number)
+            # 期間内の最初のブロックと、その直前のブロックの時刻のみを取得する
+            args_get_block_by_number = [
+                {
+                    'request_url': 'https://' + os.environ[
+                        'PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/eth/get_block_by_number',
+                    'payload_dict': {
+                        'block_num': hex(block_number)
+                    }
                 }
-            }
-            self.assertEqual(mock_send_transaction.call_args_list[1][1], args_get_block_by_number)
+                for block_number in [from_block_number, from_block_number - 1]
+            ]
+            self.assertEqual([c[1] for c in mock_send_transaction.call_args_list[1:3]], args_get_block_by_number)
             args_replay_events = {
                 'request_url': 'https://' + os.environ[
                     'PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/wallet/relay_events',
                 'payload_dict': {
                     'from_block': hex(from_block_number),
-                    'to_block': return_block_number,
+                    'to_block': hex(latest_block_number),
                     'sender_eth_address': private_eth_address[2:]
                 }
             }
-            self.assertEqual(mock_send_transaction.call_args_list[2][1], args_replay_events)
+            self.assertEqual(mock_send_transaction.call_args_list[3][1], args_replay_events)
             args_apply_relay_events = {
                 'request_url': 'https://' + os.environ[
                     'PRIVATE_CHAIN_EXECUTE_API_HOST'] + '/production/wallet/apply_relay_events',
                 'payload_dict': {
                     'from_block': hex(from_block_number),
-                    'to_block': return_block_number,
+                    'to_block': hex(latest_block_number),
                     'recipient_eth_address': private_eth_address[2:]
                 }
             }
-            self.assertEqual(mock_send_transaction.call_args_list[3][1], args_apply_relay_events)
+            self.assertEqual(mock_send_transaction.call_args_list[4][1], args_apply_relay_events)
+
+            # 2 回目以降は取得済のブロックの時刻を再利用する
+            mock_send_transaction.reset_mock()
+            response = MeWalletTokenHistoriesIndex(event, {}, self.dynamodb, cognito=None).main()
+            self.assertEqual(response['statusCode'], 200)
+            self.assertEqual(len(mock_send_transaction.call_args_list), 3)
 
     def test_ng_migration_checking(self):
         event = {
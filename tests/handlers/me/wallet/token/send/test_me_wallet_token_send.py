@@ -27,6 +27,9 @@ class TestMeWalletTokenSend(TestCase):
         TestsUtil.set_all_tables_name_to_env()
         TestsUtil.delete_all_tables(self.dynamodb)
         TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_TABLE_NAME'], [])
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'], [])
+        TestsUtil.create_table(self.dynamodb, os.environ['TIP_TABLE_NAME'], [])
+        TestsUtil.create_table(self.dynamodb, os.environ['PAID_ARTICLES_TABLE_NAME'], [])
         os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE'] = '100000000000000000000000'
 
         user_configurations_items = [
@@ -40,6 +43,23 @@ class TestMeWalletTokenSend(TestCase):
     def tearDown(self):
         TestsUtil.delete_all_tables(self.dynamodb)
 
+    def put_daily_totals(self, token_send_items):
+        # 出金情報に対応する日次の合計額（done と doing の合計）を作成する
+        daily_totals = {}
+        for item in token_send_items:
+            if item['send_status'] in ['done', 'doing']:
+                key = (item['user_id'], item['target_date'])
+                daily_totals[key] = daily_totals.get(key, Decimal(0)) + Decimal(item['send_value'])
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        for (user_id, target_date), send_value in daily_totals.items():
+            token_send_daily_total_table.put_item(
+                Item={'user_id': user_id, 'target_date': target_date, 'send_value': send_value})
+
+    def get_daily_total(self, user_id, target_date):
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        return token_send_daily_total_table.get_item(
+            Key={'user_id': user_id, 'target_date': target_date})['Item']['send_value']
+
     def assert_bad_request(self, params):
         target_function = MeWalletTokenSend(params, {}, self.dynamodb, cognito=None)
         response = target_function.main()
@@ -108,6 +128,8 @@ class TestMeWalletTokenSend(TestCase):
                 'created_at': Decimal(int(1520150552.000003))
             }
             self.assertEqual(expected_token_send, token_send_itmes[0])
+            # 日次の合計額に計上される
+            self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), Decimal(send_value))
 
             # 各種メソッド呼び出し確認
             # mock_get_allowance
@@ -182,11 +204,14 @@ class TestMeWalletTokenSend(TestCase):
                 'approve_transaction': 'approve_transaction_hash',
                 'relay_transaction_hash': 'relay_transaction_hash',
                 'send_status': 'doing',
+                'uncompleted': 1,
                 'target_date': '2018-03-04',
                 'sort_key': Decimal(1520150552000003),
                 'created_at': Decimal(int(1520150552.000003))
             }
             self.assertEqual(expected_token_send, token_send_itmes[0])
+            # doing の出金も日次の合計額に計上される
+            self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), Decimal(send_value))
 
             # 各種メソッド呼び出し確認
             # mock_get_allowance
@@ -277,6 +302,7 @@ class TestMeWalletTokenSend(TestCase):
         token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
         for i in items:
             token_send_table.put_item(Item=i)
+        self.put_daily_totals(items)
 
         nonce = 5
         to_address = format(10, '064x')
@@ -334,6 +360,7 @@ class TestMeWalletTokenSend(TestCase):
             }
             sort_items = sorted(token_send_itmes, key=lambda x: x['sort_key'], reverse=True)
             self.assertEqual(expected_token_send, sort_items[0])
+            self.assertEqual(self.get_daily_total(user_id, '2018-03-04'), Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE']))
 
             # 各種メソッド呼び出し確認
             # mock_get_allowance
@@ -414,6 +441,7 @@ class TestMeWalletTokenSend(TestCase):
                 'approve_transaction': 'approve_transaction_hash',
                 'relay_transaction_hash': 'relay_transaction_hash',
                 'send_status': 'doing',
+                'uncompleted': 1,
                 'target_date': '2018-03-04',
                 'sort_key': Decimal(1520150552000003),
                 'created_at': Decimal(int(1520150552.000003))
@@ -433,15 +461,15 @@ class TestMeWalletTokenSend(TestCase):
             # validate_raw_transaction_signature
             # init approve
             args, _ = mock_validate_signature.call_args_list[0]
-            self.assertEqual(init_transaction, args[0])
+            self.assertEqual(init_transaction, args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             # approve
             args, _ = mock_validate_signature.call_args_list[1]
-            self.assertEqual(approve_transaction, args[0])
+            self.assertEqual(approve_transaction, args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
             # relay
             args, _ = mock_validate_signature.call_args_list[2]
-            self.assertEqual(relay_transaction, args[0])
+            self.assertEqual(relay_transaction, args[0].raw_transaction)
             self.assertEqual(self.test_account.address, args[1])
 
             # mock_validate_erc20_approve_data
@@ -532,6 +560,7 @@ class TestMeWalletTokenSend(TestCase):
         token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
         for i in items:
             token_send_table.put_item(Item=i)
+        self.put_daily_totals(items)
 
         nonce = 5
         to_address = format(10, '064x')
@@ -576,6 +605,183 @@ class TestMeWalletTokenSend(TestCase):
             token_send_table_name = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
             result_items = token_send_table_name.scan()['Items']
             self.assertEqual(len(result_items), len(items))
+            # 日次の合計額は更新されない
+            self.assertEqual(self.get_daily_total(user_id, '2018-03-04'),
+                             sum([i['send_value'] for i in items if i['send_status'] in ['done', 'doing']]))
+
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
+        side_effect=['approve_transaction_hash', 'relay_transaction_hash']))
+    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000100))
+    @patch('time.time', MagicMock(return_value=1520150552.000100))
+    @patch('me_wallet_token_send.MeWalletTokenSend._MeWalletTokenSend__verify_user_attribute', MagicMock())
+    def test_main_ng_over_limit_with_concurrent_request(self):
+        # 並行する出金により日次の合計額が更新済の場合
+        user_id = 'user_01'
+        daily_total = Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE']) / 5 * 4 + 1
+        self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME']).put_item(
+            Item={'user_id': user_id, 'target_date': '2018-03-04', 'send_value': daily_total})
+
+        nonce = 5
+        to_address = format(10, '064x')
+        send_value = int(Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE']) / Decimal(5))
+        approve_transaction = self.create_singed_approve_transaction(nonce, send_value)
+        relay_transaction = self.create_singed_relay_transaction(nonce + 1, to_address, send_value)
+
+        with patch('private_chain_util.PrivateChainUtil.get_allowance') as mock_get_allowance, \
+                patch('private_chain_util.PrivateChainUtil.get_transaction_count') as mock_get_transaction_count:
+            # mock の初期化
+            mock_get_allowance.return_value = '0x' + '0' * 64
+            mock_get_transaction_count.return_value = format(nonce, '#x')
+
+            # テスト実施
+            event = {
+                'body': {
+                    'approve_signed_transaction': approve_transaction,
+                    'relay_signed_transaction': relay_transaction,
+                    'access_token': 'aaaaa',
+                    'pin_code': '123456'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': user_id,
+                            'custom:private_eth_address': self.test_account.address,
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+            event['body'] = json.dumps(event['body'])
+            response = MeWalletTokenSend(event, {}, self.dynamodb, cognito=None).main()
+
+            # ステータス確認
+            self.assertEqual(response['statusCode'], 400)
+            self.assertIsNotNone(re.match('{"message": "Invalid parameter:', response['body']))
+
+            # 出金情報は作成されず、approve も relay も実行されない
+            token_send_table_name = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+            self.assertEqual(token_send_table_name.scan()['Items'], [])
+            self.assertEqual(PrivateChainUtil.send_raw_transaction.call_count, 0)
+            self.assertEqual(self.get_daily_total(user_id, '2018-03-04'), daily_total)
+
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
+        side_effect=['approve_transaction_hash', 'relay_transaction_hash']))
+    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000100))
+    @patch('time.time', MagicMock(return_value=1520150552.000100))
+    @patch('me_wallet_token_send.MeWalletTokenSend._MeWalletTokenSend__verify_user_attribute', MagicMock())
+    def test_main_ng_over_limit_with_first_send_of_day(self):
+        # 当日の出金が存在しない場合も、限度額を超える出金は行わない
+        user_id = 'user_01'
+        nonce = 5
+        to_address = format(10, '064x')
+        send_value = int(Decimal(os.environ['DAILY_LIMIT_TOKEN_SEND_VALUE'])) + 1
+        approve_transaction = self.create_singed_approve_transaction(nonce, send_value)
+        relay_transaction = self.create_singed_relay_transaction(nonce + 1, to_address, send_value)
+
+        with patch('private_chain_util.PrivateChainUtil.get_allowance') as mock_get_allowance, \
+                patch('private_chain_util.PrivateChainUtil.get_transaction_count') as mock_get_transaction_count:
+            # mock の初期化
+            mock_get_allowance.return_value = '0x' + '0' * 64
+            mock_get_transaction_count.return_value = format(nonce, '#x')
+
+            # テスト実施
+            event = {
+                'body': {
+                    'approve_signed_transaction': approve_transaction,
+                    'relay_signed_transaction': relay_transaction,
+                    'access_token': 'aaaaa',
+                    'pin_code': '123456'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': user_id,
+                            'custom:private_eth_address': self.test_account.address,
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+            event['body'] = json.dumps(event['body'])
+            response = MeWalletTokenSend(event, {}, self.dynamodb, cognito=None).main()
+
+            # ステータス確認
+            self.assertEqual(response['statusCode'], 400)
+            self.assertIsNotNone(re.match('{"message": "Invalid parameter:', response['body']))
+
+            # 出金情報及び日次の合計額は作成されず、approve も relay も実行されない
+            token_send_table_name = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+            self.assertEqual(token_send_table_name.scan()['Items'], [])
+            self.assertEqual(PrivateChainUtil.send_raw_transaction.call_count, 0)
+            token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+            self.assertIsNone(token_send_daily_total_table.get_item(
+                Key={'user_id': user_id, 'target_date': '2018-03-04'}).get('Item'))
+
+    @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
+        side_effect=['approve_transaction_hash', 'relay_transaction_hash']))
+    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000100))
+    @patch('time.time', MagicMock(return_value=1520150552.000100))
+    @patch('me_wallet_token_send.MeWalletTokenSend._MeWalletTokenSend__verify_user_attribute', MagicMock())
+    def test_main_ng_with_pending_burn(self):
+        # 記事購入のバーンのトランザクションが未送信の場合は、同じ nonce を使わないよう出金を受け付けない
+        user_id = 'user_01'
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        paid_articles_table.put_item(Item={
+            'article_id': 'article_01',
+            'sort_key': 1520150552000001,
+            'user_id': user_id,
+            'status': 'done',
+            'uncompleted': 1,
+            'burn_uncompleted': 1,
+            'burn_signed_transaction': '0x' + 'a' * 100
+        })
+        nonce = 5
+        to_address = format(10, '064x')
+        send_value = settings.parameters['token_send_value']['minimum']
+        approve_transaction = self.create_singed_approve_transaction(nonce, send_value)
+        relay_transaction = self.create_singed_relay_transaction(nonce + 1, to_address, send_value)
+
+        with patch('private_chain_util.PrivateChainUtil.get_allowance') as mock_get_allowance, \
+                patch('private_chain_util.PrivateChainUtil.get_transaction_count') as mock_get_transaction_count:
+            # mock の初期化
+            mock_get_allowance.return_value = '0x' + '0' * 64
+            mock_get_transaction_count.return_value = format(nonce, '#x')
+
+            # テスト実施
+            event = {
+                'body': {
+                    'approve_signed_transaction': approve_transaction,
+                    'relay_signed_transaction': relay_transaction,
+                    'access_token': 'aaaaa',
+                    'pin_code': '123456'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': user_id,
+                            'custom:private_eth_address': self.test_account.address,
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+            event['body'] = json.dumps(event['body'])
+            response = MeWalletTokenSend(event, {}, self.dynamodb, cognito=None).main()
+
+            # ステータス確認
+            self.assertEqual(response['statusCode'], 400)
+            self.assertEqual(
+                json.loads(response['body'])['message'],
+                'Invalid parameter: Previous burn transaction is pending'
+            )
+
+            # 出金情報は作成されず、approve も relay も実行されない
+            token_send_table_name = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+            self.assertEqual(token_send_table_name.scan()['Items'], [])
+            self.assertEqual(PrivateChainUtil.send_raw_transaction.call_count, 0)
 
     @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
     @patch('time.time', MagicMock(return_value=1520150552.000003))
@@ -780,6 +986,8 @@ class TestMeWalletTokenSend(TestCase):
                 'created_at': Decimal(int(1520150552.000003))
             }
             self.assertEqual(expected_token_send, token_send_itmes[0])
+            # fail となった出金は日次の合計額から差し引かれる
+            self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 0)
 
     @patch('private_chain_util.PrivateChainUtil.send_raw_transaction', MagicMock(
         side_effect=['approve_transaction_hash', 'relay_transaction_hash']))
@@ -841,6 +1049,64 @@ class TestMeWalletTokenSend(TestCase):
                 'created_at': Decimal(int(1520150552.000003))
             }
             self.assertEqual(expected_token_send, token_send_itmes[0])
+            # fail となった出金は日次の合計額から差し引かれる
+            self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 0)
+
+    @patch('time_util.TimeUtil.generate_sort_key', MagicMock(return_value=1520150552000003))
+    @patch('time.time', MagicMock(return_value=1520150552.000003))
+    @patch('me_wallet_token_send.MeWalletTokenSend._MeWalletTokenSend__verify_user_attribute', MagicMock())
+    def test_main_ng_with_status_fail_at_approve_SendTransactionError(self):
+        nonce = 5
+        to_address = format(10, '064x')
+        send_value = settings.parameters['token_send_value']['minimum']
+        init_transaction = self.create_singed_approve_transaction(nonce, 0)
+        approve_transaction = self.create_singed_approve_transaction(nonce + 1, send_value)
+        relay_transaction = self.create_singed_relay_transaction(nonce + 2, to_address, send_value)
+
+        with patch('private_chain_util.PrivateChainUtil.get_allowance') as mock_get_allowance, \
+                patch('private_chain_util.PrivateChainUtil.get_transaction_count') as mock_get_transaction_count, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            # mock の初期化
+            mock_get_allowance.return_value = '0x' + '0' * 63 + '1'
+            mock_get_transaction_count.return_value = format(nonce, '#x')
+            mock_send_raw_transaction.side_effect = ['init_hash', SendTransactionError()]
+
+            # テスト実施
+            event = {
+                'body': {
+                    'init_approve_signed_transaction': init_transaction,
+                    'approve_signed_transaction': approve_transaction,
+                    'relay_signed_transaction': relay_transaction,
+                    'access_token': 'aaaaa',
+                    'pin_code': '123456'
+                },
+                'requestContext': {
+                    'authorizer': {
+                        'claims': {
+                            'cognito:username': 'user_01',
+                            'custom:private_eth_address': self.test_account.address,
+                            'phone_number_verified': 'true',
+                            'email_verified': 'true'
+                        }
+                    }
+                }
+            }
+            event['body'] = json.dumps(event['body'])
+            response = MeWalletTokenSend(event, {}, self.dynamodb, cognito=None).main()
+
+            # ステータス確認
+            self.assertEqual(response['statusCode'], 500)
+            # relay は実行されない
+            self.assertEqual(mock_send_raw_transaction.call_count, 2)
+
+            # DB 確認
+            token_send_table_name = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+            token_send_itmes = token_send_table_name.scan()['Items']
+            self.assertEqual(len(token_send_itmes), 1)
+            self.assertEqual(token_send_itmes[0]['send_status'], 'fail')
+            self.assertNotIn('approve_transaction', token_send_itmes[0])
+            # 送信前に計上した出金額は日次の合計額から差し引かれる
+            self.assertEqual(self.get_daily_total('user_01', '2018-03-04'), 0)
 
     def test_main_ng_invalid_pin_code(self):
         nonce = 5
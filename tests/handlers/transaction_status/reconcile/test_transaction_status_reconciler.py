@@ -0,0 +1,376 @@
+import os
+import settings
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from tests_util import TestsUtil
+from exceptions import ReceiptError, SendTransactionError
+from web3 import Web3
+from transaction_status_reconciler import TransactionStatusReconciler
+
+
+class TestTransactionStatusReconciler(TestCase):
+    dynamodb = TestsUtil.get_dynamodb_client()
+    now = 1520150552
+
+    def setUp(self):
+        TestsUtil.set_all_tables_name_to_env()
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+        expired = self.now - settings.TRANSACTION_STATUS_RECONCILE_EXPIRE_SECONDS - 1
+        stale = self.now - settings.TOKEN_SEND_RECONCILE_STALE_SECONDS - 1
+
+        TestsUtil.create_table(self.dynamodb, os.environ['TIP_TABLE_NAME'], [
+            # 投げ銭が完了している
+            self.create_tip_item(1, self.now, 'tip_completed'),
+            # 投げ銭が実行されなかった
+            self.create_tip_item(2, self.now, 'tip_failed'),
+            # 投げ銭が未完了
+            self.create_tip_item(3, self.now, 'tip_pending'),
+            # 投げ銭が未完了のまま期限を過ぎた
+            self.create_tip_item(4, expired, 'tip_pending'),
+            # バーン処理が実施済
+            {
+                'user_id': 'tip_user',
+                'sort_key': 5,
+                'transaction': 'tip_completed',
+                'burn_transaction': 'burn_transaction_hash',
+                'uncompleted': 1,
+                'created_at': self.now
+            }
+        ])
+
+        TestsUtil.create_table(self.dynamodb, os.environ['PAID_ARTICLES_TABLE_NAME'], [
+            # 購入が完了している
+            self.create_paid_article_item('article01', self.now, 'purchase_completed'),
+            # 購入が実行されなかった
+            self.create_paid_article_item('article02', self.now, 'purchase_failed'),
+            # 購入が未完了
+            self.create_paid_article_item('article03', self.now, 'purchase_pending'),
+            # 購入が未完了のまま期限を過ぎた
+            self.create_paid_article_item('article04', expired, 'purchase_pending'),
+            # 購入が完了済
+            dict(self.create_paid_article_item('article05', self.now, 'purchase_completed'), status='done')
+        ])
+        TestsUtil.create_table(self.dynamodb, os.environ['PAID_STATUS_TABLE_NAME'], [
+            {'article_id': article_id, 'user_id': 'purchase_user', 'status': 'doing', 'created_at': self.now}
+            for article_id in ['article01', 'article02', 'article03', 'article04']
+        ])
+        TestsUtil.create_table(self.dynamodb, os.environ['NOTIFICATION_TABLE_NAME'], [])
+        TestsUtil.create_table(self.dynamodb, os.environ['UNREAD_NOTIFICATION_MANAGER_TABLE_NAME'], [])
+
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_TABLE_NAME'], [
+            # relay が完了している
+            self.create_token_send_item(1, stale, 'relay_completed'),
+            # relay が実行されなかった
+            self.create_token_send_item(2, stale, 'relay_failed'),
+            # relay が未完了
+            self.create_token_send_item(3, stale, 'relay_pending'),
+            # relay が未完了のまま期限を過ぎた
+            self.create_token_send_item(4, expired, 'relay_pending'),
+            # relay が送信されないまま期限を過ぎた
+            self.create_token_send_item(5, expired, None),
+            # 作成から間もない
+            self.create_token_send_item(6, self.now, 'relay_completed')
+        ])
+        TestsUtil.create_table(self.dynamodb, os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'], [
+            {'user_id': 'send_user', 'target_date': '2018-03-04', 'send_value': Decimal(600)}
+        ])
+
+    def tearDown(self):
+        TestsUtil.delete_all_tables(self.dynamodb)
+
+    @staticmethod
+    def create_tip_item(sort_key, created_at, transaction):
+        return {
+            'user_id': 'tip_user',
+            'sort_key': sort_key,
+            'transaction': transaction,
+            'burn_transaction': None,
+            'burn_signed_transaction': 'burn_signed_transaction_{0}'.format(sort_key),
+            'burn_uncompleted': 1,
+            'uncompleted': 1,
+            'created_at': created_at
+        }
+
+    @staticmethod
+    def create_paid_article_item(article_id, created_at, purchase_transaction):
+        return {
+            'article_id': article_id,
+            'user_id': 'purchase_user',
+            'article_user_id': 'author_user',
+            'article_title': '{0} title'.format(article_id),
+            'price': 100 * (10 ** 18),
+            'purchase_transaction': purchase_transaction,
+            'burn_signed_transaction': 'burn_signed_transaction_{0}'.format(article_id),
+            'sort_key': 1520150552000003,
+            'status': 'doing',
+            'created_at': created_at
+        }
+
+    @staticmethod
+    def create_token_send_item(sort_key, created_at, relay_transaction_hash):
+        item = {
+            'user_id': 'send_user',
+            'sort_key': sort_key,
+            'send_value': Decimal(100),
+            'send_status': 'doing',
+            'uncompleted': 1,
+            'created_at': created_at,
+            'target_date': '2018-03-04'
+        }
+        if relay_transaction_hash is not None:
+            item['relay_transaction_hash'] = relay_transaction_hash
+        return item
+
+    @staticmethod
+    def is_transaction_receipt_completed(transaction):
+        if transaction.endswith('_failed'):
+            raise ReceiptError('Receipt exists, but Not exists mined logs.')
+        return transaction.endswith('_completed')
+
+    @staticmethod
+    def send_raw_transaction(raw_transaction):
+        return raw_transaction.replace('burn_signed_transaction', 'burn_transaction')
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok(self):
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = self.send_raw_transaction
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            # 同一のトランザクションの receipt は 1 度のみ取得し、作成から間もない出金の receipt は取得しない
+            self.assertEqual(sorted([c[0][0] for c in mock_receipt_completed.call_args_list]), [
+                'purchase_completed', 'purchase_failed', 'purchase_pending',
+                'relay_completed', 'relay_failed', 'relay_pending',
+                'tip_completed', 'tip_failed', 'tip_pending'
+            ])
+            # 完了した投げ銭と購入のバーン処理のみを行う
+            self.assertEqual(sorted([c[0][0] for c in mock_send_raw_transaction.call_args_list]),
+                             ['burn_signed_transaction_1', 'burn_signed_transaction_article01'])
+
+        self.assertEqual(sorted(result['tips'], key=lambda x: x['sort_key']), [
+            {'user_id': 'tip_user', 'sort_key': 1, 'status': 'done'},
+            {'user_id': 'tip_user', 'sort_key': 2, 'status': 'fail'},
+            {'user_id': 'tip_user', 'sort_key': 4, 'status': 'fail'}
+        ])
+        self.assertEqual(sorted(result['paid_articles'], key=lambda x: x['article_id']), [
+            {'article_id': 'article01', 'sort_key': 1520150552000003, 'status': 'done'},
+            {'article_id': 'article02', 'sort_key': 1520150552000003, 'status': 'fail'},
+            {'article_id': 'article04', 'sort_key': 1520150552000003, 'status': 'fail'}
+        ])
+        self.assertEqual(sorted(result['token_sends'], key=lambda x: x['sort_key']), [
+            {'user_id': 'send_user', 'sort_key': 1, 'status': 'done'},
+            {'user_id': 'send_user', 'sort_key': 2, 'status': 'fail'},
+            {'user_id': 'send_user', 'sort_key': 4, 'status': 'fail'},
+            {'user_id': 'send_user', 'sort_key': 5, 'status': 'fail'}
+        ])
+
+        # tip
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        tips = {item['sort_key']: item for item in tip_table.scan()['Items']}
+        self.assertEqual({k: v['burn_transaction'] for k, v in tips.items()},
+                         {1: 'burn_transaction_1', 2: None, 3: None, 4: None, 5: 'burn_transaction_hash'})
+        self.assertEqual(sorted([k for k, v in tips.items() if 'burn_uncompleted' in v]), [3])
+        self.assertEqual(sorted([k for k, v in tips.items() if 'burn_signed_transaction' in v]), [3])
+        # 投げ銭の完了（uncompleted）は更新しない
+        self.assertEqual(sorted([k for k, v in tips.items() if 'uncompleted' in v]), [1, 2, 3, 4, 5])
+
+        # paid_articles, paid_status
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        paid_articles = {item['article_id']: item for item in paid_articles_table.scan()['Items']}
+        self.assertEqual({k: v['status'] for k, v in paid_articles.items()}, {
+            'article01': 'done', 'article02': 'fail', 'article03': 'doing', 'article04': 'fail', 'article05': 'done'
+        })
+        self.assertEqual(paid_articles['article01']['burn_transaction'], 'burn_transaction_article01')
+        self.assertNotIn('burn_signed_transaction', paid_articles['article01'])
+        self.assertNotIn('burn_transaction', paid_articles['article02'])
+        paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
+        self.assertEqual({item['article_id']: item['status'] for item in paid_status_table.scan()['Items']}, {
+            'article01': 'done', 'article02': 'fail', 'article03': 'doing', 'article04': 'fail'
+        })
+
+        # 購入が完了した場合は購入者と著者へ、失敗した場合は購入者へ通知を行う
+        notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
+        notifications = notification_table.scan()['Items']
+        self.assertEqual(sorted([(n['user_id'], n['article_id'], n['type']) for n in notifications]), [
+            ('author_user', 'article01', settings.ARTICLE_PURCHASED_TYPE),
+            ('purchase_user', 'article01', settings.ARTICLE_PURCHASE_TYPE),
+            ('purchase_user', 'article02', settings.ARTICLE_PURCHASE_ERROR_TYPE),
+            ('purchase_user', 'article04', settings.ARTICLE_PURCHASE_ERROR_TYPE)
+        ])
+        unread_notification_manager_table = self.dynamodb.Table(os.environ['UNREAD_NOTIFICATION_MANAGER_TABLE_NAME'])
+        self.assertEqual(sorted([item['user_id'] for item in unread_notification_manager_table.scan()['Items']]),
+                         ['author_user', 'purchase_user'])
+
+        # token_send
+        token_send_table = self.dynamodb.Table(os.environ['TOKEN_SEND_TABLE_NAME'])
+        token_sends = {item['sort_key']: item for item in token_send_table.scan()['Items']}
+        self.assertEqual({k: v['send_status'] for k, v in token_sends.items()},
+                         {1: 'done', 2: 'fail', 3: 'doing', 4: 'fail', 5: 'fail', 6: 'doing'})
+        self.assertEqual(sorted([k for k, v in token_sends.items() if 'uncompleted' in v]), [3, 6])
+        # fail となった出金は日次の合計額から差し引かれる
+        token_send_daily_total_table = self.dynamodb.Table(os.environ['TOKEN_SEND_DAILY_TOTAL_TABLE_NAME'])
+        daily_total = token_send_daily_total_table.get_item(Key={'user_id': 'send_user', 'target_date': '2018-03-04'})
+        self.assertEqual(daily_total['Item']['send_value'], 300)
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok_rerun(self):
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = self.send_raw_transaction
+            TransactionStatusReconciler(self.dynamodb).run()
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            # 確定済のものは再度更新せず、バーン処理も重複して行わない
+            self.assertEqual(result, {'tips': [], 'paid_articles': [], 'token_sends': []})
+            self.assertEqual(mock_send_raw_transaction.call_count, 2)
+
+        notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
+        self.assertEqual(len(notification_table.scan()['Items']), 4)
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok_with_receipt_error(self):
+        # receipt の取得に失敗したものは更新せず、他の確認を続ける
+        def is_transaction_receipt_completed(transaction):
+            if transaction in ['tip_completed', 'purchase_completed', 'relay_completed']:
+                raise Exception('connection error')
+            return self.is_transaction_receipt_completed(transaction)
+
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = is_transaction_receipt_completed
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            self.assertEqual(mock_send_raw_transaction.call_count, 0)
+
+        self.assertEqual(sorted([r['sort_key'] for r in result['tips']]), [2, 4])
+        self.assertEqual(sorted([r['article_id'] for r in result['paid_articles']]), ['article02', 'article04'])
+        self.assertEqual(sorted([r['sort_key'] for r in result['token_sends']]), [2, 4, 5])
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok_with_burn_error(self):
+        # バーンのトランザクションの発行に失敗した場合も、購入の完了と通知は行い、バーン処理は次回以降の実行で再実施する
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = Exception('send error')
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+        self.assertEqual(sorted([r['sort_key'] for r in result['tips']]), [2, 4])
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        tip = tip_table.get_item(Key={'user_id': 'tip_user', 'sort_key': 1})['Item']
+        self.assertEqual(tip['burn_uncompleted'], 1)
+        self.assertNotIn('burn_sending_at', tip)
+
+        self.assertEqual(sorted([r['article_id'] for r in result['paid_articles']]), ['article02', 'article04'])
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        paid_article = paid_articles_table.get_item(Key={'article_id': 'article01', 'sort_key': 1520150552000003})['Item']
+        self.assertEqual(paid_article['status'], 'done')
+        self.assertEqual(paid_article['uncompleted'], 1)
+        self.assertEqual(paid_article['burn_uncompleted'], 1)
+        self.assertNotIn('notification_uncompleted', paid_article)
+        self.assertNotIn('burn_transaction', paid_article)
+
+        notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
+        self.assertEqual(len(notification_table.scan()['Items']), 4)
+
+        # 次回の実行で未完了のバーン処理のみを再実施する
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = self.send_raw_transaction
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            self.assertEqual(sorted([c[0][0] for c in mock_send_raw_transaction.call_args_list]),
+                             ['burn_signed_transaction_1', 'burn_signed_transaction_article01'])
+
+        self.assertEqual(result['paid_articles'], [
+            {'article_id': 'article01', 'sort_key': 1520150552000003, 'status': 'done'}
+        ])
+        paid_article = paid_articles_table.get_item(Key={'article_id': 'article01', 'sort_key': 1520150552000003})['Item']
+        self.assertEqual(paid_article['burn_transaction'], 'burn_transaction_article01')
+        self.assertNotIn('uncompleted', paid_article)
+        self.assertNotIn('burn_uncompleted', paid_article)
+        self.assertEqual(len(notification_table.scan()['Items']), 4)
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok_with_uncompleted_paid_article(self):
+        # 状態の確定後に異常終了した購入は、receipt を再取得せずに未完了の処理を行う
+        paid_articles_table = self.dynamodb.Table(os.environ['PAID_ARTICLES_TABLE_NAME'])
+        paid_articles_table.put_item(Item=dict(
+            self.create_paid_article_item('article06', self.now, 'purchase_unknown'),
+            status='done', uncompleted=1, notification_uncompleted=1, burn_uncompleted=1
+        ))
+        paid_status_table = self.dynamodb.Table(os.environ['PAID_STATUS_TABLE_NAME'])
+        paid_status_table.put_item(
+            Item={'article_id': 'article06', 'user_id': 'purchase_user', 'status': 'doing', 'created_at': self.now})
+
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = self.send_raw_transaction
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            self.assertNotIn('purchase_unknown', [c[0][0] for c in mock_receipt_completed.call_args_list])
+
+        self.assertIn({'article_id': 'article06', 'sort_key': 1520150552000003, 'status': 'done'},
+                      result['paid_articles'])
+        paid_article = paid_articles_table.get_item(Key={'article_id': 'article06', 'sort_key': 1520150552000003})['Item']
+        self.assertEqual(paid_article['burn_transaction'], 'burn_transaction_article06')
+        self.assertNotIn('uncompleted', paid_article)
+        self.assertNotIn('notification_uncompleted', paid_article)
+        self.assertEqual(paid_status_table.get_item(Key={'article_id': 'article06', 'user_id': 'purchase_user'})[
+            'Item']['status'], 'done')
+        notification_table = self.dynamodb.Table(os.environ['NOTIFICATION_TABLE_NAME'])
+        self.assertEqual(
+            sorted([(n['user_id'], n['type']) for n in notification_table.scan()['Items'] if n['article_id'] == 'article06']),
+            [('author_user', settings.ARTICLE_PURCHASED_TYPE), ('purchase_user', settings.ARTICLE_PURCHASE_TYPE)]
+        )
+
+    @patch('time.time', MagicMock(return_value=now))
+    def test_run_ok_with_burn_sending(self):
+        # 他の実行がバーンのトランザクションを送信中の場合は送信しない
+        def send_raw_transaction(raw_transaction):
+            if raw_transaction == '0xabcdef':
+                raise SendTransactionError({'message': 'already known'})
+            return self.send_raw_transaction(raw_transaction)
+
+        tip_table = self.dynamodb.Table(os.environ['TIP_TABLE_NAME'])
+        tip_table.update_item(
+            Key={'user_id': 'tip_user', 'sort_key': 1},
+            UpdateExpression='SET burn_sending_at = :sending_at, burn_signed_transaction = :burn_signed_transaction',
+            ExpressionAttributeValues={':sending_at': self.now, ':burn_signed_transaction': '0xabcdef'}
+        )
+
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = send_raw_transaction
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+            self.assertNotIn('0xabcdef', [c[0][0] for c in mock_send_raw_transaction.call_args_list])
+        self.assertNotIn(1, [r['sort_key'] for r in result['tips']])
+        self.assertEqual(tip_table.get_item(Key={'user_id': 'tip_user', 'sort_key': 1})['Item']['burn_uncompleted'], 1)
+
+        # 送信中のまま期限を過ぎた場合は再送信し、送信済として拒否された場合も完了とする
+        lease_expired = self.now - settings.TRANSACTION_STATUS_RECONCILE_BURN_LEASE_SECONDS - 1
+        tip_table.update_item(
+            Key={'user_id': 'tip_user', 'sort_key': 1},
+            UpdateExpression='SET burn_sending_at = :sending_at',
+            ExpressionAttributeValues={':sending_at': lease_expired}
+        )
+        with patch('private_chain_util.PrivateChainUtil.is_transaction_receipt_completed') as mock_receipt_completed, \
+                patch('private_chain_util.PrivateChainUtil.send_raw_transaction') as mock_send_raw_transaction:
+            mock_receipt_completed.side_effect = self.is_transaction_receipt_completed
+            mock_send_raw_transaction.side_effect = send_raw_transaction
+            result = TransactionStatusReconciler(self.dynamodb).run()
+
+        self.assertEqual(result['tips'], [{'user_id': 'tip_user', 'sort_key': 1, 'status': 'done'}])
+        tip = tip_table.get_item(Key={'user_id': 'tip_user', 'sort_key': 1})['Item']
+        self.assertEqual(tip['burn_transaction'], Web3.sha3(hexstr='0xabcdef').hex())
+        self.assertNotIn('burn_uncompleted', tip)
+        self.assertNotIn('burn_sending_at', tip)
@@ -4,18 +4,32 @@ import json
 from unittest import TestCase
 from unittest.mock import MagicMock
 from users_wallet_address_show import UsersWalletAddressShow
+from tests_util import TestsUtil
 
 
 class TestUsersWalletAddressShow(TestCase):
     cognito = boto3.client('cognito-idp')
+    dynamodb = TestsUtil.get_dynamodb_client()
     test_user_id = 'test-user'
 
     @classmethod
     def setUpClass(cls):
         os.environ['COGNITO_USER_POOL_ID'] = 'xxxxxxx'
+        TestsUtil.set_all_tables_name_to_env()
+        TestsUtil.delete_all_tables(cls.dynamodb)
+        TestsUtil.create_table(cls.dynamodb, os.environ['USER_CONFIGURATIONS_TABLE_NAME'], [
+            {
+                'user_id': 'test-wallet-user',
+                'private_eth_address': '0x1234567890123456789012345678901234567890'
+            }
+        ])
+
+    @classmethod
+    def tearDownClass(cls):
+        TestsUtil.delete_all_tables(cls.dynamodb)
 
     def assert_bad_request(self, params):
-        function = UsersWalletAddressShow(params, {}, cognito=self.cognito)
+        function = UsersWalletAddressShow(params, {}, dynamodb=self.dynamodb, cognito=self.cognito)
         response = function.main()
 
         self.assertEqual(response['statusCode'], 400)
@@ -40,11 +54,25 @@ class TestUsersWalletAddressShow(TestCase):
             }
         }
 
-        response = UsersWalletAddressShow(params, {}, cognito=self.cognito).main()
+        response = UsersWalletAddressShow(params, {}, dynamodb=self.dynamodb, cognito=self.cognito).main()
 
         self.assertEqual(response['statusCode'], 200)
         self.assertEqual(json.loads(response['body']), {'wallet_address': test_address})
 
+    def test_main_ok_exists_configuration_data(self):
+        self.cognito.admin_get_user = MagicMock()
+        params = {
+            'pathParameters': {
+                'user_id': 'test-wallet-user'
+            }
+        }
+
+        response = UsersWalletAddressShow(params, {}, dynamodb=self.dynamodb, cognito=self.cognito).main()
+
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(json.loads(response['body']), {'wallet_address': '0x1234567890123456789012345678901234567890'})
+        self.cognito.admin_get_user.assert_not_called()
+
     def test_validation_with_no_user_id_param(self):
         params = {
             'pathParameters': {
@@ -98,16 +98,20 @@ class TestsUtil:
             {'env_name': 'TAG_TABLE_NAME', 'table_name': 'Tag'},
             {'env_name': 'TIP_TABLE_NAME', 'table_name': 'Tip'},
             {'env_name': 'EXTERNAL_PROVIDER_USERS_TABLE_NAME', 'table_name': 'ExternalProviderUsers'},
+            {'env_name': 'VERIFIED_USER_ATTRIBUTES_TABLE_NAME', 'table_name': 'VerifiedUserAttributes'},
             {'env_name': 'USER_FRAUD_TABLE_NAME', 'table_name': 'UserFraud'},
             {'env_name': 'SCREENED_ARTICLE_TABLE_NAME', 'table_name': 'ScreenedArticle'},
             {'env_name': 'TOKEN_DISTRIBUTION_TABLE_NAME', 'table_name': 'TokenDistribution'},
+            {'env_name': 'TOKEN_DISTRIBUTION_TOTAL_TABLE_NAME', 'table_name': 'TokenDistributionTotal'},
             {'env_name': 'USER_FIRST_EXPERIENCE_TABLE_NAME', 'table_name': 'UserFirstExperience'},
             {'env_name': 'NONCE_TABLE_NAME', 'table_name': 'Nonce'},
             {'env_name': 'PAID_ARTICLES_TABLE_NAME', 'table_name': 'PaidArticles'},
             {'env_name': 'PAID_STATUS_TABLE_NAME', 'table_name': 'PaidStatus'},
             {'env_name': 'TOKEN_SEND_TABLE_NAME', 'table_name': 'TokenSend'},
+            {'env_name': 'TOKEN_SEND_DAILY_TOTAL_TABLE_NAME', 'table_name': 'TokenSendDailyTotal'},
             {'env_name': 'SUCCEEDED_TIP_TABLE_NAME', 'table_name': 'SucceededTip'},
-            {'env_name': 'USER_CONFIGURATIONS_TABLE_NAME', 'table_name': 'UserConfigurations'}
+            {'env_name': 'USER_CONFIGURATIONS_TABLE_NAME', 'table_name': 'UserConfigurations'},
+            {'env_name': 'TOKEN_HISTORY_EXPORT_JOB_TABLE_NAME', 'table_name': 'TokenHistoryExportJob'}
         ]
         if os.environ.get('IS_DYNAMODB_ENDPOINT_OF_AWS') is not None:
             for table in cls.all_tables: